@@ -1,17 +1,27 @@
 import os
-import json
 from typing import Optional, List, Tuple
 from twilio.rest import Client as TwilioClient
 
-from translatron.translator import AmazonTranslator
 from translatron.text import TranslatronText
 from translatron.actions import StoreToDynamoDB, SendTranslatedSMS
 from translatron.record import TextRecord
+from translatron.media import MediaProcessor, S3MediaStore
+from translatron.outbox import Outbox, OutboxWorker
+from translatron.logs import LogConfig, configure_logging
+from translatron.config import ConfigLoader
+from translatron.directory import DynamoDBUserDirectory
+from translatron.storage import RecordEncoder
+from translatron.usage import UsageMetrics
 
 
-import logging
-logging.getLogger('translatron').setLevel(logging.INFO)
-logging.basicConfig(level=logging.INFO)
+# LOG_FORMAT=json gives one structured line per message; LOG_SAMPLE_RATE is
+# the fraction of those lines that include the (redacted) record
+structured_logs = os.getenv("LOG_FORMAT", "text") == "json"
+configure_logging(structured=structured_logs)
+log_config = (
+    LogConfig(sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0")))
+    if structured_logs else None
+)
 
 class MySendTranslatedSMS(SendTranslatedSMS):
     def _testing_override_msg_pairs(
@@ -21,18 +31,101 @@ class MySendTranslatedSMS(SendTranslatedSMS):
             return [(os.getenv("TEST_PHONE"), "fa")]
 
 
-table_name = os.environ["DYNAMODB_TABLE"]
-store_dynamodb_action = StoreToDynamoDB(table_name)
+# configuration comes from TRANSLATRON_CONFIG_URI (S3, SSM or a file) or,
+# by default, from USER_INFO/TARGET_LANGUAGES/DYNAMODB_TABLE/...
+config_loader = ConfigLoader.from_env(
+    refresh_interval=float(os.getenv("CONFIG_REFRESH_SECONDS", "300"))
+)
+config = config_loader.get()
+
+# STORAGE_CODEC (gzip, zstd or none) stores records in the compact encoding,
+# expiring after RECORD_TTL_DAYS if set
+storage_codec = os.getenv("STORAGE_CODEC")
+record_ttl_days = os.getenv("RECORD_TTL_DAYS")
+encoder = (
+    RecordEncoder(
+        codec=None if storage_codec == "none" else storage_codec,
+        ttl=float(record_ttl_days) * 86400 if record_ttl_days else None,
+    )
+    if storage_codec else None
+)
+# STORE_USAGE=1 stores each message's usage with its record (for billing per
+# group); USAGE_METRICS=1 writes usage per messaging number as CloudWatch EMF
+store_usage = os.getenv("STORE_USAGE", "0") == "1"
+usage_metrics = (
+    UsageMetrics() if os.getenv("USAGE_METRICS", "0") == "1" else None
+)
+store_dynamodb_action = StoreToDynamoDB(
+    config.dynamodb_table, encoder=encoder, store_usage=store_usage
+)
 
-user_info = json.loads(os.getenv('USER_INFO'))
 account_sid = os.environ['TWILIO_ACCOUNT_SID']
 auth_token = os.environ['TWILIO_AUTH_TOKEN']
 twilio_client = TwilioClient(account_sid, auth_token)
-send_sms_action = MySendTranslatedSMS(user_info, twilio_client)
+# with USER_TABLE, routing is read from DynamoDB and can be edited at
+# runtime; USER_INFO is then not needed
+user_table = config.user_table
+user_directory = (
+    DynamoDBUserDirectory(user_table) if user_table
+    else config_loader.routing()
+)
+
+
+def target_languages(config):
+    # without TARGET_LANGUAGES, a directory's users determine the languages
+    if user_table and not config.languages:
+        return user_directory.routing.all_languages
+    return config.languages
+
+send_sms_action = MySendTranslatedSMS(user_directory, twilio_client)
 
-target_languages = os.getenv("TARGET_LANGUAGES").split(",")
-lambda_handler = TranslatronText(
-    translator=AmazonTranslator(),
-    actions=[store_dynamodb_action, send_sms_action],
-    languages=target_languages,
+media_processor = (
+    MediaProcessor(store=S3MediaStore(config.media_bucket))
+    if config.media_bucket else None
 )
+
+# with an outbox, the webhook only enqueues deliveries; drain_handler (run
+# on a schedule) performs them
+outbox = Outbox(config.outbox_table) if config.outbox_table else None
+
+# the stored usage only covers the actions run before the store
+actions = (
+    [send_sms_action, store_dynamodb_action] if store_usage
+    else [store_dynamodb_action, send_sms_action]
+)
+translator_name = config.translator
+text_handler = TranslatronText(
+    translator=config.make_translator(),
+    actions=actions,
+    languages=target_languages(config),
+    required_languages=config.required_languages,
+    media_processor=media_processor,
+    outbox=outbox,
+    log_config=log_config,
+    usage_metrics=usage_metrics,
+)
+drain_handler = OutboxWorker(outbox, actions) if outbox else None
+
+
+# the loader warns about changed tables and buckets, which need a restart
+def apply_config(config):
+    global translator_name
+    if config.translator != translator_name:
+        text_handler.translator = config.make_translator()
+        translator_name = config.translator
+    if not user_table:
+        send_sms_action.user_info = config_loader.routing()
+    text_handler.languages = target_languages(config)
+    text_handler.required_languages = config.required_languages
+
+
+config_loader.on_change = apply_config
+if user_table:
+    user_directory.on_change = (
+        lambda routing: apply_config(config_loader.get())
+    )
+
+
+def lambda_handler(event, context):
+    config_loader.get()  # picks up configuration changes when due
+    return text_handler(event, context)
@@ -1,13 +1,38 @@
+import os
 import json
+
+from translatron.translator import AmazonTranslator
+from translatron.transcribe import AmazonTranscriber
+from translatron.dispatch import invoke_async
+from translatron.voice import RECORDING_EVENT, TranslatronVoice
+from translatron.actions import StoreToDynamoDB, SendTranslatedSMS
+from twilio.rest import Client as TwilioClient
+
 import logging
+logging.getLogger('translatron').setLevel(logging.INFO)
+logging.basicConfig(level=logging.INFO)
+
+table_name = os.environ["DYNAMODB_TABLE"]
+store_dynamodb_action = StoreToDynamoDB(table_name)
+actions = [store_dynamodb_action]
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# without user info and Twilio credentials, voice mails are only stored
+user_info = json.loads(os.getenv('USER_INFO') or '{}')
+account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+if user_info and account_sid and auth_token:
+    twilio_client = TwilioClient(account_sid, auth_token)
+    actions.append(SendTranslatedSMS(user_info, twilio_client))
 
-def lambda_handler(event, context):
-    logger.info("Voice handler invoked")
-    logger.info(event)
-    return {
-        "statusCode": 200,
-        "body": json.dumps({"message": "Voice placeholder OK"})
-    }
+target_languages = os.getenv("TARGET_LANGUAGES").split(",")
+lambda_handler = TranslatronVoice(
+    translator=AmazonTranslator(),
+    actions=actions,
+    languages=target_languages,
+    transcriber=AmazonTranscriber(os.environ["VOICEMAIL_BUCKET"]),
+    # transcribe in an asynchronous invocation of this function, so the
+    # recording callback answers Twilio at once
+    dispatch=invoke_async(
+        os.environ["AWS_LAMBDA_FUNCTION_NAME"], RECORDING_EVENT
+    ),
+)
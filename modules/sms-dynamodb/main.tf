@@ -1,3 +1,9 @@
+locals {
+  index_non_key_attributes = (
+    var.index_projection_type == "INCLUDE" ? var.index_attributes : null
+  )
+}
+
 # DynamoDB table
 resource "aws_dynamodb_table" "this" {
   name         = var.table_name
@@ -22,20 +28,36 @@ resource "aws_dynamodb_table" "this" {
     type = "S"
   }
 
+  # The indexes are used to find messages. With the compact encoder, the
+  # full record (including the payload) can be read from the table, so
+  # INCLUDE avoids copying each message into all three indexes. Changing
+  # the projection recreates the indexes, so ALL stays the default.
   global_secondary_index {
-    name            = "TimestampIndex"
-    hash_key        = "timestamp"
-    projection_type = "ALL"
+    name               = "TimestampIndex"
+    hash_key           = "timestamp"
+    projection_type    = var.index_projection_type
+    non_key_attributes = local.index_non_key_attributes
   }
   global_secondary_index {
-    name            = "MessageIdIndex"
-    hash_key        = "message_id"
-    projection_type = "ALL"
+    name               = "MessageIdIndex"
+    hash_key           = "message_id"
+    projection_type    = var.index_projection_type
+    non_key_attributes = local.index_non_key_attributes
   }
   global_secondary_index {
-    name            = "SenderIndex"
-    hash_key        = "sender"
-    projection_type = "ALL"
+    name               = "SenderIndex"
+    hash_key           = "sender"
+    projection_type    = var.index_projection_type
+    non_key_attributes = local.index_non_key_attributes
+  }
+
+  # set by translatron.storage.RecordEncoder when it is given a ttl
+  dynamic "ttl" {
+    for_each = var.ttl_attribute != null ? [var.ttl_attribute] : []
+    content {
+      attribute_name = ttl.value
+      enabled        = true
+    }
   }
 
   point_in_time_recovery { enabled = true }
@@ -28,3 +28,21 @@ variable "backup_retention_days" {
   type    = number
   default = 30
 }
+
+variable "index_projection_type" {
+  description = "Projection of the secondary indexes: KEYS_ONLY, INCLUDE or ALL. INCLUDE suits the compact record encoding; changing it recreates the indexes."
+  type        = string
+  default     = "ALL"
+}
+
+variable "index_attributes" {
+  description = "Non-key attributes projected into the indexes with INCLUDE."
+  type        = list(string)
+  default     = ["recipient", "original_lang"]
+}
+
+variable "ttl_attribute" {
+  description = "Attribute holding each item's expiry time (epoch seconds), e.g. expires_at, or null to disable TTL."
+  type        = string
+  default     = null
+}
@@ -138,6 +138,24 @@ resource "aws_backup_selection" "dynamo_backup_selection" {
 }
 
 
+locals {
+  sms_handler_environment = merge(
+    {
+      DYNAMODB_TABLE      = aws_dynamodb_table.sms_messages.name
+      TRANSLATOR_PROVIDER = "amazon" # TODO make variable
+      TARGET_LANGUAGES    = "en,fa"  # TODO make variable (or get from user_info?)
+      # Additional environment variables as needed (e.g., translation API keys)
+      # temporary twilio testing
+      USER_INFO          = var.user_info
+      TEST_PHONE         = var.test_phone
+      TWILIO_ACCOUNT_SID = var.twilio_account_sid
+      TWILIO_AUTH_TOKEN  = var.twilio_auth_token
+      TWILIO_NUMBER      = var.twilio_phone_number
+    },
+    var.enable_outbox ? { OUTBOX_TABLE = aws_dynamodb_table.outbox[0].name } : {},
+  )
+}
+
 # Create the Lambda function for SMS processing
 resource "aws_lambda_function" "sms_handler" {
   function_name = "${var.project_name}-sms-handler"
@@ -153,18 +171,7 @@ resource "aws_lambda_function" "sms_handler" {
   timeout = 60
 
   environment {
-    variables = {
-      DYNAMODB_TABLE      = aws_dynamodb_table.sms_messages.name
-      TRANSLATOR_PROVIDER = "amazon" # TODO make variable
-      TARGET_LANGUAGES    = "en,fa"  # TODO make variable (or get from user_info?)
-      # Additional environment variables as needed (e.g., translation API keys)
-      # temporary twilio testing
-      USER_INFO          = var.user_info
-      TEST_PHONE         = var.test_phone
-      TWILIO_ACCOUNT_SID = var.twilio_account_sid
-      TWILIO_AUTH_TOKEN  = var.twilio_auth_token
-      TWILIO_NUMBER      = var.twilio_phone_number
-    }
+    variables = local.sms_handler_environment
   }
 }
 
@@ -190,3 +197,109 @@ resource "aws_cloudwatch_log_group" "sms_handler" {
   name              = "/aws/lambda/${aws_lambda_function.sms_handler.function_name}"
   retention_in_days = 30 # TODO: make this a variable
 }
+
+
+# Outbox of pending deliveries (see translatron.outbox): the webhook only
+# enqueues them, and a scheduled function drains the table
+resource "aws_dynamodb_table" "outbox" {
+  count        = var.enable_outbox ? 1 : 0
+  name         = "${var.project_name}-outbox"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "delivery_id"
+
+  attribute {
+    name = "delivery_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "status"
+    type = "S"
+  }
+
+  attribute {
+    name = "next_attempt_at"
+    type = "N"
+  }
+
+  global_secondary_index {
+    name            = "status-index"
+    hash_key        = "status"
+    range_key       = "next_attempt_at"
+    projection_type = "ALL"
+  }
+
+  # finished deliveries expire after the outbox's retention
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
+resource "aws_iam_role_policy" "sms_outbox_policy" {
+  count = var.enable_outbox ? 1 : 0
+  name  = "${var.project_name}-sms-outbox-policy"
+  role  = aws_iam_role.sms_lambda_role.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect = "Allow"
+      Action = [
+        "dynamodb:PutItem",
+        "dynamodb:GetItem",
+        "dynamodb:UpdateItem",
+        "dynamodb:Query",
+      ]
+      Resource = [
+        aws_dynamodb_table.outbox[0].arn,
+        "${aws_dynamodb_table.outbox[0].arn}/index/*",
+      ]
+    }]
+  })
+}
+
+resource "aws_lambda_function" "outbox_drain" {
+  count         = var.enable_outbox ? 1 : 0
+  function_name = "${var.project_name}-outbox-drain"
+  package_type  = "Image"
+  image_uri     = var.lambda_container_image_uri
+  role          = aws_iam_role.sms_lambda_role.arn
+
+  image_config {
+    command = [var.outbox_drain_handler]
+  }
+
+  # must stay below the worker's lease_seconds (300 by default)
+  timeout = 60
+
+  environment {
+    variables = local.sms_handler_environment
+  }
+}
+
+resource "aws_cloudwatch_event_rule" "outbox_drain" {
+  count               = var.enable_outbox ? 1 : 0
+  name                = "${var.project_name}-outbox-drain"
+  schedule_expression = var.outbox_drain_schedule
+}
+
+resource "aws_cloudwatch_event_target" "outbox_drain" {
+  count = var.enable_outbox ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.outbox_drain[0].name
+  arn   = aws_lambda_function.outbox_drain[0].arn
+}
+
+resource "aws_lambda_permission" "allow_outbox_drain_schedule" {
+  count         = var.enable_outbox ? 1 : 0
+  statement_id  = "AllowOutboxDrainSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.outbox_drain[0].function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.outbox_drain[0].arn
+}
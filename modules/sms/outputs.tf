@@ -15,3 +15,8 @@ output "sms_lambda_role_name" {
   description = "Name of the IAM role for the SMS Lambda"
   value       = aws_iam_role.sms_lambda_role.name
 }
+
+output "outbox_table" {
+  description = "Name of the outbox table, if enabled"
+  value       = var.enable_outbox ? aws_dynamodb_table.outbox[0].name : null
+}
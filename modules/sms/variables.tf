@@ -1,6 +1,7 @@
 variable "user_info" {
-  description = "The user information, JSON-endcoded"
+  description = "The user information, JSON-endcoded; may be empty when USER_TABLE is set"
   type        = string
+  default     = ""
 }
 
 variable "twilio_phone_number" {
@@ -48,3 +49,21 @@ variable "sms_handler_handler" {
   description = "The handler for the SMS Lambda function (e.g., sms_handler.lambda_handler)."
   type        = string
 }
+
+variable "enable_outbox" {
+  description = "Enqueue deliveries in an outbox table, drained on a schedule, instead of sending them in the webhook."
+  type        = bool
+  default     = false
+}
+
+variable "outbox_drain_handler" {
+  description = "The handler draining the outbox (e.g., sms_handler_2.drain_handler)."
+  type        = string
+  default     = "sms_handler_2.drain_handler"
+}
+
+variable "outbox_drain_schedule" {
+  description = "EventBridge schedule expression for draining the outbox."
+  type        = string
+  default     = "rate(1 minute)"
+}
@@ -18,6 +18,55 @@ resource "aws_iam_policy_attachment" "voice_lambda_policy_attach" {
   policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
 }
 
+# Permissions for the voice mail pipeline: store recordings and transcripts,
+# transcribe, translate, and store the resulting records
+resource "aws_iam_role_policy" "voice_pipeline_policy" {
+  name = "${var.project_name}-voice-pipeline-policy"
+  role = aws_iam_role.voice_lambda_role.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect   = "Allow"
+        Action   = ["s3:PutObject", "s3:GetObject"]
+        Resource = "${aws_s3_bucket.voicemail_bucket.arn}/*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "transcribe:StartTranscriptionJob",
+          "transcribe:GetTranscriptionJob",
+          "translate:TranslateText",
+          "comprehend:DetectDominantLanguage",
+        ]
+        Resource = "*"
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["dynamodb:PutItem"]
+        Resource = aws_dynamodb_table.voice_messages.arn
+      },
+    ]
+  })
+}
+
+# Recordings are transcribed in an asynchronous invocation of the handler
+# itself, so that the recording callback can answer Twilio at once
+resource "aws_iam_role_policy" "voice_dispatch_policy" {
+  name = "${var.project_name}-voice-dispatch-policy"
+  role = aws_iam_role.voice_lambda_role.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect   = "Allow"
+      Action   = ["lambda:InvokeFunction"]
+      Resource = aws_lambda_function.voice_handler.arn
+    }]
+  })
+}
+
 # Create a DynamoDB table for Voice messages
 resource "aws_dynamodb_table" "voice_messages" {
   name         = var.dynamodb_voice_table_name
@@ -67,11 +116,18 @@ resource "aws_lambda_function" "voice_handler" {
     command = [var.voice_handler_handler]
   }
 
+  # in the asynchronous invocation, transcription jobs are polled until
+  # they complete
+  timeout = 300
+
   environment {
     variables = {
-      DYNAMODB_TABLE   = aws_dynamodb_table.voice_messages.name
-      VOICEMAIL_BUCKET = aws_s3_bucket.voicemail_bucket.bucket
-      # Additional environment variables as needed (e.g., transcription API keys)
+      DYNAMODB_TABLE     = aws_dynamodb_table.voice_messages.name
+      VOICEMAIL_BUCKET   = aws_s3_bucket.voicemail_bucket.bucket
+      TARGET_LANGUAGES   = var.target_languages
+      USER_INFO          = var.user_info
+      TWILIO_ACCOUNT_SID = var.twilio_account_sid
+      TWILIO_AUTH_TOKEN  = var.twilio_auth_token
     }
   }
 }
@@ -27,3 +27,27 @@ variable "voice_handler_handler" {
   description = "The handler for the Voice Lambda function (e.g., voice_handler.lambda_handler)."
   type        = string
 }
+
+variable "target_languages" {
+  description = "Comma-separated list of languages to translate voice mails into."
+  type        = string
+  default     = "en,fa"
+}
+
+variable "user_info" {
+  description = "The user information, JSON-endcoded. Without it (or the Twilio credentials), voice mails are only stored."
+  type        = string
+  default     = ""
+}
+
+variable "twilio_account_sid" {
+  description = "The Twilio account SID."
+  type        = string
+  default     = ""
+}
+
+variable "twilio_auth_token" {
+  description = "The Twilio auth token, also used to validate webhook signatures."
+  type        = string
+  default     = ""
+}
@@ -1,9 +1,21 @@
 # src/translatron/actions.py
 import boto3
-from typing import Optional, Dict, List, Tuple
+from typing import Any, Optional, Dict, List, Tuple, Union
+from xml.sax.saxutils import escape
 from twilio.rest import Client as TwilioClient
 
+from .directory import UserDirectory, as_directory
 from .record import TextRecord
+from .storage import RecordEncoder
+from .usage import current_usage, record_sms, record_voice_call
+from .sms import GSM7, UCS2, SegmentPolicy, SMSSendResult, count_segments
+from .speech import (
+    S3AudioStore,
+    Synthesizer,
+    UploadedAudioKeys,
+    VoiceSendResult,
+    audio_cache_key,
+)
 
 import logging
 
@@ -11,9 +23,25 @@ logger = logging.getLogger(__name__)
 
 
 class ActionBase:
+    # whether follow-up records (see :meth:`.TranslatronText.follow_up`),
+    # which add the deferred languages, are passed to the action
+    delivers_follow_ups = True
+
     def __call__(self, record: TextRecord) -> None:
         raise NotImplementedError("Subclasses should implement this method.")
 
+    def deliveries(self, record: TextRecord) -> List[Dict[str, str]]:
+        """Split the work for ``record`` into independent deliveries.
+
+        Each delivery can be performed (and retried) on its own with
+        :meth:`deliver`. By default the whole action is a single delivery.
+        """
+        return [{}]
+
+    def deliver(self, record: TextRecord, delivery: Dict[str, str]) -> Any:
+        """Perform one delivery from :meth:`deliveries`."""
+        return self(record)
+
 
 class NullAction(ActionBase):
     def __call__(self, record: TextRecord) -> None:
@@ -21,24 +49,73 @@ class NullAction(ActionBase):
         A no-op action that does nothing with the record.
         Useful for testing or as a placeholder.
         """
-        logger.debug(f"NullAction called with record: {record}")
+        logger.debug("NullAction called with record: %s", record)
         # No operation performed, just logging the call
 
 
 class StoreToDynamoDB(ActionBase):
-    def __init__(self, table_name: str):
+    # the record is stored once, before any follow-up; a Backfill can add
+    # the deferred translations to it
+    delivers_follow_ups = False
+
+    def __init__(
+        self,
+        table_name: str,
+        encoder: Optional[RecordEncoder] = None,
+        store_usage: bool = False,
+    ):
+        """
+        Parameters
+        ==========
+        table_name: str
+            Table to write the records to.
+        encoder: Optional[RecordEncoder]
+            If given, records are stored in its compact (optionally
+            compressed) form; by default as ``record.model_dump()``. Read
+            either form with :func:`.decode_item`.
+        store_usage: bool
+            Store the message's :class:`.Usage` so far in the record's
+            ``usage`` field, e.g. for billing per group. Only the actions
+            that ran before this one are included, so list it last.
+        """
         self.table_name = table_name
+        self.encoder = encoder
+        self.store_usage = store_usage
         self.table = boto3.resource("dynamodb").Table(table_name)
 
     def __call__(self, record: TextRecord) -> None:
-        logger.info(f"Storing record in {self.table_name}: {record}")
-        self.table.put_item(Item=record.model_dump())
+        logger.info(
+            "Storing message %s in %s", record.message_id, self.table_name
+        )
+        logger.debug("Stored record: %s", record)
+        accumulator = current_usage()
+        if accumulator is not None and self.store_usage:
+            usage = accumulator.snapshot()
+            usage.dynamodb_writes += 1  # the stored usage includes this write
+            record = record.model_copy(update={"usage": usage})
+        if self.encoder is not None:
+            item = self.encoder.encode(record)
+        else:
+            item = record.model_dump(
+                exclude={"usage"} if record.usage is None else None
+            )
+        self.table.put_item(Item=item)
+        # counted once the write has succeeded
+        if accumulator is not None:
+            accumulator.add_dynamodb_write()
+
 
+class SendTranslatedBase(ActionBase):
+    """Deliver each user the translation in their preferred language.
+
+    Subclasses implement :meth:`_send` for a specific medium.
+    """
+
+    medium = "message"
 
-class SendTranslatedSMS(ActionBase):
     def __init__(
         self,
-        user_info: Dict[str, Dict[str, Dict[str, str]]],
+        user_info: Union[Dict[str, Dict[str, Dict[str, str]]], UserDirectory],
         twilio_client: TwilioClient,
     ):
         """
@@ -58,17 +135,29 @@ class SendTranslatedSMS(ActionBase):
                 }
             where $MESSAGING_NUMBER is the Twilio number, $USER_NUMBER is
             the user's phone number, and $NAME and $LANG are the user's name
-            and preferred language.
+            and preferred language. A :class:`.UserDirectory` (e.g. a
+            :class:`.DynamoDBUserDirectory`) can be given instead.
+        twilio_client: TwilioClient
+            Client used to send the messages.
         """
         self.user_info = user_info
         self.twilio_client = twilio_client
 
+    @property
+    def user_info(self) -> Any:
+        return self._user_info
+
+    @user_info.setter
+    def user_info(self, user_info: Any) -> None:
+        self._user_info = user_info
+        self.directory = as_directory(user_info)
+
     def _action_on_unknown_sender(self, record: TextRecord) -> None:
         """
         Handle the case where the sender is not recognized.
         This could be logging, sending a notification, etc.
         """
-        logger.warning(f"Unknown sender: {record.sender}. Record: {record}")
+        logger.warning("Unknown sender: %s. Record: %s", record.sender, record)
 
     def _testing_override_msg_pairs(
         self, record: TextRecord
@@ -79,16 +168,21 @@ class SendTranslatedSMS(ActionBase):
         """
         return None
 
-    def __call__(self, record: TextRecord) -> None:
-        logger.info(f"Sending SMS with translated record: {record}")
+    def __call__(self, record: TextRecord) -> List[Any]:
+        logger.info("Sending %s for message %s", self.medium, record.message_id)
+        logger.debug("Translated record: %s", record)
+        return [
+            self.deliver(record, delivery)
+            for delivery in self.deliveries(record)
+        ]
 
-        if record.recipient not in self.user_info:
+    def deliveries(self, record: TextRecord) -> List[Dict[str, str]]:
+        """One delivery per user: ``{"to": ..., "lang": ..., "text": ...}``"""
+        if self.directory.members(record.recipient) is None:
             logger.error(
-                f"Unknown recipient messaging number: {record.recipient}"
+                "Unknown recipient messaging number: %s", record.recipient
             )
-            return
-
-        users = self.user_info[record.recipient]
+            return []
 
         # reorganize translation into easy-to-use dict
         translations = list(record.translations)
@@ -97,25 +191,172 @@ class SendTranslatedSMS(ActionBase):
         )
         translations_dict = {t["lang"]: t["text"] for t in translations}
 
-        if record.sender not in users:
+        msg_pairs = self.directory.targets(record.recipient, record.sender)
+        if msg_pairs is None:
             self._action_on_unknown_sender(record)
-            return
+            return []
 
-        targets = set(users) - {record.sender}
-        msg_pairs = [(target, users[target]["lang"]) for target in targets]
         msg_pairs = self._testing_override_msg_pairs(record) or msg_pairs
 
+        # deferred languages are delivered by the follow-up record only
+        deferred = set(record.deferred_languages)
+        msg_pairs = [
+            (send_to, lang)
+            for send_to, lang in msg_pairs
+            if (lang in deferred) == record.is_follow_up
+        ]
+
+        deliveries = []
         for send_to, lang in msg_pairs:
-            logger.info(f"sender={record.sender} {send_to=} {lang=}")
+            logger.debug(
+                "sender=%s send_to=%r lang=%r", record.sender, send_to, lang
+            )
             msg = translations_dict.get(lang, record.original_text)
             if lang not in translations_dict:
                 logger.warning(
-                    f"No translation available for language '{lang}', using "
-                    "original text"
+                    "No translation available for language '%s', using "
+                    "original text", lang
                 )
-            logger.info("About to send: %s", msg)
+            deliveries.append({"to": send_to, "lang": lang, "text": msg})
+
+        return deliveries
+
+    def deliver(self, record: TextRecord, delivery: Dict[str, str]) -> Any:
+        return self._send(
+            record, delivery["to"], delivery["lang"], delivery["text"]
+        )
+
+    def _send(
+        self, record: TextRecord, send_to: str, lang: str, msg: str
+    ) -> Any:
+        """Deliver ``msg`` to ``send_to``, returning a result record."""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+
+class SendTranslatedSMS(SendTranslatedBase):
+    medium = "SMS"
+
+    def __init__(
+        self,
+        user_info: Union[Dict[str, Dict[str, Dict[str, str]]], UserDirectory],
+        twilio_client: TwilioClient,
+        segment_policy: Optional[SegmentPolicy] = None,
+    ):
+        """
+        Parameters
+        ==========
+        user_info: dict[str, dict[str, dict[str, str]]]
+            Routing information; see :class:`SendTranslatedBase`.
+        twilio_client: TwilioClient
+            Client used to send the messages.
+        segment_policy: Optional[SegmentPolicy]
+            If given, used to pick the cheapest representation of each
+            outbound message (e.g., normalizing smart quotes so the message
+            can be sent as GSM-7). By default, messages are sent as-is.
+        """
+        super().__init__(user_info, twilio_client)
+        self.segment_policy = segment_policy
+
+    def _send(
+        self, record: TextRecord, send_to: str, lang: str, msg: str
+    ) -> SMSSendResult:
+        """Send one message, returning the encoding and segments used."""
+        if self.segment_policy is not None:
+            bodies = self.segment_policy.choose(msg)
+        else:
+            bodies = [msg]
+
+        # a split message can mix encodings, e.g. only one part needing
+        # UCS-2
+        infos = [count_segments(body) for body in bodies]
+        for body in bodies:
+            logger.debug("About to send: %s", body)
             self.twilio_client.messages.create(
-                body=msg,
+                body=body,
                 from_=record.recipient,  # Twilio number
                 to=send_to,
             )
+        record_sms(sum(info.segments for info in infos), len(bodies))
+
+        return SMSSendResult(
+            to=send_to,
+            lang=lang,
+            encoding=(
+                UCS2 if any(info.encoding == UCS2 for info in infos)
+                else GSM7
+            ),
+            segments=sum(info.segments for info in infos),
+            messages=len(bodies),
+        )
+
+
+class SendTranslatedVoice(SendTranslatedBase):
+    medium = "voice"
+
+    def __init__(
+        self,
+        user_info: Union[Dict[str, Dict[str, Dict[str, str]]], UserDirectory],
+        twilio_client: TwilioClient,
+        synthesizer: Synthesizer,
+        audio_store: S3AudioStore,
+        uploaded_keys: Optional[UploadedAudioKeys] = None,
+        voices: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Call each user and play the translation as synthesized speech.
+
+        Audio is looked up by a hash of (text, lang, voice), first in
+        ``uploaded_keys`` (no network call), then in ``audio_store``; only
+        on a miss in both is the text synthesized. Keys are only added
+        once the audio is in the store, so a local hit implies the object
+        is in S3 (unless it was since expired by a lifecycle rule).
+
+        Parameters
+        ==========
+        user_info: dict[str, dict[str, dict[str, str]]]
+            Routing information; see :class:`SendTranslatedBase`.
+        twilio_client: TwilioClient
+            Client used to place the calls.
+        synthesizer: Synthesizer
+            Text-to-speech engine.
+        audio_store: S3AudioStore
+            Store that caches the audio and provides the URL Twilio plays.
+        uploaded_keys: Optional[UploadedAudioKeys]
+            Keys known to be in ``audio_store``.
+        voices: Optional[Dict[str, str]]
+            Voice per language, overriding the synthesizer's defaults.
+        """
+        super().__init__(user_info, twilio_client)
+        self.synthesizer = synthesizer
+        self.audio_store = audio_store
+        self.uploaded_keys = uploaded_keys
+        self.voices = voices or {}
+
+    def audio_url(self, text: str, lang: str) -> Tuple[str, bool]:
+        """Return the URL of the audio for ``text`` and whether it was
+        cached."""
+        voice = self.voices.get(lang) or self.synthesizer.default_voice(lang)
+        key = audio_cache_key(text, lang, voice)
+        if self.uploaded_keys is not None and self.uploaded_keys.seen(key):
+            return self.audio_store.url(key), True
+
+        cached = self.audio_store.exists(key)
+        if not cached:
+            audio = self.synthesizer.synthesize(text, lang, voice)
+            self.audio_store.put(key, audio, self.synthesizer.content_type)
+        if self.uploaded_keys is not None:
+            self.uploaded_keys.add(key)
+        return self.audio_store.url(key), cached
+
+    def _send(
+        self, record: TextRecord, send_to: str, lang: str, msg: str
+    ) -> VoiceSendResult:
+        url, cached = self.audio_url(msg, lang)
+        logger.debug("Calling %s to play %s (cached=%s)", send_to, lang, cached)
+        self.twilio_client.calls.create(
+            twiml=f"<Response><Play>{escape(url)}</Play></Response>",
+            from_=record.recipient,  # Twilio number
+            to=send_to,
+        )
+        record_voice_call()
+        return VoiceSendResult(to=send_to, lang=lang, url=url, cached=cached)
@@ -0,0 +1,322 @@
+# src/translatron/asgi.py
+"""Serve a Lambda-style handler over HTTP as an ASGI application.
+
+:class:`.TranslatronText` (and its subclasses) take the API Gateway event
+dict. :class:`TranslatronASGI` turns each HTTP request into that event
+shape and runs the handler on a thread pool, so the same handler can run
+in a container fleet behind a load balancer, e.g. with ``translatron
+serve`` (which uses uvicorn from the ``server`` extra). Keep-alive is
+handled by the ASGI server; this adapter always sends a
+``content-length``, so connections can be reused.
+
+On lifespan shutdown, the adapter stops accepting webhooks (new requests
+get a 503, which Twilio and load balancers retry elsewhere), waits for the
+requests in flight, and then shuts down the worker pool.
+"""
+import asyncio
+import base64
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+# seconds between checks for in-flight requests while draining
+_DRAIN_POLL = 0.05
+
+
+class RequestContext:
+    """Stand-in for the Lambda context object.
+
+    With a ``timeout``, it reports the remaining time like Lambda does, so
+    the handler derives its request deadline from it. Without one, it has
+    no ``get_remaining_time_in_millis``, and the handler no deadline.
+    """
+
+    def __init__(self, request_id: str, timeout: Optional[float] = None):
+        self.aws_request_id = request_id
+        self.timeout = timeout
+        self._start = time.monotonic()
+        if timeout is not None:
+            self.get_remaining_time_in_millis = self._remaining_millis
+
+    def _remaining_millis(self) -> int:
+        elapsed = time.monotonic() - self._start
+        return max(0, int((self.timeout - elapsed) * 1000))
+
+
+class ServerMetrics:
+    """Request counters and latencies, in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[int, int] = {}
+        self.in_flight = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_count = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, status: int, latency: float, error: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.errors += int(error)
+            self.latency_sum += latency
+            self.latency_count += 1
+
+    def render(self, extra: Optional[Dict[str, float]] = None) -> str:
+        with self._lock:
+            lines = [
+                "# TYPE translatron_requests_total counter",
+                *(
+                    f'translatron_requests_total{{status="{status}"}} {count}'
+                    for status, count in sorted(self.requests.items())
+                ),
+                "# TYPE translatron_requests_in_flight gauge",
+                f"translatron_requests_in_flight {self.in_flight}",
+                "# TYPE translatron_handler_errors_total counter",
+                f"translatron_handler_errors_total {self.errors}",
+                "# TYPE translatron_request_seconds summary",
+                f"translatron_request_seconds_sum {self.latency_sum:.6f}",
+                f"translatron_request_seconds_count {self.latency_count}",
+            ]
+        for name, value in (extra or {}).items():
+            lines.append(f"translatron_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def build_event(
+    scope: Dict[str, Any], body: bytes
+) -> Dict[str, Any]:
+    """API Gateway-style event for an ASGI HTTP request."""
+    headers: Dict[str, str] = {}
+    for name, value in scope.get("headers", []):
+        headers[name.decode("latin-1").lower()] = value.decode("latin-1")
+    try:
+        body_str = body.decode("utf-8")
+        is_base64 = False
+    except UnicodeDecodeError:
+        body_str = base64.b64encode(body).decode("ascii")
+        is_base64 = True
+    query_string = scope.get("query_string", b"").decode("latin-1")
+    query = parse_qs(query_string)
+    path = scope.get("path", "/")
+    return {
+        "body": body_str,
+        "isBase64Encoded": is_base64,
+        "headers": headers,
+        "httpMethod": scope.get("method", "POST"),
+        "path": path,
+        "queryStringParameters": {k: v[0] for k, v in query.items()} or None,
+        # as in Lambda function URL events; the Twilio signature covers the
+        # exact path and query string
+        "rawPath": path,
+        "rawQueryString": query_string,
+    }
+
+
+def _encode_headers(headers: Dict[str, str]) -> List[Tuple[bytes, bytes]]:
+    return [
+        (name.lower().encode("latin-1"), str(value).encode("latin-1"))
+        for name, value in headers.items()
+    ]
+
+
+class TranslatronASGI:
+    """ASGI application running a Lambda-style handler on a worker pool.
+
+    Parameters
+    ==========
+    handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]
+        E.g. a :class:`.TranslatronText`.
+    max_workers: int
+        Size of the thread pool running the handler; requests beyond this
+        queue in the pool.
+    timeout: Optional[float]
+        Per-request time limit in seconds, exposed to the handler through
+        the context the way Lambda does. None means no deadline.
+    max_body_bytes: int
+        Larger request bodies are rejected with a 413.
+    metrics_path: str
+        Path of the metrics endpoint.
+    health_path: str
+        Path of the health check, which fails while draining.
+    metrics_sources: Optional[Dict[str, Callable[[], float]]]
+        Additional gauges for the metrics endpoint, e.g. cache sizes.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        max_workers: int = 8,
+        timeout: Optional[float] = None,
+        max_body_bytes: int = 1024 * 1024,
+        metrics_path: str = "/metrics",
+        health_path: str = "/healthz",
+        metrics_sources: Optional[Dict[str, Callable[[], float]]] = None,
+        shutdown_timeout: float = 30.0,
+    ):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.metrics_path = metrics_path
+        self.health_path = health_path
+        self.metrics_sources = metrics_sources or {}
+        self.shutdown_timeout = shutdown_timeout
+        self.metrics = ServerMetrics()
+        self.draining = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._request_count = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="translatron",
+            )
+        return self._executor
+
+    def start(self) -> None:
+        """Create the worker pool and accept requests."""
+        self.draining = False
+        self._executor = self.executor
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    # ---- lifespan ----------------------------------------------------------
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def shutdown(self) -> None:
+        """Stop accepting webhooks and wait for in-flight requests."""
+        self.draining = True
+        logger.info(
+            "Draining %d in-flight requests", self.metrics.in_flight
+        )
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + self.shutdown_timeout
+        while self.metrics.in_flight and loop.time() < stop_at:
+            await asyncio.sleep(_DRAIN_POLL)
+        if self.metrics.in_flight:
+            logger.warning(
+                "Shutting down with %d requests in flight",
+                self.metrics.in_flight,
+            )
+        if self._executor is not None:
+            self._executor.shutdown(wait=not self.metrics.in_flight)
+            self._executor = None
+
+    # ---- http --------------------------------------------------------------
+    async def http(self, scope, receive, send) -> None:
+        path = scope.get("path", "/")
+        if path == self.metrics_path:
+            extra = {name: get() for name, get in self.metrics_sources.items()}
+            await self.respond(
+                send, 200, self.metrics.render(extra),
+                {"Content-Type": "text/plain; version=0.0.4"},
+            )
+            return
+        if path == self.health_path:
+            if self.draining:
+                await self.respond(send, 503, "draining")
+            else:
+                await self.respond(send, 200, "ok")
+            return
+        if self.draining:
+            await self.respond(send, 503, "Service Unavailable")
+            return
+        if scope.get("method") != "POST":
+            await self.respond(send, 405, "Method Not Allowed")
+            return
+
+        body = await self.read_body(receive)
+        if body is None:
+            await self.respond(send, 413, "Payload Too Large")
+            return
+
+        event = build_event(scope, body)
+        self._request_count += 1
+        context = RequestContext(
+            f"asgi-{self._request_count}", timeout=self.timeout
+        )
+        self.metrics.started()
+        start = time.monotonic()
+        status, error = 500, True
+        try:
+            result = await self.run_handler(event, context)
+            status, error = int(result.get("statusCode", 200)), False
+        except Exception:
+            logger.exception("Handler failed")
+            result = {"statusCode": 500, "body": "Internal Server Error"}
+        finally:
+            self.metrics.finished(status, time.monotonic() - start, error)
+        await self.respond(
+            send, status, result.get("body", ""), result.get("headers")
+        )
+
+    async def read_body(self, receive) -> Optional[bytes]:
+        """Request body, or None if it exceeds ``max_body_bytes``."""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            body += message.get("body", b"")
+            if len(body) > self.max_body_bytes:
+                return None
+            if not message.get("more_body", False):
+                break
+        return bytes(body)
+
+    async def run_handler(
+        self, event: Dict[str, Any], context: RequestContext
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, ctx.run, self.handler, event, context
+        )
+
+    async def respond(
+        self,
+        send,
+        status: int,
+        body: Any,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        headers = dict(headers or {"Content-Type": "text/plain"})
+        headers["Content-Length"] = str(len(body))
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": _encode_headers(headers),
+        })
+        await send({"type": "http.response.body", "body": body})
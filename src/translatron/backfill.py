@@ -0,0 +1,438 @@
+# src/translatron/backfill.py
+"""Backfill of translations over stored conversations.
+
+When a target language is added, the messages already in the table lack
+it. A :class:`Backfill` scans the table in parallel segments, groups the
+texts needing a translation by (source, target) and sends them through
+:meth:`.Translator.translate_batch` behind a :class:`.CachingTranslator`,
+so repeated texts are translated once. The new translations are written
+back in transactions of conditional updates: an item that changed since it
+was scanned is left alone and counted as a conflict, to be picked up by a
+later run. (BatchWriteItem cannot carry conditions, so transactions are
+the only batched conditional write DynamoDB offers.)
+
+After each scanned page, the segment's cursor is saved to a
+:class:`Checkpoint`, so an interrupted backfill resumes where it stopped.
+Since items already having the language are skipped, re-processing the
+last page after a crash only costs a read.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .cache import CachingTranslator
+from .record import TextRecord
+from .storage import (
+    CODEC, KEY_ATTRIBUTES, PAYLOAD, RecordEncoder, decode_item
+)
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+# DynamoDB's limit on the number of items in one transaction
+MAX_TRANSACTION_ITEMS = 100
+
+
+class Checkpoint:
+    """Scan cursor of each segment, persisted as a JSON file.
+
+    Cursors are stored in DynamoDB's typed JSON form, so number keys
+    round-trip exactly. The file is replaced atomically on every update.
+
+    Parameters
+    ==========
+    path: str
+        File to keep the cursors in; read if it exists.
+    total_segments: int
+        Number of scan segments. Resuming with a different number of
+        segments is an error, since the cursors would not match.
+    """
+
+    def __init__(self, path: str, total_segments: int):
+        self.path = path
+        self.total_segments = total_segments
+        self._lock = threading.Lock()
+        self.segments: Dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data["total_segments"] != total_segments:
+                raise ValueError(
+                    f"Checkpoint {path} was written with "
+                    f"{data['total_segments']} segments, not {total_segments}"
+                )
+            self.segments = data["segments"]
+
+    def is_done(self, segment: int) -> bool:
+        return self.segments.get(str(segment), {}).get("done", False)
+
+    def cursor(self, segment: int) -> Optional[Dict[str, Any]]:
+        from boto3.dynamodb.types import TypeDeserializer
+
+        cursor = self.segments.get(str(segment), {}).get("cursor")
+        if cursor is None:
+            return None
+        deserializer = TypeDeserializer()
+        return {k: deserializer.deserialize(v) for k, v in cursor.items()}
+
+    def update(
+        self, segment: int, cursor: Optional[Dict[str, Any]]
+    ) -> None:
+        """Record the position of ``segment``; None marks it done."""
+        from boto3.dynamodb.types import TypeSerializer
+
+        if cursor is None:
+            state = {"done": True, "cursor": None}
+        else:
+            serializer = TypeSerializer()
+            state = {
+                "done": False,
+                "cursor": {
+                    k: serializer.serialize(v) for k, v in cursor.items()
+                },
+            }
+        with self._lock:
+            self.segments[str(segment)] = state
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "total_segments": self.total_segments,
+                    "segments": self.segments,
+                }, f)
+            os.replace(tmp, self.path)
+
+    @property
+    def complete(self) -> bool:
+        return all(self.is_done(s) for s in range(self.total_segments))
+
+
+class BackfillReport(BaseModel):
+    """Progress of a backfill; rates are per second of wall time."""
+
+    scanned: int
+    updated: int
+    skipped: int
+    conflicts: int
+    errors: int
+    translations: int
+    characters: int
+    cache_hits: int
+    elapsed: float
+    items_per_second: float
+    characters_per_second: float
+
+
+class Backfill:
+    """Add missing translations to the records stored in a table.
+
+    Parameters
+    ==========
+    table_name: str
+        Table written by :class:`.StoreToDynamoDB`, in either the plain or
+        the encoded form.
+    languages: Iterable[str]
+        Languages every record should have a translation in.
+    translator: Translator
+        Provider; wrapped in a :class:`.CachingTranslator` unless it is
+        one already.
+    segments: int
+        Number of parallel scan segments (and worker threads).
+    batch_size: int
+        Maximum number of texts per ``translate_batch`` call and of
+        updates per transaction.
+    overwrite: bool
+        Re-translate ``languages`` even where a translation exists, e.g.
+        after switching providers.
+    checkpoint: Optional[Checkpoint]
+        Where to keep the scan cursors, to resume an interrupted run.
+    encoder: Optional[RecordEncoder]
+        Codec and compression threshold used to re-encode items stored in
+        the encoded form; by default those of a :class:`.RecordEncoder`.
+        Each item keeps its own top-level attributes (and its codec, if
+        it is compressed); its TTL is left as it is.
+    page_size: Optional[int]
+        Maximum number of items per scanned page (DynamoDB's 1 MB limit
+        applies regardless), to bound the work lost on interruption.
+    progress: Optional[Callable[[BackfillReport], None]]
+        Called with the current totals after each scanned page.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        languages: Iterable[str],
+        translator: Translator,
+        segments: int = 4,
+        batch_size: int = 25,
+        overwrite: bool = False,
+        checkpoint: Optional[Checkpoint] = None,
+        encoder: Optional[RecordEncoder] = None,
+        page_size: Optional[int] = None,
+        progress: Optional[Callable[[BackfillReport], None]] = None,
+        dynamodb: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 1 <= batch_size <= MAX_TRANSACTION_ITEMS:
+            raise ValueError(
+                f"batch_size must be between 1 and {MAX_TRANSACTION_ITEMS}"
+            )
+        if checkpoint is not None and checkpoint.total_segments != segments:
+            raise ValueError("checkpoint has a different number of segments")
+        if dynamodb is None:
+            import boto3
+
+            dynamodb = boto3.resource("dynamodb")
+        self.table_name = table_name
+        self.table = dynamodb.Table(table_name)
+        self.key_names = [k["AttributeName"] for k in self.table.key_schema]
+        self.languages = list(languages)
+        if not isinstance(translator, CachingTranslator):
+            translator = CachingTranslator(translator)
+        self.translator = translator
+        self.segments = segments
+        self.batch_size = batch_size
+        self.overwrite = overwrite
+        self.checkpoint = checkpoint
+        self.encoder = encoder or RecordEncoder()
+        self.page_size = page_size
+        self.progress = progress
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(
+            ["scanned", "updated", "skipped", "conflicts", "errors",
+             "translations"], 0
+        )
+        self._start: Optional[float] = None
+
+    # ---- progress ----------------------------------------------------------
+    def _add(self, **counts: int) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                self._counts[name] += count
+
+    def report(self) -> BackfillReport:
+        elapsed = 0.0 if self._start is None else self.clock() - self._start
+        with self._lock:
+            counts = dict(self._counts)
+        characters = self.translator.characters
+        return BackfillReport(
+            **counts,
+            characters=characters,
+            cache_hits=self.translator.hits,
+            elapsed=elapsed,
+            items_per_second=counts["scanned"] / elapsed if elapsed else 0.0,
+            characters_per_second=characters / elapsed if elapsed else 0.0,
+        )
+
+    # ---- run ---------------------------------------------------------------
+    def run(self) -> BackfillReport:
+        """Process every segment not yet done, and return the totals."""
+        self._start = self.clock()
+        with ThreadPoolExecutor(self.segments) as executor:
+            # list() re-raises the first error of a segment
+            list(executor.map(self._scan_segment, range(self.segments)))
+        report = self.report()
+        logger.info("Backfill of %s done: %s", self.table_name, report)
+        return report
+
+    def _scan_segment(self, segment: int) -> None:
+        checkpoint = self.checkpoint
+        if checkpoint is not None and checkpoint.is_done(segment):
+            return
+        kwargs: Dict[str, Any] = {
+            "Segment": segment,
+            "TotalSegments": self.segments,
+        }
+        if self.page_size is not None:
+            kwargs["Limit"] = self.page_size
+        cursor = None if checkpoint is None else checkpoint.cursor(segment)
+        while True:
+            if cursor is not None:
+                kwargs["ExclusiveStartKey"] = cursor
+            resp = self.table.scan(**kwargs)
+            self.process(resp.get("Items", []))
+            cursor = resp.get("LastEvaluatedKey")
+            if checkpoint is not None:
+                checkpoint.update(segment, cursor)
+            if self.progress is not None:
+                self.progress(self.report())
+            if cursor is None:
+                return
+
+    def missing_languages(self, record: TextRecord) -> List[str]:
+        # media-only messages have no text, and an undetermined ("und")
+        # language that providers reject as a source
+        if not record.original_text.strip() or record.original_lang == "und":
+            return []
+        have = {t["lang"] for t in record.translations}
+        return [
+            lang for lang in self.languages
+            if lang != record.original_lang
+            and (self.overwrite or lang not in have)
+        ]
+
+    def process(self, items: List[Dict[str, Any]]) -> None:
+        """Translate and update one page of scanned items."""
+        pending: List[Tuple[Dict[str, Any], TextRecord, List[str]]] = []
+        for item in items:
+            try:
+                record = decode_item(item)
+            except Exception:
+                logger.warning(
+                    "Skipping item that is not a record: %s",
+                    {k: item.get(k) for k in self.key_names},
+                    exc_info=True,
+                )
+                self._add(scanned=1, errors=1)
+                continue
+            missing = self.missing_languages(record)
+            if missing:
+                pending.append((item, record, missing))
+            else:
+                self._add(scanned=1, skipped=1)
+        if not pending:
+            return
+        self._add(scanned=len(pending))
+
+        translated = self._translate(pending)
+        operations = []
+        for item, record, missing in pending:
+            new = {
+                lang: translated[
+                    (record.original_lang, lang, record.original_text)
+                ]
+                for lang in missing
+            }
+            translations = [
+                t for t in record.translations if t["lang"] not in new
+            ]
+            translations.extend(
+                {"lang": lang, "text": text} for lang, text in new.items()
+            )
+            updated = record.model_copy(update={"translations": translations})
+            operations.append(self._update(item, record, updated))
+            self._add(translations=len(new))
+
+        for start in range(0, len(operations), self.batch_size):
+            self._write(operations[start:start + self.batch_size])
+
+    def _translate(
+        self, pending: List[Tuple[Dict[str, Any], TextRecord, List[str]]]
+    ) -> Dict[Tuple[str, str, str], str]:
+        """Batch-translate the texts, keyed by (source, target, text)."""
+        groups: Dict[Tuple[str, str], Dict[str, None]] = {}
+        for _, record, missing in pending:
+            for lang in missing:
+                texts = groups.setdefault((record.original_lang, lang), {})
+                texts[record.original_text] = None
+
+        results: Dict[Tuple[str, str, str], str] = {}
+        for (source, target), texts in groups.items():
+            texts = list(texts)
+            for start in range(0, len(texts), self.batch_size):
+                chunk = texts[start:start + self.batch_size]
+                out = self.translator.translate_batch(
+                    chunk, target, detected_language=source
+                )
+                for text, result in zip(chunk, out):
+                    results[(source, target, text)] = result
+        return results
+
+    def _encoder_for(self, item: Dict[str, Any]) -> RecordEncoder:
+        """Encoder reproducing the layout of the encoded ``item``."""
+        fields = set(TextRecord.model_fields)
+        top_level = [
+            name for name in item
+            if name in fields and name not in KEY_ATTRIBUTES
+        ]
+        return RecordEncoder(
+            codec=item.get(CODEC, self.encoder.codec),
+            min_compress_size=self.encoder.min_compress_size,
+            index_attributes=top_level,
+        )
+
+    def _update(
+        self,
+        item: Dict[str, Any],
+        record: TextRecord,
+        updated: TextRecord,
+    ) -> Dict[str, Any]:
+        """Conditional update writing ``updated``'s translations."""
+        update: Dict[str, Any] = {
+            "TableName": self.table_name,
+            "Key": {k: item[k] for k in self.key_names},
+        }
+        if PAYLOAD in item:
+            # encoded item: rewrite every attribute of the encoding, if the
+            # payload is unchanged
+            encoded = self._encoder_for(item).encode(updated)
+            attributes = [
+                name for name in encoded if name not in self.key_names
+            ]
+            names = {f"#a{i}": name for i, name in enumerate(attributes)}
+            values = {
+                f":a{i}": encoded[name] for i, name in enumerate(attributes)
+            }
+            expression = "SET " + ", ".join(
+                f"#a{i} = :a{i}" for i in range(len(attributes))
+            )
+            if CODEC not in encoded:
+                names["#c"] = CODEC
+                expression += " REMOVE #c"
+            names["#p"] = PAYLOAD
+            values[":old"] = item[PAYLOAD]
+            condition = "#p = :old"
+        else:
+            # plain item: condition on the number of translations, since
+            # lists cannot be compared as a whole
+            names = {"#t": "translations", "#k": self.key_names[0]}
+            values = {
+                ":translations": updated.translations,
+                ":count": len(record.translations),
+            }
+            expression = "SET #t = :translations"
+            condition = "attribute_exists(#k) AND size(#t) = :count"
+        update.update({
+            "UpdateExpression": expression,
+            "ConditionExpression": condition,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        })
+        return {"Update": update}
+
+    def _write(self, operations: List[Dict[str, Any]]) -> None:
+        """Apply the updates in one transaction, dropping conflicts."""
+        from botocore.exceptions import ClientError
+
+        client = self.table.meta.client
+        while operations:
+            try:
+                client.transact_write_items(TransactItems=operations)
+            except ClientError as exc:
+                if (exc.response["Error"]["Code"]
+                        != "TransactionCanceledException"):
+                    raise
+                reasons = exc.response.get("CancellationReasons", [])
+                failed = {
+                    i for i, reason in enumerate(reasons)
+                    if reason.get("Code") == "ConditionalCheckFailed"
+                }
+                if not failed:
+                    raise
+                logger.info(
+                    "%d items changed since they were scanned; skipping",
+                    len(failed),
+                )
+                self._add(conflicts=len(failed))
+                operations = [
+                    op for i, op in enumerate(operations) if i not in failed
+                ]
+                continue
+            self._add(updated=len(operations))
+            return
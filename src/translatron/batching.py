@@ -0,0 +1,167 @@
+# src/translatron/batching.py
+"""Micro-batching of translation requests.
+
+In a warm worker handling many messages at once (SQS consumers, the
+container deployment), each message calls ``translate`` on its own. A
+:class:`MicroBatchingTranslator` holds requests for the same (source,
+target) pair for up to ``max_wait`` seconds and sends them to the provider
+as a single :meth:`.Translator.translate_batch` call, then hands each
+caller its own result.
+
+No background thread is used: the first caller of a batch waits for
+``max_wait`` (or until the batch fills up) and then sends it. This only
+helps with providers that have a native batch API
+(:attr:`.Translator.supports_batch`); for others, such as Amazon
+Translate, the leader would translate the batch one text at a time, so
+calls are passed straight through instead.
+
+The provider call of a batch is made with its own usage accumulator (see
+:mod:`.usage`), and each caller then records the characters of its own
+text in its own message's usage, rather than the leader being billed for
+the whole batch.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .translator import Translator
+from .usage import Usage, activate_usage, record_translation
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self, source: Optional[str], target: str):
+        self.source = source
+        self.target = target
+        self.texts: List[str] = []
+        self.results: Optional[List[str]] = None
+        self.error: Optional[BaseException] = None
+        self.usage: Optional[Usage] = None  # of the provider call
+        self.closed = threading.Event()  # no more texts will be added
+        self.done = threading.Event()
+
+    def result(self, index: int) -> str:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.results[index]
+
+
+class MicroBatchingTranslator(Translator):
+    """Coalesce concurrent ``translate`` calls into batched provider calls.
+
+    Parameters
+    ==========
+    translator: Translator
+        Provider; its ``translate_batch`` is called with each batch.
+    max_batch_size: int
+        A batch is sent as soon as it has this many texts.
+    max_wait: float
+        Maximum time (seconds) the first request in a batch waits for
+        others to join it.
+    """
+
+    def __init__(
+        self,
+        translator: Translator,
+        max_batch_size: int = 16,
+        max_wait: float = 0.005,
+    ):
+        self.translator = translator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple[Optional[str], str], _Batch] = {}
+        self.requests = 0
+        self.batches = 0
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.translator.supports_batch
+
+    def detect_language(self, text: str) -> str:
+        return self.translator.detect_language(text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        if not self.translator.supports_batch:
+            return self.translator.translate(
+                text, target_language, detected_language=detected_language
+            )
+        key = (detected_language, target_language)
+        with self._lock:
+            self.requests += 1
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch(*key)
+            index = len(batch.texts)
+            batch.texts.append(text)
+            full = len(batch.texts) >= self.max_batch_size
+            if full:
+                del self._open[key]
+                batch.closed.set()
+
+        if full:
+            self._send(batch)
+        elif leader:
+            batch.closed.wait(self.max_wait)
+            with self._lock:
+                expired = self._open.get(key) is batch
+                if expired:
+                    del self._open[key]
+                    batch.closed.set()
+            if expired:
+                self._send(batch)
+        result = batch.result(index)
+        # bill this caller's share of the batch to its own message
+        for provider, langs in batch.usage.translated_characters.items():
+            if batch.target in langs:
+                record_translation(provider, batch.target, len(text))
+        return result
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        return self.translator.translate_batch(
+            texts, target_language, detected_language=detected_language
+        )
+
+    def _send(self, batch: _Batch) -> None:
+        with self._lock:
+            self.batches += 1
+        logger.debug(
+            "Sending batch of %d texts (%s -> %s)",
+            len(batch.texts), batch.source, batch.target,
+        )
+        try:
+            with activate_usage() as usage:
+                try:
+                    results = self.translator.translate_batch(
+                        batch.texts, batch.target,
+                        detected_language=batch.source,
+                    )
+                finally:
+                    batch.usage = usage.snapshot()
+            if len(results) != len(batch.texts):
+                raise RuntimeError(
+                    f"Expected {len(batch.texts)} translations, "
+                    f"got {len(results)}"
+                )
+            batch.results = results
+        except BaseException as exc:
+            batch.error = exc
+        finally:
+            batch.done.set()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
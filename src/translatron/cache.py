@@ -0,0 +1,141 @@
+# src/translatron/cache.py
+"""In-memory cache of translations.
+
+Messages repeat: short replies ("ok", "thanks", "on my way") make up a
+large share of traffic, and a backfill over stored history sees the same
+texts again and again. A :class:`CachingTranslator` keeps the most recent
+translations keyed by (text, source, target), so repeats cost neither a
+provider call nor characters of API quota. In a warm Lambda the cache
+lives across invocations.
+"""
+import collections
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, Optional[str], str]
+
+
+class CachingTranslator(Translator):
+    """Serve repeated translations from a bounded LRU cache.
+
+    Language detection is passed through uncached. ``hits`` and ``misses``
+    count translations; ``characters`` counts the characters sent to the
+    wrapped translator, i.e. the quota actually used.
+
+    Parameters
+    ==========
+    translator: Translator
+        Provider for cache misses.
+    max_entries: int
+        Number of translations kept; the least recently used are evicted.
+    """
+
+    def __init__(self, translator: Translator, max_entries: int = 10000):
+        self.translator = translator
+        self.max_entries = max_entries
+        self._cache: "collections.OrderedDict[CacheKey, str]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.characters = 0
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.translator.supports_batch
+
+    @staticmethod
+    def _key(text: str, target: str, source: Optional[str]) -> CacheKey:
+        return (text, None if source == "auto" else source, target)
+
+    def _get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _put(self, key: CacheKey, result: str) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def detect_language(self, text: str) -> str:
+        return self.translator.detect_language(text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        key = self._key(text, target_language, detected_language)
+        result = self._get(key)
+        if result is None:
+            with self._lock:
+                self.characters += len(text)
+            result = self.translator.translate(
+                text, target_language, detected_language=detected_language
+            )
+            self._put(key, result)
+        return result
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        """Translate the texts not in the cache in one batch call.
+
+        Duplicates within ``texts`` are only sent once.
+        """
+        results: Dict[str, str] = {}
+        missing: Dict[str, None] = {}  # ordered set
+        for text in texts:
+            if text in results or text in missing:
+                continue
+            key = self._key(text, target_language, detected_language)
+            cached = self._get(key)
+            if cached is None:
+                missing[text] = None
+            else:
+                results[text] = cached
+
+        if missing:
+            with self._lock:
+                self.characters += sum(len(text) for text in missing)
+            translated = self.translator.translate_batch(
+                list(missing),
+                target_language,
+                detected_language=detected_language,
+            )
+            for text, result in zip(missing, translated):
+                self._put(
+                    self._key(text, target_language, detected_language),
+                    result,
+                )
+                results[text] = result
+        return [results[text] for text in texts]
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "characters": self.characters,
+            "entries": len(self._cache),
+        }
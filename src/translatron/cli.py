@@ -11,11 +11,21 @@ from .test_events import create_twilio_test_event, validate_test_event
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 
-if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN:
-    click.echo("Error: TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN environment variables must be set.")
-    sys.exit(1)
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+def require_twilio_credentials():
+    """Exit unless the Twilio credentials are set in the environment."""
+    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN:
+        click.echo(
+            "Error: TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN environment "
+            "variables must be set."
+        )
+        sys.exit(1)
+
+
+def get_twilio_client() -> Client:
+    require_twilio_credentials()
+    return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
 
 # Default preferred area codes
 DEFAULT_PREFERRED_AREA_CODES = ["312", "773"]
@@ -37,6 +47,7 @@ def purchase_number(area_code):
     Search for and purchase a new Twilio phone number in the specified area codes.
     This command does not set webhook URLs unless required by Twilio.
     """
+    client = get_twilio_client()
     area_codes = list(area_code)
     click.echo(f"Searching for available phone numbers in area codes: {', '.join(area_codes)}")
     purchased_number = None
@@ -88,6 +99,7 @@ def set_webhooks(phone_number, sms_webhook, voice_webhook):
     """
     Update the webhook URLs for an existing Twilio phone number.
     """
+    client = get_twilio_client()
     try:
         numbers = client.incoming_phone_numbers.list(phone_number=phone_number)
     except Exception as e:
@@ -150,6 +162,7 @@ def create_test_event(url: str, from_number: str, to_number: str, message: str,
     - To: +0987654321
     - Message: Hello world
     """
+    require_twilio_credentials()
     # Create test event
     param_dict = {
         "From": from_number,
@@ -172,5 +185,409 @@ def create_test_event(url: str, from_number: str, to_number: str, message: str,
     # Output the event to stdout
     click.echo(json.dumps(event, indent=2))
 
+def _iter_dynamodb_records(table_name: str):
+    import boto3
+    from .storage import decode_item
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    kwargs = {}
+    while True:
+        resp = table.scan(**kwargs)
+        for item in resp.get("Items", []):
+            yield decode_item(item)
+        if "LastEvaluatedKey" not in resp:
+            break
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _iter_jsonl_records(path: str):
+    from .record import TextRecord
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield TextRecord.model_validate_json(line)
+
+
+@cli.command("mine-phrases")
+@click.option(
+    "--table",
+    help="DynamoDB table of stored TextRecords to mine."
+)
+@click.option(
+    "--input", "input_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSONL file of TextRecords to mine (instead of --table)."
+)
+@click.option(
+    "--output", "-o",
+    type=click.File("w", encoding="utf-8"),
+    default="-",
+    help="Where to write candidate phrases as JSONL (default: stdout)."
+)
+@click.option(
+    "--min-count",
+    default=3,
+    show_default=True,
+    help="Minimum number of occurrences for a candidate phrase."
+)
+@click.option(
+    "--max-words",
+    default=6,
+    show_default=True,
+    help="Maximum number of words in a candidate phrase."
+)
+def mine_phrases(table, input_path, output, min_count, max_words):
+    """Find frequently repeated short messages in stored history.
+
+    The output is JSONL that can be reviewed, edited, and then passed to
+    build-phrase-table.
+    """
+    from .phrases import mine_phrases as mine
+
+    if (table is None) == (input_path is None):
+        click.echo("Error: provide exactly one of --table or --input", err=True)
+        sys.exit(1)
+
+    if table is not None:
+        records = _iter_dynamodb_records(table)
+    else:
+        records = _iter_jsonl_records(input_path)
+
+    candidates = mine(records, min_count=min_count, max_words=max_words)
+    for candidate in candidates:
+        output.write(candidate.model_dump_json() + "\n")
+    click.echo(f"Found {len(candidates)} candidate phrases", err=True)
+
+
+@cli.command("build-phrase-table")
+@click.argument("entries", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.option(
+    "--source-only",
+    is_flag=True,
+    help="Only index phrases by their source-language text."
+)
+def build_phrase_table(entries, output, source_only):
+    """Build a memory-mapped phrase table from a JSONL file of entries."""
+    from .phrases import PhraseTable, read_phrase_entries
+
+    n_keys = PhraseTable.build(
+        read_phrase_entries(entries),
+        output,
+        index_all_languages=not source_only,
+    )
+    click.echo(f"Wrote {n_keys} phrase keys to {output}")
+
+
+def _load_object(spec: str):
+    """Import ``module:attribute``, e.g. ``sms_handler_2:lambda_handler``."""
+    import importlib
+
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise click.BadParameter(
+            f"expected 'module:attribute', got '{spec}'"
+        )
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    obj = importlib.import_module(module_name)
+    for name in attr.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+@cli.command("serve")
+@click.argument("handler")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8000, show_default=True)
+@click.option(
+    "--workers",
+    default=8,
+    show_default=True,
+    help="Number of threads running the handler."
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=None,
+    help="Per-request time limit in seconds (like the Lambda timeout)."
+)
+@click.option(
+    "--keep-alive",
+    default=75,
+    show_default=True,
+    help="Seconds to keep idle connections open. Keep this above the "
+         "load balancer's idle timeout."
+)
+@click.option(
+    "--graceful-timeout",
+    default=30.0,
+    show_default=True,
+    help="Seconds to wait for in-flight requests on shutdown."
+)
+def serve(handler, host, port, workers, timeout, keep_alive,
+          graceful_timeout):
+    """Serve a handler (given as module:attribute) over HTTP.
+
+    The handler is anything taking a Lambda event and context, e.g. the
+    TranslatronText instance of a Lambda module. Requires uvicorn
+    (pip install translatron[server]).
+    """
+    try:
+        import uvicorn
+    except ImportError:
+        click.echo(
+            "Error: serve requires uvicorn; "
+            "install it with `pip install translatron[server]`",
+            err=True,
+        )
+        sys.exit(1)
+    from .asgi import TranslatronASGI
+
+    app = TranslatronASGI(
+        _load_object(handler),
+        max_workers=workers,
+        timeout=timeout,
+        shutdown_timeout=graceful_timeout,
+    )
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        lifespan="on",
+        timeout_keep_alive=keep_alive,
+        timeout_graceful_shutdown=graceful_timeout,
+    )
+
+
+@cli.command("emulate")
+@click.option("--messages", "-n", default=100, show_default=True,
+              help="Number of webhooks to send.")
+@click.option("--concurrency", "-c", default=8, show_default=True,
+              help="Number of webhooks handled at once.")
+@click.option("--groups", default=1, show_default=True,
+              help="Number of messaging numbers (groups).")
+@click.option("--users", default=5, show_default=True,
+              help="Number of users in each group.")
+@click.option("--language", "-l", "languages", multiple=True,
+              default=["en", "es", "fr"], show_default=True,
+              help="User language; can be provided multiple times.")
+@click.option("--translate-latency", default=0.0, show_default=True,
+              help="Median translation latency in ms (log-normal).")
+@click.option("--twilio-latency", default=0.0, show_default=True,
+              help="Median Twilio API latency in ms (log-normal).")
+@click.option("--error-rate", default=0.0, show_default=True,
+              help="Fraction of translation and Twilio calls that fail.")
+@click.option("--retries", default=0, show_default=True,
+              help="Retry transient errors up to this many times.")
+@click.option("--seed", type=int, default=None,
+              help="Seed for the load and the fault injection.")
+def emulate(messages, concurrency, groups, users, languages,
+            translate_latency, twilio_latency, error_rate, retries, seed):
+    """Run TranslatronText against local fakes and report throughput.
+
+    Twilio and the translator are simulated in-process, and DynamoDB is
+    emulated with moto (pip install translatron[dev]). The report is
+    printed as JSON.
+    """
+    from .retry import RetryPolicy
+    from .testing import (
+        ConstantLatency, Emulator, FakeTranslator, FakeTwilioClient,
+        FaultInjector, LogNormalLatency, emulated_user_info,
+        translate_throttled, twilio_unavailable,
+    )
+
+    def latency(ms):
+        return LogNormalLatency(ms / 1000) if ms > 0 else ConstantLatency(0)
+
+    # separate seeds keep each fake's draws independent of the other's
+    seeds = [None, None] if seed is None else [seed + 1, seed + 2]
+    translator = FakeTranslator(faults=FaultInjector(
+        latency(translate_latency), error_rate, translate_throttled,
+        seed=seeds[0],
+    ))
+    twilio_client = FakeTwilioClient(FaultInjector(
+        latency(twilio_latency), error_rate, twilio_unavailable,
+        seed=seeds[1],
+    ))
+    handler_kwargs = {}
+    if retries:
+        handler_kwargs["retry_policy"] = RetryPolicy(max_attempts=retries + 1)
+
+    emulator = Emulator(
+        user_info=emulated_user_info(groups, users, list(languages)),
+        translator=translator,
+        twilio_client=twilio_client,
+        seed=seed,
+        handler_kwargs=handler_kwargs,
+    )
+    with emulator:
+        report = emulator.run(messages, concurrency=concurrency)
+    click.echo(report.model_dump_json(indent=2))
+
+
+@cli.command("backfill")
+@click.argument("table")
+@click.option("--language", "-l", "languages", multiple=True, required=True,
+              help="Language every record should have (repeatable).")
+@click.option("--translator", "provider", default="amazon",
+              show_default=True,
+              type=click.Choice(["amazon", "google", "none"]),
+              help="Translation provider.")
+@click.option("--segments", default=4, show_default=True,
+              help="Number of parallel scan segments.")
+@click.option("--batch-size", default=25, show_default=True,
+              help="Texts per translation batch and updates per write.")
+@click.option("--checkpoint", type=click.Path(dir_okay=False),
+              help="File keeping the scan position; rerun to resume.")
+@click.option("--overwrite", is_flag=True,
+              help="Re-translate languages that already have a translation.")
+@click.option("--cache-size", default=100000, show_default=True,
+              help="Number of translations kept in memory.")
+def backfill(table, languages, provider, segments, batch_size, checkpoint,
+             overwrite, cache_size):
+    """Add missing translations to the records stored in TABLE.
+
+    Progress (throughput and characters sent to the translation API) is
+    printed to stderr after each scanned page; the final report is
+    printed as JSON.
+    """
+    from .backfill import Backfill, Checkpoint
+    from .cache import CachingTranslator
+    from .config import HandlerConfig
+
+    translator = HandlerConfig(
+        user_info={}, translator=provider
+    ).make_translator()
+
+    def progress(report):
+        click.echo(
+            f"scanned={report.scanned} updated={report.updated} "
+            f"conflicts={report.conflicts} "
+            f"{report.items_per_second:.1f} items/s "
+            f"characters={report.characters} "
+            f"({report.characters_per_second:.0f}/s) "
+            f"cache_hits={report.cache_hits}",
+            err=True,
+        )
+
+    job = Backfill(
+        table,
+        languages,
+        CachingTranslator(translator, max_entries=cache_size),
+        segments=segments,
+        batch_size=batch_size,
+        overwrite=overwrite,
+        checkpoint=(
+            Checkpoint(checkpoint, segments) if checkpoint else None
+        ),
+        progress=progress,
+    )
+    report = job.run()
+    click.echo(report.model_dump_json(indent=2))
+
+
+@cli.command("export")
+@click.argument("table")
+@click.argument("output", type=click.Path(file_okay=False))
+@click.option("--format", "file_format", default="parquet",
+              show_default=True, type=click.Choice(["parquet", "arrow"]),
+              help="File format of the export.")
+@click.option("--segments", default=4, show_default=True,
+              help="Number of parallel scan segments.")
+@click.option("--row-group-size", default=10000, show_default=True,
+              help="Rows per row group (record batch) in each file.")
+@click.option("--page-size", type=int, default=None,
+              help="Items per scanned page, to limit the read rate.")
+def export(table, output, file_format, segments, row_group_size,
+           page_size):
+    """Export the records in TABLE to partitioned files in OUTPUT.
+
+    Files are partitioned by date and messaging number, and can be read
+    with translatron.export.read_export or any Parquet/Arrow tool.
+    Requires pyarrow (pip install translatron[analytics]).
+    """
+    from .export import export_table
+
+    report = export_table(
+        table,
+        output,
+        segments=segments,
+        file_format=file_format,
+        row_group_size=row_group_size,
+        page_size=page_size,
+    )
+    click.echo(report.model_dump_json(indent=2))
+
+
+@cli.command("evaluate")
+@click.option("--corpus", type=click.Path(exists=True, dir_okay=False),
+              help="JSONL file of source/reference pairs.")
+@click.option("--table",
+              help="DynamoDB table of stored records to sample instead.")
+@click.option("--target-lang",
+              help="Target language of the examples taken from --table.")
+@click.option("--sample", default=500, show_default=True,
+              help="Number of examples sampled from --table.")
+@click.option("--provider", "-p", "providers", multiple=True,
+              type=click.Choice(["amazon", "google", "none"]),
+              default=["amazon", "google"], show_default=True,
+              help="Provider to evaluate (repeatable).")
+@click.option("--concurrency", "-c", default=8, show_default=True,
+              help="Translations in flight per provider.")
+@click.option("--no-cache", is_flag=True,
+              help="Do not cache repeated sources.")
+@click.option("--bootstrap", default=1000, show_default=True,
+              help="Bootstrap resamples for the confidence intervals.")
+@click.option("--seed", type=int, default=None,
+              help="Seed for the sampling and the bootstrap.")
+@click.option("--json", "as_json", is_flag=True,
+              help="Print the full report as JSON.")
+def evaluate(corpus, table, target_lang, sample, providers, concurrency,
+             no_cache, bootstrap, seed, as_json):
+    """Compare translation providers on quality, latency and cost.
+
+    Requires numpy (pip install translatron[evaluation]).
+    """
+    from .config import HandlerConfig
+    from .evaluation import (
+        corpus_from_records, evaluate as run_evaluation, read_corpus
+    )
+
+    if (corpus is None) == (table is None):
+        click.echo("Error: provide exactly one of --corpus or --table",
+                   err=True)
+        sys.exit(1)
+    if corpus is not None:
+        examples = read_corpus(corpus)
+    else:
+        if target_lang is None:
+            click.echo("Error: --table requires --target-lang", err=True)
+            sys.exit(1)
+        examples = corpus_from_records(
+            _iter_dynamodb_records(table), target_lang,
+            sample=sample, seed=seed,
+        )
+    click.echo(f"Evaluating on {len(examples)} examples", err=True)
+
+    translators = {
+        name: HandlerConfig(user_info={}, translator=name).make_translator()
+        for name in providers
+    }
+    report = run_evaluation(
+        translators,
+        examples,
+        concurrency=concurrency,
+        cache=not no_cache,
+        bootstrap=bootstrap,
+        seed=seed,
+    )
+    if as_json:
+        click.echo(report.model_dump_json(indent=2))
+    else:
+        click.echo(report.format_table())
+
+
 if __name__ == '__main__':
     cli()
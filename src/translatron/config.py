@@ -0,0 +1,380 @@
+# src/translatron/config.py
+"""Handler configuration: loading, validation, caching and routing.
+
+The configuration (user routing, target languages, provider choice) can
+come from the environment, a local file, S3 or SSM Parameter Store. Large
+routing tables do not fit in Lambda's 4 KB of environment variables, so
+``TRANSLATRON_CONFIG_URI`` can point to S3 or SSM instead.
+
+A :class:`ConfigLoader` validates the configuration once and keeps it
+across warm invocations. After ``refresh_interval`` seconds it asks the
+source for a newer version; S3 and file sources only transfer and parse
+the configuration when it has changed. The routing table is compiled into
+a :class:`Routing`, which precomputes the recipients of each sender.
+
+Routing, languages and the provider can change at runtime. The AWS
+resources (:data:`RESTART_FIELDS`) are built into the handler at start;
+when a refresh changes one, the loader logs that a restart is needed.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import (
+    Any, Callable, Dict, List, Literal, Mapping, Optional, Tuple
+)
+
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+
+from .directory import Routing
+
+logger = logging.getLogger(__name__)
+
+CONFIG_URI_VAR = "TRANSLATRON_CONFIG_URI"
+CONFIG_JSON_VAR = "TRANSLATRON_CONFIG"
+# fields that only take effect when the handler is restarted
+RESTART_FIELDS = (
+    "dynamodb_table", "media_bucket", "outbox_table", "user_table"
+)
+
+
+class ConfigError(Exception):
+    """The configuration could not be loaded or is invalid."""
+
+
+class UserEntry(BaseModel):
+    name: str = ""
+    lang: str
+
+    @field_validator("lang")
+    @classmethod
+    def _lang_not_empty(cls, lang: str) -> str:
+        if not lang:
+            raise ValueError("lang must not be empty")
+        return lang
+
+
+class HandlerConfig(BaseModel):
+    """Validated configuration of a message handler.
+
+    Parameters
+    ==========
+    user_info: Dict[str, Dict[str, UserEntry]]
+        Users of each messaging number, as for
+        :class:`.SendTranslatedBase`. Required unless ``user_table`` is
+        set.
+    languages: List[str]
+        Target languages; by default, every language of a user. With
+        ``user_table``, the default is empty and the handler takes the
+        languages of the directory's users.
+    required_languages: Optional[List[str]]
+        See :class:`.TranslatronText`.
+    translator: str
+        Translation provider: ``"amazon"``, ``"google"`` or ``"none"``.
+    dynamodb_table, media_bucket, outbox_table: Optional[str]
+        AWS resources used by the handler, if any.
+    user_table: Optional[str]
+        Table of a :class:`.DynamoDBUserDirectory`, which then replaces
+        ``user_info`` for routing.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    user_info: Dict[str, Dict[str, UserEntry]] = {}
+    languages: List[str] = []
+    required_languages: Optional[List[str]] = None
+    translator: Literal["amazon", "google", "none"] = "amazon"
+    dynamodb_table: Optional[str] = None
+    media_bucket: Optional[str] = None
+    outbox_table: Optional[str] = None
+    user_table: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _default_languages(self) -> "HandlerConfig":
+        if self.user_table is None and "user_info" not in self.model_fields_set:
+            raise ValueError("user_info is required without user_table")
+        if not self.languages and self.user_table is None:
+            self.languages = sorted({
+                user.lang
+                for users in self.user_info.values()
+                for user in users.values()
+            })
+        return self
+
+    def changed_fields(self, other: "HandlerConfig") -> List[str]:
+        """Names of the fields whose value differs in ``other``."""
+        return [
+            name for name in type(self).model_fields
+            if getattr(self, name) != getattr(other, name)
+        ]
+
+    def routing(self) -> Routing:
+        return Routing({
+            number: {
+                user: entry.model_dump() for user, entry in users.items()
+            }
+            for number, users in self.user_info.items()
+        })
+
+    def make_translator(self) -> Any:
+        from .translator import (
+            AmazonTranslator, GoogleTranslator, NonTranslator
+        )
+
+        if self.translator == "amazon":
+            return AmazonTranslator()
+        if self.translator == "google":
+            return GoogleTranslator(
+                os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+            )
+        return NonTranslator()
+
+
+# ---- sources ---------------------------------------------------------------
+class ConfigSource(ABC):
+    """Where the configuration JSON is read from."""
+
+    @abstractmethod
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[str, str]]:
+        """Return ``(text, version)``, or None if the source still has
+        ``version``."""
+        pass
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EnvSource(ConfigSource):
+    """Configuration from environment variables.
+
+    ``TRANSLATRON_CONFIG`` holds the whole configuration as JSON. Without
+    it, the individual variables used by the Lambda handlers are read:
+    ``USER_INFO`` (JSON), ``TARGET_LANGUAGES`` (comma-separated),
+    ``DYNAMODB_TABLE``, ``MEDIA_BUCKET``, ``OUTBOX_TABLE``, ``USER_TABLE``
+    and ``TRANSLATOR_PROVIDER``. ``USER_INFO`` is optional when
+    ``USER_TABLE`` is set.
+    """
+
+    _VARIABLES = {
+        "DYNAMODB_TABLE": "dynamodb_table",
+        "MEDIA_BUCKET": "media_bucket",
+        "OUTBOX_TABLE": "outbox_table",
+        "USER_TABLE": "user_table",
+        "TRANSLATOR_PROVIDER": "translator",
+    }
+
+    def __init__(self, environ: Optional[Mapping[str, str]] = None):
+        self.environ = os.environ if environ is None else environ
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[str, str]]:
+        text = self.environ.get(CONFIG_JSON_VAR)
+        if text is None:
+            data: Dict[str, Any] = {}
+            if self.environ.get("USER_INFO"):
+                try:
+                    data["user_info"] = json.loads(self.environ["USER_INFO"])
+                except ValueError as exc:
+                    raise ConfigError(f"Invalid USER_INFO: {exc}") from exc
+            elif not self.environ.get("USER_TABLE"):
+                raise ConfigError(
+                    f"Neither {CONFIG_JSON_VAR}, USER_INFO nor USER_TABLE "
+                    "is set"
+                )
+            languages = self.environ.get("TARGET_LANGUAGES")
+            if languages:
+                data["languages"] = languages.split(",")
+            for var, field in self._VARIABLES.items():
+                if self.environ.get(var):
+                    data[field] = self.environ[var]
+            text = json.dumps(data)
+        digest = _digest(text)
+        return None if digest == version else (text, digest)
+
+
+class FileSource(ConfigSource):
+    """Configuration from a JSON file, re-read when it is modified."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[str, str]]:
+        stat = os.stat(self.path)
+        current = f"{stat.st_mtime_ns}:{stat.st_size}"
+        if current == version:
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            return f.read(), current
+
+
+class S3Source(ConfigSource):
+    """Configuration from an S3 object.
+
+    Refreshes are conditional on the ETag, so an unchanged object is not
+    transferred again.
+    """
+
+    def __init__(self, bucket: str, key: str, s3_client: Any = None):
+        if s3_client is None:
+            import boto3
+
+            s3_client = boto3.client("s3")
+        self.bucket = bucket
+        self.key = key
+        self.s3_client = s3_client
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[str, str]]:
+        from botocore.exceptions import ClientError
+
+        kwargs = {"Bucket": self.bucket, "Key": self.key}
+        if version is not None:
+            kwargs["IfNoneMatch"] = version
+        try:
+            resp = self.s3_client.get_object(**kwargs)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("304", "NotModified"):
+                return None
+            raise
+        return resp["Body"].read().decode("utf-8"), resp["ETag"]
+
+
+class SSMSource(ConfigSource):
+    """Configuration from an SSM parameter (SecureString is supported).
+
+    The parameter's version is compared to skip re-validating an
+    unchanged configuration; advanced parameters hold up to 8 KB.
+    """
+
+    def __init__(self, name: str, ssm_client: Any = None):
+        if ssm_client is None:
+            import boto3
+
+            ssm_client = boto3.client("ssm")
+        self.name = name
+        self.ssm_client = ssm_client
+
+    def fetch(self, version: Optional[str]) -> Optional[Tuple[str, str]]:
+        resp = self.ssm_client.get_parameter(
+            Name=self.name, WithDecryption=True
+        )
+        parameter = resp["Parameter"]
+        current = str(parameter["Version"])
+        if current == version:
+            return None
+        return parameter["Value"], current
+
+
+def source_from_uri(uri: Optional[str]) -> ConfigSource:
+    """Source for ``s3://bucket/key``, ``ssm:/name``, ``env:`` or a path.
+
+    With no URI, the environment is used.
+    """
+    if not uri or uri == "env:":
+        return EnvSource()
+    if uri.startswith("s3://"):
+        bucket, _, key = uri[len("s3://"):].partition("/")
+        if not bucket or not key:
+            raise ConfigError(f"Invalid S3 URI: {uri}")
+        return S3Source(bucket, key)
+    if uri.startswith("ssm:"):
+        return SSMSource(uri[len("ssm:"):])
+    if uri.startswith("file://"):
+        return FileSource(uri[len("file://"):])
+    return FileSource(uri)
+
+
+# ---- loader ----------------------------------------------------------------
+class ConfigLoader:
+    """Validated configuration, cached and refreshed from a source.
+
+    Parameters
+    ==========
+    source: ConfigSource
+        Where to read the configuration.
+    refresh_interval: float
+        Seconds after which the source is checked for a new version.
+    on_change: Optional[Callable[[HandlerConfig], None]]
+        Called whenever a new configuration has been loaded (also the
+        first time), e.g. to update the actions' routing.
+    """
+
+    def __init__(
+        self,
+        source: ConfigSource,
+        refresh_interval: float = 300.0,
+        on_change: Optional[Callable[[HandlerConfig], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.on_change = on_change
+        self.clock = clock
+        self.version: Optional[str] = None
+        self._config: Optional[HandlerConfig] = None
+        self._routing: Optional[Routing] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "ConfigLoader":
+        """Loader for the source in ``TRANSLATRON_CONFIG_URI``."""
+        return cls(source_from_uri(os.getenv(CONFIG_URI_VAR)), **kwargs)
+
+    def get(self) -> HandlerConfig:
+        """Current configuration, refreshing it when due.
+
+        Errors on the first load are raised. Later, a failed refresh is
+        logged and the last good configuration is kept.
+        """
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._load()
+        elif self.clock() - self._checked_at >= self.refresh_interval:
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._load()
+                except Exception:
+                    logger.exception(
+                        "Failed to refresh configuration; keeping version %s",
+                        self.version,
+                    )
+                finally:
+                    self._lock.release()
+        return self._config
+
+    def routing(self) -> Routing:
+        """Routing compiled from the current configuration."""
+        self.get()
+        return self._routing
+
+    def _load(self) -> None:
+        self._checked_at = self.clock()
+        fetched = self.source.fetch(self.version)
+        if fetched is None:
+            return
+        text, version = fetched
+        try:
+            config = HandlerConfig.model_validate_json(text)
+        except ValueError as exc:
+            raise ConfigError(f"Invalid configuration: {exc}") from exc
+        if self._config is not None:
+            restart = [
+                name for name in self._config.changed_fields(config)
+                if name in RESTART_FIELDS
+            ]
+            if restart:
+                logger.warning(
+                    "Configuration version %s changes %s; these take effect "
+                    "after a restart",
+                    version, ", ".join(restart),
+                )
+        self._config = config
+        self._routing = config.routing()
+        self.version = version
+        logger.info("Loaded configuration version %s", version)
+        if self.on_change is not None:
+            self.on_change(config)
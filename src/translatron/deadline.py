@@ -0,0 +1,146 @@
+# src/translatron/deadline.py
+"""Request deadlines derived from the Lambda context.
+
+A webhook invocation has a hard time limit; work that cannot finish before
+it is wasted (and for Twilio, a late response is as bad as none). The
+deadline for the current request is kept in a context variable so that
+retries and other helpers deep in the call stack can respect it without
+threading it through every signature.
+"""
+import contextlib
+import contextvars
+import time
+from typing import Any, Callable, Iterator, Optional
+
+# shortest timeout handed to a blocking call: a timeout of 0 would make a
+# socket non-blocking instead of failing
+MIN_TIMEOUT = 0.01
+
+
+class DeadlineExceededError(Exception):
+    """Raised when there is not enough time left to do some work."""
+
+
+class Deadline:
+    """A point in time by which the current request must be finished.
+
+    Parameters
+    ==========
+    expires_at: float
+        Expiry time, as a value of ``clock``.
+    clock: Callable[[], float]
+        Monotonic clock.
+    """
+
+    def __init__(
+        self,
+        expires_at: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.expires_at = expires_at
+        self.clock = clock
+
+    @classmethod
+    def from_timeout(
+        cls, seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> "Deadline":
+        return cls(clock() + seconds, clock=clock)
+
+    @classmethod
+    def from_context(
+        cls,
+        context: Any,
+        safety_margin: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> Optional["Deadline"]:
+        """Deadline from a Lambda context, or None outside Lambda.
+
+        ``safety_margin`` seconds are kept back so the handler can still
+        log and respond after the deadline passes.
+        """
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining is None:
+            return None
+        remaining = get_remaining() / 1000.0 - safety_margin
+        return cls.from_timeout(max(remaining, 0.0), clock=clock)
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires_at - self.clock()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def child(self, reserve: float) -> "Deadline":
+        """Deadline for a stage that must leave ``reserve`` seconds for
+        the stages after it."""
+        return Deadline(self.expires_at - reserve, clock=self.clock)
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for a single call: ``cap``, or less if time is short.
+
+        Never below ``MIN_TIMEOUT``, even once the deadline has passed;
+        call :meth:`check` first to fail in that case.
+        """
+        return max(MIN_TIMEOUT, min(cap, self.remaining()))
+
+    def check(self, what: str = "operation") -> None:
+        """Raise DeadlineExceededError if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceededError(f"Deadline exceeded before {what}")
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+class DeadlineBudget:
+    """Time reserved for the stages of handling a message.
+
+    Parameters
+    ==========
+    actions: float
+        Seconds kept back for running the actions. Translation stops
+        retrying (and optional languages are skipped) to leave this much.
+    translation: float
+        Expected time for one translation; an optional language is only
+        translated if this much is left on top of the actions' reserve.
+    """
+
+    def __init__(self, actions: float = 1.0, translation: float = 0.5):
+        self.actions = actions
+        self.translation = translation
+
+    def translation_deadline(
+        self, deadline: Optional[Deadline]
+    ) -> Optional[Deadline]:
+        return deadline.child(self.actions) if deadline is not None else None
+
+    def can_translate(self, deadline: Optional[Deadline]) -> bool:
+        return (
+            deadline is None
+            or deadline.remaining() >= self.actions + self.translation
+        )
+
+    def can_act(self, deadline: Optional[Deadline]) -> bool:
+        return deadline is None or deadline.remaining() >= self.actions
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = (
+    contextvars.ContextVar("translatron_deadline", default=None)
+)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the request being handled, if any."""
+    return _current_deadline.get()
+
+
+@contextlib.contextmanager
+def activate(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make ``deadline`` the current deadline within the block."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
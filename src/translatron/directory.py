@@ -0,0 +1,332 @@
+# src/translatron/directory.py
+"""User routing directories.
+
+A :class:`UserDirectory` answers which users belong to a messaging number
+and who should receive a message from a given sender. The
+:class:`DynamoDBUserDirectory` keeps the routing in a table that can be
+edited at runtime: lookups are served from an in-memory snapshot, which is
+replaced in the background when the table's version counter changes, so
+adding a group member takes effect without a redeploy.
+"""
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import (
+    Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+)
+
+logger = logging.getLogger(__name__)
+
+UserInfo = Mapping[str, Mapping[str, Dict[str, str]]]
+
+# key of the item holding the table's version counter
+META_NUMBER = "#meta"
+META_MEMBER = "version"
+
+
+class UserDirectory(ABC):
+    @abstractmethod
+    def members(self, number: str) -> Optional[Mapping[str, Dict[str, str]]]:
+        """Users of messaging number ``number`` (None if unknown), as
+        ``{user_number: {"name": ..., "lang": ...}}``."""
+        pass
+
+    def targets(
+        self, number: str, sender: str
+    ) -> Optional[List[Tuple[str, str]]]:
+        """``(recipient, lang)`` for a message from ``sender`` to the group
+        at ``number``, or None if the number or sender is unknown."""
+        users = self.members(number)
+        if users is None or sender not in users:
+            return None
+        return [
+            (user, info["lang"])
+            for user, info in users.items()
+            if user != sender
+        ]
+
+
+class StaticUserDirectory(UserDirectory):
+    """Directory over a nested ``user_info`` dict.
+
+    The dict is not copied, so changes to it are seen immediately.
+    """
+
+    def __init__(self, user_info: UserInfo):
+        self.user_info = user_info
+
+    def members(self, number: str) -> Optional[Mapping[str, Dict[str, str]]]:
+        return self.user_info.get(number)
+
+
+class Routing(UserDirectory, Mapping):
+    """Routing table compiled for fast lookups by the actions.
+
+    It behaves as the nested ``user_info`` dict, and precomputes for each
+    (messaging number, sender) the list of ``(recipient, lang)`` pairs.
+    """
+
+    def __init__(self, user_info: Dict[str, Dict[str, Dict[str, str]]]):
+        self._user_info = user_info
+        self._targets: Dict[Tuple[str, str], List[Tuple[str, str]]] = {
+            (number, sender): [
+                (user, info["lang"])
+                for user, info in users.items()
+                if user != sender
+            ]
+            for number, users in user_info.items()
+            for sender in users
+        }
+        self.languages = {
+            number: sorted({info["lang"] for info in users.values()})
+            for number, users in user_info.items()
+        }
+        # every language of a user, across numbers
+        self.all_languages = sorted({
+            lang for langs in self.languages.values() for lang in langs
+        })
+
+    def members(self, number: str) -> Optional[Mapping[str, Dict[str, str]]]:
+        return self._user_info.get(number)
+
+    def targets(
+        self, number: str, sender: str
+    ) -> Optional[List[Tuple[str, str]]]:
+        return self._targets.get((number, sender))
+
+    def __getitem__(self, number: str) -> Dict[str, Dict[str, str]]:
+        return self._user_info[number]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._user_info)
+
+    def __len__(self) -> int:
+        return len(self._user_info)
+
+
+def as_directory(user_info: Any) -> UserDirectory:
+    """Wrap a ``user_info`` dict; directories are returned unchanged."""
+    if isinstance(user_info, UserDirectory):
+        return user_info
+    return StaticUserDirectory(user_info)
+
+
+def create_directory_table(table_name: str, dynamodb: Any = None) -> Any:
+    """Create the directory table (for local use and tests).
+
+    Items are keyed by messaging ``number`` and ``member`` (the user's
+    number), and hold the user's ``name`` and ``lang``.
+    """
+    if dynamodb is None:
+        import boto3
+
+        dynamodb = boto3.resource("dynamodb")
+    return dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {"AttributeName": "number", "KeyType": "HASH"},
+            {"AttributeName": "member", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "number", "AttributeType": "S"},
+            {"AttributeName": "member", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+class DynamoDBUserDirectory(UserDirectory):
+    """Routing stored in DynamoDB, served from an in-memory snapshot.
+
+    Every change made through :meth:`put_user` and :meth:`remove_user`
+    also increments a version counter in the table, in the same
+    transaction. A refresh reads only that counter, and scans the table
+    only when it has changed. The snapshot is replaced as a whole, so
+    lookups never see a partial update.
+
+    Parameters
+    ==========
+    table_name: str
+        Table created with :func:`create_directory_table`.
+    refresh_interval: float
+        Seconds between version checks.
+    background: bool
+        Check for changes in a daemon thread. Otherwise (e.g. in Lambda,
+        where threads are frozen between invocations), the check is made
+        on lookup once the interval has passed.
+    on_change: Optional[Callable[[Routing], None]]
+        Called with the new snapshot whenever one has been loaded (also
+        the first time), e.g. to update the target languages.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        refresh_interval: float = 60.0,
+        background: bool = False,
+        on_change: Optional[Callable[[Routing], None]] = None,
+        dynamodb: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if dynamodb is None:
+            import boto3
+
+            dynamodb = boto3.resource("dynamodb")
+        self.table_name = table_name
+        self.table = dynamodb.Table(table_name)
+        self.refresh_interval = refresh_interval
+        self.on_change = on_change
+        self.clock = clock
+        self.version: Optional[int] = None
+        self._routing = Routing({})
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refresh()
+        if background:
+            self.start()
+
+    # ---- lookups -----------------------------------------------------------
+    @property
+    def routing(self) -> Routing:
+        """Current snapshot."""
+        return self._routing
+
+    def members(self, number: str) -> Optional[Mapping[str, Dict[str, str]]]:
+        self._maybe_refresh()
+        return self._routing.members(number)
+
+    def targets(
+        self, number: str, sender: str
+    ) -> Optional[List[Tuple[str, str]]]:
+        self._maybe_refresh()
+        return self._routing.targets(number, sender)
+
+    # ---- refresh -----------------------------------------------------------
+    def read_version(self) -> int:
+        resp = self.table.get_item(
+            Key={"number": META_NUMBER, "member": META_MEMBER},
+            ConsistentRead=True,
+        )
+        return int(resp.get("Item", {}).get("version", 0))
+
+    def load(self) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """Read the whole routing table."""
+        user_info: Dict[str, Dict[str, Dict[str, str]]] = {}
+        kwargs: Dict[str, Any] = {"ConsistentRead": True}
+        while True:
+            resp = self.table.scan(**kwargs)
+            for item in resp.get("Items", []):
+                if item["number"] == META_NUMBER:
+                    continue
+                user_info.setdefault(item["number"], {})[item["member"]] = {
+                    "name": item.get("name", ""),
+                    "lang": item["lang"],
+                }
+            if "LastEvaluatedKey" not in resp:
+                return user_info
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    def refresh(self) -> bool:
+        """Reload the snapshot if the table changed; returns whether it
+        did."""
+        with self._lock:
+            self._checked_at = self.clock()
+            version = self.read_version()
+            if version == self.version:
+                return False
+            # a change between reading the version and the scan is picked
+            # up by the next refresh, since the version will differ again
+            user_info = self.load()
+            routing = self._routing = Routing(user_info)
+            self.version = version
+        logger.info(
+            "Loaded user directory version %s (%d numbers)",
+            version, len(user_info),
+        )
+        if self.on_change is not None:
+            self.on_change(routing)
+        return True
+
+    def _maybe_refresh(self) -> None:
+        if self._thread is not None:
+            return
+        if self.clock() - self._checked_at < self.refresh_interval:
+            return
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Failed to refresh user directory")
+
+    def start(self) -> None:
+        """Check for changes every ``refresh_interval`` in a thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="user-directory", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh user directory")
+
+    def close(self) -> None:
+        """Stop the background refresh."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # ---- edits -------------------------------------------------------------
+    def _write(self, operation: Dict[str, Any]) -> None:
+        bump = {
+            "Update": {
+                "TableName": self.table_name,
+                "Key": {"number": META_NUMBER, "member": META_MEMBER},
+                "UpdateExpression": "ADD version :one",
+                "ExpressionAttributeValues": {":one": 1},
+            }
+        }
+        self.table.meta.client.transact_write_items(
+            TransactItems=[operation, bump]
+        )
+
+    def put_user(
+        self, number: str, member: str, lang: str, name: str = ""
+    ) -> None:
+        """Add or update a member of the group at ``number``."""
+        self._write({
+            "Put": {
+                "TableName": self.table_name,
+                "Item": {
+                    "number": number,
+                    "member": member,
+                    "name": name,
+                    "lang": lang,
+                },
+            }
+        })
+
+    def remove_user(self, number: str, member: str) -> None:
+        self._write({
+            "Delete": {
+                "TableName": self.table_name,
+                "Key": {"number": number, "member": member},
+            }
+        })
+
+    def import_user_info(self, user_info: UserInfo) -> None:
+        """Write all users of a ``user_info`` dict (e.g. when migrating
+        from the ``USER_INFO`` variable)."""
+        for number, users in user_info.items():
+            for member, info in users.items():
+                self.put_user(
+                    number, member, info["lang"], info.get("name", "")
+                )
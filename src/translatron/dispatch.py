@@ -0,0 +1,43 @@
+# src/translatron/dispatch.py
+"""Handing work off to an asynchronous Lambda invocation.
+
+Some work takes longer than a webhook can wait (transcribing a voice
+mail), or should not delay the response (translating deferred
+languages). A dispatcher from :func:`invoke_async` sends the work's
+payload as ``{key: payload}`` to an asynchronous invocation of a Lambda
+function, usually the handler's own, which recognizes the key and does
+the work. Such an event cannot come through a function URL, only from a
+caller allowed to invoke the function, so it carries no Twilio signature.
+"""
+import json
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+Dispatcher = Callable[[Any], Any]
+
+
+def invoke_async(
+    function_name: str, key: str, lambda_client: Any = None
+) -> Dispatcher:
+    """Dispatcher invoking ``function_name`` asynchronously with
+    ``{key: payload}``.
+
+    Payloads must be JSON-serializable; pydantic models are dumped in
+    JSON mode.
+    """
+    if lambda_client is None:
+        import boto3
+
+        lambda_client = boto3.client("lambda")
+
+    def dispatch(payload: Any) -> None:
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump(mode="json")
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType="Event",
+            Payload=json.dumps({key: payload}).encode(),
+        )
+
+    return dispatch
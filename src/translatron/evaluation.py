@@ -0,0 +1,488 @@
+# src/translatron/evaluation.py
+"""Offline comparison of translation providers.
+
+:func:`evaluate` runs each provider over a corpus of (source, reference)
+pairs and reports, side by side:
+
+* quality: corpus chrF and BLEU, with bootstrap confidence intervals;
+* latency: percentiles of the per-call latency at the given concurrency;
+* cost: characters sent to the provider (after caching) and the cost per
+  1000 source characters at the provider's list price.
+
+The n-gram statistics are counted per sentence once, into arrays of shape
+``(sentences, orders)``. Corpus scores, and the scores of all bootstrap
+resamples at once, are then computed from those arrays with NumPy.
+
+A corpus can be a JSONL file (see :func:`read_corpus`) or a sample of
+stored records (see :func:`corpus_from_records`), whose stored
+translations then serve as references. The latter measures agreement
+with the production provider rather than quality, which is still useful
+to see what switching would change.
+
+Requires ``numpy`` (``pip install translatron[evaluation]``).
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+)
+
+from pydantic import BaseModel
+
+from .cache import CachingTranslator
+from .record import TextRecord
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+# list prices in USD per million characters
+PRICES_PER_MILLION = {
+    "amazon": 15.0,
+    "google": 20.0,
+}
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError(
+            "The evaluation requires numpy; install translatron[evaluation]"
+        ) from exc
+    return numpy
+
+
+# ---- corpus ----------------------------------------------------------------
+class Example(BaseModel):
+    source: str
+    reference: str
+    source_lang: Optional[str] = None
+    target_lang: str
+
+
+def read_corpus(path: str) -> List[Example]:
+    """Read a JSONL corpus; each line has ``source``, ``reference``,
+    ``target_lang`` and optionally ``source_lang``."""
+    with open(path, encoding="utf-8") as f:
+        return [Example.model_validate_json(line) for line in f if line.strip()]
+
+
+def corpus_from_records(
+    records: Iterable[TextRecord],
+    target_lang: str,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Example]:
+    """Examples from stored records having a ``target_lang`` translation.
+
+    With ``sample``, a uniform sample of that many examples is drawn in a
+    single pass (reservoir sampling), so the records can be streamed.
+    """
+    def examples() -> Iterator[Example]:
+        for record in records:
+            if record.original_lang == target_lang:
+                continue
+            for translation in record.translations:
+                if translation["lang"] == target_lang:
+                    yield Example(
+                        source=record.original_text,
+                        reference=translation["text"],
+                        source_lang=record.original_lang,
+                        target_lang=target_lang,
+                    )
+                    break
+
+    if sample is None:
+        return list(examples())
+    rng = random.Random(seed)
+    reservoir: List[Example] = []
+    for i, example in enumerate(examples()):
+        if i < sample:
+            reservoir.append(example)
+        else:
+            j = rng.randint(0, i)
+            if j < sample:
+                reservoir[j] = example
+    return reservoir
+
+
+# ---- metrics ---------------------------------------------------------------
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+# bound on the elements of the arrays built per bootstrap chunk
+_BOOTSTRAP_CELLS = 4_000_000
+
+
+def _char_ngrams(text: str, n: int) -> Counter:
+    text = "".join(text.split())
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def _word_ngrams(tokens: Sequence[str], n: int) -> Counter:
+    return Counter(
+        tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)
+    )
+
+
+def chrf_statistics(
+    hypotheses: Sequence[str], references: Sequence[str], order: int = 6
+) -> Tuple[Any, Any, Any]:
+    """Character n-gram ``(matches, hypothesis, reference)`` counts.
+
+    Each array has shape ``(len(hypotheses), order)``; whitespace is
+    ignored, as in chrF.
+    """
+    np = _numpy()
+    stats = np.zeros((3, len(hypotheses), order), dtype=np.int64)
+    for i, (hyp, ref) in enumerate(zip(hypotheses, references)):
+        for n in range(1, order + 1):
+            h, r = _char_ngrams(hyp, n), _char_ngrams(ref, n)
+            stats[0, i, n - 1] = sum((h & r).values())
+            stats[1, i, n - 1] = sum(h.values())
+            stats[2, i, n - 1] = sum(r.values())
+    return stats[0], stats[1], stats[2]
+
+
+def chrf_from_statistics(
+    matches: Any, hyp: Any, ref: Any, beta: float = 2.0
+) -> Any:
+    """chrF (0-100) from summed statistics of shape ``(..., order)``.
+
+    Leading dimensions are kept, so a stack of resampled sums is scored
+    in one call. As in sacreBLEU, precision and recall are averaged over
+    the orders that both sides have n-grams of.
+    """
+    np = _numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = (hyp > 0) & (ref > 0)
+        orders = np.maximum(valid.sum(axis=-1), 1)
+        precision = np.where(valid, matches / hyp, 0.0).sum(axis=-1) / orders
+        recall = np.where(valid, matches / ref, 0.0).sum(axis=-1) / orders
+        b2 = beta ** 2
+        denominator = b2 * precision + recall
+        score = np.where(
+            denominator > 0,
+            (1 + b2) * precision * recall / denominator,
+            0.0,
+        )
+    return 100.0 * score
+
+
+def bleu_statistics(
+    hypotheses: Sequence[str], references: Sequence[str], max_order: int = 4
+) -> Tuple[Any, Any, Any, Any]:
+    """Word n-gram ``(matches, totals)`` of shape ``(sentences,
+    max_order)``, and hypothesis and reference lengths."""
+    np = _numpy()
+    matches = np.zeros((len(hypotheses), max_order), dtype=np.int64)
+    totals = np.zeros_like(matches)
+    hyp_len = np.zeros(len(hypotheses), dtype=np.int64)
+    ref_len = np.zeros_like(hyp_len)
+    for i, (hyp, ref) in enumerate(zip(hypotheses, references)):
+        h_tokens, r_tokens = _TOKEN.findall(hyp), _TOKEN.findall(ref)
+        hyp_len[i], ref_len[i] = len(h_tokens), len(r_tokens)
+        for n in range(1, max_order + 1):
+            h, r = _word_ngrams(h_tokens, n), _word_ngrams(r_tokens, n)
+            matches[i, n - 1] = sum((h & r).values())
+            totals[i, n - 1] = sum(h.values())
+    return matches, totals, hyp_len, ref_len
+
+
+def bleu_from_statistics(
+    matches: Any, totals: Any, hyp_len: Any, ref_len: Any
+) -> Any:
+    """Corpus BLEU (0-100) from summed statistics; ``matches`` and
+    ``totals`` have shape ``(..., max_order)``.
+
+    Orders without any hypothesis n-gram are left out of the geometric
+    mean, since SMS corpora can be too short to have 4-grams at all.
+    """
+    np = _numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = totals > 0
+        log_precision = np.where(
+            valid,
+            np.where(
+                matches > 0,
+                np.log(matches / np.maximum(totals, 1)),
+                -np.inf,
+            ),
+            0.0,
+        )
+        orders = valid.sum(axis=-1)
+        mean = np.where(
+            orders > 0,
+            log_precision.sum(axis=-1) / np.maximum(orders, 1),
+            -np.inf,
+        )
+        brevity = np.where(
+            hyp_len < ref_len, 1.0 - ref_len / np.maximum(hyp_len, 1), 0.0
+        )
+        score = np.exp(mean + np.minimum(brevity, 0.0))
+    return 100.0 * np.where(hyp_len > 0, score, 0.0)
+
+
+def _resampled_sums(
+    stats: Sequence[Any], samples: int, seed: Optional[int]
+) -> List[Any]:
+    """Sums of each statistic over ``samples`` bootstrap resamples of the
+    sentences, with a leading ``samples`` dimension.
+
+    Resamples are drawn in chunks, to bound the size of the intermediate
+    ``(chunk, sentences, ...)`` arrays.
+    """
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    n = len(stats[0])
+    width = max(int(np.prod(s.shape[1:])) for s in stats)
+    chunk = max(1, _BOOTSTRAP_CELLS // (n * width))
+    sums: List[List[Any]] = [[] for _ in stats]
+    for start in range(0, samples, chunk):
+        idx = rng.integers(0, n, size=(min(chunk, samples - start), n))
+        for out, s in zip(sums, stats):
+            out.append(s[idx].sum(axis=1))
+    return [np.concatenate(out) for out in sums]
+
+
+def _interval(scores: Any, confidence: float) -> Tuple[float, float]:
+    np = _numpy()
+    alpha = (1.0 - confidence) / 2 * 100
+    low, high = np.percentile(scores, [alpha, 100 - alpha])
+    return float(low), float(high)
+
+
+class Score(BaseModel):
+    score: float
+    low: float
+    high: float
+
+
+def chrf(
+    hypotheses: Sequence[str],
+    references: Sequence[str],
+    bootstrap: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> Score:
+    """Corpus chrF with a bootstrap confidence interval."""
+    stats = chrf_statistics(hypotheses, references)
+    score = chrf_from_statistics(*(s.sum(axis=0) for s in stats))
+    if bootstrap and len(hypotheses) > 1:
+        scores = chrf_from_statistics(
+            *_resampled_sums(stats, bootstrap, seed)
+        )
+        low, high = _interval(scores, confidence)
+    else:
+        low = high = float(score)
+    return Score(score=float(score), low=low, high=high)
+
+
+def bleu(
+    hypotheses: Sequence[str],
+    references: Sequence[str],
+    bootstrap: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> Score:
+    """Corpus BLEU with a bootstrap confidence interval."""
+    stats = bleu_statistics(hypotheses, references)
+    score = bleu_from_statistics(*(s.sum(axis=0) for s in stats))
+    if bootstrap and len(hypotheses) > 1:
+        scores = bleu_from_statistics(
+            *_resampled_sums(stats, bootstrap, seed)
+        )
+        low, high = _interval(scores, confidence)
+    else:
+        low = high = float(score)
+    return Score(score=float(score), low=low, high=high)
+
+
+# ---- running providers -----------------------------------------------------
+class ProviderReport(BaseModel):
+    provider: str
+    examples: int
+    errors: int
+    chrf: Score
+    bleu: Score
+    # of the successful calls that reached the provider; cache hits and
+    # failures are not included
+    latency_ms: Dict[str, float]
+    characters: int
+    source_characters: int
+    cache_hits: int
+    cost: Optional[float]
+    cost_per_1k_chars: Optional[float]
+    elapsed: float
+
+
+class EvaluationReport(BaseModel):
+    examples: int
+    providers: List[ProviderReport]
+
+    def format_table(self) -> str:
+        """Plain-text comparison, one row per provider."""
+        header = (
+            f"{'provider':<12} {'chrF [95% CI]':>21} {'BLEU [95% CI]':>21} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'chars':>8} "
+            f"{'$/1k chars':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        for r in self.providers:
+            cost = (
+                "n/a" if r.cost_per_1k_chars is None
+                else f"{r.cost_per_1k_chars:.4f}"
+            )
+            chrf = f"{r.chrf.score:6.2f} [{r.chrf.low:5.1f},{r.chrf.high:5.1f}]"
+            bleu = f"{r.bleu.score:6.2f} [{r.bleu.low:5.1f},{r.bleu.high:5.1f}]"
+            lines.append(
+                f"{r.provider:<12} {chrf:>21} {bleu:>21} "
+                f"{r.latency_ms['p50']:8.1f} {r.latency_ms['p99']:8.1f} "
+                f"{r.errors:6d} {r.characters:8d} {cost:>10}"
+            )
+        return "\n".join(lines)
+
+
+def _latency_summary(latencies: Any) -> Dict[str, float]:
+    np = _numpy()
+    if len(latencies) == 0:
+        return dict.fromkeys(["mean", "p50", "p90", "p99", "max"], 0.0)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {
+        "mean": float(latencies.mean()),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "max": float(latencies.max()),
+    }
+
+
+class _TimedTranslator(Translator):
+    """Latency of the successful provider calls, behind the cache."""
+
+    def __init__(self, translator: Translator):
+        self.translator = translator
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+
+    def detect_language(self, text: str) -> str:
+        return self.translator.detect_language(text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        start = time.perf_counter()
+        result = self.translator.translate(
+            text, target_language, detected_language=detected_language
+        )
+        with self._lock:
+            self.latencies.append((time.perf_counter() - start) * 1000.0)
+        return result
+
+
+def evaluate_provider(
+    name: str,
+    translator: Translator,
+    corpus: Sequence[Example],
+    concurrency: int = 8,
+    cache: bool = True,
+    price_per_million: Optional[float] = None,
+    bootstrap: int = 1000,
+    seed: Optional[int] = None,
+) -> ProviderReport:
+    """Translate the corpus with one provider and score it.
+
+    Parameters
+    ==========
+    name: str
+        Provider name in the report; also used to look up the price in
+        :data:`PRICES_PER_MILLION` when ``price_per_million`` is not set.
+    translator: Translator
+        Provider to evaluate.
+    corpus: Sequence[Example]
+        Examples to translate.
+    concurrency: int
+        Number of translations in flight at once.
+    cache: bool
+        Put a :class:`.CachingTranslator` in front of the provider, as in
+        production, so repeated sources are only paid for once.
+    price_per_million: Optional[float]
+        USD per million characters; without a price, no cost is reported.
+    bootstrap: int
+        Number of bootstrap resamples for the confidence intervals.
+    """
+    np = _numpy()
+    timed = _TimedTranslator(translator)
+    counter = CachingTranslator(timed, max_entries=max(len(corpus), 1))
+    if not cache:
+        counter.max_entries = 0
+
+    def run(example: Example) -> Optional[str]:
+        try:
+            return counter.translate(
+                example.source,
+                example.target_lang,
+                detected_language=example.source_lang,
+            )
+        except Exception:
+            logger.warning("%s failed on an example", name, exc_info=True)
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(run, corpus))
+    elapsed = time.perf_counter() - start
+
+    hypotheses = [result or "" for result in results]
+    references = [example.reference for example in corpus]
+    errors = sum(result is None for result in results)
+    latencies = np.array(timed.latencies, dtype=float)
+
+    if price_per_million is None:
+        price_per_million = PRICES_PER_MILLION.get(name)
+    source_characters = sum(len(example.source) for example in corpus)
+    cost = cost_per_1k = None
+    if price_per_million is not None:
+        cost = counter.characters * price_per_million / 1e6
+        if source_characters:
+            cost_per_1k = cost / source_characters * 1000
+
+    return ProviderReport(
+        provider=name,
+        examples=len(corpus),
+        errors=errors,
+        chrf=chrf(hypotheses, references, bootstrap=bootstrap, seed=seed),
+        bleu=bleu(hypotheses, references, bootstrap=bootstrap, seed=seed),
+        latency_ms=_latency_summary(latencies),
+        characters=counter.characters,
+        source_characters=source_characters,
+        cache_hits=counter.hits,
+        cost=cost,
+        cost_per_1k_chars=cost_per_1k,
+        elapsed=elapsed,
+    )
+
+
+def evaluate(
+    providers: Dict[str, Translator],
+    corpus: Sequence[Example],
+    **kwargs: Any,
+) -> EvaluationReport:
+    """Evaluate each provider on the same corpus; see
+    :func:`evaluate_provider` for the options."""
+    _numpy()
+    corpus = list(corpus)
+    return EvaluationReport(
+        examples=len(corpus),
+        providers=[
+            evaluate_provider(name, translator, corpus, **kwargs)
+            for name, translator in providers.items()
+        ],
+    )
+
@@ -0,0 +1,400 @@
+# src/translatron/export.py
+"""Export of stored records to partitioned columnar files.
+
+Analytics on message volume and languages should not scan the production
+table each time. :func:`export_table` copies the table once, with a
+parallel scan, into Parquet (or Arrow IPC) files partitioned Hive-style by
+date and messaging number::
+
+    root/date=2024-05-01/number=%2B15551234567/part-0-00000.parquet
+
+The export streams. Each scan segment has its own
+:class:`PartitionedWriter`, which buffers rows per partition and writes a
+row group whenever ``row_group_size`` rows have accumulated. The total
+number of buffered rows and the number of open files are both bounded, so
+memory stays constant however large the table is.
+:func:`read_export` and :func:`iter_export_records` read the files back,
+with filters on the partitions.
+
+Requires ``pyarrow`` (``pip install translatron[analytics]``).
+"""
+import logging
+import os
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .record import TextRecord
+from .storage import decode_item
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+PARTITION_COLUMNS = ("date", "number")
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError(
+            "Exporting records requires pyarrow; install "
+            "translatron[analytics]"
+        ) from exc
+    return pyarrow
+
+
+def record_schema() -> Any:
+    """Arrow schema of the exported columns (partitions excluded)."""
+    pa = _pyarrow()
+    return pa.schema([
+        ("message_id", pa.string()),
+        ("conversation_id", pa.string()),
+        ("timestamp", pa.string()),
+        ("sender", pa.string()),
+        ("recipient", pa.string()),
+        ("original_lang", pa.string()),
+        ("original_text", pa.string()),
+        ("translations", pa.list_(pa.struct([
+            ("lang", pa.string()),
+            ("text", pa.string()),
+        ]))),
+        ("media_count", pa.int32()),
+        ("deferred_languages", pa.list_(pa.string())),
+        ("is_follow_up", pa.bool_()),
+    ])
+
+
+def partition_of(record: TextRecord) -> Tuple[str, str]:
+    """``(date, messaging number)`` of a record."""
+    return record.timestamp[:10], record.recipient
+
+
+def _row(record: TextRecord) -> Dict[str, Any]:
+    return {
+        "message_id": record.message_id,
+        "conversation_id": record.conversation_id,
+        "timestamp": record.timestamp,
+        "sender": record.sender,
+        "recipient": record.recipient,
+        "original_lang": record.original_lang,
+        "original_text": record.original_text,
+        "translations": [
+            {"lang": t["lang"], "text": t["text"]}
+            for t in record.translations
+        ],
+        "media_count": len(record.media),
+        "deferred_languages": list(record.deferred_languages),
+        "is_follow_up": record.is_follow_up,
+    }
+
+
+def partition_path(date: str, number: str) -> str:
+    """Relative directory of a partition; values are URI-encoded, as
+    pyarrow's Hive partitioning expects."""
+    return os.path.join(*(
+        f"{name}={urllib.parse.quote(value, safe='')}"
+        for name, value in zip(PARTITION_COLUMNS, (date, number))
+    ))
+
+
+class _PartitionFile:
+    def __init__(self, path: str, schema: Any, file_format: str):
+        pa = _pyarrow()
+        self.path = path
+        self.format = file_format
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def write(self, table: Any) -> None:
+        if self.format == "parquet":
+            self._writer.write_table(table, row_group_size=len(table))
+        else:
+            self._writer.write_table(table)
+
+    def close(self) -> None:
+        self._writer.close()
+        if self.format == "arrow":
+            self._sink.close()
+
+
+class PartitionedWriter:
+    """Write records into per-partition files, in bounded memory.
+
+    Parameters
+    ==========
+    root: str
+        Directory of the dataset.
+    file_format: str
+        ``"parquet"`` or ``"arrow"`` (Arrow IPC file).
+    prefix: str
+        Prefix of the file names, unique per concurrent writer (e.g. the
+        scan segment).
+    row_group_size: int
+        Rows of a partition buffered before they are written as a row
+        group (a record batch for Arrow).
+    max_buffered_rows: int
+        Bound on the rows buffered across partitions; above it, the
+        largest buffer is written early.
+    max_open_files: int
+        Bound on the files open at once; the least recently written is
+        closed, and its partition continues in a new file.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        file_format: str = "parquet",
+        prefix: str = "part",
+        row_group_size: int = 10000,
+        max_buffered_rows: int = 100000,
+        max_open_files: int = 64,
+    ):
+        if file_format not in FORMATS:
+            raise ValueError(f"file_format must be one of {list(FORMATS)}")
+        self.root = root
+        self.format = file_format
+        self.prefix = prefix
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max(max_buffered_rows, row_group_size)
+        self.max_open_files = max_open_files
+        self.schema = record_schema()
+        self._buffers: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._buffered = 0
+        # insertion order is the order of last use
+        self._open: Dict[Tuple[str, str], _PartitionFile] = {}
+        self._sequence = 0
+        self.files: List[str] = []
+        self.rows = 0
+
+    def write(self, record: TextRecord) -> None:
+        partition = partition_of(record)
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.append(_row(record))
+        self._buffered += 1
+        self.rows += 1
+        if len(buffer) >= self.row_group_size:
+            self._flush(partition)
+        elif self._buffered > self.max_buffered_rows:
+            largest = max(self._buffers, key=lambda p: len(self._buffers[p]))
+            self._flush(largest)
+
+    def write_all(self, records: Iterable[TextRecord]) -> None:
+        for record in records:
+            self.write(record)
+
+    def _file(self, partition: Tuple[str, str]) -> _PartitionFile:
+        file = self._open.pop(partition, None)
+        if file is None:
+            if len(self._open) >= self.max_open_files:
+                oldest = next(iter(self._open))
+                self._open.pop(oldest).close()
+            extension = FORMATS[self.format]
+            name = f"{self.prefix}-{self._sequence:05d}.{extension}"
+            self._sequence += 1
+            path = os.path.join(self.root, partition_path(*partition), name)
+            file = _PartitionFile(path, self.schema, self.format)
+            self.files.append(path)
+        self._open[partition] = file
+        return file
+
+    def _flush(self, partition: Tuple[str, str]) -> None:
+        rows = self._buffers.pop(partition, [])
+        if not rows:
+            return
+        self._buffered -= len(rows)
+        pa = _pyarrow()
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        self._file(partition).write(table)
+
+    def close(self) -> None:
+        """Write all buffered rows and close the files."""
+        for partition in list(self._buffers):
+            self._flush(partition)
+        for file in self._open.values():
+            file.close()
+        self._open.clear()
+
+    def __enter__(self) -> "PartitionedWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class ExportReport(BaseModel):
+    records: int
+    files: int
+    elapsed: float
+    records_per_second: float
+
+
+def export_table(
+    table_name: str,
+    root: str,
+    segments: int = 4,
+    file_format: str = "parquet",
+    row_group_size: int = 10000,
+    max_buffered_rows: int = 100000,
+    max_open_files: int = 64,
+    page_size: Optional[int] = None,
+    dynamodb: Any = None,
+) -> ExportReport:
+    """Export every record of a table with a parallel scan.
+
+    Each of the ``segments`` scan segments is written by its own
+    :class:`PartitionedWriter`, with file names prefixed by
+    ``part-<segment>``, so a partition holds up to one file per segment
+    (more if files were closed early). The write-buffer bounds apply per
+    segment. Items that are not records are skipped.
+    """
+    _pyarrow()
+    if dynamodb is None:
+        import boto3
+
+        dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(table_name)
+    lock = threading.Lock()
+    files: List[str] = []
+    counts = {"records": 0}
+
+    def export_segment(segment: int) -> None:
+        writer = PartitionedWriter(
+            root,
+            file_format=file_format,
+            prefix=f"part-{segment}",
+            row_group_size=row_group_size,
+            max_buffered_rows=max_buffered_rows,
+            max_open_files=max_open_files,
+        )
+        kwargs: Dict[str, Any] = {
+            "Segment": segment,
+            "TotalSegments": segments,
+        }
+        if page_size is not None:
+            kwargs["Limit"] = page_size
+        with writer:
+            while True:
+                resp = table.scan(**kwargs)
+                for item in resp.get("Items", []):
+                    try:
+                        record = decode_item(item)
+                    except Exception:
+                        logger.warning("Skipping item that is not a record")
+                        continue
+                    writer.write(record)
+                if "LastEvaluatedKey" not in resp:
+                    break
+                kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        with lock:
+            files.extend(writer.files)
+            counts["records"] += writer.rows
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(segments) as executor:
+        list(executor.map(export_segment, range(segments)))
+    elapsed = time.monotonic() - start
+    logger.info(
+        "Exported %d records from %s to %d files",
+        counts["records"], table_name, len(files),
+    )
+    return ExportReport(
+        records=counts["records"],
+        files=len(files),
+        elapsed=elapsed,
+        records_per_second=counts["records"] / elapsed if elapsed else 0.0,
+    )
+
+
+# ---- reading ---------------------------------------------------------------
+def _dataset(root: str, file_format: str) -> Any:
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(
+        pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]),
+        flavor="hive",
+    )
+    return ds.dataset(
+        root, format=file_format, partitioning=partitioning,
+        exclude_invalid_files=True,
+    )
+
+
+def _filter(
+    dates: Optional[Tuple[Optional[str], Optional[str]]],
+    numbers: Optional[Iterable[str]],
+) -> Any:
+    import pyarrow.dataset as ds
+
+    expression = None
+
+    def combine(condition):
+        return condition if expression is None else expression & condition
+
+    if dates is not None:
+        start, end = dates
+        if start is not None:
+            expression = combine(ds.field("date") >= start)
+        if end is not None:
+            expression = combine(ds.field("date") <= end)
+    if numbers is not None:
+        expression = combine(ds.field("number").isin(list(numbers)))
+    return expression
+
+
+def read_export(
+    root: str,
+    columns: Optional[List[str]] = None,
+    dates: Optional[Tuple[Optional[str], Optional[str]]] = None,
+    numbers: Optional[Iterable[str]] = None,
+    file_format: str = "parquet",
+) -> Any:
+    """Read an export as a ``pyarrow.Table``.
+
+    Parameters
+    ==========
+    root: str
+        Directory written by :func:`export_table`.
+    columns: Optional[List[str]]
+        Columns to read (the partition columns ``date`` and ``number``
+        included); by default all.
+    dates: Optional[Tuple[Optional[str], Optional[str]]]
+        Inclusive ``(first, last)`` date range, as ``YYYY-MM-DD``; either
+        end can be None. Partitions outside it are not read.
+    numbers: Optional[Iterable[str]]
+        Messaging numbers to read.
+    file_format: str
+        Format the export was written in.
+    """
+    dataset = _dataset(root, file_format)
+    return dataset.to_table(
+        columns=columns, filter=_filter(dates, numbers)
+    )
+
+
+def iter_export_records(
+    root: str,
+    dates: Optional[Tuple[Optional[str], Optional[str]]] = None,
+    numbers: Optional[Iterable[str]] = None,
+    file_format: str = "parquet",
+) -> Iterator[TextRecord]:
+    """Stream the records of an export, one record batch at a time.
+
+    Media are exported as a count only, so the records have no media.
+    """
+    dataset = _dataset(root, file_format)
+    fields = set(TextRecord.model_fields)
+    for batch in dataset.to_batches(filter=_filter(dates, numbers)):
+        for row in batch.to_pylist():
+            yield TextRecord(**{k: v for k, v in row.items() if k in fields})
@@ -0,0 +1,309 @@
+# src/translatron/failover.py
+"""Failover and hedging across several translation providers."""
+import collections
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+
+class AllProvidersFailedError(Exception):
+    """Raised when no provider could complete a request."""
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    the provider is skipped. Once ``reset_timeout`` seconds have passed, the
+    breaker is half-open: a single trial request is allowed through, and its
+    outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to this provider now."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if (
+                self._opened_at is not None
+                or self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self.clock()
+
+
+class ProviderStats:
+    """Rolling call statistics for a single provider."""
+
+    def __init__(self, window: int = 100):
+        self._lock = threading.Lock()
+        self.latencies: Deque[float] = collections.deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record(self, latency: float, success: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            if success:
+                self.latencies.append(latency)
+            else:
+                self.failures += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        idx = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[idx]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+        }
+
+
+class FailoverTranslator(Translator):
+    """Translator that fails over and hedges across several providers.
+
+    Providers are tried in the order given. A provider whose circuit breaker
+    is open is skipped. If the active provider hasn't answered within its
+    recent p95 latency, the next healthy provider is fired as well, and
+    whichever returns first wins; a failure immediately starts the next
+    provider. Tail latency is therefore bounded by the fastest healthy
+    provider rather than by the slowest.
+
+    Parameters
+    ==========
+    providers: Dict[str, Translator]
+        Named providers, in priority order, e.g.
+        ``{"amazon": AmazonTranslator(), "local": NonTranslator()}``.
+    hedge_quantile: float
+        Latency quantile of the active provider after which the next
+        provider is fired.
+    default_hedge_delay: float
+        Hedge delay (seconds) used until a provider has ``min_samples``
+        successful calls.
+    min_hedge_delay: float
+        Lower bound for the hedge delay, so that a very fast provider does
+        not cause every request to be hedged.
+    failure_threshold, reset_timeout:
+        Circuit breaker settings (see :class:`.CircuitBreaker`).
+    max_workers: int
+        Size of the thread pool used for provider calls.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Translator],
+        hedge_quantile: float = 0.95,
+        default_hedge_delay: float = 1.0,
+        min_hedge_delay: float = 0.05,
+        min_samples: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_workers: int = 8,
+    ):
+        if not providers:
+            raise ValueError("At least one provider is required")
+        self.providers = dict(providers)
+        self.hedge_quantile = hedge_quantile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold, reset_timeout)
+            for name in self.providers
+        }
+        self.stats = {name: ProviderStats() for name in self.providers}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="translatron-failover"
+        )
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait on provider ``name`` before hedging."""
+        stats = self.stats[name]
+        if len(stats.latencies) < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, stats.quantile(self.hedge_quantile))
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        """Breaker state and rolling stats for each provider."""
+        return {
+            name: {"state": self.breakers[name].state, **stats.as_dict()}
+            for name, stats in self.stats.items()
+        }
+
+    def _run(self, name: str, method: str, *args, **kwargs) -> Any:
+        provider = self.providers[name]
+        start = time.monotonic()
+        try:
+            result = getattr(provider, method)(*args, **kwargs)
+        except Exception:
+            self.stats[name].record(time.monotonic() - start, success=False)
+            self.breakers[name].record_failure()
+            raise
+        self.stats[name].record(time.monotonic() - start, success=True)
+        self.breakers[name].record_success()
+        return result
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        remaining = list(self.providers)
+        in_flight = {}  # future -> provider name
+        errors: Dict[str, Exception] = {}
+
+        def launch_next() -> Optional[str]:
+            while remaining:
+                name = remaining.pop(0)
+                if self.breakers[name].allow():
+                    # run in a copy of this context (e.g. the deadline)
+                    context = contextvars.copy_context()
+                    future = self._executor.submit(
+                        context.run, self._run, name, method, *args, **kwargs
+                    )
+                    in_flight[future] = name
+                    return name
+                logger.debug("Skipping provider %s: circuit open", name)
+            return None
+
+        active = launch_next()
+        if active is None:
+            raise AllProvidersFailedError(
+                f"No healthy provider available for {method}"
+            )
+
+        while in_flight:
+            timeout = self.hedge_delay(active) if remaining else None
+            done, _ = wait(
+                list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED
+            )
+            if not done:
+                # active provider is slow: hedge with the next one
+                hedged = launch_next()
+                if hedged is not None:
+                    logger.info(
+                        "Hedging %s call from %s to %s",
+                        method,
+                        active,
+                        hedged,
+                    )
+                    self.stats[active].hedges += 1
+                    active = hedged
+                continue
+
+            for future in done:
+                name = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    logger.warning("Provider %s failed: %s", name, exc)
+                    errors[name] = exc
+                    continue
+                self.stats[name].wins += 1
+                return result
+
+            # a provider failed; start the next one without waiting
+            if remaining:
+                active = launch_next() or active
+
+        raise AllProvidersFailedError(
+            f"All providers failed for {method}: {errors}"
+        )
+
+    def detect_language(self, text: str) -> str:
+        return self._call("detect_language", text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        return self._call(
+            "translate",
+            text,
+            target_language,
+            detected_language=detected_language,
+        )
+
+    @property
+    def supports_batch(self) -> bool:
+        """Whether the first provider, normally the one that answers,
+        has a native batch API."""
+        return next(iter(self.providers.values())).supports_batch
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        return self._call(
+            "translate_batch",
+            texts,
+            target_language,
+            detected_language=detected_language,
+        )
+
+    def close(self) -> None:
+        """Shut down the worker pool without waiting for hedged losers."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
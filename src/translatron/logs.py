@@ -0,0 +1,217 @@
+# src/translatron/logs.py
+"""Structured, sampled logging of handled messages.
+
+By default every stage of the pipeline logs its own lines. In the
+structured mode set up by :func:`configure_logging`, the detailed
+``translatron`` loggers are raised to WARNING and each handled message
+produces a single JSON line on the ``translatron.messages`` logger. That
+line has the stage timings and no message content, and phone numbers are
+redacted. The full (redacted) record is added for a sampled fraction of
+messages only. Since all other log calls format lazily, disabled detail
+lines cost little more than a level check.
+"""
+import contextlib
+import datetime
+import json
+import logging
+import random
+import sys
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO
+
+from .record import TextRecord
+
+message_logger = logging.getLogger("translatron.messages")
+
+
+def redact_number(number: str, keep: int = 4) -> str:
+    """Mask all but the last ``keep`` digits of a phone number."""
+    if len(number) <= keep:
+        return "*" * len(number)
+    prefix = "+" if number.startswith("+") else ""
+    hidden = len(number) - keep - len(prefix)
+    return f"{prefix}{'*' * hidden}{number[-keep:]}"
+
+
+def redact_text(text: str) -> str:
+    """Replace message content by its length."""
+    return f"<{len(text)} chars>"
+
+
+def redact_url(url: str) -> str:
+    """Keep only the scheme and host of a URL; media URLs give access to
+    the content."""
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/<redacted>"
+
+
+class Redactor:
+    """Remove personal data from what is logged.
+
+    Parameters
+    ==========
+    numbers: bool
+        Mask phone numbers (all but the last four digits).
+    text: bool
+        Replace message content and translations by their length, and
+        media descriptions and URLs likewise.
+    """
+
+    def __init__(self, numbers: bool = True, text: bool = True):
+        self.numbers = numbers
+        self.text = text
+
+    def number(self, number: str) -> str:
+        return redact_number(number) if self.numbers else number
+
+    def content(self, text: str) -> str:
+        return redact_text(text) if self.text else text
+
+    def record(self, record: TextRecord) -> Dict[str, Any]:
+        data = record.model_dump()
+        data["sender"] = self.number(record.sender)
+        data["recipient"] = self.number(record.recipient)
+        data["original_text"] = self.content(record.original_text)
+        data["translations"] = [
+            {"lang": t["lang"], "text": self.content(t["text"])}
+            for t in record.translations
+        ]
+        if self.text:
+            for item in data["media"]:
+                item["url"] = redact_url(item["url"])
+                if item["description"] is not None:
+                    item["description"] = redact_text(item["description"])
+        return data
+
+
+class LogConfig:
+    """Settings of the structured message log.
+
+    Parameters
+    ==========
+    sample_rate: float
+        Fraction of messages whose (redacted) record is included in the
+        message line.
+    redactor: Optional[Redactor]
+        Redaction applied to everything in the message line; by default
+        numbers and content are both redacted.
+    seed: Optional[int]
+        Seed for the sampling.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        redactor: Optional[Redactor] = None,
+        seed: Optional[int] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.redactor = redactor or Redactor()
+        self._rng = random.Random(seed)
+
+    def sample(self) -> bool:
+        return self.sample_rate > 0 and self._rng.random() < self.sample_rate
+
+
+class MessageLog:
+    """Fields and stage timings for the log line of one message.
+
+    ``record`` is summarized in the line once it has been set.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.fields: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self.record: Optional[TextRecord] = None
+
+    def set(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block; repeated stages add up."""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = (self.clock() - start) * 1000.0
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **self.fields,
+            "timings_ms": {k: round(v, 3) for k, v in self.timings.items()},
+            "total_ms": round((self.clock() - self.start) * 1000.0, 3),
+        }
+
+    def emit(self, config: LogConfig, level: int = logging.INFO) -> None:
+        """Write the message line, with a sampled copy of the record."""
+        if not message_logger.isEnabledFor(level):
+            return
+        redactor = config.redactor
+        record = self.record
+        if record is not None:
+            self.set(
+                message_id=record.message_id,
+                sender=redactor.number(record.sender),
+                recipient=redactor.number(record.recipient),
+                original_lang=record.original_lang,
+                chars=len(record.original_text),
+                translations=len(record.translations),
+                deferred=len(record.deferred_languages),
+                media=len(record.media),
+            )
+            if config.sample():
+                self.set(record=redactor.record(record))
+        message_logger.log(
+            level, "message handled", extra={"fields": self.as_dict()}
+        )
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including ``extra={"fields": ...}``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+def configure_logging(
+    structured: bool = True,
+    level: int = logging.INFO,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """Set up the root handler for a Lambda or server process.
+
+    In structured mode, output is JSON, only the per-message lines (and
+    warnings) are logged at ``level``, and detail logging is off.
+    Otherwise, all ``translatron`` logs are written as text at ``level``.
+    """
+    root = logging.getLogger()
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler(stream or sys.stderr))
+    for handler in root.handlers:
+        if structured:
+            handler.setFormatter(JsonFormatter())
+    root.setLevel(level)
+
+    package_logger = logging.getLogger("translatron")
+    if structured:
+        package_logger.setLevel(max(level, logging.WARNING))
+        message_logger.setLevel(level)
+    else:
+        package_logger.setLevel(level)
+        message_logger.setLevel(logging.NOTSET)
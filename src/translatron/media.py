@@ -0,0 +1,287 @@
+# src/translatron/media.py
+"""MMS media: parallel download, content hashing and deduplicated storage.
+
+Twilio posts ``NumMedia`` plus a ``MediaUrlN``/``MediaContentTypeN`` pair for
+each attachment. Group threads are often photo-heavy, so attachments are
+fetched concurrently; each is identified by the SHA-256 of its content, so
+the same photo forwarded to (or by) several people is only stored once.
+"""
+import base64
+import contextvars
+import hashlib
+import logging
+import mimetypes
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .deadline import current_deadline
+from .record import MediaItem
+
+logger = logging.getLogger(__name__)
+
+# Twilio rejects MMS media over 5 MB, so anything larger is unexpected
+MAX_MEDIA_BYTES = 5 * 1024 * 1024
+
+
+class MediaTooLargeError(Exception):
+    pass
+
+
+def parse_media_params(params: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+    """Return (url, content_type) for each attachment in a Twilio webhook."""
+    try:
+        num_media = int(params.get("NumMedia", ["0"])[0] or 0)
+    except ValueError:
+        logger.warning("Invalid NumMedia: %s", params.get("NumMedia"))
+        return []
+
+    media = []
+    for n in range(num_media):
+        url = params.get(f"MediaUrl{n}", [""])[0]
+        if not url:
+            continue
+        content_type = params.get(
+            f"MediaContentType{n}", ["application/octet-stream"]
+        )[0]
+        media.append((url, content_type))
+    return media
+
+
+class ScopedAuthRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follow redirects without sending credentials to another host.
+
+    urllib copies every header of a request to its redirect. Twilio media
+    and recording URLs redirect to S3 or a CDN, which must not see the
+    account credentials, and presigned S3 URLs reject requests that carry
+    an ``Authorization`` header.
+    """
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new is not None and (
+            urllib.parse.urlsplit(newurl).netloc
+            != urllib.parse.urlsplit(req.full_url).netloc
+        ):
+            new.remove_header("Authorization")
+        return new
+
+
+def build_opener(*handlers: Any) -> urllib.request.OpenerDirector:
+    """urllib opener that keeps credentials to the original host."""
+    return urllib.request.build_opener(ScopedAuthRedirectHandler, *handlers)
+
+
+def open_url(
+    url: str,
+    auth: Optional[Tuple[str, str]] = None,
+    timeout: float = 30.0,
+    opener: Optional[urllib.request.OpenerDirector] = None,
+) -> Any:
+    """Open ``url``, sending the HTTP basic ``auth`` to its host only."""
+    request = urllib.request.Request(url)
+    if auth is not None:
+        token = base64.b64encode(f"{auth[0]}:{auth[1]}".encode()).decode()
+        request.add_header("Authorization", f"Basic {token}")
+    if opener is None:
+        opener = build_opener()
+    return opener.open(request, timeout=timeout)
+
+
+def fetch_media(
+    url: str,
+    auth: Optional[Tuple[str, str]] = None,
+    max_bytes: int = MAX_MEDIA_BYTES,
+    chunk_size: int = 64 * 1024,
+    timeout: float = 30.0,
+) -> Tuple[bytes, str]:
+    """Download an attachment, returning its content and SHA-256 digest.
+
+    The digest is computed while reading, and the download is abandoned
+    as soon as it exceeds ``max_bytes``. The timeout is shortened to fit
+    the current deadline.
+    """
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check("fetching media")
+        timeout = deadline.timeout(timeout)
+
+    digest = hashlib.sha256()
+    data = bytearray()
+    with open_url(url, auth=auth, timeout=timeout) as response:
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            data += chunk
+            if len(data) > max_bytes:
+                raise MediaTooLargeError(
+                    f"Media at {url} exceeds {max_bytes} bytes"
+                )
+            digest.update(chunk)
+    return bytes(data), digest.hexdigest()
+
+
+class MediaDescriber(ABC):
+    """Produce text for an attachment, e.g. OCR or an image caption."""
+
+    @abstractmethod
+    def describe(self, data: bytes, content_type: str) -> Optional[str]:
+        """Return a description, or None if this media is not supported."""
+        pass
+
+
+class RekognitionTextDescriber(MediaDescriber):
+    """Extract the text in an image with Amazon Rekognition."""
+
+    SUPPORTED_TYPES = ("image/jpeg", "image/png")
+
+    def __init__(self, min_confidence: float = 80.0):
+        import boto3
+
+        self.min_confidence = min_confidence
+        self.client = boto3.client("rekognition")
+
+    def describe(self, data: bytes, content_type: str) -> Optional[str]:
+        if content_type not in self.SUPPORTED_TYPES:
+            return None
+        resp = self.client.detect_text(Image={"Bytes": data})
+        lines = [
+            det["DetectedText"]
+            for det in resp.get("TextDetections", [])
+            if det["Type"] == "LINE"
+            and det.get("Confidence", 0) >= self.min_confidence
+        ]
+        return "\n".join(lines) or None
+
+
+class S3MediaStore:
+    """Content-addressed media storage in S3.
+
+    Objects are keyed by their SHA-256, so an upload is skipped whenever
+    the object already exists.
+    """
+
+    def __init__(
+        self, bucket: str, prefix: str = "media/", s3_client: Any = None
+    ):
+        if s3_client is None:
+            import boto3
+
+            s3_client = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3_client = s3_client
+
+    def object_key(self, sha256: str, content_type: str) -> str:
+        ext = mimetypes.guess_extension(content_type) or ""
+        return f"{self.prefix}{sha256}{ext}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return False
+            raise
+        return True
+
+    def store(self, data: bytes, sha256: str, content_type: str) -> str:
+        """Upload unless already present; returns the object key."""
+        key = self.object_key(sha256, content_type)
+        if self.exists(key):
+            logger.info("Media %s already stored", sha256)
+            return key
+        self.s3_client.put_object(
+            Bucket=self.bucket, Key=key, Body=data, ContentType=content_type
+        )
+        return key
+
+
+class MediaProcessor:
+    """Fetch, hash, store and (optionally) describe MMS attachments.
+
+    Parameters
+    ==========
+    store: Optional[S3MediaStore]
+        Where to keep the media. If None, media is hashed but not stored.
+    describer: Optional[MediaDescriber]
+        Optional OCR/captioning of each attachment.
+    max_workers: int
+        Number of attachments processed concurrently.
+    max_bytes: int
+        Maximum size of a single attachment.
+    """
+
+    def __init__(
+        self,
+        store: Optional[S3MediaStore] = None,
+        describer: Optional[MediaDescriber] = None,
+        max_workers: int = 4,
+        max_bytes: int = MAX_MEDIA_BYTES,
+    ):
+        self.store = store
+        self.describer = describer
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+
+    def fetch(
+        self, url: str, auth: Optional[Tuple[str, str]]
+    ) -> Tuple[bytes, str]:
+        return fetch_media(url, auth=auth, max_bytes=self.max_bytes)
+
+    def process_one(
+        self,
+        url: str,
+        content_type: str,
+        auth: Optional[Tuple[str, str]] = None,
+    ) -> MediaItem:
+        data, sha256 = self.fetch(url, auth)
+        s3_key = None
+        if self.store is not None:
+            s3_key = self.store.store(data, sha256, content_type)
+        description = None
+        if self.describer is not None:
+            description = self.describer.describe(data, content_type)
+        return MediaItem(
+            url=url,
+            content_type=content_type,
+            sha256=sha256,
+            size=len(data),
+            s3_key=s3_key,
+            description=description,
+        )
+
+    def __call__(
+        self,
+        media: List[Tuple[str, str]],
+        auth: Optional[Tuple[str, str]] = None,
+    ) -> List[MediaItem]:
+        """Process all attachments concurrently, preserving their order.
+
+        An attachment that fails is logged and left out, so one broken
+        image does not drop the message.
+        """
+        if not media:
+            return []
+
+        def run(item: Tuple[str, str]) -> Optional[MediaItem]:
+            url, content_type = item
+            try:
+                return self.process_one(url, content_type, auth)
+            except Exception:
+                logger.exception("Failed to process media %s", url)
+                return None
+
+        # each worker runs in a copy of this context (e.g. the deadline)
+        contexts = [contextvars.copy_context() for _ in media]
+        workers = min(self.max_workers, len(media))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(lambda ctx, item: ctx.run(run, item), contexts, media)
+            )
+        return [item for item in results if item is not None]
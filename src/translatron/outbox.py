@@ -0,0 +1,494 @@
+# src/translatron/outbox.py
+"""Transactional outbox for actions.
+
+Instead of running the actions inside the webhook, :class:`Outbox` writes
+one pending *delivery* per (action, recipient) to DynamoDB in a single
+transaction, and the webhook returns immediately. A separate drain entry
+point (:class:`OutboxWorker`) claims pending deliveries in batches,
+performs them concurrently and records the outcome.
+
+Each delivery moves through ``pending -> in_progress -> done``, or back to
+``pending`` with a backoff after a failure, until ``max_attempts`` is
+reached and it is marked ``failed``. Claims are conditional writes, so a
+delivery is only ever held by one worker; a worker that dies holding a
+claim loses it when its lease expires. Bookkeeping is exactly-once per
+recipient, but a crash between sending and recording the result can
+repeat that one send after the lease expires.
+
+In Lambda, the worker stops claiming batches when too little of the
+invocation is left to finish one, and the lease must outlast the
+invocation, so a timeout never leaves claimed deliveries to be sent
+twice.
+"""
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .actions import ActionBase
+from .deadline import Deadline
+from .record import TextRecord
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+STATUS_INDEX = "status-index"
+
+_CONDITION_FAILED = "ConditionalCheckFailedException"
+
+# DynamoDB transactions are limited to 100 items
+_MAX_TRANSACTION_ITEMS = 100
+
+
+def action_name(action: ActionBase) -> str:
+    """Name used to match a delivery to its action when draining."""
+    return getattr(action, "name", None) or type(action).__name__
+
+
+def delivery_id(
+    record: TextRecord, action: str, delivery: Dict[str, str]
+) -> str:
+    suffix = "#follow-up" if record.is_follow_up else ""
+    return f"{record.message_id}#{action}#{delivery.get('to', '*')}{suffix}"
+
+
+def create_outbox_table(table_name: str, dynamodb: Any = None) -> Any:
+    """Create the outbox table (for local use and tests).
+
+    The table is keyed by ``delivery_id``, with a ``status-index`` GSI on
+    (``status``, ``next_attempt_at``) used to find deliveries that are due.
+    """
+    if dynamodb is None:
+        import boto3
+
+        dynamodb = boto3.resource("dynamodb")
+    return dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[{"AttributeName": "delivery_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "delivery_id", "AttributeType": "S"},
+            {"AttributeName": "status", "AttributeType": "S"},
+            {"AttributeName": "next_attempt_at", "AttributeType": "N"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": STATUS_INDEX,
+                "KeySchema": [
+                    {"AttributeName": "status", "KeyType": "HASH"},
+                    {"AttributeName": "next_attempt_at", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+class DrainReport(BaseModel):
+    """Outcome of one call to :meth:`OutboxWorker.drain`."""
+
+    claimed: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+class Outbox:
+    """DynamoDB-backed outbox of pending deliveries.
+
+    Parameters
+    ==========
+    table_name: str
+        Outbox table; see :func:`create_outbox_table` for the schema.
+    retention: Optional[int]
+        If given, seconds after which finished deliveries expire (written
+        to the ``expires_at`` attribute for DynamoDB TTL).
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        retention: Optional[int] = 7 * 24 * 3600,
+        dynamodb: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if dynamodb is None:
+            import boto3
+
+            dynamodb = boto3.resource("dynamodb")
+        self.table_name = table_name
+        self.table = dynamodb.Table(table_name)
+        self.client = self.table.meta.client
+        self.retention = retention
+        self.clock = clock
+
+    def enqueue(
+        self, record: TextRecord, actions: List[ActionBase]
+    ) -> List[str]:
+        """Durably write one pending delivery per action and recipient.
+
+        Deliveries already in the outbox are left as they are, so
+        re-enqueueing a record is a no-op. DynamoDB transactions hold at
+        most 100 items, so only each chunk of 100 deliveries is atomic: if
+        enqueueing fails part way, the chunks before the failure are
+        enqueued, and enqueueing the record again adds the rest. Returns
+        the delivery IDs.
+        """
+        now = self.clock()
+        record_json = record.model_dump_json()
+        items = []
+        for action in actions:
+            name = action_name(action)
+            for delivery in action.deliveries(record):
+                item = {
+                    "delivery_id": delivery_id(record, name, delivery),
+                    "message_id": record.message_id,
+                    "action": name,
+                    "delivery": json.dumps(delivery),
+                    "record": record_json,
+                    "status": PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": _decimal(now),
+                    "created_at": _decimal(now),
+                }
+                items.append(item)
+
+        for start in range(0, len(items), _MAX_TRANSACTION_ITEMS):
+            self._put_new(
+                record, items[start : start + _MAX_TRANSACTION_ITEMS]
+            )
+        logger.info(
+            "Enqueued %d deliveries for %s", len(items), record.message_id
+        )
+        return [item["delivery_id"] for item in items]
+
+    def _put_new(
+        self, record: TextRecord, items: List[Dict[str, Any]]
+    ) -> None:
+        """Put the items that do not exist yet, in one transaction.
+
+        If the transaction is cancelled only because some items exist, it
+        is retried without them; any other cancellation is raised.
+        """
+        from botocore.exceptions import ClientError
+
+        while items:
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[
+                        {
+                            "Put": {
+                                "TableName": self.table_name,
+                                # the resource's client serializes values
+                                "Item": item,
+                                "ConditionExpression": (
+                                    "attribute_not_exists(delivery_id)"
+                                ),
+                            }
+                        }
+                        for item in items
+                    ]
+                )
+            except ClientError as exc:
+                if (exc.response["Error"]["Code"]
+                        != "TransactionCanceledException"):
+                    raise
+                reasons = exc.response.get("CancellationReasons", [])
+                codes = [reason.get("Code", "None") for reason in reasons]
+                existing = {
+                    i for i, code in enumerate(codes)
+                    if code == "ConditionalCheckFailed"
+                }
+                if not existing or any(
+                    code not in ("None", "ConditionalCheckFailed")
+                    for code in codes
+                ):
+                    raise
+                logger.warning(
+                    "%d deliveries for %s already enqueued",
+                    len(existing), record.message_id,
+                )
+                items = [
+                    item for i, item in enumerate(items) if i not in existing
+                ]
+                continue
+            return
+
+    def get(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        resp = self.table.get_item(Key={"delivery_id": delivery_id})
+        return resp.get("Item")
+
+    def due(self, status: str, limit: int) -> List[Dict[str, Any]]:
+        """Deliveries in ``status`` whose ``next_attempt_at`` has passed."""
+        from boto3.dynamodb.conditions import Key
+
+        resp = self.table.query(
+            IndexName=STATUS_INDEX,
+            KeyConditionExpression=(
+                Key("status").eq(status)
+                & Key("next_attempt_at").lte(_decimal(self.clock()))
+            ),
+            Limit=limit,
+        )
+        return resp.get("Items", [])
+
+    def claim(
+        self, item: Dict[str, Any], lease_seconds: float
+    ) -> Optional[str]:
+        """Take ownership of a delivery; returns a claim token or None.
+
+        The write is conditional on the status and ``next_attempt_at``
+        being unchanged since ``item`` was read, so when several workers
+        race for a delivery only one wins. For an in-progress delivery,
+        ``next_attempt_at`` is the lease expiry.
+        """
+        from botocore.exceptions import ClientError
+
+        token = str(uuid.uuid4())
+        try:
+            self.table.update_item(
+                Key={"delivery_id": item["delivery_id"]},
+                UpdateExpression=(
+                    "SET #s = :in_progress, claim_token = :token, "
+                    "next_attempt_at = :lease, attempts = attempts + :one"
+                ),
+                ConditionExpression=(
+                    "#s = :status AND next_attempt_at = :seen"
+                ),
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={
+                    ":in_progress": IN_PROGRESS,
+                    ":token": token,
+                    ":lease": _decimal(self.clock() + lease_seconds),
+                    ":one": 1,
+                    ":status": item["status"],
+                    ":seen": item["next_attempt_at"],
+                },
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] == _CONDITION_FAILED:
+                return None
+            raise
+        return token
+
+    def complete(
+        self,
+        delivery_id: str,
+        token: str,
+        status: str,
+        next_attempt_at: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Record the outcome of a claimed delivery.
+
+        Returns False if the claim was lost (the lease expired and another
+        worker took over), in which case nothing is written.
+        """
+        from botocore.exceptions import ClientError
+
+        updates = ["#s = :status", "next_attempt_at = :next"]
+        values = {
+            ":status": status,
+            ":token": token,
+            ":next": _decimal(
+                next_attempt_at if next_attempt_at is not None else self.clock()
+            ),
+        }
+        if error is not None:
+            updates.append("last_error = :error")
+            values[":error"] = error[:1000]
+        if status in (DONE, FAILED) and self.retention is not None:
+            updates.append("expires_at = :expires")
+            values[":expires"] = int(self.clock() + self.retention)
+        try:
+            self.table.update_item(
+                Key={"delivery_id": delivery_id},
+                UpdateExpression="SET " + ", ".join(updates)
+                + " REMOVE claim_token",
+                ConditionExpression="claim_token = :token",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues=values,
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] == _CONDITION_FAILED:
+                logger.warning("Lost claim on delivery %s", delivery_id)
+                return False
+            raise
+        return True
+
+
+class OutboxWorker:
+    """Drain pending deliveries from an :class:`Outbox`.
+
+    Instances are callable with a Lambda ``(event, context)`` signature, so
+    a worker can be used directly as a scheduled (or stream-triggered)
+    Lambda handler.
+
+    Parameters
+    ==========
+    outbox: Outbox
+        Outbox to drain.
+    actions: List[ActionBase]
+        Actions that deliveries are dispatched to, matched by
+        :func:`action_name`.
+    batch_size: int
+        Number of deliveries claimed per batch.
+    max_workers: int
+        Number of deliveries performed concurrently.
+    max_attempts: int
+        Attempts before a delivery is marked failed.
+    base_backoff, max_backoff: float
+        Exponential backoff between attempts, in seconds.
+    lease_seconds: float
+        How long a claim is held before another worker may take over.
+        In Lambda, it must be longer than the function timeout.
+    batch_seconds: float
+        Time reserved for one batch, margin included. No batch is
+        claimed with less than this (or the slowest batch so far) left
+        before the deadline.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        actions: List[ActionBase],
+        batch_size: int = 25,
+        max_workers: int = 4,
+        max_attempts: int = 5,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        lease_seconds: float = 300.0,
+        batch_seconds: float = 15.0,
+    ):
+        self.outbox = outbox
+        self.actions = {action_name(action): action for action in actions}
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease_seconds = lease_seconds
+        self.batch_seconds = batch_seconds
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+
+    def claim_batch(self) -> List[Dict[str, Any]]:
+        """Claim up to ``batch_size`` due deliveries.
+
+        Deliveries whose lease has expired are reclaimed first.
+        """
+        claimed = []
+        for status in (IN_PROGRESS, PENDING):
+            remaining = self.batch_size - len(claimed)
+            if remaining <= 0:
+                break
+            for item in self.outbox.due(status, remaining):
+                token = self.outbox.claim(item, self.lease_seconds)
+                if token is not None:
+                    item["claim_token"] = token
+                    item["attempts"] = int(item["attempts"]) + 1
+                    claimed.append(item)
+        return claimed
+
+    def process(self, item: Dict[str, Any]) -> str:
+        """Perform one claimed delivery; returns the resulting status."""
+        delivery_id = item["delivery_id"]
+        token = item["claim_token"]
+        action = self.actions.get(item["action"])
+        try:
+            if action is None:
+                raise LookupError(f"No action named {item['action']}")
+            record = TextRecord.model_validate_json(item["record"])
+            action.deliver(record, json.loads(item["delivery"]))
+        except Exception as exc:
+            attempts = item["attempts"]
+            if action is None or attempts >= self.max_attempts:
+                logger.error(
+                    "Delivery %s failed after %d attempts: %s",
+                    delivery_id, attempts, exc,
+                )
+                self.outbox.complete(delivery_id, token, FAILED, error=str(exc))
+                return FAILED
+            logger.warning(
+                "Delivery %s failed (attempt %d): %s",
+                delivery_id, attempts, exc,
+            )
+            self.outbox.complete(
+                delivery_id,
+                token,
+                PENDING,
+                next_attempt_at=self.outbox.clock() + self.backoff(attempts),
+                error=str(exc),
+            )
+            return PENDING
+
+        self.outbox.complete(delivery_id, token, DONE)
+        return DONE
+
+    def drain(
+        self,
+        max_batches: Optional[int] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> DrainReport:
+        """Process due deliveries until none remain (or ``max_batches``),
+        claiming no batch that might not finish before ``deadline``."""
+        report = DrainReport()
+        batches = 0
+        slowest = 0.0
+        clock = deadline.clock if deadline is not None else time.monotonic
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while max_batches is None or batches < max_batches:
+                needed = max(self.batch_seconds, slowest)
+                if deadline is not None and deadline.remaining() < needed:
+                    logger.info(
+                        "Stopping drain: %.1fs left, %.1fs needed per batch",
+                        deadline.remaining(), needed,
+                    )
+                    break
+                started = clock()
+                batch = self.claim_batch()
+                if not batch:
+                    break
+                batches += 1
+                report.claimed += len(batch)
+                for status in pool.map(self.process, batch):
+                    if status == DONE:
+                        report.succeeded += 1
+                    elif status == PENDING:
+                        report.retried += 1
+                    else:
+                        report.failed += 1
+                slowest = max(slowest, clock() - started)
+        logger.info("Drained outbox: %s", report)
+        return report
+
+    def __call__(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        deadline = Deadline.from_context(context)
+        if deadline is not None:
+            invocation = context.get_remaining_time_in_millis() / 1000.0
+            if self.lease_seconds <= invocation:
+                raise ValueError(
+                    f"lease_seconds ({self.lease_seconds}) must exceed the "
+                    f"function timeout ({invocation:.0f}s), or deliveries "
+                    "interrupted by the timeout are sent twice"
+                )
+        max_batches = (event or {}).get("max_batches")
+        return self.drain(
+            max_batches=max_batches, deadline=deadline
+        ).model_dump()
+
+
+def _decimal(value: float):
+    """DynamoDB numbers must be Decimals; millisecond precision suffices."""
+    from decimal import Decimal
+
+    return Decimal(str(round(value, 3)))
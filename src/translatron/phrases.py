@@ -0,0 +1,245 @@
+# src/translatron/phrases.py
+"""Prebuilt, memory-mapped phrase tables.
+
+A phrase table maps normalized text to its known source language and its
+translations. Tables are built ahead of time into a compact binary file::
+
+    header   b"TRPHRS01" | uint32 count | uint32 reserved
+    index    count x (uint64 key hash | uint32 offset | uint32 length),
+             sorted by key hash
+    payload  one UTF-8 JSON document per index entry
+
+Opening a table only memory-maps the file, so loading is effectively free
+at cold start and the pages are shared between processes; a lookup is a
+binary search over the index plus decoding of a single small payload.
+"""
+import collections
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .record import TextRecord
+
+MAGIC = b"TRPHRS01"
+_HEADER = struct.Struct("<8sII")
+_INDEX = struct.Struct("<QII")
+
+# punctuation that doesn't change the meaning of a short canned reply
+_STRIP_CHARS = " \t\r\n.,!?;:…¡¿؟،。！？"
+
+
+def normalize_phrase(text: str) -> str:
+    """Normalize text for phrase-table lookup.
+
+    Applies NFKC normalization, case folding, whitespace collapsing, and
+    strips surrounding punctuation, so that "Thanks!" and " thanks" match.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(text.split()).strip(_STRIP_CHARS)
+
+
+def _key_hash(key: str) -> int:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class PhraseEntry(BaseModel):
+    """Known source language and translations for one phrase."""
+
+    source: str
+    translations: Dict[str, str]
+
+
+class PhraseCandidate(PhraseEntry):
+    """Phrase entry mined from message history, with its frequency."""
+
+    count: int
+
+
+def mine_phrases(
+    records: Iterable[TextRecord],
+    min_count: int = 3,
+    max_words: int = 6,
+) -> List[PhraseCandidate]:
+    """Find frequently repeated short messages in stored records.
+
+    Messages are grouped by normalized text and detected language. For each
+    group seen at least ``min_count`` times, the most common spelling of
+    the original and the most common translation into each language are
+    used. Candidates are sorted by frequency; they should be reviewed
+    before being built into a table.
+    """
+    counts: collections.Counter = collections.Counter()
+    spellings = collections.defaultdict(collections.Counter)
+    translations = collections.defaultdict(
+        lambda: collections.defaultdict(collections.Counter)
+    )
+    for record in records:
+        key = normalize_phrase(record.original_text)
+        if not key or len(key.split()) > max_words:
+            continue
+        group = (key, record.original_lang)
+        counts[group] += 1
+        spellings[group][record.original_text.strip()] += 1
+        for translation in record.translations:
+            translations[group][translation["lang"]][translation["text"]] += 1
+
+    candidates = []
+    for (key, lang), count in counts.most_common():
+        if count < min_count:
+            break
+        group = (key, lang)
+        mined = {
+            target: texts.most_common(1)[0][0]
+            for target, texts in translations[group].items()
+        }
+        mined[lang] = spellings[group].most_common(1)[0][0]
+        candidates.append(
+            PhraseCandidate(source=lang, translations=mined, count=count)
+        )
+    return candidates
+
+
+def read_phrase_entries(path: str) -> List[PhraseEntry]:
+    """Read phrase entries from a JSONL file.
+
+    Each line looks like
+    ``{"source": "en", "translations": {"en": "Thanks!", "es": "¡Gracias!"}}``.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [
+            PhraseEntry.model_validate_json(line)
+            for line in f
+            if line.strip()
+        ]
+
+
+class PhraseTable:
+    """Read-only, memory-mapped phrase table.
+
+    Use :func:`load_phrase_table` to share one instance per process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+        magic, self._count, _ = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a translatron phrase table")
+
+    @staticmethod
+    def build(
+        entries: Iterable[PhraseEntry],
+        path: str,
+        index_all_languages: bool = True,
+    ) -> int:
+        """Write a phrase table file; returns the number of keys written.
+
+        Each entry is indexed under its source text. With
+        ``index_all_languages``, it is also indexed under each of its
+        translations (with that language as the source), so a reply in any
+        language of the table is recognized.
+        """
+        records: Dict[Tuple[str, str], bytes] = {}
+        for entry in entries:
+            variants = [entry.source]
+            if index_all_languages:
+                variants += [
+                    lang for lang in entry.translations if lang != entry.source
+                ]
+            for source in variants:
+                text = entry.translations.get(source)
+                if text is None:
+                    continue
+                key = normalize_phrase(text)
+                payload = {
+                    "key": key,
+                    "source": source,
+                    "translations": entry.translations,
+                }
+                records.setdefault(
+                    (key, source),
+                    json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                )
+
+        ordered = sorted(
+            (_key_hash(key), payload)
+            for (key, _), payload in records.items()
+        )
+        offset = _HEADER.size + _INDEX.size * len(ordered)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(ordered), 0))
+            for key_hash, payload in ordered:
+                f.write(_INDEX.pack(key_hash, offset, len(payload)))
+                offset += len(payload)
+            for _, payload in ordered:
+                f.write(payload)
+        os.replace(tmp_path, path)
+        return len(ordered)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index(self, i: int) -> Tuple[int, int, int]:
+        return _INDEX.unpack_from(self._mmap, _HEADER.size + i * _INDEX.size)
+
+    def _candidates(self, key_hash: int) -> Iterator[dict]:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index(mid)[0] < key_hash:
+                lo = mid + 1
+            else:
+                hi = mid
+        i = lo
+        while i < self._count:
+            found_hash, offset, length = self._index(i)
+            if found_hash != key_hash:
+                break
+            yield json.loads(self._mmap[offset : offset + length])
+            i += 1
+
+    def lookup(
+        self, text: str, source: Optional[str] = None
+    ) -> Optional[PhraseEntry]:
+        """Find the entry for ``text``, optionally in a given language."""
+        key = normalize_phrase(text)
+        for payload in self._candidates(_key_hash(key)):
+            if payload["key"] != key:
+                continue  # hash collision
+            if source is not None and payload["source"] != source:
+                continue
+            return PhraseEntry(
+                source=payload["source"],
+                translations=payload["translations"],
+            )
+        return None
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+
+_TABLES: Dict[str, PhraseTable] = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def load_phrase_table(path: str) -> PhraseTable:
+    """Open a phrase table once per process (i.e., once per warm Lambda)."""
+    real_path = os.path.realpath(path)
+    with _TABLES_LOCK:
+        if real_path not in _TABLES:
+            _TABLES[real_path] = PhraseTable(real_path)
+        return _TABLES[real_path]
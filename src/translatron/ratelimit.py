@@ -0,0 +1,386 @@
+# src/translatron/ratelimit.py
+"""Client-side rate limiting and quota budgeting for translation providers.
+
+Limiters are shared by every translator in the process that uses the same
+provider/API pair (see :func:`get_limiter`), so a burst of concurrent group
+messages is smoothed out before it reaches the provider's TPS limit.
+"""
+import datetime
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .deadline import current_deadline
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+# Error codes used by AWS (and Google's HTTP status) to signal throttling
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "LimitExceededException",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+}
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a request can't be made within the configured limits."""
+
+
+def is_throttling_error(exc: Exception) -> bool:
+    """Whether ``exc`` is a provider throttling response."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code")
+        if code in THROTTLING_ERROR_CODES:
+            return True
+    # google.api_core.exceptions.TooManyRequests and similar
+    return getattr(exc, "code", None) == 429
+
+
+class TokenBucket:
+    """Thread-safe token bucket with adaptive (AIMD) rate.
+
+    Parameters
+    ==========
+    rate: float
+        Tokens added per second when the provider is healthy.
+    capacity: float
+        Maximum burst size; by default ``rate``, but at least one token so
+        that rates below 1/s can still acquire.
+    min_rate: float
+        Floor for the adaptive rate after repeated throttling.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last) * self.rate
+        )
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(
+        self, tokens: float = 1.0, timeout: Optional[float] = None
+    ) -> bool:
+        """Block until tokens are available or ``timeout`` expires."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if timeout is not None and waited + wait > timeout:
+                return False
+            self.sleep(wait)
+            waited += wait
+
+    def penalize(self) -> None:
+        """Halve the rate after a throttling response."""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            logger.info("Throttled: reducing rate to %.2f/s", self.rate)
+
+    def reward(self) -> None:
+        """Additively recover toward the configured rate after a success."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(
+                    self.max_rate, self.rate + self.max_rate / 20
+                )
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class CharacterBudget:
+    """Daily character budget, reset at midnight UTC."""
+
+    def __init__(
+        self,
+        daily_limit: int,
+        now: Callable[[], datetime.datetime] = _utcnow,
+    ):
+        self.daily_limit = daily_limit
+        self.now = now
+        self._day = now().date()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def _roll(self) -> None:
+        today = self.now().date()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll()
+            return self.daily_limit - self._used
+
+    def consume(self, characters: int) -> bool:
+        """Reserve characters from today's budget; False if exhausted."""
+        with self._lock:
+            self._roll()
+            if self._used + characters > self.daily_limit:
+                return False
+            self._used += characters
+            return True
+
+    def refund(self, characters: int) -> None:
+        """Return characters whose translation was not billed."""
+        with self._lock:
+            self._roll()
+            self._used = max(0, self._used - characters)
+
+
+_LIMITERS: Dict[Tuple[str, str], TokenBucket] = {}
+_BUDGETS: Dict[str, CharacterBudget] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_limiter(
+    provider: str, api: str, rate: float, capacity: Optional[float] = None
+) -> TokenBucket:
+    """Process-wide limiter for a provider/API pair (e.g. amazon/detect).
+
+    The first caller's settings win; later callers share that bucket, and
+    a warning is logged if they asked for a different rate or capacity.
+    """
+    with _REGISTRY_LOCK:
+        key = (provider, api)
+        if key not in _LIMITERS:
+            _LIMITERS[key] = TokenBucket(rate, capacity)
+        limiter = _LIMITERS[key]
+    if limiter.max_rate != rate or (
+        capacity is not None and limiter.capacity != capacity
+    ):
+        logger.warning(
+            "Limiter for %s/%s already exists with rate=%s capacity=%s; "
+            "ignoring rate=%s capacity=%s",
+            provider, api, limiter.max_rate, limiter.capacity,
+            rate, capacity,
+        )
+    return limiter
+
+
+def get_budget(provider: str, daily_limit: int) -> CharacterBudget:
+    """Process-wide daily character budget for a provider.
+
+    As with :func:`get_limiter`, the first caller's limit wins, and a
+    warning is logged if a later caller asked for a different one.
+    """
+    with _REGISTRY_LOCK:
+        if provider not in _BUDGETS:
+            _BUDGETS[provider] = CharacterBudget(daily_limit)
+        budget = _BUDGETS[provider]
+    if budget.daily_limit != daily_limit:
+        logger.warning(
+            "Budget for %s already exists with daily_limit=%s; "
+            "ignoring daily_limit=%s",
+            provider, budget.daily_limit, daily_limit,
+        )
+    return budget
+
+
+class RateLimitedTranslator(Translator):
+    """Wrap a translator with rate limiting, backoff and a character budget.
+
+    Throttling responses from the provider are retried with exponential
+    backoff (with jitter), and reduce the shared rate for that API. When
+    the limits can't be met, requests go to ``fallback`` if one is given;
+    otherwise :class:`.RateLimitExceededError` is raised.
+
+    Parameters
+    ==========
+    translator: Translator
+        The provider translator to wrap.
+    provider: str
+        Provider name used to share limiters across the process.
+    detect_rate, translate_rate: float
+        Requests per second allowed for each API.
+    daily_characters: Optional[int]
+        Daily character budget for translation; unlimited if None.
+    acquire_timeout: float
+        Maximum seconds to wait for a token before giving up.
+    max_retries: int
+        Retries after a throttling response.
+    base_backoff: float
+        Initial backoff (seconds) after a throttling response.
+    fallback: Optional[Translator]
+        Translator used when the provider can't be called, e.g.
+        :class:`.NonTranslator` to pass the original text through.
+    """
+
+    def __init__(
+        self,
+        translator: Translator,
+        provider: str,
+        detect_rate: float = 20.0,
+        translate_rate: float = 10.0,
+        daily_characters: Optional[int] = None,
+        acquire_timeout: float = 2.0,
+        max_retries: int = 3,
+        base_backoff: float = 0.1,
+        fallback: Optional[Translator] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.translator = translator
+        self.provider = provider
+        self.detect_limiter = get_limiter(provider, "detect", detect_rate)
+        self.translate_limiter = get_limiter(
+            provider, "translate", translate_rate
+        )
+        self.budget = (
+            get_budget(provider, daily_characters)
+            if daily_characters is not None
+            else None
+        )
+        self.acquire_timeout = acquire_timeout
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.fallback = fallback
+        self.sleep = sleep
+
+    def _degrade(self, reason: str, method: str, *args, **kwargs):
+        if self.fallback is None:
+            raise RateLimitExceededError(f"{self.provider} {method}: {reason}")
+        logger.warning(
+            "%s %s unavailable (%s); using fallback",
+            self.provider,
+            method,
+            reason,
+        )
+        return getattr(self.fallback, method)(*args, **kwargs)
+
+    def _refund(self, characters: int) -> None:
+        if self.budget is not None and characters:
+            self.budget.refund(characters)
+
+    def _call(
+        self,
+        limiter: TokenBucket,
+        method: str,
+        *args,
+        refund: int = 0,
+        **kwargs,
+    ):
+        """Call the provider; ``refund`` characters taken from the budget
+        are returned if the provider does not translate them."""
+        deadline = current_deadline()
+        for attempt in range(self.max_retries + 1):
+            timeout = self.acquire_timeout
+            if deadline is not None:
+                timeout = deadline.timeout(timeout)
+            if not limiter.acquire(timeout=timeout):
+                self._refund(refund)
+                return self._degrade("rate limit", method, *args, **kwargs)
+            try:
+                result = getattr(self.translator, method)(*args, **kwargs)
+            except Exception as exc:
+                if not is_throttling_error(exc):
+                    self._refund(refund)
+                    raise
+                limiter.penalize()
+                if attempt == self.max_retries:
+                    break
+                backoff = self.base_backoff * 2**attempt
+                self.sleep(backoff * random.uniform(0.5, 1.0))
+                continue
+            limiter.reward()
+            return result
+
+        self._refund(refund)
+        return self._degrade("throttled", method, *args, **kwargs)
+
+    def detect_language(self, text: str) -> str:
+        return self._call(self.detect_limiter, "detect_language", text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        kwargs = {"detected_language": detected_language}
+        if self.budget is not None and not self.budget.consume(len(text)):
+            return self._degrade(
+                "daily character budget exhausted",
+                "translate",
+                text,
+                target_language,
+                **kwargs,
+            )
+        return self._call(
+            self.translate_limiter,
+            "translate",
+            text,
+            target_language,
+            refund=len(text),
+            **kwargs,
+        )
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.translator.supports_batch
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        """Translate the texts in one provider call, which takes a single
+        token but all of their characters from the budget."""
+        kwargs = {"detected_language": detected_language}
+        characters = sum(len(text) for text in texts)
+        if self.budget is not None and not self.budget.consume(characters):
+            return self._degrade(
+                "daily character budget exhausted",
+                "translate_batch",
+                texts,
+                target_language,
+                **kwargs,
+            )
+        return self._call(
+            self.translate_limiter,
+            "translate_batch",
+            texts,
+            target_language,
+            refund=characters,
+            **kwargs,
+        )
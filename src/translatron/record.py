@@ -1,8 +1,21 @@
 # src/translatron/record.py
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pydantic import BaseModel
 
+from .usage import Usage
+
+
+class MediaItem(BaseModel):
+    """An MMS attachment, identified by the SHA-256 of its content."""
+
+    url: str
+    content_type: str
+    sha256: str
+    size: int
+    s3_key: Optional[str] = None
+    description: Optional[str] = None
+
 
 class TextRecord(BaseModel):
     """
@@ -17,3 +30,10 @@ class TextRecord(BaseModel):
     original_text: str
     translations: List[Dict[str, str]]
     timestamp: str
+    media: List[MediaItem] = []
+    # languages deferred to a follow-up; in the follow-up record itself,
+    # the languages it delivers
+    deferred_languages: List[str] = []
+    is_follow_up: bool = False
+    # billable usage of the message, if stored for accounting
+    usage: Optional[Usage] = None
@@ -0,0 +1,258 @@
+# src/translatron/retry.py
+"""Retries with exponential backoff and jitter.
+
+A :class:`RetryPolicy` describes how to retry (attempts, backoff, which
+exceptions are transient); :class:`RetryingAction` and
+:class:`RetryingTranslator` apply a policy to any action or translator.
+Retries never sleep past the current request's :class:`.Deadline`.
+"""
+import logging
+import random
+import socket
+import time
+import urllib.error
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from .actions import ActionBase
+from .deadline import Deadline, current_deadline
+from .ratelimit import is_throttling_error
+from .record import TextRecord
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# AWS error codes worth retrying besides throttling
+TRANSIENT_AWS_ERROR_CODES = {
+    "InternalServerError",
+    "InternalFailure",
+    "InternalServerException",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "TransactionConflictException",
+}
+
+
+def is_transient_aws_error(exc: BaseException) -> bool:
+    """Throttling, 5xx and connection errors from boto3."""
+    try:
+        from botocore.exceptions import (
+            ClientError,
+            ConnectionClosedError,
+            EndpointConnectionError,
+            ReadTimeoutError,
+        )
+    except ImportError:  # pragma: no cover
+        return False
+
+    if isinstance(
+        exc, (ConnectionClosedError, EndpointConnectionError, ReadTimeoutError)
+    ):
+        return True
+    if isinstance(exc, ClientError):
+        if is_throttling_error(exc):
+            return True
+        error = exc.response.get("Error", {})
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return error.get("Code") in TRANSIENT_AWS_ERROR_CODES or (
+            status is not None and status >= 500
+        )
+    return False
+
+
+def is_transient_twilio_error(exc: BaseException) -> bool:
+    """Twilio 429s and 5xx responses."""
+    try:
+        from twilio.base.exceptions import TwilioRestException
+    except ImportError:  # pragma: no cover
+        return False
+
+    if isinstance(exc, TwilioRestException):
+        return exc.status == 429 or exc.status >= 500
+    return False
+
+
+def is_transient_network_error(exc: BaseException) -> bool:
+    """Connection failures and timeouts; HTTP errors only for 429/5xx."""
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code == 429 or exc.code >= 500
+    return isinstance(
+        exc,
+        (ConnectionError, TimeoutError, socket.timeout, urllib.error.URLError),
+    )
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Default classifier: transient AWS, Twilio or network errors."""
+    return (
+        is_transient_aws_error(exc)
+        or is_transient_twilio_error(exc)
+        or is_transient_network_error(exc)
+        or is_throttling_error(exc)
+    )
+
+
+class RetryPolicy:
+    """How to retry a call.
+
+    The delay before attempt ``n + 1`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * multiplier ** (n - 1))]`` ("full
+    jitter"), which spreads out retries from concurrent invocations that
+    failed together.
+
+    Parameters
+    ==========
+    max_attempts: int
+        Total attempts, including the first.
+    base_delay, max_delay: float
+        Backoff bounds in seconds.
+    multiplier: float
+        Growth of the backoff per attempt.
+    jitter: bool
+        If False, the full backoff is always used.
+    retryable: Callable[[BaseException], bool]
+        Which exceptions are transient; see :func:`is_transient_error`.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 5.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retryable: Callable[[BaseException], bool] = is_transient_error,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryable = retryable
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+    def backoff(self, attempt: int) -> float:
+        """Delay after the ``attempt``-th failure (1-based)."""
+        cap = min(
+            self.max_delay, self.base_delay * self.multiplier ** (attempt - 1)
+        )
+        return self.rng.uniform(0, cap) if self.jitter else cap
+
+    def call(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> T:
+        """Call ``func``, retrying transient failures.
+
+        ``deadline`` defaults to the current request's deadline. The last
+        exception is re-raised if attempts run out, the error is not
+        retryable, or the backoff would end after the deadline.
+        """
+        if deadline is None:
+            deadline = current_deadline()
+        name = getattr(func, "__qualname__", repr(func))
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as exc:
+                if attempt >= self.max_attempts or not self.retryable(exc):
+                    raise
+                delay = self.backoff(attempt)
+                if deadline is not None and deadline.remaining() <= delay:
+                    logger.warning(
+                        "Not retrying %s: deadline too close (%s)",
+                        name, deadline,
+                    )
+                    raise
+                logger.info(
+                    "Retrying %s in %.3fs after attempt %d failed: %s",
+                    name, delay, attempt, exc,
+                )
+                self.sleep(delay)
+
+
+class RetryingAction(ActionBase):
+    """Apply a retry policy to an action.
+
+    Each delivery of the wrapped action is retried on its own, so a retry
+    after a failed send to one user does not resend to the users who
+    already got the message.
+    """
+
+    def __init__(self, action: ActionBase, policy: RetryPolicy):
+        self.action = action
+        self.policy = policy
+
+    @property
+    def name(self) -> str:
+        from .outbox import action_name
+
+        return action_name(self.action)
+
+    @property
+    def delivers_follow_ups(self) -> bool:
+        return self.action.delivers_follow_ups
+
+    def deliveries(self, record: TextRecord) -> List[Dict[str, str]]:
+        return self.action.deliveries(record)
+
+    def deliver(self, record: TextRecord, delivery: Dict[str, str]) -> Any:
+        return self.policy.call(self.action.deliver, record, delivery)
+
+    def __call__(self, record: TextRecord) -> List[Any]:
+        return [
+            self.deliver(record, delivery)
+            for delivery in self.deliveries(record)
+        ]
+
+
+class RetryingTranslator(Translator):
+    """Apply a retry policy to a translator's calls."""
+
+    def __init__(self, translator: Translator, policy: RetryPolicy):
+        self.translator = translator
+        self.policy = policy
+
+    def detect_language(self, text: str) -> str:
+        return self.policy.call(self.translator.detect_language, text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        return self.policy.call(
+            self.translator.translate,
+            text,
+            target_language,
+            detected_language=detected_language,
+        )
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.translator.supports_batch
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        return self.policy.call(
+            self.translator.translate_batch,
+            texts,
+            target_language,
+            detected_language=detected_language,
+        )
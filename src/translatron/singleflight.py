@@ -0,0 +1,138 @@
+# src/translatron/singleflight.py
+"""Coalescing of concurrent identical calls ("single flight").
+
+When a message goes to a broadcast group, or Twilio retries a webhook
+while the first attempt is still running, the same (text, source, target)
+is translated several times at once. With :class:`CoalescingTranslator`,
+only the first of those calls reaches the provider; the others wait for
+its result. Unlike a cache, nothing is kept once the call completes, so
+this composes with caching rather than replacing it.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, TypeVar
+
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, sharing its outcome.
+
+    ``calls`` counts every call, ``coalesced`` those that waited for
+    another caller's result instead of running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = func()
+            except BaseException as exc:
+                call.error = exc
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
+
+
+class CoalescingTranslator(Translator):
+    """Share one provider call among concurrent identical requests.
+
+    Batches are coalesced as a whole: concurrent identical batches share
+    one provider call.
+    """
+
+    def __init__(self, translator: Translator):
+        self.translator = translator
+        self.detect_flight = SingleFlight()
+        self.translate_flight = SingleFlight()
+        self.batch_flight = SingleFlight()
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.translator.supports_batch
+
+    def detect_language(self, text: str) -> str:
+        return self.detect_flight.do(
+            text, lambda: self.translator.detect_language(text)
+        )
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        key = (text, detected_language, target_language)
+        return self.translate_flight.do(
+            key,
+            lambda: self.translator.translate(
+                text, target_language, detected_language=detected_language
+            ),
+        )
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        key = (tuple(texts), detected_language, target_language)
+        return list(self.batch_flight.do(
+            key,
+            lambda: self.translator.translate_batch(
+                texts, target_language, detected_language=detected_language
+            ),
+        ))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Call and coalescing counts, e.g. for a metrics endpoint."""
+        return {
+            "detect_language": self.detect_flight.stats(),
+            "translate": self.translate_flight.stats(),
+            "translate_batch": self.batch_flight.stats(),
+        }
@@ -0,0 +1,207 @@
+# src/translatron/sms.py
+"""Encoding-aware SMS segment calculations.
+
+An SMS body is sent either as GSM-7 (160 septets in a single segment, 153 per
+segment when concatenated) or, if any character falls outside the GSM-7
+alphabet, as UCS-2 (70 UTF-16 code units single, 67 concatenated). Twilio
+bills per segment, so a single curly quote in an otherwise plain message can
+more than double the cost of a send.
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+GSM7 = "gsm7"
+UCS2 = "ucs2"
+
+GSM7_SINGLE = 160
+GSM7_CONCAT = 153
+UCS2_SINGLE = 70
+UCS2_CONCAT = 67
+
+# GSM 03.38 default alphabet (the escape character 0x1B is excluded)
+_GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+# GSM 03.38 extension table; each of these costs two septets
+_GSM7_EXTENDED = frozenset("^{}\\[~]|€\f")
+
+# Common characters that force UCS-2 but have a close GSM-7 equivalent
+GSM7_NORMALIZATION = {
+    "\u2018": "'",  # left single quotation mark
+    "\u2019": "'",  # right single quotation mark
+    "\u201a": "'",  # single low-9 quotation mark
+    "\u201b": "'",  # single high-reversed-9 quotation mark
+    "\u2032": "'",  # prime
+    "\u00b4": "'",  # acute accent
+    "\u02bc": "'",  # modifier letter apostrophe
+    "\u201c": '"',  # left double quotation mark
+    "\u201d": '"',  # right double quotation mark
+    "\u201e": '"',  # double low-9 quotation mark
+    "\u201f": '"',  # double high-reversed-9 quotation mark
+    "\u2033": '"',  # double prime
+    "\u2013": "-",  # en dash
+    "\u2014": "-",  # em dash
+    "\u2212": "-",  # minus sign
+    "\u2026": "...",  # horizontal ellipsis
+    "\u00a0": " ",  # no-break space
+    "\u2002": " ",  # en space
+    "\u2003": " ",  # em space
+    "\u2009": " ",  # thin space
+    "\u200b": "",  # zero width space
+}
+_NORMALIZATION_TABLE = str.maketrans(GSM7_NORMALIZATION)
+
+
+class SegmentInfo(BaseModel):
+    """Encoding and segment count for a single SMS body."""
+
+    encoding: str
+    units: int
+    segments: int
+
+
+class SMSSendResult(BaseModel):
+    """What was actually sent to one recipient."""
+
+    to: str
+    lang: str
+    encoding: str
+    segments: int
+    messages: int
+
+
+def _char_units(char: str, encoding: str) -> int:
+    if encoding == GSM7:
+        return 2 if char in _GSM7_EXTENDED else 1
+    return 2 if ord(char) > 0xFFFF else 1  # surrogate pair in UTF-16
+
+
+def is_gsm7(text: str) -> bool:
+    """Whether the text can be sent using the GSM-7 alphabet."""
+    return all(c in _GSM7_BASIC or c in _GSM7_EXTENDED for c in text)
+
+
+def detect_encoding(text: str) -> str:
+    return GSM7 if is_gsm7(text) else UCS2
+
+
+def normalize_gsm7(text: str) -> str:
+    """Replace common typographic characters with GSM-7 equivalents."""
+    return text.translate(_NORMALIZATION_TABLE)
+
+
+def count_segments(text: str) -> SegmentInfo:
+    """Return the encoding and number of segments needed to send ``text``.
+
+    Concatenated messages never split an escaped GSM-7 character or a UTF-16
+    surrogate pair across a segment boundary, which matches how carriers
+    (and Twilio) pack the segments.
+    """
+    encoding = detect_encoding(text)
+    single, concat = (
+        (GSM7_SINGLE, GSM7_CONCAT)
+        if encoding == GSM7
+        else (UCS2_SINGLE, UCS2_CONCAT)
+    )
+    units = sum(_char_units(c, encoding) for c in text)
+    if units <= single:
+        return SegmentInfo(encoding=encoding, units=units, segments=1)
+
+    segments = 1
+    used = 0
+    for char in text:
+        size = _char_units(char, encoding)
+        if used + size > concat:
+            segments += 1
+            used = 0
+        used += size
+
+    return SegmentInfo(encoding=encoding, units=units, segments=segments)
+
+
+def split_single_segments(text: str) -> List[str]:
+    """Split text into separate messages that each fit in one segment.
+
+    Splits happen at whitespace where possible. Independent messages avoid
+    the concatenation header, so e.g. 310 GSM-7 characters fit in two
+    messages rather than three concatenated segments.
+    """
+    encoding = detect_encoding(text)
+    limit = GSM7_SINGLE if encoding == GSM7 else UCS2_SINGLE
+
+    def units(s: str) -> int:
+        return sum(_char_units(c, encoding) for c in s)
+
+    parts: List[str] = []
+    current = ""
+    for word in text.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if units(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            parts.append(current)
+        # hard-split any single word that is too long on its own
+        current = ""
+        for char in word:
+            if units(current + char) > limit:
+                parts.append(current)
+                current = ""
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+class SegmentPolicy:
+    """Pick the cheapest representation of an outbound SMS body.
+
+    Parameters
+    ==========
+    normalize: bool
+        Whether to try replacing typographic characters (smart quotes,
+        dashes, ellipses) with GSM-7 equivalents. This is only used if it
+        makes the whole body GSM-7.
+    allow_split: bool
+        Whether to try sending the body as several independent
+        single-segment messages. Note that carriers do not guarantee the
+        delivery order of independent messages.
+    """
+
+    def __init__(self, normalize: bool = True, allow_split: bool = False):
+        self.normalize = normalize
+        self.allow_split = allow_split
+
+    def candidates(self, text: str) -> List[List[str]]:
+        """List of candidate representations, each a list of SMS bodies."""
+        candidates = [[text]]
+        if self.normalize and not is_gsm7(text):
+            normalized = normalize_gsm7(text)
+            if is_gsm7(normalized):
+                candidates.append([normalized])
+
+        if self.allow_split:
+            for bodies in list(candidates):
+                (body,) = bodies
+                if count_segments(body).segments > 1:
+                    candidates.append(split_single_segments(body))
+
+        return candidates
+
+    def choose(self, text: str) -> List[str]:
+        """Return the bodies to send, minimizing the total segment count.
+
+        Ties are broken in favor of fewer messages, then the original text.
+        """
+        best: Optional[List[str]] = None
+        best_key = None
+        for bodies in self.candidates(text):
+            key = (
+                sum(count_segments(body).segments for body in bodies),
+                len(bodies),
+            )
+            if best_key is None or key < best_key:
+                best, best_key = bodies, key
+        return best
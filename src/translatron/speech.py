@@ -0,0 +1,235 @@
+# src/translatron/speech.py
+"""Text-to-speech synthesis and caching of synthesized audio.
+
+Synthesis is billed per character and adds latency to every call, while
+the messages people send (and their translations) repeat a lot. Audio is
+therefore cached by a hash of (text, language, voice) in an S3 store,
+which both caches the audio across containers and serves it to Twilio
+through a presigned URL. A local set of the keys already uploaded saves
+the existence check on repeats.
+"""
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Default Amazon Polly voice for each language
+POLLY_VOICES = {
+    "ar": "Zeina",
+    "de": "Vicki",
+    "en": "Joanna",
+    "es": "Lupe",
+    "fr": "Lea",
+    "hi": "Aditi",
+    "it": "Bianca",
+    "ja": "Mizuki",
+    "ko": "Seoyeon",
+    "nl": "Laura",
+    "pl": "Ola",
+    "pt": "Camila",
+    "ru": "Tatyana",
+    "tr": "Filiz",
+    "zh": "Zhiyu",
+}
+
+
+class VoiceSendResult(BaseModel):
+    """What was played to one recipient."""
+
+    to: str
+    lang: str
+    url: str
+    cached: bool
+
+
+def audio_cache_key(text: str, lang: str, voice: Optional[str]) -> str:
+    """Stable cache key for synthesized audio."""
+    digest = hashlib.sha256()
+    for part in (lang, voice or "", text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class Synthesizer(ABC):
+    content_type: str = "audio/mpeg"
+
+    def default_voice(self, lang: str) -> Optional[str]:
+        """Voice to use for ``lang`` when none is configured."""
+        return None
+
+    @abstractmethod
+    def synthesize(
+        self, text: str, lang: str, voice: Optional[str] = None
+    ) -> bytes:
+        """Return the audio for ``text`` spoken in ``lang``."""
+        pass
+
+
+class FakeSynthesizer(Synthesizer):
+    """Local synthesizer for tests.
+
+    Returns deterministic bytes derived from the inputs and records every
+    call in ``calls``, so tests can check when synthesis was skipped.
+    """
+
+    def __init__(self, content_type: str = "audio/mpeg"):
+        self.content_type = content_type
+        self.calls = []
+
+    def synthesize(
+        self, text: str, lang: str, voice: Optional[str] = None
+    ) -> bytes:
+        self.calls.append((text, lang, voice))
+        return f"{lang}:{voice}:{text}".encode("utf-8")
+
+
+class PollySynthesizer(Synthesizer):
+    """Synthesize speech with Amazon Polly.
+
+    Parameters
+    ==========
+    voices: Optional[Dict[str, str]]
+        Mapping of language code to Polly voice ID, overriding
+        :data:`POLLY_VOICES`.
+    engine: str
+        Polly engine (``"standard"`` or ``"neural"``).
+    output_format: str
+        Polly output format; ``"mp3"`` is playable by Twilio.
+    """
+
+    _CONTENT_TYPES = {"mp3": "audio/mpeg", "ogg_vorbis": "audio/ogg"}
+
+    def __init__(
+        self,
+        voices: Optional[Dict[str, str]] = None,
+        engine: str = "standard",
+        output_format: str = "mp3",
+    ):
+        import boto3
+
+        self.voices = {**POLLY_VOICES, **(voices or {})}
+        self.engine = engine
+        self.output_format = output_format
+        self.content_type = self._CONTENT_TYPES.get(
+            output_format, "application/octet-stream"
+        )
+        self.client = boto3.client("polly")
+
+    def default_voice(self, lang: str) -> Optional[str]:
+        return self.voices.get(lang)
+
+    def synthesize(
+        self, text: str, lang: str, voice: Optional[str] = None
+    ) -> bytes:
+        voice = voice or self.default_voice(lang)
+        if voice is None:
+            raise ValueError(f"No Polly voice configured for '{lang}'")
+        resp = self.client.synthesize_speech(
+            Text=text,
+            VoiceId=voice,
+            Engine=self.engine,
+            OutputFormat=self.output_format,
+        )
+        return resp["AudioStream"].read()
+
+
+class UploadedAudioKeys:
+    """Least-recently-used set of the keys known to be in the audio store.
+
+    Twilio always fetches the audio from the store's URL, so the audio
+    itself is never needed locally; remembering which keys were uploaded
+    is enough to skip the store's existence check. In Lambda the set
+    lives across warm invocations.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+
+    def seen(self, key: str) -> bool:
+        """Whether ``key`` is known, marking it as recently used."""
+        if key not in self._keys:
+            return False
+        self._keys.move_to_end(key)
+        return True
+
+    def add(self, key: str) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class S3AudioStore:
+    """Synthesized audio in S3, served to Twilio via presigned URLs.
+
+    Parameters
+    ==========
+    bucket: str
+        Bucket holding the audio. A lifecycle rule on ``prefix`` can be
+        used to expire rarely used audio.
+    prefix: str
+        Key prefix for the audio objects.
+    expires_in: int
+        Lifetime of presigned URLs in seconds. It only has to outlast the
+        time Twilio needs to place the call and fetch the audio.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "tts/",
+        expires_in: int = 3600,
+        s3_client: Any = None,
+    ):
+        if s3_client is None:
+            import boto3
+
+            s3_client = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.expires_in = expires_in
+        self.s3_client = s3_client
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.s3_client.head_object(
+                Bucket=self.bucket, Key=self.object_key(key)
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return False
+            raise
+        return True
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            Body=data,
+            ContentType=content_type,
+        )
+
+    def url(self, key: str) -> str:
+        return self.s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+            ExpiresIn=self.expires_in,
+        )
@@ -0,0 +1,156 @@
+# src/translatron/storage.py
+"""Compact DynamoDB representation of :class:`.TextRecord`.
+
+``record.model_dump()`` stores the text and every translation as nested
+maps, repeating the ``lang``/``text`` attribute names for each one, and
+all of it is copied into every ALL-projection index. A
+:class:`RecordEncoder` instead keeps only the key and index attributes at
+the top level, and packs the bulky fields (text, translations, media)
+into a single ``payload`` attribute. The payload is compressed to Binary
+when that makes it smaller. Write units and storage are billed by item
+size, so this cuts the cost of each message. An optional TTL attribute
+lets DynamoDB expire old messages for free.
+
+:func:`decode_item` reads both encoded and plain (``model_dump``) items,
+so existing tables keep working.
+"""
+import gzip
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .record import TextRecord
+
+# attributes kept at the top level: the table and index keys, plus what
+# the indexes project
+KEY_ATTRIBUTES = ("conversation_id", "timestamp", "message_id", "sender")
+INDEX_ATTRIBUTES = ("recipient", "original_lang")
+
+PAYLOAD = "payload"
+CODEC = "codec"
+SCHEMA = "schema"
+SCHEMA_VERSION = 1
+
+CODECS = ("gzip", "zstd")
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError as exc:  # pragma: no cover
+        raise ImportError(
+            "zstd compression requires the zstandard package"
+        ) from exc
+    return zstandard
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, mtime=0)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor().compress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+class RecordEncoder:
+    """Encode records as compact DynamoDB items.
+
+    Parameters
+    ==========
+    codec: Optional[str]
+        ``"gzip"``, ``"zstd"`` (requires ``zstandard``) or None to never
+        compress.
+    min_compress_size: int
+        Payloads smaller than this many bytes are stored as a string;
+        compression does not pay off for short messages.
+    ttl: Optional[float]
+        If given, items get a ``ttl_attribute`` this many seconds after
+        they are written.
+    ttl_attribute: str
+        Name of the table's TTL attribute (epoch seconds).
+    index_attributes: Iterable[str]
+        Record fields kept at the top level besides the keys, e.g. those
+        projected into indexes.
+    """
+
+    def __init__(
+        self,
+        codec: Optional[str] = "gzip",
+        min_compress_size: int = 256,
+        ttl: Optional[float] = None,
+        ttl_attribute: str = "expires_at",
+        index_attributes: Iterable[str] = INDEX_ATTRIBUTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        if codec is not None and codec not in CODECS:
+            raise ValueError(f"codec must be one of {CODECS} or None")
+        if codec == "zstd":
+            _zstd()
+        self.codec = codec
+        self.min_compress_size = min_compress_size
+        self.ttl = ttl
+        self.ttl_attribute = ttl_attribute
+        self.top_level = tuple(KEY_ATTRIBUTES) + tuple(index_attributes)
+        self.clock = clock
+
+    def encode(self, record: TextRecord) -> Dict[str, Any]:
+        data = record.model_dump()
+        item = {name: data.pop(name) for name in self.top_level}
+        # {"es": "Hola"} instead of [{"lang": "es", "text": "Hola"}]
+        data["translations"] = {
+            t["lang"]: t["text"] for t in data["translations"]
+        }
+        # omit fields that still have their defaults
+        for name in ("media", "deferred_languages", "is_follow_up", "usage"):
+            if name in data and not data[name]:
+                del data[name]
+
+        payload = json.dumps(
+            data, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        item[SCHEMA] = SCHEMA_VERSION
+        if self.codec is not None and len(payload) >= self.min_compress_size:
+            compressed = compress(payload, self.codec)
+            if len(compressed) < len(payload):
+                item[PAYLOAD] = compressed
+                item[CODEC] = self.codec
+            else:
+                item[PAYLOAD] = payload.decode("utf-8")
+        else:
+            item[PAYLOAD] = payload.decode("utf-8")
+
+        if self.ttl is not None:
+            item[self.ttl_attribute] = int(self.clock() + self.ttl)
+        return item
+
+    def decode(self, item: Dict[str, Any]) -> TextRecord:
+        return decode_item(item)
+
+
+def decode_item(item: Dict[str, Any]) -> TextRecord:
+    """Record from an encoded or a plain (``model_dump``) item."""
+    if PAYLOAD not in item:
+        fields = set(TextRecord.model_fields)
+        return TextRecord(**{k: v for k, v in item.items() if k in fields})
+
+    payload = item[PAYLOAD]
+    if CODEC in item:
+        # boto3 returns Binary attributes wrapped in a Binary object
+        raw = getattr(payload, "value", payload)
+        payload = decompress(bytes(raw), item[CODEC]).decode("utf-8")
+    data = json.loads(payload)
+    data["translations"] = [
+        {"lang": lang, "text": text}
+        for lang, text in data["translations"].items()
+    ]
+    fields = set(TextRecord.model_fields)
+    data.update({k: v for k, v in item.items() if k in fields})
+    return TextRecord(**data)
@@ -0,0 +1,292 @@
+# src/translatron/streaming.py
+"""Bounded-memory streaming of recordings.
+
+Voice mails can be minutes long, and several may be handled at once in a
+warm container. These helpers move audio from a readable source (e.g. the
+HTTP response for a Twilio ``RecordingUrl``) to a consumer through a fixed
+pool of reusable buffers, so memory use is ``buffer_size * max_in_flight``
+regardless of the recording length. When the consumer falls behind, the
+reader blocks (backpressure) instead of buffering more.
+"""
+import logging
+import queue
+import struct
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+Chunk = Union[bytes, bytearray, memoryview]
+
+
+class BufferPool:
+    """Fixed set of preallocated, reusable buffers."""
+
+    def __init__(self, buffer_size: int, max_buffers: int):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free: "queue.Queue[bytearray]" = queue.Queue()
+        for _ in range(max_buffers):
+            self._free.put(bytearray(buffer_size))
+
+    def acquire(self, timeout: Optional[float] = None) -> bytearray:
+        """Take a free buffer, blocking while all are in use."""
+        return self._free.get(timeout=timeout)
+
+    def release(self, buffer: bytearray) -> None:
+        self._free.put(buffer)
+
+    @property
+    def available(self) -> int:
+        return self._free.qsize()
+
+
+_DONE = object()
+
+
+class BoundedStream:
+    """Iterate over a readable source through a bounded buffer pool.
+
+    A background thread fills buffers from ``source.readinto`` and hands
+    them to the consuming thread. Each yielded chunk is a ``memoryview``
+    into a pooled buffer and is only valid until the next chunk is
+    requested; consumers that need to keep data must copy it.
+
+    Parameters
+    ==========
+    source: BinaryIO
+        Object with a ``readinto`` method, such as an HTTP response.
+    buffer_size: int
+        Size of each buffer (the maximum chunk size).
+    max_in_flight: int
+        Maximum number of buffers filled but not yet consumed. Memory use
+        is bounded by ``buffer_size * (max_in_flight + 1)``.
+    """
+
+    def __init__(
+        self,
+        source: BinaryIO,
+        buffer_size: int = 64 * 1024,
+        max_in_flight: int = 4,
+    ):
+        self.source = source
+        # one extra buffer: the one currently held by the consumer
+        self.pool = BufferPool(buffer_size, max_in_flight + 1)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_in_flight)
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _put(self, item: Any) -> None:
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        if isinstance(item, tuple):
+            self.pool.release(item[0])
+
+    def _fill(self) -> None:
+        try:
+            while True:
+                buffer = self.pool.acquire()
+                if self._closed.is_set():
+                    self.pool.release(buffer)
+                    return
+                n = self.source.readinto(buffer)
+                if not n:
+                    self.pool.release(buffer)
+                    break
+                self._put((buffer, n))
+            self._put(_DONE)
+        except Exception as exc:  # surfaced in the consuming thread
+            self._put(exc)
+
+    def __iter__(self) -> Iterator[memoryview]:
+        self._thread = threading.Thread(
+            target=self._fill, name="translatron-stream", daemon=True
+        )
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                buffer, n = item
+                try:
+                    yield memoryview(buffer)[:n]
+                finally:
+                    self.pool.release(buffer)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop reading; unblocks the reader if the consumer stops early."""
+        self._closed.set()
+        # drain so a reader blocked on a full queue can observe the close
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, tuple):
+                self.pool.release(item[0])
+
+
+class Transcoder(ABC):
+    """Convert a stream of audio chunks chunk-by-chunk."""
+
+    content_type: str = "application/octet-stream"
+
+    @abstractmethod
+    def transcode(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        """Yield output chunks; must not buffer the whole input."""
+        pass
+
+
+class PassthroughTranscoder(Transcoder):
+    def __init__(self, content_type: str = "audio/wav"):
+        self.content_type = content_type
+
+    def transcode(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        yield from chunks
+
+
+class WavToPcmTranscoder(Transcoder):
+    """Strip the RIFF/WAVE header, yielding only the raw PCM samples.
+
+    Streaming speech-to-text APIs generally expect headerless PCM. The
+    header may span several input chunks; only the header bytes (never the
+    samples) are held back. ``sample_rate``, ``channels`` and
+    ``bits_per_sample`` are set once the ``fmt`` chunk has been read.
+    """
+
+    content_type = "audio/pcm"
+
+    def __init__(self):
+        self.sample_rate: Optional[int] = None
+        self.channels: Optional[int] = None
+        self.bits_per_sample: Optional[int] = None
+
+    def transcode(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        header = bytearray()
+        data_remaining: Optional[int] = None
+        for chunk in chunks:
+            if data_remaining is None:
+                header += chunk
+                start, data_remaining = self._parse_header(header)
+                if data_remaining is None:
+                    continue
+                chunk = memoryview(header)[start:]
+            if data_remaining <= 0:
+                continue
+            out = chunk[:data_remaining]
+            data_remaining -= len(out)
+            if len(out):
+                yield out
+
+    def _parse_header(self, header: bytearray):
+        """Return (data offset, data length), or (0, None) if incomplete."""
+        if len(header) < 12:
+            return 0, None
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE stream")
+        pos = 12
+        while pos + 8 <= len(header):
+            chunk_id = bytes(header[pos : pos + 4])
+            (size,) = struct.unpack_from("<I", header, pos + 4)
+            if chunk_id == b"data":
+                return pos + 8, size
+            if pos + 8 + size > len(header):
+                return 0, None
+            if chunk_id == b"fmt ":
+                self.channels, self.sample_rate = struct.unpack_from(
+                    "<HI", header, pos + 10
+                )
+                (self.bits_per_sample,) = struct.unpack_from(
+                    "<H", header, pos + 22
+                )
+            pos += 8 + size + (size % 2)
+        return 0, None
+
+
+class S3MultipartSink:
+    """Write a stream of chunks to S3 with a multipart upload.
+
+    A single reusable part buffer of ``part_size`` bytes is used, so memory
+    stays constant regardless of the object size (unlike boto3's managed
+    transfer, which may hold several 8 MiB parts per upload). S3 requires
+    every part but the last to be at least 5 MiB.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        key: str,
+        part_size: int = MIN_PART_SIZE,
+        content_type: Optional[str] = None,
+    ):
+        if part_size < self.MIN_PART_SIZE:
+            raise ValueError(
+                f"part_size must be at least {self.MIN_PART_SIZE} bytes"
+            )
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.content_type = content_type
+        self.bytes_written = 0
+
+    def write_all(self, chunks: Iterable[Chunk]) -> int:
+        """Upload all chunks; returns the number of bytes written."""
+        kwargs = {"Bucket": self.bucket, "Key": self.key}
+        if self.content_type:
+            kwargs["ContentType"] = self.content_type
+        upload_id = self.s3_client.create_multipart_upload(**kwargs)["UploadId"]
+        parts: List[dict] = []
+        buffer = bytearray(self.part_size)
+        filled = 0
+
+        def flush(n: int) -> None:
+            resp = self.s3_client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                Body=bytes(memoryview(buffer)[:n]),
+            )
+            parts.append({"ETag": resp["ETag"], "PartNumber": len(parts) + 1})
+
+        try:
+            for chunk in chunks:
+                view = memoryview(chunk)
+                while len(view):
+                    n = min(len(view), self.part_size - filled)
+                    buffer[filled : filled + n] = view[:n]
+                    filled += n
+                    view = view[n:]
+                    self.bytes_written += n
+                    if filled == self.part_size:
+                        flush(filled)
+                        filled = 0
+            if filled or not parts:
+                flush(filled)
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            logger.error("Aborting multipart upload of %s", self.key)
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=upload_id
+            )
+            raise
+        return self.bytes_written
@@ -1,6 +1,6 @@
 import base64
 from typing import Dict, Any
-from urllib.parse import quote_plus, parse_qs
+from urllib.parse import quote_plus, parse_qs, urlsplit
 
 from twilio.request_validator import RequestValidator
 
@@ -38,7 +38,9 @@ def create_twilio_test_event(
             "host": url.split("/")[2],
             "x-twilio-signature": signature
         },
-        "httpMethod": "POST"
+        "httpMethod": "POST",
+        "rawPath": urlsplit(url).path or "/",
+        "rawQueryString": urlsplit(url).query,
     }
     
     return event
@@ -58,7 +60,9 @@ def validate_test_event(event: Dict[str, Any], auth_token: str) -> bool:
     
     # Extract URL and parameters
     host = event["headers"]["host"]
-    url = f"https://{host}/"
+    url = f"https://{host}{event.get('rawPath') or '/'}"
+    if event.get("rawQueryString"):
+        url += f"?{event['rawQueryString']}"
     
     # Parse parameters from body
     body = event["body"]
@@ -0,0 +1,41 @@
+"""In-process fakes for Twilio, translation and DynamoDB.
+
+These make it possible to run :class:`.TranslatronText` end-to-end without
+Twilio or AWS, with seeded latency and error injection, as the basis for
+load and soak tests. The DynamoDB helpers require moto.
+"""
+from .faults import (
+    ConstantLatency,
+    EmpiricalLatency,
+    FaultInjector,
+    Latency,
+    LogNormalLatency,
+    UniformLatency,
+)
+from .twilio import FakeTwilioClient, twilio_unavailable
+from .translator import FakeTranslator, translate_throttled
+from .dynamodb import (
+    create_records_table,
+    mock_aws_environment,
+    mock_store_to_dynamodb,
+)
+from .emulator import EmulationReport, Emulator, emulated_user_info
+
+__all__ = [
+    "ConstantLatency",
+    "EmpiricalLatency",
+    "EmulationReport",
+    "Emulator",
+    "FakeTranslator",
+    "FakeTwilioClient",
+    "FaultInjector",
+    "Latency",
+    "LogNormalLatency",
+    "UniformLatency",
+    "create_records_table",
+    "emulated_user_info",
+    "mock_aws_environment",
+    "mock_store_to_dynamodb",
+    "translate_throttled",
+    "twilio_unavailable",
+]
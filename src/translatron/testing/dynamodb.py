@@ -0,0 +1,60 @@
+# src/translatron/testing/dynamodb.py
+"""DynamoDB tables backed by moto, for local runs without AWS."""
+import contextlib
+import os
+from typing import Any, Iterator
+from unittest import mock
+
+from ..actions import StoreToDynamoDB
+
+
+def create_records_table(table_name: str, dynamodb: Any = None) -> Any:
+    """Create a table for :class:`.StoreToDynamoDB`, keyed by
+    ``message_id``."""
+    if dynamodb is None:
+        import boto3
+
+        dynamodb = boto3.resource("dynamodb")
+    return dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "message_id", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+@contextlib.contextmanager
+def mock_aws_environment(region: str = "us-east-1") -> Iterator[None]:
+    """Run the block against moto's in-memory AWS.
+
+    Fake credentials and a default region are set for the duration, so
+    clients created inside the block can never reach real AWS. Requires
+    moto (``pip install translatron[dev]``).
+    """
+    try:
+        from moto import mock_aws
+    except ImportError as exc:
+        raise ImportError(
+            "The AWS emulation requires moto; install translatron[dev]"
+        ) from exc
+
+    env = {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": region,
+    }
+    with mock.patch.dict(os.environ, env), mock_aws():
+        yield
+
+
+@contextlib.contextmanager
+def mock_store_to_dynamodb(
+    table_name: str = "translatron-records", region: str = "us-east-1"
+) -> Iterator[StoreToDynamoDB]:
+    """A :class:`.StoreToDynamoDB` writing to a fresh moto table."""
+    with mock_aws_environment(region):
+        create_records_table(table_name)
+        yield StoreToDynamoDB(table_name)
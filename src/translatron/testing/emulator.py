@@ -0,0 +1,216 @@
+# src/translatron/testing/emulator.py
+"""Run :class:`.TranslatronText` end-to-end against in-process fakes.
+
+The :class:`Emulator` wires a :class:`.FakeTwilioClient`, a
+:class:`.FakeTranslator` and a moto-backed :class:`.StoreToDynamoDB` into
+a handler, and drives it with signed webhook events from a pool of
+threads. The fakes' fault injection is seeded, so load and soak tests are
+repeatable.
+"""
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from ..actions import SendTranslatedSMS, StoreToDynamoDB
+from ..test_events import create_twilio_test_event
+from ..text import TranslatronText
+from ..translator import Translator
+from .dynamodb import create_records_table, mock_aws_environment
+from .translator import FakeTranslator
+from .twilio import FakeTwilioClient
+
+EMULATOR_AUTH_TOKEN = "emulator-auth-token"
+EMULATOR_URL = "https://translatron.invalid/"
+
+SAMPLE_TEXTS = [
+    "Hello everyone",
+    "Running 10 minutes late, sorry!",
+    "Can someone pick up milk on the way home?",
+    "Dinner is at 7",
+    "Thanks!",
+    "Where are we meeting tomorrow?",
+]
+
+
+def emulated_user_info(
+    n_groups: int = 1,
+    users_per_group: int = 5,
+    languages: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """Routing information for synthetic groups.
+
+    Users are assigned the ``languages`` round-robin.
+    """
+    languages = languages or ["en", "es", "fr"]
+    user_info = {}
+    for group in range(n_groups):
+        number = f"+1555000{group:04d}"
+        user_info[number] = {
+            f"+1555{group:03d}{user:04d}": {
+                "name": f"User {group}-{user}",
+                "lang": languages[user % len(languages)],
+            }
+            for user in range(users_per_group)
+        }
+    return user_info
+
+
+class EmulationReport(BaseModel):
+    """Outcome of :meth:`Emulator.run`."""
+
+    messages: int
+    errors: int
+    duration: float
+    throughput: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    sms_sent: int
+    records_stored: int
+    translate_calls: int
+
+
+def _quantile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _EmulatedText(TranslatronText):
+    def get_twilio_auth_token(self) -> str:
+        return EMULATOR_AUTH_TOKEN
+
+
+class Emulator:
+    """A handler wired to fakes, plus a synthetic webhook load.
+
+    Use as a context manager: AWS is emulated by moto inside the block.
+
+    Parameters
+    ==========
+    user_info: Optional[Dict[str, Dict[str, Dict[str, str]]]]
+        Routing information; by default one group from
+        :func:`emulated_user_info`.
+    languages: Optional[List[str]]
+        Target languages; by default those of the users.
+    translator: Optional[Translator]
+        By default a :class:`.FakeTranslator` with no latency.
+    twilio_client: Optional[FakeTwilioClient]
+        By default a :class:`.FakeTwilioClient` with no latency.
+    table_name: str
+        Name of the moto table for stored records.
+    seed: Optional[int]
+        Seed for choosing senders and texts.
+    handler_kwargs: Optional[Dict[str, Any]]
+        Extra arguments for :class:`.TranslatronText`, e.g. a retry policy.
+    """
+
+    def __init__(
+        self,
+        user_info: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
+        languages: Optional[List[str]] = None,
+        translator: Optional[Translator] = None,
+        twilio_client: Optional[FakeTwilioClient] = None,
+        table_name: str = "translatron-emulator",
+        seed: Optional[int] = None,
+        handler_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        self.user_info = user_info or emulated_user_info()
+        if languages is None:
+            languages = sorted({
+                user["lang"]
+                for users in self.user_info.values()
+                for user in users.values()
+            })
+        self.languages = languages
+        self.translator = translator or FakeTranslator()
+        self.twilio_client = twilio_client or FakeTwilioClient()
+        self.table_name = table_name
+        self.rng = random.Random(seed)
+        self.handler_kwargs = handler_kwargs or {}
+        self.handler: Optional[TranslatronText] = None
+        self.table: Any = None
+        self._aws = None
+
+    def __enter__(self) -> "Emulator":
+        self._aws = mock_aws_environment()
+        self._aws.__enter__()
+        self.table = create_records_table(self.table_name)
+        actions = [
+            StoreToDynamoDB(self.table_name),
+            SendTranslatedSMS(self.user_info, self.twilio_client),
+        ]
+        self.handler = _EmulatedText(
+            translator=self.translator,
+            actions=actions,
+            languages=self.languages,
+            **self.handler_kwargs,
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._aws.__exit__(*exc_info)
+        self._aws = None
+        self.handler = None
+
+    def event(self, sender: str, recipient: str, body: str) -> Dict[str, Any]:
+        """Signed webhook event, as API Gateway would deliver it."""
+        return create_twilio_test_event(
+            url=EMULATOR_URL,
+            param_dict={"From": sender, "To": recipient, "Body": body},
+            auth_token=EMULATOR_AUTH_TOKEN,
+        )
+
+    def random_event(self) -> Dict[str, Any]:
+        recipient = self.rng.choice(sorted(self.user_info))
+        sender = self.rng.choice(sorted(self.user_info[recipient]))
+        return self.event(sender, recipient, self.rng.choice(SAMPLE_TEXTS))
+
+    def records_stored(self) -> int:
+        return self.table.scan(Select="COUNT")["Count"]
+
+    def run(self, n_messages: int, concurrency: int = 8) -> EmulationReport:
+        """Send ``n_messages`` webhooks from ``concurrency`` threads."""
+        if self.handler is None:
+            raise RuntimeError("Emulator.run must be called inside `with`")
+        events = [self.random_event() for _ in range(n_messages)]
+        latencies: List[float] = []
+        errors = 0
+        lock = threading.Lock()
+
+        def send(event: Dict[str, Any]) -> None:
+            nonlocal errors
+            start = time.monotonic()
+            try:
+                status = self.handler(event, None)["statusCode"]
+                failed = status != 200
+            except Exception:
+                failed = True
+            with lock:
+                latencies.append(time.monotonic() - start)
+                errors += int(failed)
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(send, events))
+        duration = time.monotonic() - start
+
+        translate_calls = getattr(self.translator, "translate_calls", 0)
+        return EmulationReport(
+            messages=n_messages,
+            errors=errors,
+            duration=duration,
+            throughput=n_messages / duration if duration else 0.0,
+            latency_p50=statistics.median(latencies) if latencies else 0.0,
+            latency_p95=_quantile(latencies, 0.95),
+            latency_p99=_quantile(latencies, 0.99),
+            sms_sent=len(self.twilio_client.messages),
+            records_stored=self.records_stored(),
+            translate_calls=translate_calls,
+        )
@@ -0,0 +1,122 @@
+# src/translatron/testing/faults.py
+"""Latency distributions and fault injection for the in-process fakes."""
+import math
+import random
+import threading
+import time
+from typing import Callable, Optional, Sequence
+
+
+class Latency:
+    """Distribution of the simulated latency of one call, in seconds."""
+
+    def sample(self, rng: random.Random) -> float:
+        raise NotImplementedError("Subclasses should implement this method.")
+
+
+class ConstantLatency(Latency):
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+
+class UniformLatency(Latency):
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+
+class LogNormalLatency(Latency):
+    """Long-tailed latency, the usual shape of remote API calls.
+
+    Parameters
+    ==========
+    median: float
+        Median latency in seconds.
+    sigma: float
+        Shape parameter; larger values give a longer tail (the p99 is
+        about ``median * exp(2.33 * sigma)``).
+    cap: Optional[float]
+        Upper bound on a single sample, e.g. the client timeout.
+    """
+
+    def __init__(
+        self, median: float, sigma: float = 0.5, cap: Optional[float] = None
+    ):
+        self.median = median
+        self.sigma = sigma
+        self.cap = cap
+
+    def sample(self, rng: random.Random) -> float:
+        value = rng.lognormvariate(math.log(self.median), self.sigma)
+        return min(value, self.cap) if self.cap is not None else value
+
+
+class EmpiricalLatency(Latency):
+    """Resample latencies measured in production."""
+
+    def __init__(self, samples: Sequence[float]):
+        if not samples:
+            raise ValueError("EmpiricalLatency needs at least one sample")
+        self.samples = list(samples)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.choice(self.samples)
+
+
+class FaultInjector:
+    """Delay each call and fail a fraction of them.
+
+    Parameters
+    ==========
+    latency: Optional[Latency]
+        Simulated latency of each call (none by default).
+    error_rate: float
+        Probability that a call fails.
+    error_factory: Optional[Callable[[], BaseException]]
+        Builds the exception raised on failure.
+    seed: Optional[int]
+        Seed of the random generator. With a single caller, runs with the
+        same seed are identical; with concurrent callers the draws are
+        shared out in call order.
+    sleep: Callable[[float], None]
+        Used to wait out the latency; pass a no-op to only record it.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[Latency] = None,
+        error_rate: float = 0.0,
+        error_factory: Optional[Callable[[], BaseException]] = None,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.latency = latency or ConstantLatency(0.0)
+        self.error_rate = error_rate
+        self.error_factory = error_factory or (
+            lambda: RuntimeError("Injected failure")
+        )
+        self.rng = random.Random(seed)
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.total_latency = 0.0
+
+    def __call__(self) -> None:
+        """Simulate one call: wait, then possibly raise."""
+        with self._lock:
+            delay = self.latency.sample(self.rng)
+            fail = self.rng.random() < self.error_rate
+            self.calls += 1
+            self.failures += int(fail)
+            self.total_latency += delay
+        if delay > 0:
+            self.sleep(delay)
+        if fail:
+            raise self.error_factory()
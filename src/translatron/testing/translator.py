@@ -0,0 +1,73 @@
+# src/translatron/testing/translator.py
+"""Translator fake with configurable latency and throttling."""
+import threading
+from typing import Callable, Optional
+
+from botocore.exceptions import ClientError
+
+from ..translator import Translator
+from ..usage import record_detection, record_translation
+from .faults import FaultInjector
+
+
+def translate_throttled() -> ClientError:
+    """The error Amazon Translate raises when throttling."""
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+        "TranslateText",
+    )
+
+
+class FakeTranslator(Translator):
+    """Deterministic translator with simulated provider behaviour.
+
+    Translations are ``"[<target>] <text>"``, so tests can tell which
+    language a recipient received.
+
+    Parameters
+    ==========
+    faults: Optional[FaultInjector]
+        Latency and errors of ``translate`` calls. By default, a failure
+        is an Amazon Translate throttling error.
+    detect_faults: Optional[FaultInjector]
+        Latency and errors of ``detect_language`` calls (none by default).
+    detect: Optional[Callable[[str], str]]
+        Language detection; by default every text is ``default_language``.
+    default_language: str
+        Language returned by the default detection.
+    """
+
+    def __init__(
+        self,
+        faults: Optional[FaultInjector] = None,
+        detect_faults: Optional[FaultInjector] = None,
+        detect: Optional[Callable[[str], str]] = None,
+        default_language: str = "en",
+    ):
+        self.faults = faults or FaultInjector(
+            error_factory=translate_throttled
+        )
+        self.detect_faults = detect_faults or FaultInjector()
+        self.detect = detect or (lambda text: default_language)
+        self._lock = threading.Lock()
+        self.translate_calls = 0
+        self.detect_calls = 0
+
+    def detect_language(self, text: str) -> str:
+        with self._lock:
+            self.detect_calls += 1
+        self.detect_faults()
+        record_detection("fake", len(text))
+        return self.detect(text)
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        with self._lock:
+            self.translate_calls += 1
+        self.faults()
+        record_translation("fake", target_language, len(text))
+        return f"[{target_language}] {text}"
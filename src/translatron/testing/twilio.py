@@ -0,0 +1,76 @@
+# src/translatron/testing/twilio.py
+"""In-process stand-in for the Twilio REST client."""
+import itertools
+import threading
+from typing import Any, Dict, List, Optional
+
+from twilio.base.exceptions import TwilioRestException
+
+from .faults import FaultInjector
+
+
+def twilio_unavailable() -> TwilioRestException:
+    """A 503 from Twilio, which the retry policies treat as transient."""
+    return TwilioRestException(
+        status=503, uri="/fake", msg="Service Unavailable (injected)"
+    )
+
+
+class FakeResource:
+    """Twilio resource created by a fake ``create`` call."""
+
+    def __init__(self, sid: str, params: Dict[str, Any]):
+        self.sid = sid
+        self.status = "queued"
+        self.params = params
+        for name, value in params.items():
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"FakeResource(sid={self.sid!r}, to={self.params.get('to')!r})"
+
+
+class FakeResourceList:
+    """Records ``create`` calls, e.g. for ``client.messages``."""
+
+    def __init__(self, prefix: str, faults: FaultInjector):
+        self.prefix = prefix
+        self.faults = faults
+        self.created: List[FakeResource] = []
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, **params: Any) -> FakeResource:
+        self.faults()
+        with self._lock:
+            sid = f"{self.prefix}{next(self._counter):032x}"
+            resource = FakeResource(sid, params)
+            self.created.append(resource)
+        return resource
+
+    def __len__(self) -> int:
+        return len(self.created)
+
+
+class FakeTwilioClient:
+    """Twilio client stub for ``messages.create`` and ``calls.create``.
+
+    Every created message and call is recorded in ``messages.created``
+    and ``calls.created``. By default a failed call raises a Twilio 503.
+
+    Parameters
+    ==========
+    faults: Optional[FaultInjector]
+        Latency and error injection applied to every ``create`` call.
+    """
+
+    def __init__(self, faults: Optional[FaultInjector] = None):
+        if faults is None:
+            faults = FaultInjector(error_factory=twilio_unavailable)
+        self.faults = faults
+        self.messages = FakeResourceList("SM", faults)
+        self.calls = FakeResourceList("CA", faults)
+
+    def sent_to(self, number: str) -> List[FakeResource]:
+        """Messages sent to ``number``."""
+        return [m for m in self.messages.created if m.params["to"] == number]
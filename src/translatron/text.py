@@ -1,60 +1,198 @@
 # src/translatron/text.py
 import base64
+import contextlib
+import contextvars
 import datetime
 import logging
 import os
+import time
 import uuid
-from typing import List, Dict, Any, Tuple
-from urllib.parse import parse_qs
+from concurrent.futures import Executor
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlencode
 from twilio.request_validator import RequestValidator
 
 from .record import TextRecord
 from .translator import Translator
 from .actions import ActionBase
+from .phrases import PhraseTable
+from .media import MediaProcessor, parse_media_params
+from .outbox import Outbox
+from .deadline import Deadline, DeadlineBudget, activate, current_deadline
+from .dispatch import Dispatcher
+from .retry import RetryingAction, RetryingTranslator, RetryPolicy
+from .ratelimit import is_throttling_error
+from .tiers import LanguageTiers
+from .logs import LogConfig, MessageLog
+from .usage import UsageMetrics, activate_usage
 
 logger = logging.getLogger(__name__)
 
+# key of the follow-ups dispatched with :func:`.invoke_async`
+FOLLOW_UP_EVENT = "translatron_follow_up"
+
 
 class TranslatronText:  # TODO: make this an ABC
-    """Reusable Twilio‑>Translate‑>Whatever Lambda core."""
+    """Reusable Twilio‑>Translate‑>Whatever Lambda core.
+
+    If a ``retry_policy`` is given, translator calls and each action
+    delivery are retried on transient errors. Retries respect the deadline
+    derived from the Lambda context's remaining time.
+
+    The deadline is also used to protect the actions from a slow
+    translator: detection and translation run against a deadline that
+    keeps ``budget.actions`` seconds in reserve, and languages not in
+    ``required_languages`` are skipped when time runs short. By default
+    only the first of ``languages`` is required. If the time left is
+    below the actions' reserve, the remaining actions are passed to
+    ``handoff`` (e.g. :meth:`.Outbox.enqueue`) instead of being run.
+
+    With ``tiers``, only tier-1 languages are translated before the
+    actions run; the rest (and, when time is short, optional languages)
+    are deferred, then translated and sent as a follow-up record to the
+    actions that deliver follow-ups (not to stores). The follow-up runs on
+    ``follow_up_executor`` if one is given (e.g. in a long-running
+    server), or is handed to ``follow_up_dispatch``; with
+    ``invoke_async(function_name, FOLLOW_UP_EVENT)`` (see
+    :mod:`translatron.dispatch`) it runs in an asynchronous invocation of
+    the handler. Without either, it runs after the main actions, before
+    the response.
+
+    With a ``log_config``, each message handled is summarized in one
+    structured log line (see :mod:`translatron.logs`).
+
+    The billable usage of each message (see :mod:`translatron.usage`) is
+    collected while it is handled, and added to ``usage_metrics`` if
+    given. Usage of work done after the handler returns (follow-ups on an
+    executor, outbox deliveries) is not included.
+    """
 
     def __init__(
         self,
         translator: Translator,
         actions: List[ActionBase],
         languages: List[str],
+        phrase_table: Optional[PhraseTable] = None,
+        media_processor: Optional[MediaProcessor] = None,
+        outbox: Optional[Outbox] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        required_languages: Optional[List[str]] = None,
+        budget: Optional[DeadlineBudget] = None,
+        handoff: Optional[
+            Callable[[TextRecord, List[ActionBase]], Any]
+        ] = None,
+        tiers: Optional[LanguageTiers] = None,
+        follow_up_executor: Optional[Executor] = None,
+        follow_up_dispatch: Optional[Dispatcher] = None,
+        log_config: Optional[LogConfig] = None,
+        usage_metrics: Optional[UsageMetrics] = None,
     ) -> None:
+        if retry_policy is not None:
+            translator = RetryingTranslator(translator, retry_policy)
+            actions = [RetryingAction(a, retry_policy) for a in actions]
         self.translator = translator
         self.actions = actions
         self.languages = languages
+        self.phrase_table = phrase_table
+        self.media_processor = media_processor
+        self.outbox = outbox
+        self.required_languages = required_languages
+        self.budget = budget or DeadlineBudget()
+        self.handoff = handoff
+        self.tiers = tiers
+        self.follow_up_executor = follow_up_executor
+        self.follow_up_dispatch = follow_up_dispatch
+        self.log_config = log_config
+        self.usage_metrics = usage_metrics
+
+    @property
+    def required_languages(self) -> List[str]:
+        """Languages translated even when time is short; by default the
+        first of ``languages``."""
+        if self._required_languages is not None:
+            return self._required_languages
+        return self.languages[:1]
+
+    @required_languages.setter
+    def required_languages(self, languages: Optional[List[str]]) -> None:
+        self._required_languages = languages
 
     # ---- public entrypoint -------------------------------------------------
     def __call__(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-        logger.info("Received event: %s", event)  # TODO: remove in production
-        params = self.parse_event_params(event)
-        headers = event["headers"]
-        if not self.validate_twilio_event(params, headers):
-            logger.error("Invalid Twilio request signature")
-            return {
-                "statusCode": 403,
-                "body": "Forbidden: Invalid Twilio request signature",
-            }
-        message = self.get_message_details(params)
-        translations, orig_lang = self.detect_and_translate(message)
-        record = TextRecord(
-            message_id=message["message_id"],
-            conversation_id=message["conversation_id"],
-            sender=message["sender"],
-            recipient=message["recipient"],
-            original_lang=orig_lang,
-            original_text=message["text"],
-            translations=translations,
-            timestamp=message["timestamp"],
-        )
-        self.action(record)
+        with activate(self.get_deadline(context)):
+            if FOLLOW_UP_EVENT in event:
+                return self.handle_follow_up(event[FOLLOW_UP_EVENT], context)
+            return self.handle(event, context)
+
+    def handle(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        with self.message_log(context) as log:
+            logger.debug("Received event: %s", event)
+            with log.stage("validate"):
+                params = self.parse_event_params(event)
+                headers = event["headers"]
+                valid = self.validate_twilio_event(
+                    params, headers, self.get_request_path(event)
+                )
+            if not valid:
+                logger.error("Invalid Twilio request signature")
+                log.set(status=403)
+                return {
+                    "statusCode": 403,
+                    "body": "Forbidden: Invalid Twilio request signature",
+                }
+            with log.stage("message"):
+                message = self.get_message_details(params)
+            with log.stage("translate"):
+                translations, orig_lang = self.detect_and_translate(message)
+            log.record = self.build_record(message, translations, orig_lang)
+            with log.stage("action"):
+                self.action(log.record)
+            with log.stage("follow_up"):
+                self.follow_up(log.record)
+            return self.build_response()
+
+    def handle_follow_up(
+        self, payload: Dict[str, Any], context: Any
+    ) -> Dict[str, Any]:
+        """Run a follow-up handed to ``follow_up_dispatch``."""
+        with self.message_log(context) as log:
+            log.record = TextRecord.model_validate(payload)
+            with log.stage("follow_up"):
+                self.action(self.translate_deferred(log.record))
         return self.build_response()
 
+    @contextlib.contextmanager
+    def message_log(self, context: Any) -> Iterator[MessageLog]:
+        """Collect timings and usage for the block, then emit them.
+
+        Set ``log.record`` once the record is built; a ``status`` of 200
+        (or ``"error"`` if the block raises) is filled in unless set.
+        """
+        log = MessageLog()
+        request_id = getattr(context, "aws_request_id", None)
+        if request_id is not None:
+            log.set(request_id=request_id)
+        with activate_usage() as accumulator:
+            try:
+                yield log
+            except BaseException:
+                log.set(status="error")
+                raise
+            finally:
+                usage = accumulator.snapshot()
+                if self.usage_metrics is not None:
+                    number = log.record.recipient if log.record else ""
+                    self.usage_metrics.add(usage, number=number)
+                if self.log_config is not None:
+                    log.fields.setdefault("status", 200)
+                    log.set(usage=usage.model_dump(exclude_defaults=True))
+                    log.emit(self.log_config)
+
     # ---- overridable hooks -------------------------------------------------
+    def get_deadline(self, context: Any) -> Optional[Deadline]:
+        """Deadline for handling this event (None outside Lambda)."""
+        return Deadline.from_context(context)
+
     def _get_conversation_id(self, event: Dict[str, Any]) -> str:
         """Extract conversation ID from the event."""
         sender = event.get("From", [""])[0]
@@ -63,6 +201,9 @@ class TranslatronText:  # TODO: make this an ABC
     def get_twilio_auth_token(self) -> str:
         return os.getenv("TWILIO_AUTH_TOKEN", "")
 
+    def get_twilio_account_sid(self) -> str:
+        return os.getenv("TWILIO_ACCOUNT_SID", "")
+
     def parse_event_params(self, event: Dict[str, Any]) -> Dict[str, List[str]]:
         """Extract and parse parameters from the event body."""
         body_str = event.get("body", "")
@@ -73,16 +214,31 @@ class TranslatronText:  # TODO: make this an ABC
         params = parse_qs(body_str, keep_blank_values=True)
         return params
 
-    def validate_twilio_event(self, params, headers) -> bool:
+    def get_request_path(self, event: Dict[str, Any]) -> str:
+        """Path and query string of the request, as Twilio signed them."""
+        path = event.get("rawPath") or event.get("path") or "/"
+        query = event.get("rawQueryString")
+        if query is None:
+            query = urlencode(event.get("queryStringParameters") or {})
+        return f"{path}?{query}" if query else path
+
+    def validate_twilio_event(self, params, headers, path: str = "/") -> bool:
+        """Check the Twilio signature of the request.
+
+        The signed URL is rebuilt from ``path`` and the headers; behind a
+        proxy, ``X-Forwarded-Proto`` and ``X-Forwarded-Host`` give the
+        scheme and host that Twilio used.
+        """
         auth_token = self.get_twilio_auth_token()
         validator = RequestValidator(auth_token)
 
-        host = headers.get("host")
+        host = _first(headers.get("x-forwarded-host")) or headers.get("host")
         if not host:
             logger.error("Missing 'host' header in request")
             return False
 
-        url = f"https://{host}/"  # for lambdas, this will be correct
+        scheme = _first(headers.get("x-forwarded-proto")) or "https"
+        url = f"{scheme}://{host}{path}"
         tw_sig = headers["x-twilio-signature"]
 
         validator_params = {k: v[0] for k, v in params.items()}
@@ -97,11 +253,11 @@ class TranslatronText:  # TODO: make this an ABC
         self, params: Dict[str, List[str]]
     ) -> Dict[str, Any]:
         sender = str(params.get("From", [""])[0])
-        logger.info("Received SMS from %s", sender)
+        logger.debug("Received SMS from %s", sender)
         recipient = str(params.get("To", [""])[0])
-        logger.info("Received SMS to %s", recipient)
+        logger.debug("Received SMS to %s", recipient)
         text = str(params.get("Body", [""])[0])
-        logger.info("SMS text: %s", text)
+        logger.debug("SMS text: %s", text)
         timestamp = (
             datetime.datetime.now(datetime.timezone.utc).isoformat() + "Z"
         )
@@ -110,9 +266,9 @@ class TranslatronText:  # TODO: make this an ABC
         message_id = str(uuid.uuid4())
         logger.info("Message ID: %s", message_id)
         conversation_id = str(self._get_conversation_id(params))
-        logger.info("Conversation ID: %s", conversation_id)
+        logger.debug("Conversation ID: %s", conversation_id)
 
-        return {
+        message = {
             "message_id": message_id,
             "conversation_id": conversation_id,
             "sender": sender,
@@ -120,28 +276,197 @@ class TranslatronText:  # TODO: make this an ABC
             "text": text,
             "timestamp": timestamp,
         }
+        media = parse_media_params(params)
+        if media:
+            message["media"] = self.process_media(media)
+        return message
+
+    def process_media(self, media: List[Tuple[str, str]]) -> List[Any]:
+        """Fetch and store MMS attachments given as (url, content_type)."""
+        if self.media_processor is None:
+            logger.info("Ignoring %d media items", len(media))
+            return []
+        auth = (self.get_twilio_account_sid(), self.get_twilio_auth_token())
+        return self.media_processor(media, auth=auth)
 
     def detect_and_translate(
         self, message: Dict[str, str]
     ) -> Tuple[List[Dict[str, str]], str]:
-        """Runs language detection + translations."""
-        original_lang = self.translator.detect_language(message["text"])
-        logger.info("Detected language: %s", original_lang)
+        """Runs language detection + translations.
+
+        If a phrase table is configured, known phrases skip detection and
+        use the table's translations; only languages missing from the table
+        entry go to the translator. A media-only message (no text) has
+        nothing to translate, and its language is ``"und"``. Languages
+        deferred to a follow-up are listed in ``message["deferred_languages"]``.
+        """
+        if message.get("media") and not message["text"].strip():
+            return [], "und"
+
+        phrase = None
+        if self.phrase_table is not None:
+            phrase = self.phrase_table.lookup(message["text"])
+
+        deadline = current_deadline()
         translations = []
-        for target in self.languages:
-            if target == original_lang:
-                continue
-            translated_text = self.translator.translate(
-                message["text"], target, detected_language=original_lang
-            )
-            logger.info("Translated to %s: %s", target, translated_text)
-            translations.append({"lang": target, "text": translated_text})
+        deferred = []
+        with activate(self.budget.translation_deadline(deadline)):
+            if phrase is not None:
+                original_lang = phrase.source
+                logger.info("Phrase table hit; language: %s", original_lang)
+            else:
+                original_lang = self.detect_language(message)
+                logger.info("Detected language: %s", original_lang)
 
+            for target in self.languages:
+                if target == original_lang:
+                    continue
+                if phrase is not None and target in phrase.translations:
+                    translated_text = phrase.translations[target]
+                elif self.tiers is not None and self.tiers.is_deferred(target):
+                    deferred.append(target)
+                    continue
+                elif self.should_skip_language(target, deadline):
+                    if self.tiers is not None:
+                        deferred.append(target)
+                    logger.warning(
+                        "Skipping translation to %s: %s left", target, deadline
+                    )
+                    continue
+                else:
+                    translated_text = self.translate(
+                        message["text"], target, original_lang
+                    )
+                logger.debug("Translated to %s: %s", target, translated_text)
+                translations.append({"lang": target, "text": translated_text})
+
+        if deferred:
+            logger.info("Deferring translation to %s", deferred)
+            message["deferred_languages"] = deferred
         return translations, original_lang
 
+    def detect_language(self, message: Dict[str, Any]) -> str:
+        """Language of the message text."""
+        return self.translator.detect_language(message["text"])
+
+    def translate(self, text: str, target: str, source: str) -> str:
+        """Translate one language, reporting load to the tiers' monitor."""
+        monitor = self.tiers.monitor if self.tiers is not None else None
+        if monitor is None:
+            return self.translator.translate(
+                text, target, detected_language=source
+            )
+        start = time.monotonic()
+        try:
+            result = self.translator.translate(
+                text, target, detected_language=source
+            )
+        except Exception as exc:
+            monitor.record(time.monotonic() - start, is_throttling_error(exc))
+            raise
+        monitor.record(time.monotonic() - start)
+        return result
+
+    def should_skip_language(
+        self, target: str, deadline: Optional[Deadline]
+    ) -> bool:
+        """Whether to skip an optional language to save time."""
+        if target in self.required_languages:
+            return False
+        return not self.budget.can_translate(deadline)
+
+    def build_record(
+        self,
+        message: Dict[str, Any],
+        translations: List[Dict[str, str]],
+        original_lang: str,
+    ) -> TextRecord:
+        return TextRecord(
+            message_id=message["message_id"],
+            conversation_id=message["conversation_id"],
+            sender=message["sender"],
+            recipient=message["recipient"],
+            original_lang=original_lang,
+            original_text=message["text"],
+            translations=translations,
+            timestamp=message["timestamp"],
+            media=message.get("media", []),
+            deferred_languages=message.get("deferred_languages", []),
+        )
+
+    def translate_deferred(self, record: TextRecord) -> TextRecord:
+        """Follow-up record with the deferred languages translated.
+
+        The follow-up carries all translations (so its deliveries have the
+        full record), and ``deferred_languages`` names the ones it
+        delivers. A language left untranslated when time runs short is
+        delivered in the original text.
+        """
+        deadline = current_deadline()
+        translations = list(record.translations)
+        with activate(self.budget.translation_deadline(deadline)):
+            for target in record.deferred_languages:
+                if not self.budget.can_translate(deadline):
+                    logger.warning(
+                        "No time to translate follow-up to %s: %s left",
+                        target, deadline,
+                    )
+                    continue
+                translated_text = self.translate(
+                    record.original_text, target, record.original_lang
+                )
+                logger.debug("Translated to %s: %s", target, translated_text)
+                translations.append({"lang": target, "text": translated_text})
+        return record.model_copy(
+            update={"translations": translations, "is_follow_up": True}
+        )
+
+    def follow_up(self, record: TextRecord) -> None:
+        """Translate and deliver the deferred languages of ``record``."""
+        if not record.deferred_languages:
+            return
+
+        def run() -> None:
+            try:
+                if self.follow_up_dispatch is not None:
+                    self.follow_up_dispatch(record)
+                else:
+                    self.action(self.translate_deferred(record))
+            except Exception:
+                logger.exception(
+                    "Follow-up for %s failed", record.message_id
+                )
+
+        if self.follow_up_executor is not None:
+            context = contextvars.copy_context()
+            self.follow_up_executor.submit(context.run, run)
+        else:
+            run()
+
     def action(self, record: TextRecord) -> None:
-        """E.g. forward via Twilio, invoke SNS, push WebSocket…"""
-        for action in self.actions:
+        """E.g. forward via Twilio, invoke SNS, push WebSocket…
+
+        If an outbox is configured, the actions are not run here; their
+        deliveries are written to the outbox for an
+        :class:`.OutboxWorker` to perform. A follow-up record only goes to
+        the actions that deliver follow-ups.
+        """
+        actions = self.actions
+        if record.is_follow_up:
+            actions = [a for a in actions if a.delivers_follow_ups]
+        if self.outbox is not None:
+            self.outbox.enqueue(record, actions)
+            return
+
+        deadline = current_deadline()
+        for n, action in enumerate(actions):
+            if self.handoff is not None and not self.budget.can_act(deadline):
+                remaining = actions[n:]
+                logger.warning(
+                    "Handing off %d actions: %s left", len(remaining), deadline
+                )
+                self.handoff(record, remaining)
+                return
             action(record)
 
     def build_response(self) -> Dict[str, Any]:
@@ -151,3 +476,10 @@ class TranslatronText:  # TODO: make this an ABC
             "body": "<Response></Response>",
             "headers": {"Content-Type": "application/xml"},
         }
+
+
+def _first(value: Optional[str]) -> Optional[str]:
+    """First entry of a forwarded header; each proxy appends its own."""
+    if not value:
+        return None
+    return value.split(",")[0].strip()
@@ -0,0 +1,124 @@
+# src/translatron/tiers.py
+"""Priority tiers for target languages.
+
+Tier-1 languages are translated on the critical path, before the actions
+run. Languages in later tiers are *deferred*: the actions first run for
+the tier-1 recipients, and the deferred languages are translated and
+delivered afterwards as a follow-up. Under load (slow or throttled
+translation calls), every tier is demoted by one, except for pinned
+languages, so that the majority language group keeps a low latency.
+"""
+import collections
+import logging
+import threading
+from typing import Deque, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoadMonitor:
+    """Track translation latency and throttling to detect overload.
+
+    The monitor is *degraded* when, over the last ``window`` calls, the
+    ``quantile`` latency exceeds ``latency_threshold`` seconds or the
+    fraction of throttled calls exceeds ``throttle_threshold``. To avoid
+    flapping, it only recovers once both fall below ``recovery_factor``
+    times their thresholds.
+    """
+
+    def __init__(
+        self,
+        latency_threshold: float = 2.0,
+        throttle_threshold: float = 0.1,
+        window: int = 50,
+        quantile: float = 0.9,
+        min_samples: int = 10,
+        recovery_factor: float = 0.5,
+    ):
+        self.latency_threshold = latency_threshold
+        self.throttle_threshold = throttle_threshold
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.recovery_factor = recovery_factor
+        self._latencies: Deque[float] = collections.deque(maxlen=window)
+        self._throttled: Deque[bool] = collections.deque(maxlen=window)
+        self._degraded = False
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, throttled: bool = False) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._throttled.append(throttled)
+            self._update()
+
+    def _latency_quantile(self) -> float:
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+        return ordered[index]
+
+    def _update(self) -> None:
+        if len(self._latencies) < self.min_samples:
+            return
+        latency = self._latency_quantile()
+        throttle_rate = sum(self._throttled) / len(self._throttled)
+        if not self._degraded:
+            if (
+                latency > self.latency_threshold
+                or throttle_rate > self.throttle_threshold
+            ):
+                logger.warning(
+                    "Entering degraded mode: latency=%.3fs throttled=%.2f",
+                    latency, throttle_rate,
+                )
+                self._degraded = True
+        elif (
+            latency < self.latency_threshold * self.recovery_factor
+            and throttle_rate < self.throttle_threshold * self.recovery_factor
+        ):
+            logger.info("Leaving degraded mode")
+            self._degraded = False
+
+    @property
+    def degraded(self) -> bool:
+        return self._degraded
+
+
+class LanguageTiers:
+    """Assign each target language a priority tier.
+
+    Parameters
+    ==========
+    tiers: Dict[str, int]
+        Tier for each language; 1 is translated synchronously.
+    default_tier: int
+        Tier of languages not listed in ``tiers``.
+    monitor: Optional[LoadMonitor]
+        If given, tiers are demoted by one while it is degraded.
+    pinned: Optional[Iterable[str]]
+        Languages that are never demoted.
+    """
+
+    def __init__(
+        self,
+        tiers: Dict[str, int],
+        default_tier: int = 2,
+        monitor: Optional[LoadMonitor] = None,
+        pinned: Optional[Iterable[str]] = None,
+    ):
+        self.tiers = tiers
+        self.default_tier = default_tier
+        self.monitor = monitor
+        self.pinned = set(pinned or [])
+
+    def tier(self, lang: str) -> int:
+        tier = self.tiers.get(lang, self.default_tier)
+        if (
+            self.monitor is not None
+            and self.monitor.degraded
+            and lang not in self.pinned
+        ):
+            tier += 1
+        return tier
+
+    def is_deferred(self, lang: str) -> bool:
+        return self.tier(lang) > 1
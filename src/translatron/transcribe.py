@@ -0,0 +1,181 @@
+# src/translatron/transcribe.py
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+from pydantic import BaseModel
+
+from .deadline import current_deadline
+from .streaming import S3MultipartSink
+
+logger = logging.getLogger(__name__)
+
+
+class Transcript(BaseModel):
+    """Result of transcribing a recording."""
+
+    text: str
+    lang: Optional[str] = None
+
+
+class Transcriber(ABC):
+    @abstractmethod
+    def transcribe(
+        self, chunks: Iterable[bytes], content_type: str
+    ) -> Transcript:
+        """Transcribe audio provided as an iterable of byte chunks.
+
+        Implementations should consume the chunks incrementally rather than
+        joining them, so that long recordings are never fully buffered.
+        """
+        pass
+
+
+class FakeTranscriber(Transcriber):
+    """Local transcriber for tests: returns a fixed transcript.
+
+    The audio is still consumed, and the number of bytes and chunks seen is
+    recorded so tests can check that the recording was streamed.
+    """
+
+    def __init__(self, text: str = "", lang: Optional[str] = None):
+        self.text = text
+        self.lang = lang
+        self.bytes_received = 0
+        self.chunks_received = 0
+        self.content_type: Optional[str] = None
+
+    def transcribe(
+        self, chunks: Iterable[bytes], content_type: str
+    ) -> Transcript:
+        self.content_type = content_type
+        for chunk in chunks:
+            self.bytes_received += len(chunk)
+            self.chunks_received += 1
+        return Transcript(text=self.text, lang=self.lang)
+
+
+class AmazonTranscriber(Transcriber):
+    """Transcribe recordings with Amazon Transcribe.
+
+    The audio is streamed to S3 with a multipart upload that reuses a
+    single part buffer, and a batch transcription job is started and polled
+    until it finishes.
+
+    Batch jobs need a container format (WAV, MP3, ...); headerless PCM,
+    such as the output of :class:`.WavToPcmTranscoder`, is rejected before
+    anything is uploaded.
+
+    Parameters
+    ==========
+    bucket: str
+        S3 bucket for the recordings and transcription output.
+    prefix: str
+        Key prefix for objects written by this transcriber.
+    language_code: Optional[str]
+        Transcribe language code (e.g. ``"en-US"``). If None, Transcribe's
+        automatic language identification is used.
+    poll_interval, timeout: float
+        Seconds between job status checks, and before giving up (sooner
+        if the current deadline expires first).
+    part_size: int
+        Size of the multipart upload buffer (at least 5 MiB).
+    """
+
+    _MEDIA_FORMATS = {
+        "audio/wav": "wav",
+        "audio/x-wav": "wav",
+        "audio/mpeg": "mp3",
+        "audio/ogg": "ogg",
+        "audio/flac": "flac",
+    }
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "recordings/",
+        language_code: Optional[str] = None,
+        poll_interval: float = 1.0,
+        timeout: float = 600.0,
+        part_size: int = S3MultipartSink.MIN_PART_SIZE,
+    ):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.language_code = language_code
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.part_size = part_size
+        self.s3_client = boto3.client("s3")
+        self.transcribe_client = boto3.client("transcribe")
+
+    def transcribe(
+        self, chunks: Iterable[bytes], content_type: str
+    ) -> Transcript:
+        media_format = self._MEDIA_FORMATS.get(content_type)
+        if media_format is None:
+            raise ValueError(
+                f"Unsupported audio for batch transcription: {content_type}"
+            )
+        job_name = f"translatron-{uuid.uuid4()}"
+        key = f"{self.prefix}{job_name}.{media_format}"
+
+        sink = S3MultipartSink(
+            self.s3_client,
+            self.bucket,
+            key,
+            part_size=self.part_size,
+            content_type=content_type,
+        )
+        sink.write_all(chunks)
+        logger.info("Uploaded recording to s3://%s/%s", self.bucket, key)
+
+        job_kwargs = {
+            "TranscriptionJobName": job_name,
+            "Media": {"MediaFileUri": f"s3://{self.bucket}/{key}"},
+            "MediaFormat": media_format,
+            "OutputBucketName": self.bucket,
+            "OutputKey": f"{self.prefix}{job_name}.json",
+        }
+        if self.language_code:
+            job_kwargs["LanguageCode"] = self.language_code
+        else:
+            job_kwargs["IdentifyLanguage"] = True
+        self.transcribe_client.start_transcription_job(**job_kwargs)
+
+        job = self._wait_for_job(job_name)
+        obj = self.s3_client.get_object(
+            Bucket=self.bucket, Key=f"{self.prefix}{job_name}.json"
+        )
+        result = json.loads(obj["Body"].read())
+        text = " ".join(
+            t["transcript"] for t in result["results"]["transcripts"]
+        )
+        lang = job.get("LanguageCode")
+        return Transcript(text=text, lang=lang.split("-")[0] if lang else None)
+
+    def _wait_for_job(self, job_name: str) -> dict:
+        deadline = time.monotonic() + self.timeout
+        request_deadline = current_deadline()
+        while True:
+            if request_deadline is not None:
+                request_deadline.check(f"transcription job {job_name}")
+            resp = self.transcribe_client.get_transcription_job(
+                TranscriptionJobName=job_name
+            )
+            job = resp["TranscriptionJob"]
+            status = job["TranscriptionJobStatus"]
+            if status == "COMPLETED":
+                return job
+            if status == "FAILED":
+                raise RuntimeError(
+                    f"Transcription job {job_name} failed: "
+                    f"{job.get('FailureReason')}"
+                )
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Transcription job {job_name} timed out")
+            time.sleep(self.poll_interval)
@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Any
+from typing import List, Optional, Any
+
+from .usage import record_detection, record_translation
 
 
 class Translator(ABC):
+    # whether translate_batch is a native batch call rather than a loop
+    # over translate; wrappers report their provider's
+    supports_batch = False
+
     @abstractmethod
     def detect_language(self, text: str) -> str:
         """Return ISO language code for the input text."""
@@ -18,6 +24,25 @@ class Translator(ABC):
         """Return translated text into target_language."""
         pass
 
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        """Translate several texts with the same source and target.
+
+        Providers with a native batch API should override this and set
+        ``supports_batch``; the default translates the texts one at a
+        time.
+        """
+        return [
+            self.translate(
+                text, target_language, detected_language=detected_language
+            )
+            for text in texts
+        ]
+
 
 class NonTranslator(Translator):
     def detect_language(self, text: str) -> str:
@@ -35,14 +60,41 @@ class NonTranslator(Translator):
 
 
 class AmazonTranslator(Translator):
-    def __init__(self):
+    """Amazon Translate, with Amazon Comprehend for detection.
+
+    Parameters
+    ==========
+    timeout: float
+        Read timeout of each API call, in seconds. botocore's default of
+        60 seconds is far longer than a webhook can wait.
+    connect_timeout: float
+        Connection timeout, in seconds.
+    max_attempts: int
+        Attempts botocore makes per call, the first one included. Retries
+        that respect the request deadline are better left to
+        :class:`.RetryingTranslator`.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 5.0,
+        connect_timeout: float = 2.0,
+        max_attempts: int = 2,
+    ):
         import boto3
+        from botocore.config import Config
 
-        self.translate_client = boto3.client("translate")
-        self.comprehend_client = boto3.client("comprehend")
+        config = Config(
+            connect_timeout=connect_timeout,
+            read_timeout=timeout,
+            retries={"mode": "standard", "max_attempts": max_attempts},
+        )
+        self.translate_client = boto3.client("translate", config=config)
+        self.comprehend_client = boto3.client("comprehend", config=config)
 
     def detect_language(self, text: str) -> str:
         resp = self.comprehend_client.detect_dominant_language(Text=text)
+        record_detection("amazon", len(text))
         return resp["Languages"][0]["LanguageCode"]
 
     def translate(
@@ -58,10 +110,13 @@ class AmazonTranslator(Translator):
             SourceLanguageCode=detected_language,
             TargetLanguageCode=target_language,
         )
+        record_translation("amazon", target_language, len(text))
         return resp["TranslatedText"]
 
 
 class GoogleTranslator(Translator):
+    supports_batch = True
+
     def __init__(self, credentials_path: str):
         # require GOOGLE_APPLICATION_CREDENTIALS env var
         from google.cloud import translate_v2 as translate
@@ -72,6 +127,7 @@ class GoogleTranslator(Translator):
 
     def detect_language(self, text: str) -> str:
         resp = self.client.detect_language(text)
+        record_detection("google", len(text))
         return resp["language"]
 
     def translate(
@@ -89,4 +145,77 @@ class GoogleTranslator(Translator):
             )
         else:
             resp = self.client.translate(text, target_language=target_language)
+        record_translation("google", target_language, len(text))
         return resp["translatedText"]
+
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> List[str]:
+        # the v2 client accepts a list of values and returns a list
+        kwargs = {"target_language": target_language}
+        if detected_language and detected_language != "auto":
+            kwargs["source_language"] = detected_language
+        resp = self.client.translate(list(texts), **kwargs)
+        record_translation(
+            "google", target_language, sum(len(text) for text in texts)
+        )
+        return [item["translatedText"] for item in resp]
+
+
+class LocalTranslator(Translator):
+    """Offline translator backed by a prebuilt phrase table.
+
+    Phrases found in the table are served from a memory-mapped file without
+    any network access. Anything else goes to ``fallback`` if given;
+    otherwise the text is returned untranslated (as with
+    :class:`.NonTranslator`) and detection returns ``default_language``.
+
+    Parameters
+    ==========
+    phrase_table_path: str
+        Path to a table built with :meth:`.PhraseTable.build`. The table is
+        opened once per process.
+    fallback: Optional[Translator]
+        Translator for phrases that aren't in the table.
+    default_language: str
+        Language reported for unknown phrases when there is no fallback.
+    """
+
+    def __init__(
+        self,
+        phrase_table_path: str,
+        fallback: Optional[Translator] = None,
+        default_language: str = "en",
+    ):
+        from .phrases import load_phrase_table
+
+        self.table = load_phrase_table(phrase_table_path)
+        self.fallback = fallback
+        self.default_language = default_language
+
+    def detect_language(self, text: str) -> str:
+        entry = self.table.lookup(text)
+        if entry is not None:
+            return entry.source
+        if self.fallback is not None:
+            return self.fallback.detect_language(text)
+        return self.default_language
+
+    def translate(
+        self,
+        text: str,
+        target_language: str,
+        detected_language: Optional[str] = None,
+    ) -> str:
+        source = None if detected_language == "auto" else detected_language
+        entry = self.table.lookup(text, source=source)
+        if entry is not None and target_language in entry.translations:
+            return entry.translations[target_language]
+        if self.fallback is not None:
+            return self.fallback.translate(
+                text, target_language, detected_language=detected_language
+            )
+        return text
@@ -0,0 +1,306 @@
+# src/translatron/usage.py
+"""Accounting of the billable usage caused by each message.
+
+Every message costs a language detection, a translation per target
+language (billed by character), SMS segments or calls for each recipient,
+and DynamoDB writes. The handler activates a :class:`UsageAccumulator`
+for each message, in a context variable as with the deadline. Translator
+providers and actions report to the active accumulator when they make a
+billable call; with none active, reporting does nothing. Only calls that
+reach a provider are counted, so cache and phrase-table hits are free.
+
+The handler passes each message's :class:`Usage` to a
+:class:`UsageMetrics`, which sums it per messaging number and writes the
+totals as CloudWatch embedded-metric (EMF) log lines. With
+:class:`.StoreToDynamoDB` (``store_usage=True``), the usage is also stored
+with the record, for billing per group.
+"""
+import contextlib
+import contextvars
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+NAMESPACE = "Translatron"
+
+
+class Usage(BaseModel):
+    """Billable usage of one message (or a sum of several)."""
+
+    # provider -> number of detection calls / characters detected
+    detect_calls: Dict[str, int] = {}
+    detect_characters: Dict[str, int] = {}
+    # provider -> target language -> characters translated
+    translated_characters: Dict[str, Dict[str, int]] = {}
+    sms_messages: int = 0
+    sms_segments: int = 0
+    voice_calls: int = 0
+    dynamodb_writes: int = 0
+
+    @property
+    def total_translated_characters(self) -> int:
+        return sum(
+            sum(langs.values())
+            for langs in self.translated_characters.values()
+        )
+
+
+class UsageAccumulator:
+    """Thread-safe collector of the usage of one message."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage = Usage()
+
+    def add_detection(self, provider: str, characters: int) -> None:
+        with self._lock:
+            usage = self._usage
+            usage.detect_calls[provider] = (
+                usage.detect_calls.get(provider, 0) + 1
+            )
+            usage.detect_characters[provider] = (
+                usage.detect_characters.get(provider, 0) + characters
+            )
+
+    def add_translation(
+        self, provider: str, language: str, characters: int
+    ) -> None:
+        with self._lock:
+            langs = self._usage.translated_characters.setdefault(provider, {})
+            langs[language] = langs.get(language, 0) + characters
+
+    def add_sms(self, segments: int, messages: int = 1) -> None:
+        with self._lock:
+            self._usage.sms_segments += segments
+            self._usage.sms_messages += messages
+
+    def add_voice_call(self) -> None:
+        with self._lock:
+            self._usage.voice_calls += 1
+
+    def add_dynamodb_write(self, count: int = 1) -> None:
+        with self._lock:
+            self._usage.dynamodb_writes += count
+
+    def snapshot(self) -> Usage:
+        """Copy of the usage so far."""
+        with self._lock:
+            return self._usage.model_copy(deep=True)
+
+
+_current: contextvars.ContextVar[Optional[UsageAccumulator]] = (
+    contextvars.ContextVar("translatron_usage", default=None)
+)
+
+
+def current_usage() -> Optional[UsageAccumulator]:
+    """Accumulator of the message being handled, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def activate_usage(
+    accumulator: Optional[UsageAccumulator] = None,
+) -> Iterator[UsageAccumulator]:
+    """Collect the usage of the block in ``accumulator`` (a new one by
+    default)."""
+    if accumulator is None:
+        accumulator = UsageAccumulator()
+    token = _current.set(accumulator)
+    try:
+        yield accumulator
+    finally:
+        _current.reset(token)
+
+
+# reporting functions used by providers and actions; no-ops when no
+# accumulator is active
+def record_detection(provider: str, characters: int) -> None:
+    accumulator = _current.get()
+    if accumulator is not None:
+        accumulator.add_detection(provider, characters)
+
+
+def record_translation(provider: str, language: str, characters: int) -> None:
+    accumulator = _current.get()
+    if accumulator is not None:
+        accumulator.add_translation(provider, language, characters)
+
+
+def record_sms(segments: int, messages: int = 1) -> None:
+    accumulator = _current.get()
+    if accumulator is not None:
+        accumulator.add_sms(segments, messages)
+
+
+def record_voice_call() -> None:
+    accumulator = _current.get()
+    if accumulator is not None:
+        accumulator.add_voice_call()
+
+
+def record_dynamodb_write(count: int = 1) -> None:
+    accumulator = _current.get()
+    if accumulator is not None:
+        accumulator.add_dynamodb_write(count)
+
+
+# ---- aggregated metrics ----------------------------------------------------
+def _write_stdout(line: str) -> None:
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+class UsageMetrics:
+    """Usage summed per messaging number, emitted as CloudWatch EMF.
+
+    In Lambda, EMF lines written to stdout become CloudWatch metrics
+    without any API call. Totals since start are also available for the
+    server's metrics endpoint (:meth:`gauges`).
+
+    Parameters
+    ==========
+    namespace: str
+        CloudWatch namespace of the metrics.
+    flush_interval: float
+        Seconds over which usage is summed before it is written. With 0,
+        every message is written at once; in Lambda, where the process
+        can be frozen at any time, that is the safe choice.
+    sink: Optional[Callable[[str], None]]
+        Where the EMF lines go; stdout by default.
+    """
+
+    def __init__(
+        self,
+        namespace: str = NAMESPACE,
+        flush_interval: float = 0.0,
+        sink: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.sink = sink or _write_stdout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Usage] = {}
+        self._messages: Dict[str, int] = {}
+        self._flushed_at = clock()
+        self.totals = Usage()
+        self.messages = 0
+
+    def add(self, usage: Usage, number: str = "") -> None:
+        """Add the usage of one message to the group at ``number``."""
+        with self._lock:
+            pending = self._pending.setdefault(number, Usage())
+            for target in (pending, self.totals):
+                _merge(target, usage)
+            self._messages[number] = self._messages.get(number, 0) + 1
+            self.messages += 1
+            due = self.clock() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending usage and start a new interval."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            messages, self._messages = self._messages, {}
+            self._flushed_at = self.clock()
+        for number, usage in pending.items():
+            for document in self.documents(usage, number, messages[number]):
+                self.sink(json.dumps(document))
+
+    def documents(
+        self, usage: Usage, number: str, messages: int
+    ) -> List[Dict[str, Any]]:
+        """EMF documents for the usage of one messaging number."""
+        timestamp = int(time.time() * 1000)
+        values = {
+            "Messages": messages,
+            "DetectCalls": sum(usage.detect_calls.values()),
+            "TranslatedCharacters": usage.total_translated_characters,
+            "SmsMessages": usage.sms_messages,
+            "SmsSegments": usage.sms_segments,
+            "VoiceCalls": usage.voice_calls,
+            "DynamoDBWrites": usage.dynamodb_writes,
+        }
+        documents = [
+            self._document(timestamp, {"Number": number}, values)
+        ]
+        for provider, langs in sorted(usage.translated_characters.items()):
+            for language, characters in sorted(langs.items()):
+                documents.append(self._document(
+                    timestamp,
+                    {
+                        "Number": number,
+                        "Provider": provider,
+                        "Language": language,
+                    },
+                    {"TranslatedCharacters": characters},
+                    # per provider and language across groups, too
+                    extra_dimensions=[["Provider", "Language"]],
+                ))
+        return documents
+
+    def _document(
+        self,
+        timestamp: int,
+        dimensions: Dict[str, str],
+        values: Dict[str, int],
+        extra_dimensions: Optional[List[List[str]]] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": (
+                        [list(dimensions)] + (extra_dimensions or [])
+                    ),
+                    "Metrics": [
+                        {"Name": name, "Unit": "Count"} for name in values
+                    ],
+                }],
+            },
+            **dimensions,
+            **values,
+        }
+
+    def gauges(self) -> Dict[str, Callable[[], float]]:
+        """Totals since start, as ``metrics_sources`` for
+        :class:`.TranslatronASGI`."""
+        totals = self.totals
+        sources: List[Tuple[str, Callable[[], float]]] = [
+            ("usage_messages_total", lambda: self.messages),
+            ("usage_detect_calls_total",
+             lambda: sum(totals.detect_calls.values())),
+            ("usage_translated_characters_total",
+             lambda: totals.total_translated_characters),
+            ("usage_sms_segments_total", lambda: totals.sms_segments),
+            ("usage_voice_calls_total", lambda: totals.voice_calls),
+            ("usage_dynamodb_writes_total", lambda: totals.dynamodb_writes),
+        ]
+        return dict(sources)
+
+
+def _merge(target: Usage, usage: Usage) -> None:
+    for provider, count in usage.detect_calls.items():
+        target.detect_calls[provider] = (
+            target.detect_calls.get(provider, 0) + count
+        )
+    for provider, count in usage.detect_characters.items():
+        target.detect_characters[provider] = (
+            target.detect_characters.get(provider, 0) + count
+        )
+    for provider, langs in usage.translated_characters.items():
+        target_langs = target.translated_characters.setdefault(provider, {})
+        for language, count in langs.items():
+            target_langs[language] = target_langs.get(language, 0) + count
+    target.sms_messages += usage.sms_messages
+    target.sms_segments += usage.sms_segments
+    target.voice_calls += usage.voice_calls
+    target.dynamodb_writes += usage.dynamodb_writes
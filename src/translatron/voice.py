@@ -0,0 +1,249 @@
+# src/translatron/voice.py
+import logging
+import time
+import urllib.error
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from .actions import ActionBase
+from .deadline import current_deadline
+from .dispatch import Dispatcher
+from .logs import MessageLog
+from .media import open_url
+from .phrases import PhraseTable
+from .streaming import BoundedStream, Transcoder
+from .text import TranslatronText
+from .transcribe import Transcriber, Transcript
+from .translator import Translator
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {"wav": "audio/wav", "mp3": "audio/mpeg"}
+
+# key of the recordings dispatched with :func:`.invoke_async`
+RECORDING_EVENT = "translatron_recording"
+
+
+def open_recording(
+    url: str,
+    auth: Optional[Tuple[str, str]] = None,
+    retries: int = 3,
+    retry_delay: float = 1.0,
+    timeout: float = 30.0,
+):
+    """Open an HTTP response for the recording at ``url``.
+
+    Twilio may return 404 for a short time after a recording finishes, so
+    404s are retried. The timeout is shortened to fit the current deadline.
+    Credentials are only sent to the host of ``url`` (see
+    :func:`.open_url`).
+    """
+    deadline = current_deadline()
+    for attempt in range(retries + 1):
+        if deadline is not None:
+            deadline.check("fetching recording")
+            timeout = deadline.timeout(timeout)
+        try:
+            return open_url(url, auth=auth, timeout=timeout)
+        except urllib.error.HTTPError as exc:
+            if exc.code != 404 or attempt == retries:
+                raise
+            logger.info("Recording not available yet; retrying: %s", url)
+            time.sleep(retry_delay)
+
+
+def fetch_recording(
+    url: str,
+    auth: Optional[Tuple[str, str]] = None,
+    chunk_size: int = 64 * 1024,
+    max_in_flight: int = 4,
+    **kwargs,
+) -> Iterator[memoryview]:
+    """Stream a recording from ``url`` in chunks of at most ``chunk_size``.
+
+    The download goes through a :class:`.BoundedStream`, so at most
+    ``max_in_flight`` chunks are buffered ahead of the consumer and the
+    recording is never held in memory as a whole. Each chunk is only valid
+    until the next one is requested. Extra keyword arguments are passed to
+    :func:`open_recording`.
+    """
+    response = open_recording(url, auth=auth, **kwargs)
+    with response:
+        yield from BoundedStream(
+            response, buffer_size=chunk_size, max_in_flight=max_in_flight
+        )
+
+
+class TranslatronVoice(TranslatronText):
+    """Twilio voice mail -> transcription -> translation -> actions.
+
+    An incoming call is answered with TwiML that plays ``greeting`` and
+    records the caller. When the recording ends, Twilio posts the
+    ``RecordingUrl`` back to the same URL; the recording is then streamed
+    to the transcriber, and the transcript goes through the same
+    translation fan-out and actions as a text message. The language
+    found by the transcriber, if any, is used instead of detection.
+
+    Transcription takes far longer than Twilio waits for a webhook
+    response (about 15 seconds). With a ``dispatch``, the recording
+    callback only hands its parameters to it and ends the call at once.
+    With ``invoke_async(function_name, RECORDING_EVENT)`` (see
+    :mod:`translatron.dispatch`), the recording is processed by an
+    asynchronous invocation of the handler; in a server, the dispatcher
+    can instead submit ``handler({RECORDING_EVENT: params}, None)`` to an
+    executor. Without a ``dispatch``, the recording is processed before
+    the response, which only suits short recordings and fast
+    transcribers.
+
+    Memory used for the download is bounded by ``chunk_size *
+    (max_in_flight + 1)`` per call, independent of the recording length.
+    An optional ``transcoder`` converts the audio chunk-by-chunk before it
+    reaches the transcriber.
+    """
+
+    def __init__(
+        self,
+        translator: Translator,
+        actions: List[ActionBase],
+        languages: List[str],
+        transcriber: Transcriber,
+        phrase_table: Optional[PhraseTable] = None,
+        recording_format: str = "wav",
+        chunk_size: int = 64 * 1024,
+        max_in_flight: int = 4,
+        transcoder: Optional[Transcoder] = None,
+        greeting: str = "Please leave a message after the tone.",
+        max_length: int = 120,
+        dispatch: Optional[Dispatcher] = None,
+    ) -> None:
+        super().__init__(
+            translator=translator,
+            actions=actions,
+            languages=languages,
+            phrase_table=phrase_table,
+        )
+        self.transcriber = transcriber
+        self.recording_format = recording_format
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.transcoder = transcoder
+        self.greeting = greeting
+        self.max_length = max_length
+        self.dispatch = dispatch
+
+    # ---- public entrypoint -------------------------------------------------
+    def handle(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        if RECORDING_EVENT in event:
+            with self.message_log(context) as log:
+                self.process_recording(event[RECORDING_EVENT], log)
+            return self.build_response()
+
+        with self.message_log(context) as log:
+            with log.stage("validate"):
+                params = self.parse_event_params(event)
+                headers = event["headers"]
+                valid = self.validate_twilio_event(
+                    params, headers, self.get_request_path(event)
+                )
+            if not valid:
+                logger.error("Invalid Twilio request signature")
+                log.set(status=403)
+                return {
+                    "statusCode": 403,
+                    "body": "Forbidden: Invalid Twilio request signature",
+                }
+
+            if "RecordingUrl" not in params:
+                log.set(stage="prompt")
+                return self.build_record_prompt()
+
+            if self.dispatch is not None:
+                with log.stage("dispatch"):
+                    self.dispatch(params)
+            else:
+                self.process_recording(params, log)
+            return self.build_response()
+
+    def process_recording(
+        self, params: Dict[str, List[str]], log: MessageLog
+    ) -> None:
+        """Transcribe, translate and act on the recording in ``params``."""
+        with log.stage("transcribe"):
+            message = self.get_message_details(params)
+        if not message["text"].strip():
+            logger.warning("Empty transcription; nothing to translate")
+            log.set(empty_transcript=True)
+            return
+
+        with log.stage("translate"):
+            translations, orig_lang = self.detect_and_translate(message)
+        log.record = self.build_record(message, translations, orig_lang)
+        with log.stage("action"):
+            self.action(log.record)
+        with log.stage("follow_up"):
+            self.follow_up(log.record)
+
+    # ---- overridable hooks -------------------------------------------------
+    def get_recording_url(self, params: Dict[str, List[str]]) -> str:
+        """URL of the recording media in the configured format."""
+        return f"{params['RecordingUrl'][0]}.{self.recording_format}"
+
+    def fetch_recording(self, url: str) -> Iterator[memoryview]:
+        auth = (self.get_twilio_account_sid(), self.get_twilio_auth_token())
+        return fetch_recording(
+            url,
+            auth=auth,
+            chunk_size=self.chunk_size,
+            max_in_flight=self.max_in_flight,
+        )
+
+    def transcribe(self, params: Dict[str, List[str]]) -> Transcript:
+        url = self.get_recording_url(params)
+        logger.info("Transcribing recording %s", url)
+        chunks = self.fetch_recording(url)
+        if self.transcoder is not None:
+            chunks = self.transcoder.transcode(chunks)
+            content_type = self.transcoder.content_type
+        else:
+            content_type = CONTENT_TYPES.get(
+                self.recording_format, "application/octet-stream"
+            )
+        return self.transcriber.transcribe(chunks, content_type)
+
+    def get_message_details(
+        self, params: Dict[str, List[str]]
+    ) -> Dict[str, Any]:
+        message = super().get_message_details(params)
+        transcript = self.transcribe(params)
+        logger.debug("Transcript: %s", transcript.text)
+        message["text"] = transcript.text
+        if transcript.lang is not None:
+            message["lang"] = transcript.lang
+        return message
+
+    def detect_language(self, message: Dict[str, Any]) -> str:
+        """The transcriber's language if it found one, else detection."""
+        return message.get("lang") or super().detect_language(message)
+
+    def build_record_prompt(self) -> Dict[str, Any]:
+        """TwiML answering the call and recording a message."""
+        twiml = (
+            "<Response>"
+            f"<Say>{escape(self.greeting)}</Say>"
+            f"<Record maxLength={quoteattr(str(self.max_length))} "
+            'method="POST" playBeep="true"/>'
+            "</Response>"
+        )
+        return {
+            "statusCode": 200,
+            "body": twiml,
+            "headers": {"Content-Type": "application/xml"},
+        }
+
+    def build_response(self) -> Dict[str, Any]:
+        """TwiML ending the call after the recording has been handled."""
+        return {
+            "statusCode": 200,
+            "body": "<Response><Hangup/></Response>",
+            "headers": {"Content-Type": "application/xml"},
+        }
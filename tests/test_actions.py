@@ -5,8 +5,16 @@ from moto import mock_aws
 from twilio.rest import Client as TwilioClient
 from typing import Optional, List, Tuple
 
-from translatron.actions import ActionBase, NullAction, StoreToDynamoDB, SendTranslatedSMS
+from translatron.actions import (
+    ActionBase,
+    NullAction,
+    StoreToDynamoDB,
+    SendTranslatedSMS,
+    SendTranslatedVoice,
+)
 from translatron.record import TextRecord
+from translatron.sms import SegmentPolicy
+from translatron.speech import FakeSynthesizer, S3AudioStore, UploadedAudioKeys
 
 
 class TestActionBase:
@@ -26,7 +34,9 @@ class TestNullAction:
         """Test that NullAction logs the record but does nothing else."""
         with patch('translatron.actions.logger') as mock_logger:
             self.action(basic_text_record)
-            mock_logger.debug.assert_called_once_with(f"NullAction called with record: {basic_text_record}")
+            mock_logger.debug.assert_called_once_with(
+                "NullAction called with record: %s", basic_text_record
+            )
 
     def test_null_action_with_empty_record(self):
         """Test NullAction with minimal record data."""
@@ -43,7 +53,9 @@ class TestNullAction:
 
         with patch('translatron.actions.logger') as mock_logger:
             self.action(record)
-            mock_logger.debug.assert_called_once_with(f"NullAction called with record: {record}")
+            mock_logger.debug.assert_called_once_with(
+                "NullAction called with record: %s", record
+            )
 
     def test_null_action_multiple_calls(self):
         """Test that NullAction can be called multiple times."""
@@ -74,8 +86,8 @@ class TestNullAction:
             self.action(record2)
             
             expected_calls = [
-                call.debug(f"NullAction called with record: {record1}"),
-                call.debug(f"NullAction called with record: {record2}")
+                call.debug("NullAction called with record: %s", record1),
+                call.debug("NullAction called with record: %s", record2)
             ]
             mock_logger.debug.assert_has_calls(expected_calls)
 
@@ -116,7 +128,13 @@ class TestStoreToDynamoDB:
         """Test storing a record to DynamoDB."""
         with patch('translatron.actions.logger') as mock_logger:
             self.action(basic_text_record)
-            mock_logger.info.assert_called_once_with(f"Storing record in {self.table_name}: {basic_text_record}")
+            mock_logger.info.assert_called_once_with(
+                "Storing message %s in %s",
+                basic_text_record.message_id, self.table_name,
+            )
+            mock_logger.debug.assert_called_once_with(
+                "Stored record: %s", basic_text_record
+            )
         
         # Verify the record was stored
         response = self.table.get_item(Key={'message_id': basic_text_record.message_id})
@@ -232,7 +250,9 @@ class TestSendTranslatedSMS:
         
         with patch('translatron.actions.logger') as mock_logger:
             self.action(record)
-            mock_logger.error.assert_called_once_with("Unknown recipient messaging number: +15559999999")
+            mock_logger.error.assert_called_once_with(
+                "Unknown recipient messaging number: %s", "+15559999999"
+            )
         
         # No SMS should be sent
         self.mock_twilio_client.messages.create.assert_not_called()
@@ -245,7 +265,9 @@ class TestSendTranslatedSMS:
         
         with patch('translatron.actions.logger') as mock_logger:
             self.action(record)
-            mock_logger.warning.assert_called_once_with(f"Unknown sender: +15559999999. Record: {record}")
+            mock_logger.warning.assert_called_once_with(
+                "Unknown sender: %s. Record: %s", "+15559999999", record
+            )
         
         # No SMS should be sent
         self.mock_twilio_client.messages.create.assert_not_called()
@@ -383,8 +405,157 @@ class TestSendTranslatedSMS:
         with patch('translatron.actions.logger') as mock_logger:
             self.action(record)
             
-            # Check that info logging calls were made
-            mock_logger.info.assert_any_call(f"Sending SMS with translated record: {record}")
-            
+            # content and numbers only at DEBUG
+            mock_logger.info.assert_any_call(
+                "Sending %s for message %s", "SMS", record.message_id
+            )
+            mock_logger.debug.assert_any_call("Translated record: %s", record)
+
             # Should have logging for each recipient
-            assert mock_logger.info.call_count >= 3  # At least initial log + 2 recipients
+            # At least initial log + 2 recipients
+            assert mock_logger.debug.call_count >= 3
+
+    def test_send_results_record_segments(self, basic_text_record):
+        record = basic_text_record.model_copy(update={
+            "translations": [
+                {"lang": "es", "text": "Hola a todos"},
+                {"lang": "fr", "text": "C’est " + "a" * 70},
+            ]
+        })
+
+        results = self.action(record)
+
+        results_by_lang = {r.lang: r for r in results}
+        assert set(results_by_lang) == {"es", "fr"}
+        assert results_by_lang["es"].encoding == "gsm7"
+        assert results_by_lang["es"].segments == 1
+        assert results_by_lang["fr"].encoding == "ucs2"
+        assert results_by_lang["fr"].segments == 2
+        assert results_by_lang["fr"].to == "+15559876545"
+        assert all(r.messages == 1 for r in results)
+
+    def test_segment_policy_normalizes_body(self, basic_text_record):
+        action = SendTranslatedSMS(
+            self.user_info,
+            self.mock_twilio_client,
+            segment_policy=SegmentPolicy(),
+        )
+        record = basic_text_record.model_copy(update={
+            "translations": [
+                {"lang": "es", "text": "Hola"},
+                {"lang": "fr", "text": "C’est " + "a" * 70},
+            ]
+        })
+
+        results = action(record)
+
+        bodies = [
+            c[1]["body"]
+            for c in self.mock_twilio_client.messages.create.call_args_list
+        ]
+        assert "C'est " + "a" * 70 in bodies
+        fr_result = [r for r in results if r.lang == "fr"][0]
+        assert fr_result.encoding == "gsm7"
+        assert fr_result.segments == 1
+
+    def test_split_message_reports_worst_encoding(self, basic_text_record):
+        policy = Mock()
+        policy.choose.return_value = ["Hello", "Привет"]
+        action = SendTranslatedSMS(
+            self.user_info, self.mock_twilio_client, segment_policy=policy
+        )
+        results = action(basic_text_record)
+        assert {r.encoding for r in results} == {"ucs2"}
+        assert all(r.messages == 2 for r in results)
+
+    def test_unknown_recipient_returns_no_results(self, basic_text_record):
+        record = basic_text_record.model_copy(update={
+            "recipient": "+15559999999"
+        })
+        assert self.action(record) == []
+
+
+@mock_aws
+class TestSendTranslatedVoice:
+    def setup_method(self, method):
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="tts-bucket")
+        self.store = S3AudioStore("tts-bucket", s3_client=s3)
+        self.synthesizer = FakeSynthesizer()
+        self.mock_twilio_client = Mock(spec=TwilioClient)
+        self.mock_twilio_client.calls = Mock()
+
+    def make_action(self, user_info, uploaded_keys=None):
+        return SendTranslatedVoice(
+            user_info,
+            self.mock_twilio_client,
+            synthesizer=self.synthesizer,
+            audio_store=self.store,
+            uploaded_keys=uploaded_keys,
+            voices={"es": "Lupe"},
+        )
+
+    def test_plays_translation(self, basic_text_record, user_info_data):
+        action = self.make_action(user_info_data)
+        results = action(basic_text_record)
+
+        assert {r.lang for r in results} == {"es", "fr"}
+        assert not any(r.cached for r in results)
+        assert sorted(self.synthesizer.calls) == [
+            ("Bonjour le monde", "fr", None),
+            ("Hola mundo", "es", "Lupe"),
+        ]
+        calls = self.mock_twilio_client.calls.create.call_args_list
+        assert len(calls) == 2
+        for c in calls:
+            assert c[1]["from_"] == "+15551234567"
+            assert c[1]["twiml"].startswith("<Response><Play>https://")
+            assert "&amp;" in c[1]["twiml"]  # presigned query is escaped
+
+    def test_s3_hit_skips_synthesis(self, basic_text_record, user_info_data):
+        self.make_action(user_info_data)(basic_text_record)
+        self.synthesizer.calls.clear()
+
+        # a new action (e.g. another container) shares the S3 store
+        results = self.make_action(user_info_data)(basic_text_record)
+        assert self.synthesizer.calls == []
+        assert all(r.cached for r in results)
+
+    def test_local_hit_skips_s3(self, basic_text_record, user_info_data):
+        keys = UploadedAudioKeys()
+        action = self.make_action(user_info_data, uploaded_keys=keys)
+        action(basic_text_record)
+        assert len(keys) == 2
+
+        with patch.object(self.store, "exists") as mock_exists:
+            results = action(basic_text_record)
+        mock_exists.assert_not_called()
+        assert all(r.cached for r in results)
+        assert len(self.synthesizer.calls) == 2
+
+
+class TestSendTranslatedDeferred:
+    def test_deferred_languages_skipped_then_followed_up(
+        self, basic_text_record, user_info_data
+    ):
+        client = Mock(spec=TwilioClient)
+        client.messages = Mock()
+        action = SendTranslatedSMS(user_info_data, client)
+
+        record = basic_text_record.model_copy(update={
+            "translations": [{"lang": "es", "text": "Hola mundo"}],
+            "deferred_languages": ["fr"],
+        })
+        action(record)
+        (first,) = client.messages.create.call_args_list
+        assert first[1]["to"] == "+15559876544"
+
+        follow_up = basic_text_record.model_copy(update={
+            "deferred_languages": ["fr"],
+            "is_follow_up": True,
+        })
+        action(follow_up)
+        second = client.messages.create.call_args_list[1]
+        assert second[1]["to"] == "+15559876545"
+        assert second[1]["body"] == "Bonjour le monde"
+        assert client.messages.create.call_count == 2
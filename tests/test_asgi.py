@@ -0,0 +1,257 @@
+import asyncio
+import threading
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+import pytest
+from twilio.request_validator import RequestValidator
+
+from translatron.asgi import (
+    RequestContext, ServerMetrics, TranslatronASGI, build_event
+)
+from translatron.deadline import Deadline
+from translatron.text import TranslatronText
+from translatron.translator import NonTranslator
+
+
+def run_request(app, method="POST", path="/", body=b"", headers=None,
+                chunks=None):
+    """Drive one HTTP request through the ASGI app; returns
+    (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": headers or [(b"host", b"example.com")],
+    }
+    if chunks is None:
+        chunks = [body]
+    messages = [
+        {"type": "http.request", "body": chunk,
+         "more_body": n < len(chunks) - 1}
+        for n, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, body_msg = sent
+    return start["status"], dict(start["headers"]), body_msg["body"]
+
+
+def echo_handler(event, context):
+    return {
+        "statusCode": 200,
+        "body": "<Response></Response>",
+        "headers": {"Content-Type": "application/xml"},
+        "event": event,
+    }
+
+
+class TestBuildEvent:
+    def test_form_body(self):
+        scope = {
+            "method": "POST",
+            "path": "/sms",
+            "query_string": b"a=1",
+            "headers": [
+                (b"Host", b"example.com"),
+                (b"X-Twilio-Signature", b"sig"),
+            ],
+        }
+        event = build_event(scope, b"From=%2B1555&Body=Hi")
+        assert event["body"] == "From=%2B1555&Body=Hi"
+        assert not event["isBase64Encoded"]
+        assert event["headers"] == {
+            "host": "example.com", "x-twilio-signature": "sig"
+        }
+        assert event["path"] == "/sms"
+        assert event["queryStringParameters"] == {"a": "1"}
+        assert event["rawPath"] == "/sms"
+        assert event["rawQueryString"] == "a=1"
+
+    def test_binary_body_base64(self):
+        event = build_event({"headers": []}, b"\xff\xfe")
+        assert event["isBase64Encoded"]
+        assert event["body"] == "//4="
+
+
+class TestRequestContext:
+    def test_remaining_time(self):
+        context = RequestContext("id", timeout=10)
+        assert 9000 < context.get_remaining_time_in_millis() <= 10000
+
+    def test_no_timeout_means_no_deadline(self):
+        context = RequestContext("id")
+        assert not hasattr(context, "get_remaining_time_in_millis")
+        assert Deadline.from_context(context) is None
+
+
+class TestServerMetrics:
+    def test_render(self):
+        metrics = ServerMetrics()
+        metrics.started()
+        metrics.finished(200, 0.5, error=False)
+        text = metrics.render({"cache_size": 3})
+        assert 'translatron_requests_total{status="200"} 1' in text
+        assert "translatron_requests_in_flight 0" in text
+        assert "translatron_request_seconds_count 1" in text
+        assert "translatron_cache_size 3" in text
+
+
+class TestTranslatronASGI:
+    def setup_method(self):
+        self.events = []
+
+        def handler(event, context):
+            self.events.append((event, context))
+            return echo_handler(event, context)
+
+        self.app = TranslatronASGI(handler, max_workers=2, timeout=5)
+
+    def test_webhook(self):
+        status, headers, body = run_request(
+            self.app, body=b"Body=Hello", chunks=[b"Body=", b"Hello"]
+        )
+        assert status == 200
+        assert body == b"<Response></Response>"
+        assert headers[b"content-type"] == b"application/xml"
+        assert headers[b"content-length"] == b"21"
+        event, context = self.events[0]
+        assert event["body"] == "Body=Hello"
+        assert event["headers"]["host"] == "example.com"
+        assert context.get_remaining_time_in_millis() > 0
+
+    def test_handler_status_passed_through(self):
+        app = TranslatronASGI(lambda event, context: {
+            "statusCode": 403, "body": "Forbidden"
+        })
+        status, _, body = run_request(app)
+        assert status == 403
+        assert body == b"Forbidden"
+
+    def test_handler_error(self):
+        def handler(event, context):
+            raise RuntimeError("boom")
+
+        app = TranslatronASGI(handler)
+        status, _, _ = run_request(app)
+        assert status == 500
+        assert app.metrics.errors == 1
+
+    def test_method_not_allowed(self):
+        status, _, _ = run_request(self.app, method="GET")
+        assert status == 405
+        assert self.events == []
+
+    def test_body_too_large(self):
+        self.app.max_body_bytes = 4
+        status, _, _ = run_request(self.app, body=b"Body=Hello")
+        assert status == 413
+
+    def test_metrics_endpoint(self):
+        run_request(self.app, body=b"Body=Hi")
+        status, headers, body = run_request(
+            self.app, method="GET", path="/metrics"
+        )
+        assert status == 200
+        assert b'translatron_requests_total{status="200"} 1' in body
+
+    def test_health_and_draining(self):
+        assert run_request(self.app, method="GET", path="/healthz")[0] == 200
+        self.app.draining = True
+        assert run_request(self.app, method="GET", path="/healthz")[0] == 503
+        assert run_request(self.app, body=b"Body=Hi")[0] == 503
+        assert self.events == []
+
+    def test_handler_runs_in_worker_thread(self):
+        threads = []
+
+        def handler(event, context):
+            threads.append(threading.current_thread().name)
+            return {"statusCode": 200, "body": ""}
+
+        run_request(TranslatronASGI(handler))
+        assert threads[0].startswith("translatron")
+
+    def test_signed_webhook_without_timeout(self):
+        token = "test_token_123"
+        params = {"From": "+15551234567", "To": "+15559876543", "Body": "Hi"}
+        signature = RequestValidator(token).compute_signature(
+            "https://public.example.com/sms", params
+        )
+        handler = TranslatronText(
+            translator=NonTranslator(), actions=[], languages=["en"]
+        )
+        app = TranslatronASGI(handler)  # no timeout
+        with patch.object(
+            handler, "get_twilio_auth_token", return_value=token
+        ):
+            status, _, body = run_request(
+                app,
+                path="/sms",
+                body=urlencode(params).encode(),
+                headers=[
+                    (b"host", b"127.0.0.1:8000"),
+                    (b"x-forwarded-host", b"public.example.com"),
+                    (b"x-forwarded-proto", b"https"),
+                    (b"x-twilio-signature", signature.encode()),
+                ],
+            )
+        assert status == 200
+        assert body == b"<Response></Response>"
+
+    def test_unsupported_scope(self):
+        with pytest.raises(ValueError):
+            asyncio.run(self.app({"type": "websocket"}, None, None))
+
+
+class TestLifespan:
+    def test_shutdown_waits_for_in_flight(self):
+        release = threading.Event()
+        finished = []
+
+        def handler(event, context):
+            release.wait(5)
+            finished.append(True)
+            return {"statusCode": 200, "body": ""}
+
+        app = TranslatronASGI(handler, shutdown_timeout=5)
+
+        async def main():
+            lifespan_messages = asyncio.Queue()
+            sent = []
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await lifespan_messages.put({"type": "lifespan.startup"})
+            lifespan = asyncio.create_task(
+                app({"type": "lifespan"}, lifespan_messages.get, send)
+            )
+            request = asyncio.create_task(asyncio.to_thread(
+                run_request, app, body=b"Body=Hi"
+            ))
+            while not app.metrics.in_flight:
+                await asyncio.sleep(0.01)
+            await lifespan_messages.put({"type": "lifespan.shutdown"})
+            await asyncio.sleep(0.1)
+            assert app.draining
+            assert "lifespan.shutdown.complete" not in sent
+            release.set()
+            await lifespan
+            status = (await request)[0]
+            return status, sent
+
+        status, sent = asyncio.run(main())
+        assert status == 200
+        assert finished == [True]
+        assert sent == [
+            "lifespan.startup.complete", "lifespan.shutdown.complete"
+        ]
@@ -0,0 +1,283 @@
+import json
+from decimal import Decimal
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.backfill import Backfill, Checkpoint
+from translatron.cache import CachingTranslator
+from translatron.record import TextRecord
+from translatron.storage import CODEC, RecordEncoder, decode_item
+from translatron.usage import Usage
+from translatron.testing import FakeTranslator
+
+
+class BatchRecordingTranslator(FakeTranslator):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def translate_batch(self, texts, target_language,
+                        detected_language=None):
+        self.batches.append((detected_language, target_language, list(texts)))
+        return super().translate_batch(
+            texts, target_language, detected_language=detected_language
+        )
+
+
+def make_record(n, lang="en", text=None, translations=None):
+    return TextRecord(
+        message_id=f"msg-{n}",
+        conversation_id=f"conv-{n % 3}",
+        sender="+15559876543",
+        recipient="+15551234567",
+        original_lang=lang,
+        original_text=text or f"message {n % 4}",
+        translations=translations or [],
+        timestamp=f"2023-01-01T12:00:{n:02d}Z",
+    )
+
+
+class TestCheckpoint:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "checkpoint.json")
+        checkpoint = Checkpoint(path, 2)
+        assert checkpoint.cursor(0) is None
+        assert not checkpoint.is_done(0)
+        checkpoint.update(0, {"id": "a", "n": Decimal("12")})
+        checkpoint.update(1, None)
+
+        resumed = Checkpoint(path, 2)
+        assert resumed.cursor(0) == {"id": "a", "n": Decimal("12")}
+        assert not resumed.is_done(0)
+        assert resumed.is_done(1)
+        assert not resumed.complete
+        resumed.update(0, None)
+        assert resumed.complete
+        assert json.load(open(path))["total_segments"] == 2
+
+    def test_segments_mismatch(self, tmp_path):
+        path = str(tmp_path / "checkpoint.json")
+        Checkpoint(path, 2).update(0, None)
+        with pytest.raises(ValueError):
+            Checkpoint(path, 4)
+
+
+@mock_aws
+class TestBackfill:
+    def setup_method(self, method):
+        self.dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        self.table = self.dynamodb.create_table(
+            TableName="messages",
+            KeySchema=[
+                {"AttributeName": "conversation_id", "KeyType": "HASH"},
+                {"AttributeName": "timestamp", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "conversation_id", "AttributeType": "S"},
+                {"AttributeName": "timestamp", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self.translator = BatchRecordingTranslator()
+
+    def put(self, record, encoder=None):
+        item = encoder.encode(record) if encoder else record.model_dump()
+        self.table.put_item(Item=item)
+
+    def records(self):
+        items = self.table.scan()["Items"]
+        return {
+            r.message_id: r for r in (decode_item(item) for item in items)
+        }
+
+    def backfill(self, **kwargs):
+        kwargs.setdefault("segments", 2)
+        return Backfill(
+            "messages", ["es", "fr"], self.translator,
+            dynamodb=self.dynamodb, **kwargs
+        )
+
+    def test_adds_missing_translations(self):
+        for n in range(8):
+            self.put(make_record(n))
+        self.put(make_record(
+            8, translations=[{"lang": "es", "text": "ya"}]
+        ))
+        self.put(make_record(9, lang="es"))
+
+        report = self.backfill().run()
+
+        records = self.records()
+        assert {t["lang"]: t["text"] for t in records["msg-0"].translations} \
+            == {"es": "[es] message 0", "fr": "[fr] message 0"}
+        assert records["msg-8"].translations == [
+            {"lang": "es", "text": "ya"},
+            {"lang": "fr", "text": "[fr] message 0"},
+        ]
+        assert records["msg-9"].translations == [
+            {"lang": "fr", "text": "[fr] message 1"}
+        ]
+        assert report.scanned == 10
+        assert report.updated == 10
+        assert report.translations == 8 * 2 + 1 + 1
+        assert report.conflicts == 0
+
+    def test_batches_and_caches(self):
+        for n in range(12):
+            self.put(make_record(n))
+        report = self.backfill(segments=1, batch_size=3).run()
+        # four distinct texts, sent once per target language
+        sent = [text for _, _, texts in self.translator.batches
+                for text in texts]
+        assert len(sent) == 8
+        assert all(len(texts) <= 3 for _, _, texts in self.translator.batches)
+        assert {src for src, _, _ in self.translator.batches} == {"en"}
+        assert report.characters == len("message 0") * 8
+        assert report.updated == 12
+
+    def test_skips_complete_records(self):
+        self.put(make_record(0, translations=[
+            {"lang": "es", "text": "a"}, {"lang": "fr", "text": "b"},
+        ]))
+        report = self.backfill().run()
+        assert report.skipped == 1
+        assert report.updated == 0
+        assert self.translator.batches == []
+
+    def test_skips_media_only_records(self):
+        self.put(make_record(0))
+        media_only = make_record(1, lang="und")
+        media_only.original_text = ""
+        self.put(media_only)
+        report = self.backfill().run()
+        assert report.updated == 1
+        assert report.skipped == 1
+        assert all(
+            source == "en" for source, _, _ in self.translator.batches
+        )
+        assert self.records()["msg-1"].translations == []
+
+    def test_overwrite(self):
+        self.put(make_record(0, translations=[
+            {"lang": "es", "text": "old"}, {"lang": "de", "text": "alt"},
+        ]))
+        report = self.backfill(overwrite=True).run()
+        assert report.updated == 1
+        translations = self.records()["msg-0"].translations
+        assert {t["lang"]: t["text"] for t in translations} == {
+            "de": "alt", "es": "[es] message 0", "fr": "[fr] message 0",
+        }
+
+    def test_encoded_items(self):
+        encoder = RecordEncoder(min_compress_size=0)
+        long_text = "a long message that compresses well " * 20
+        self.put(make_record(0, text=long_text), encoder)
+        self.put(make_record(1), RecordEncoder(codec=None))
+
+        report = self.backfill(encoder=encoder).run()
+
+        assert report.updated == 2
+        items = {i["message_id"]: i for i in self.table.scan()["Items"]}
+        assert items["msg-0"][CODEC] == "gzip"
+        records = self.records()
+        assert len(records["msg-0"].translations) == 2
+        assert records["msg-0"].original_text == long_text
+        assert len(records["msg-1"].translations) == 2
+
+    def test_encoded_item_layout_preserved(self):
+        # written with an extra top-level attribute, a TTL and gzip
+        layout = RecordEncoder(
+            min_compress_size=0, ttl=3600, clock=lambda: 1000.0,
+            index_attributes=["recipient", "original_lang", "usage"],
+        )
+        record = make_record(0, text="a long message " * 20)
+        record.usage = Usage(sms_messages=1)
+        self.put(record, layout)
+
+        report = self.backfill(encoder=RecordEncoder(codec=None)).run()
+
+        assert report.updated == 1
+        (item,) = self.table.scan()["Items"]
+        assert item[CODEC] == "gzip"
+        assert item["expires_at"] == 4600
+        assert item["usage"]["sms_messages"] == 1
+        updated = decode_item(item)
+        assert len(updated.translations) == 2
+        assert updated.usage == record.usage
+
+    def test_conflicts_are_skipped(self):
+        for n in range(4):
+            self.put(make_record(n))
+
+        table = self.table
+
+        class Racing(Backfill):
+            def _translate(self, pending):
+                # another writer adds a translation after the scan
+                _, record, _ = pending[0]
+                changed = record.model_copy(update={
+                    "translations": [{"lang": "de", "text": "x"}]
+                })
+                table.put_item(Item=changed.model_dump())
+                self.changed = record.message_id
+                return super()._translate(pending)
+
+        job = Racing(
+            "messages", ["es"], self.translator,
+            segments=1, dynamodb=self.dynamodb,
+        )
+        report = job.run()
+        assert report.conflicts == 1
+        assert report.updated == 3
+        records = self.records()
+        assert records[job.changed].translations == [
+            {"lang": "de", "text": "x"}
+        ]
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        for n in range(6):
+            self.put(make_record(n))
+        path = str(tmp_path / "checkpoint.json")
+
+        class Interrupted(Exception):
+            pass
+
+        def interrupt(report):
+            raise Interrupted()
+
+        with pytest.raises(Interrupted):
+            self.backfill(
+                segments=1, page_size=2, progress=interrupt,
+                checkpoint=Checkpoint(path, 1),
+            ).run()
+        assert sum(
+            len(r.translations) > 0 for r in self.records().values()
+        ) == 2
+
+        reports = []
+        report = self.backfill(
+            segments=1, page_size=2, progress=reports.append,
+            checkpoint=Checkpoint(path, 1),
+        ).run()
+        # the first page is not scanned again
+        assert report.scanned == 4
+        assert reports[-1].scanned == 4
+        assert all(r.translations for r in self.records().values())
+        assert Checkpoint(path, 1).complete
+
+        # a finished backfill has nothing left to do
+        report = self.backfill(
+            segments=1, checkpoint=Checkpoint(path, 1)
+        ).run()
+        assert report.scanned == 0
+
+    def test_uses_given_cache(self):
+        cache = CachingTranslator(self.translator)
+        job = Backfill("messages", ["es"], cache, dynamodb=self.dynamodb)
+        assert job.translator is cache
+
+    def test_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            self.backfill(batch_size=101)
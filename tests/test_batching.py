@@ -0,0 +1,184 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from translatron.batching import MicroBatchingTranslator
+from translatron.translator import Translator
+from translatron.usage import activate_usage, record_translation
+
+
+class BatchRecordingTranslator(Translator):
+    supports_batch = True
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def detect_language(self, text):
+        return "en"
+
+    def translate(self, text, target_language, detected_language=None):
+        return self.translate_batch(
+            [text], target_language, detected_language
+        )[0]
+
+    def translate_batch(self, texts, target_language, detected_language=None):
+        with self.lock:
+            self.batches.append(
+                (list(texts), target_language, detected_language)
+            )
+        if self.fail:
+            raise RuntimeError("provider down")
+        record_translation(
+            "batch", target_language, sum(len(t) for t in texts)
+        )
+        return [f"[{target_language}] {t}" for t in texts]
+
+
+class MockTranslator(Translator):
+    def detect_language(self, text):
+        return "en"
+
+    def translate(self, text, target_language, detected_language=None):
+        return f"[{target_language}] {text}"
+
+
+def run_concurrently(translator, calls):
+    barrier = threading.Barrier(len(calls))
+
+    def call(args):
+        barrier.wait()
+        return translator.translate(*args)
+
+    with ThreadPoolExecutor(len(calls)) as pool:
+        return list(pool.map(call, calls))
+
+
+class TestMicroBatchingTranslator:
+    def test_single_request(self):
+        inner = BatchRecordingTranslator()
+        translator = MicroBatchingTranslator(inner, max_wait=0.001)
+        assert translator.translate("Hi", "es", "en") == "[es] Hi"
+        assert inner.batches == [(["Hi"], "es", "en")]
+
+    def test_concurrent_requests_are_batched(self):
+        inner = BatchRecordingTranslator()
+        translator = MicroBatchingTranslator(
+            inner, max_batch_size=100, max_wait=0.2
+        )
+        calls = [(f"msg {n}", "es", "en") for n in range(8)]
+        results = run_concurrently(translator, calls)
+
+        # every caller gets its own translation
+        assert results == [f"[es] msg {n}" for n in range(8)]
+        assert len(inner.batches) < 8
+        assert sum(len(texts) for texts, _, _ in inner.batches) == 8
+        assert translator.mean_batch_size > 1
+
+    def test_batches_split_by_language_pair(self):
+        inner = BatchRecordingTranslator()
+        translator = MicroBatchingTranslator(inner, max_wait=0.2)
+        calls = [("a", "es", "en"), ("b", "fr", "en"), ("c", "es", "de")]
+        results = run_concurrently(translator, calls)
+        assert results == ["[es] a", "[fr] b", "[es] c"]
+        assert sorted((t, s) for _, t, s in inner.batches) == [
+            ("es", "de"), ("es", "en"), ("fr", "en")
+        ]
+
+    def test_full_batch_sent_without_waiting(self):
+        inner = BatchRecordingTranslator()
+        # a long wait that would time the test out if it were used
+        translator = MicroBatchingTranslator(
+            inner, max_batch_size=4, max_wait=30
+        )
+        calls = [(f"m{n}", "es", "en") for n in range(4)]
+        results = run_concurrently(translator, calls)
+        assert len(results) == 4
+        assert [len(texts) for texts, _, _ in inner.batches] == [4]
+
+    def test_usage_billed_to_each_caller(self):
+        inner = BatchRecordingTranslator()
+        translator = MicroBatchingTranslator(
+            inner, max_batch_size=4, max_wait=30
+        )
+        texts = ["a", "bb", "ccc", "dddd"]
+        barrier = threading.Barrier(len(texts))
+
+        def call(text):
+            with activate_usage() as usage:
+                barrier.wait()
+                translator.translate(text, "es", "en")
+            return usage.snapshot().translated_characters
+
+        with ThreadPoolExecutor(len(texts)) as pool:
+            usages = list(pool.map(call, texts))
+        assert [len(texts) for texts, _, _ in inner.batches] == [4]
+        assert usages == [{"batch": {"es": len(t)}} for t in texts]
+
+    def test_errors_reach_every_caller(self):
+        inner = BatchRecordingTranslator(fail=True)
+        translator = MicroBatchingTranslator(inner, max_wait=0.05)
+        errors = []
+
+        def call(text):
+            try:
+                translator.translate(text, "es", "en")
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=call, args=(t,)) for t in "abc"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(errors) == 3
+
+    def test_mismatched_batch_result(self):
+        inner = BatchRecordingTranslator()
+        inner.translate_batch = lambda texts, target, detected_language=None: []
+        translator = MicroBatchingTranslator(inner, max_wait=0.001)
+        with pytest.raises(RuntimeError, match="Expected 1"):
+            translator.translate("Hi", "es")
+
+    def test_passthrough_without_native_batch(self):
+        inner = Mock(wraps=MockTranslator())
+        inner.supports_batch = False
+        translator = MicroBatchingTranslator(inner, max_wait=30)
+        # no wait for other callers
+        assert translator.translate("Hi", "es", "en") == "[es] Hi"
+        inner.translate.assert_called_once_with(
+            "Hi", "es", detected_language="en"
+        )
+        inner.translate_batch.assert_not_called()
+
+    def test_supports_batch_through_wrappers(self):
+        from translatron.cache import CachingTranslator
+        from translatron.failover import FailoverTranslator
+        from translatron.ratelimit import RateLimitedTranslator
+        from translatron.retry import RetryingTranslator, RetryPolicy
+
+        native = BatchRecordingTranslator()
+        wrapped = CachingTranslator(RetryingTranslator(
+            RateLimitedTranslator(native, provider=str(uuid.uuid4())),
+            RetryPolicy(),
+        ))
+        failover = FailoverTranslator({"a": wrapped, "b": MockTranslator()})
+        try:
+            assert failover.supports_batch
+            assert not FailoverTranslator(
+                {"b": MockTranslator()}
+            ).supports_batch
+            assert failover.translate_batch(["a", "b"], "es", "en") == [
+                "[es] a", "[es] b"
+            ]
+        finally:
+            failover.close()
+        assert native.batches == [(["a", "b"], "es", "en")]
+
+    def test_detect_language_passthrough(self):
+        translator = MicroBatchingTranslator(BatchRecordingTranslator())
+        assert translator.detect_language("Hi") == "en"
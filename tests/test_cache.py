@@ -0,0 +1,73 @@
+import pytest
+
+from translatron.cache import CachingTranslator
+from translatron.testing import FakeTranslator
+
+
+class BatchRecordingTranslator(FakeTranslator):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def translate_batch(self, texts, target_language,
+                        detected_language=None):
+        self.batches.append(list(texts))
+        return super().translate_batch(
+            texts, target_language, detected_language=detected_language
+        )
+
+
+@pytest.fixture
+def translator():
+    return BatchRecordingTranslator()
+
+
+class TestCachingTranslator:
+    def test_translate_hit(self, translator):
+        cache = CachingTranslator(translator)
+        assert cache.translate("hi", "es", "en") == "[es] hi"
+        assert cache.translate("hi", "es", "en") == "[es] hi"
+        assert translator.translate_calls == 1
+        assert cache.stats() == {
+            "hits": 1, "misses": 1, "characters": 2, "entries": 1
+        }
+
+    def test_key_includes_languages(self, translator):
+        cache = CachingTranslator(translator)
+        cache.translate("hi", "es", "en")
+        cache.translate("hi", "fr", "en")
+        cache.translate("hi", "es", "pt")
+        assert translator.translate_calls == 3
+        # "auto" is the same as no source language
+        cache.translate("hi", "es")
+        cache.translate("hi", "es", "auto")
+        assert translator.translate_calls == 4
+
+    def test_eviction(self, translator):
+        cache = CachingTranslator(translator, max_entries=2)
+        cache.translate("a", "es")
+        cache.translate("b", "es")
+        cache.translate("a", "es")  # "b" is now least recently used
+        cache.translate("c", "es")
+        assert len(cache) == 2
+        cache.translate("a", "es")
+        assert translator.translate_calls == 3
+        cache.translate("b", "es")
+        assert translator.translate_calls == 4
+
+    def test_batch_sends_only_misses(self, translator):
+        cache = CachingTranslator(translator)
+        cache.translate("a", "es", "en")
+        result = cache.translate_batch(["a", "b", "c", "b"], "es", "en")
+        assert result == ["[es] a", "[es] b", "[es] c", "[es] b"]
+        assert translator.batches == [["b", "c"]]
+        assert cache.characters == 3
+
+        cache.translate_batch(["a", "b"], "es", "en")
+        assert translator.batches == [["b", "c"]]
+
+    def test_detect_passes_through(self, translator):
+        cache = CachingTranslator(translator)
+        assert cache.detect_language("hi") == "en"
+        assert cache.detect_language("hi") == "en"
+        assert translator.detect_calls == 2
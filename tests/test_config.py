@@ -0,0 +1,292 @@
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.actions import SendTranslatedSMS
+from translatron.config import (
+    ConfigError,
+    ConfigLoader,
+    EnvSource,
+    FileSource,
+    HandlerConfig,
+    Routing,
+    S3Source,
+    SSMSource,
+    source_from_uri,
+)
+from translatron.translator import NonTranslator
+
+
+@pytest.fixture
+def config_data(user_info_data):
+    return {"user_info": user_info_data, "dynamodb_table": "messages"}
+
+
+class FakeSource:
+    def __init__(self, text):
+        self.text = text
+        self.fetches = 0
+        self.error = None
+
+    def fetch(self, version):
+        self.fetches += 1
+        if self.error is not None:
+            raise self.error
+        current = str(hash(self.text))
+        return None if current == version else (self.text, current)
+
+
+class TestHandlerConfig:
+    def test_default_languages(self, config_data):
+        config = HandlerConfig.model_validate(config_data)
+        assert config.languages == ["en", "es", "fr"]
+        assert config.translator == "amazon"
+
+    def test_explicit_languages(self, config_data):
+        config_data["languages"] = ["es"]
+        assert HandlerConfig.model_validate(config_data).languages == ["es"]
+
+    @pytest.mark.parametrize("bad", [
+        {"translator": "babelfish"},
+        {"unknown_key": 1},
+        {"user_info": {"+1": {"+2": {"name": "A", "lang": ""}}}},
+        {"user_info": {"+1": {"+2": {"name": "A"}}}},
+    ])
+    def test_invalid(self, config_data, bad):
+        config_data.update(bad)
+        with pytest.raises(ValueError):
+            HandlerConfig.model_validate(config_data)
+
+    def test_user_table_instead_of_user_info(self):
+        config = HandlerConfig.model_validate({"user_table": "users"})
+        assert config.user_info == {}
+        # the handler takes the languages from the directory
+        assert config.languages == []
+
+    def test_user_info_required(self):
+        with pytest.raises(ValueError):
+            HandlerConfig.model_validate({"dynamodb_table": "messages"})
+
+    def test_make_translator(self, config_data):
+        config_data["translator"] = "none"
+        config = HandlerConfig.model_validate(config_data)
+        assert isinstance(config.make_translator(), NonTranslator)
+
+
+class TestRouting:
+    def setup_method(self):
+        self.user_info = {
+            "+1000": {
+                "+1": {"name": "A", "lang": "en"},
+                "+2": {"name": "B", "lang": "es"},
+                "+3": {"name": "C", "lang": "fr"},
+            },
+        }
+        self.routing = Routing(self.user_info)
+
+    def test_targets(self):
+        assert self.routing.targets("+1000", "+1") == [
+            ("+2", "es"), ("+3", "fr")
+        ]
+        assert self.routing.targets("+1000", "+9") is None
+        assert self.routing.targets("+9999", "+1") is None
+
+    def test_mapping(self):
+        assert dict(self.routing) == self.user_info
+        assert "+1000" in self.routing
+        assert self.routing.languages == {"+1000": ["en", "es", "fr"]}
+
+    def test_used_by_send_action(self, basic_text_record, user_info_data,
+                                 mock_twilio_client):
+        action = SendTranslatedSMS(Routing(user_info_data), mock_twilio_client)
+        results = action(basic_text_record)
+        assert sorted((r.to, r.lang) for r in results) == [
+            ("+15559876544", "es"), ("+15559876545", "fr")
+        ]
+
+    def test_unknown_sender_with_routing(self, basic_text_record,
+                                         user_info_data, mock_twilio_client):
+        action = SendTranslatedSMS(Routing(user_info_data), mock_twilio_client)
+        record = basic_text_record.model_copy(update={"sender": "+1"})
+        assert action(record) == []
+
+
+class TestEnvSource:
+    def test_config_json(self, config_data):
+        source = EnvSource({"TRANSLATRON_CONFIG": json.dumps(config_data)})
+        text, version = source.fetch(None)
+        assert json.loads(text) == config_data
+        assert source.fetch(version) is None
+
+    def test_legacy_variables(self, user_info_data):
+        source = EnvSource({
+            "USER_INFO": json.dumps(user_info_data),
+            "TARGET_LANGUAGES": "en,fa",
+            "DYNAMODB_TABLE": "messages",
+            "TRANSLATOR_PROVIDER": "amazon",
+        })
+        text, _ = source.fetch(None)
+        config = HandlerConfig.model_validate_json(text)
+        assert config.languages == ["en", "fa"]
+        assert config.dynamodb_table == "messages"
+
+    def test_missing(self):
+        with pytest.raises(ConfigError):
+            EnvSource({}).fetch(None)
+
+    def test_user_table_without_user_info(self):
+        text, _ = EnvSource({"USER_TABLE": "users", "USER_INFO": ""}).fetch(
+            None
+        )
+        config = HandlerConfig.model_validate_json(text)
+        assert config.user_table == "users"
+        assert config.user_info == {}
+
+    def test_invalid_json(self):
+        with pytest.raises(ConfigError):
+            EnvSource({"USER_INFO": "{not json"}).fetch(None)
+
+
+def test_file_source(tmp_path, config_data):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config_data))
+    source = FileSource(str(path))
+    text, version = source.fetch(None)
+    assert json.loads(text) == config_data
+    assert source.fetch(version) is None
+    config_data["languages"] = ["es"]
+    path.write_text(json.dumps(config_data))
+    assert source.fetch(version) is not None
+
+
+@mock_aws
+def test_s3_source(config_data):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="translatron-config")
+    s3.put_object(Bucket="translatron-config", Key="sms.json",
+                  Body=json.dumps(config_data))
+    source = S3Source("translatron-config", "sms.json", s3_client=s3)
+    text, etag = source.fetch(None)
+    assert json.loads(text) == config_data
+    assert source.fetch(etag) is None
+    s3.put_object(Bucket="translatron-config", Key="sms.json", Body=json.dumps(
+        {**config_data, "languages": ["es"]}
+    ))
+    assert json.loads(source.fetch(etag)[0])["languages"] == ["es"]
+
+
+@mock_aws
+def test_ssm_source(config_data):
+    ssm = boto3.client("ssm", region_name="us-east-1")
+    ssm.put_parameter(Name="/translatron/sms", Type="SecureString",
+                      Value=json.dumps(config_data))
+    source = SSMSource("/translatron/sms", ssm_client=ssm)
+    text, version = source.fetch(None)
+    assert json.loads(text) == config_data
+    assert version == "1"
+    assert source.fetch(version) is None
+
+
+@pytest.mark.parametrize("uri, cls", [
+    (None, EnvSource),
+    ("env:", EnvSource),
+    ("s3://bucket/path/config.json", S3Source),
+    ("ssm:/translatron/sms", SSMSource),
+    ("file:///etc/translatron.json", FileSource),
+    ("config.json", FileSource),
+])
+def test_source_from_uri(uri, cls):
+    with mock_aws():
+        source = source_from_uri(uri)
+    assert isinstance(source, cls)
+    if cls is S3Source:
+        assert (source.bucket, source.key) == ("bucket", "path/config.json")
+    if cls is SSMSource:
+        assert source.name == "/translatron/sms"
+
+
+def test_source_from_uri_invalid_s3():
+    with pytest.raises(ConfigError):
+        source_from_uri("s3://bucket")
+
+
+class TestConfigLoader:
+    def setup_method(self):
+        self.now = 0.0
+        self.changes = []
+
+    def make_loader(self, source):
+        return ConfigLoader(
+            source,
+            refresh_interval=60,
+            on_change=self.changes.append,
+            clock=lambda: self.now,
+        )
+
+    def test_cached_until_refresh(self, config_data):
+        source = FakeSource(json.dumps(config_data))
+        loader = self.make_loader(source)
+        config = loader.get()
+        assert loader.get() is config
+        assert source.fetches == 1
+        self.now = 61
+        assert loader.get() is config  # unchanged at the source
+        assert source.fetches == 2
+        assert len(self.changes) == 1
+
+    def test_refresh_picks_up_changes(self, config_data):
+        source = FakeSource(json.dumps(config_data))
+        loader = self.make_loader(source)
+        first_routing = loader.routing()
+        source.text = json.dumps({**config_data, "languages": ["es"]})
+        self.now = 61
+        assert loader.get().languages == ["es"]
+        assert loader.routing() is not first_routing
+        assert [c.languages for c in self.changes] == [
+            ["en", "es", "fr"], ["es"]
+        ]
+
+    def test_resource_change_needs_restart(self, config_data, caplog):
+        source = FakeSource(json.dumps(config_data))
+        loader = self.make_loader(source)
+        loader.get()
+        source.text = json.dumps({
+            **config_data, "outbox_table": "other", "languages": ["es"]
+        })
+        self.now = 61
+        with caplog.at_level("WARNING", logger="translatron.config"):
+            assert loader.get().outbox_table == "other"
+        assert "changes outbox_table" in caplog.text
+        assert "languages" not in caplog.text
+
+    def test_changed_fields(self, config_data):
+        config = HandlerConfig(**config_data)
+        other = HandlerConfig(**{**config_data, "translator": "none"})
+        assert config.changed_fields(other) == ["translator"]
+        assert config.changed_fields(config) == []
+
+    def test_failed_refresh_keeps_config(self, config_data):
+        source = FakeSource(json.dumps(config_data))
+        loader = self.make_loader(source)
+        config = loader.get()
+        source.text = "{not json"
+        self.now = 61
+        assert loader.get() is config
+        # not retried until the next interval
+        loader.get()
+        assert source.fetches == 2
+
+    def test_first_load_errors_raise(self):
+        loader = self.make_loader(FakeSource('{"user_info": 1}'))
+        with pytest.raises(ConfigError):
+            loader.get()
+
+    def test_from_env(self, monkeypatch, tmp_path, config_data):
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(config_data))
+        monkeypatch.setenv("TRANSLATRON_CONFIG_URI", str(path))
+        loader = ConfigLoader.from_env()
+        assert isinstance(loader.source, FileSource)
+        assert loader.get().dynamodb_table == "messages"
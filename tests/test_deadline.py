@@ -0,0 +1,93 @@
+from unittest.mock import Mock
+
+import pytest
+
+from translatron.deadline import (
+    MIN_TIMEOUT,
+    Deadline,
+    DeadlineBudget,
+    DeadlineExceededError,
+    activate,
+    current_deadline,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+    def test_remaining_and_expiry(self):
+        clock = FakeClock()
+        deadline = Deadline.from_timeout(2.0, clock=clock)
+        assert deadline.remaining() == 2.0
+        assert not deadline.expired
+        deadline.check()
+        clock.now += 2.5
+        assert deadline.expired
+        with pytest.raises(DeadlineExceededError, match="translate"):
+            deadline.check("translate")
+
+    def test_from_context(self):
+        clock = FakeClock()
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 3000
+        deadline = Deadline.from_context(
+            context, safety_margin=0.5, clock=clock
+        )
+        assert deadline.remaining() == 2.5
+
+    def test_from_context_nearly_expired(self):
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 100
+        assert Deadline.from_context(context).expired
+
+    def test_from_context_outside_lambda(self):
+        assert Deadline.from_context({}) is None
+        assert Deadline.from_context(None) is None
+
+
+class TestActivate:
+    def test_activate_and_reset(self):
+        deadline = Deadline.from_timeout(1.0)
+        assert current_deadline() is None
+        with activate(deadline):
+            assert current_deadline() is deadline
+            with activate(None):
+                assert current_deadline() is None
+            assert current_deadline() is deadline
+        assert current_deadline() is None
+
+
+class TestStageDeadlines:
+    def test_child_and_timeout(self):
+        clock = FakeClock()
+        deadline = Deadline.from_timeout(3.0, clock=clock)
+        child = deadline.child(reserve=1.0)
+        assert child.remaining() == 2.0
+        assert deadline.timeout(10.0) == 3.0
+        assert deadline.timeout(0.5) == 0.5
+        clock.now += 5
+        # never 0, which would make a socket non-blocking
+        assert deadline.timeout(1.0) == MIN_TIMEOUT
+
+    def test_budget(self):
+        clock = FakeClock()
+        budget = DeadlineBudget(actions=1.0, translation=0.5)
+        deadline = Deadline.from_timeout(1.4, clock=clock)
+        assert not budget.can_translate(deadline)
+        assert budget.can_act(deadline)
+        assert budget.translation_deadline(deadline).remaining() == (
+            pytest.approx(0.4)
+        )
+        clock.now += 0.5
+        assert not budget.can_act(deadline)
+
+    def test_budget_without_deadline(self):
+        budget = DeadlineBudget()
+        assert budget.can_translate(None) and budget.can_act(None)
+        assert budget.translation_deadline(None) is None
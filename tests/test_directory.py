@@ -0,0 +1,166 @@
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.actions import SendTranslatedSMS
+from translatron.directory import (
+    DynamoDBUserDirectory,
+    Routing,
+    StaticUserDirectory,
+    as_directory,
+    create_directory_table,
+)
+
+
+class TestStaticUserDirectory:
+    def test_lookups(self, user_info_data):
+        directory = StaticUserDirectory(user_info_data)
+        assert directory.members("+15551111111") == user_info_data[
+            "+15551111111"
+        ]
+        assert directory.members("+1") is None
+        assert sorted(directory.targets("+15551234567", "+15559876543")) == [
+            ("+15559876544", "es"), ("+15559876545", "fr")
+        ]
+        assert directory.targets("+15551234567", "+1") is None
+        assert directory.targets("+1", "+15559876543") is None
+
+    def test_sees_changes_to_dict(self, user_info_data):
+        directory = StaticUserDirectory(user_info_data)
+        user_info_data["+15551111111"]["+15554444444"] = {
+            "name": "Frank", "lang": "fr"
+        }
+        assert ("+15554444444", "fr") in directory.targets(
+            "+15551111111", "+15552222222"
+        )
+
+
+def test_as_directory(user_info_data):
+    assert isinstance(as_directory(user_info_data), StaticUserDirectory)
+    routing = Routing(user_info_data)
+    assert as_directory(routing) is routing
+
+
+def test_routing_is_directory(user_info_data):
+    routing = Routing(user_info_data)
+    assert routing.members("+15551111111") == user_info_data["+15551111111"]
+    assert routing.members("+1") is None
+
+
+@mock_aws
+class TestDynamoDBUserDirectory:
+    def setup_method(self, method):
+        self.dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        create_directory_table("users", dynamodb=self.dynamodb)
+        self.now = 0.0
+        self.directory = self.make_directory()
+
+    def make_directory(self, refresh_interval=60, **kwargs):
+        return DynamoDBUserDirectory(
+            "users",
+            refresh_interval=refresh_interval,
+            dynamodb=self.dynamodb,
+            clock=lambda: self.now,
+            **kwargs,
+        )
+
+    def test_empty(self):
+        assert self.directory.version == 0
+        assert self.directory.members("+1000") is None
+
+    def test_edits_visible_after_refresh(self):
+        self.directory.put_user("+1000", "+1", "en", name="Alice")
+        self.directory.put_user("+1000", "+2", "es", name="Bob")
+        # served from the snapshot until the next check
+        assert self.directory.members("+1000") is None
+        self.now = 61
+        assert self.directory.targets("+1000", "+1") == [("+2", "es")]
+        assert self.directory.members("+1000")["+1"] == {
+            "name": "Alice", "lang": "en"
+        }
+        assert self.directory.version == 2
+
+        self.directory.remove_user("+1000", "+2")
+        assert self.directory.refresh()
+        assert self.directory.targets("+1000", "+1") == []
+
+    def test_on_change_with_languages(self):
+        changes = []
+        self.directory.on_change = changes.append
+        self.directory.put_user("+1000", "+1", "en")
+        self.directory.put_user("+2000", "+2", "es")
+        self.directory.put_user("+2000", "+3", "en")
+        assert self.directory.refresh()
+        assert not self.directory.refresh()
+        (routing,) = changes
+        assert routing is self.directory.routing
+        assert routing.all_languages == ["en", "es"]
+
+    def test_unchanged_version_skips_scan(self):
+        self.directory.put_user("+1000", "+1", "en")
+        assert self.directory.refresh()
+        self.directory.load = None  # a scan would now fail
+        assert not self.directory.refresh()
+
+    def test_import_user_info(self, user_info_data):
+        self.directory.import_user_info(user_info_data)
+        self.directory.refresh()
+        assert dict(self.directory._routing) == user_info_data
+
+    def test_refresh_failure_keeps_snapshot(self):
+        self.directory.put_user("+1000", "+1", "en")
+        self.directory.refresh()
+
+        def fail():
+            raise RuntimeError("throttled")
+
+        self.directory.read_version = fail
+        self.now = 61
+        assert self.directory.members("+1000") is not None
+
+    def test_background_refresh(self):
+        directory = self.make_directory(
+            refresh_interval=0.01, background=True
+        )
+        try:
+            directory.put_user("+1000", "+1", "en")
+            for _ in range(200):
+                if directory.members("+1000") is not None:
+                    break
+                time.sleep(0.01)
+            assert directory.members("+1000") is not None
+        finally:
+            directory.close()
+        assert directory._thread is None
+
+    def test_used_by_send_action(self, basic_text_record, user_info_data,
+                                 mock_twilio_client):
+        action = SendTranslatedSMS(self.directory, mock_twilio_client)
+        assert action(basic_text_record) == []  # unknown number
+
+        self.directory.import_user_info(user_info_data)
+        self.directory.refresh()
+        results = action(basic_text_record)
+        assert sorted((r.to, r.lang) for r in results) == [
+            ("+15559876544", "es"), ("+15559876545", "fr")
+        ]
+
+
+def test_replacing_user_info_updates_directory(user_info_data,
+                                               mock_twilio_client):
+    action = SendTranslatedSMS({}, mock_twilio_client)
+    action.user_info = Routing(user_info_data)
+    assert action.directory is action.user_info
+
+
+@pytest.mark.parametrize("sender, expected", [
+    ("+15559876543", 2),
+    ("+15550000000", 0),
+])
+def test_send_action_static(basic_text_record, user_info_data,
+                            mock_twilio_client, sender, expected):
+    action = SendTranslatedSMS(user_info_data, mock_twilio_client)
+    record = basic_text_record.model_copy(update={"sender": sender})
+    assert len(action(record)) == expected
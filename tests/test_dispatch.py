@@ -0,0 +1,27 @@
+import json
+from unittest.mock import Mock
+
+from translatron.dispatch import invoke_async
+from translatron.record import TextRecord
+
+
+class TestInvokeAsync:
+    def test_invokes_function_asynchronously(self):
+        client = Mock()
+        dispatch = invoke_async("handler", "work", lambda_client=client)
+        dispatch({"RecordingUrl": ["https://example.com/RE1"]})
+
+        kwargs = client.invoke.call_args.kwargs
+        assert kwargs["FunctionName"] == "handler"
+        assert kwargs["InvocationType"] == "Event"
+        assert json.loads(kwargs["Payload"]) == {
+            "work": {"RecordingUrl": ["https://example.com/RE1"]}
+        }
+
+    def test_dumps_models(self, basic_text_record):
+        client = Mock()
+        invoke_async("handler", "work", lambda_client=client)(
+            basic_text_record
+        )
+        payload = json.loads(client.invoke.call_args.kwargs["Payload"])
+        assert TextRecord.model_validate(payload["work"]) == basic_text_record
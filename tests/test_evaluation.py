@@ -0,0 +1,253 @@
+import math
+import time
+
+import pytest
+
+from translatron.record import TextRecord
+from translatron.testing import (
+    ConstantLatency, FakeTranslator, FaultInjector,
+)
+from translatron.translator import Translator
+
+np = pytest.importorskip("numpy")
+
+from translatron.evaluation import (  # noqa: E402
+    Example,
+    bleu,
+    bleu_from_statistics,
+    bleu_statistics,
+    chrf,
+    chrf_from_statistics,
+    chrf_statistics,
+    corpus_from_records,
+    evaluate,
+    evaluate_provider,
+    read_corpus,
+)
+
+
+class DictTranslator(Translator):
+    def __init__(self, table, fail_on=()):
+        self.table = table
+        self.fail_on = set(fail_on)
+        self.calls = 0
+
+    def detect_language(self, text):
+        return "en"
+
+    def translate(self, text, target_language, detected_language=None):
+        self.calls += 1
+        if text in self.fail_on:
+            raise RuntimeError("provider error")
+        return self.table.get(text, text)
+
+
+CORPUS = [
+    Example(source="hello", reference="hola", source_lang="en",
+            target_lang="es"),
+    Example(source="good morning", reference="buenos días",
+            source_lang="en", target_lang="es"),
+    Example(source="hello", reference="hola", source_lang="en",
+            target_lang="es"),
+    Example(source="see you tomorrow", reference="hasta mañana",
+            source_lang="en", target_lang="es"),
+]
+GOOD = {
+    "hello": "hola",
+    "good morning": "buenos días",
+    "see you tomorrow": "hasta mañana",
+}
+
+
+class TestMetrics:
+    def test_identical(self):
+        refs = ["the cat sat on the mat", "a quick brown fox"]
+        assert chrf(refs, refs).score == pytest.approx(100.0)
+        assert bleu(refs, refs).score == pytest.approx(100.0)
+
+    def test_disjoint(self):
+        assert chrf(["xyz"], ["abc"]).score == 0.0
+        assert bleu(["x y z w"], ["a b c d"]).score == 0.0
+        assert bleu([""], ["a b"]).score == 0.0
+
+    def test_chrf_by_hand(self):
+        # "ab" vs "abc": unigrams 2/2 precision, 2/3 recall; bigrams 1/1,
+        # 1/2; higher orders have no hypothesis n-grams
+        matches, hyp, ref = chrf_statistics(["ab"], ["abc"], order=2)
+        assert matches.tolist() == [[2, 1]]
+        assert hyp.tolist() == [[2, 1]]
+        assert ref.tolist() == [[3, 2]]
+        precision = 1.0
+        recall = (2 / 3 + 1 / 2) / 2
+        expected = 100 * 5 * precision * recall / (4 * precision + recall)
+        score = chrf_from_statistics(matches[0], hyp[0], ref[0])
+        assert score == pytest.approx(expected)
+
+    def test_chrf_ignores_whitespace(self):
+        assert chrf(["a b c"], ["abc"]).score == pytest.approx(100.0)
+
+    def test_bleu_brevity_penalty(self):
+        stats = bleu_statistics(["a b c d"], ["a b c d e f g h"])
+        matches, totals, hyp_len, ref_len = (s.sum(axis=0) for s in stats)
+        assert matches.tolist() == totals.tolist() == [4, 3, 2, 1]
+        score = bleu_from_statistics(matches, totals, hyp_len, ref_len)
+        assert score == pytest.approx(100 * math.exp(1 - 8 / 4))
+
+    def test_vectorized_over_resamples(self):
+        hyps = ["the cat sat", "a dog ran off", "hello there"]
+        refs = ["the cat sat down", "a dog ran", "hello"]
+        stats = chrf_statistics(hyps, refs)
+        stacked = [np.stack([s.sum(axis=0), s[:1].sum(axis=0)])
+                   for s in stats]
+        scores = chrf_from_statistics(*stacked)
+        assert scores.shape == (2,)
+        assert scores[0] == pytest.approx(
+            chrf_from_statistics(*(s.sum(axis=0) for s in stats))
+        )
+        assert scores[1] == pytest.approx(chrf(hyps[:1], refs[:1]).score)
+
+    def test_confidence_interval(self):
+        hyps = ["the cat sat", "a dog ran off", "hello there", "xyz"]
+        refs = ["the cat sat down", "a dog ran", "hello", "abc"]
+        score = chrf(hyps, refs, bootstrap=200, seed=1)
+        assert score.low <= score.score <= score.high
+        assert score.low < score.high
+        assert chrf(hyps, refs, bootstrap=200, seed=1) == score
+        single = bleu(hyps[:1], refs[:1])
+        assert single.low == single.high == single.score
+
+    def test_bootstrap_chunks(self, monkeypatch):
+        import translatron.evaluation as evaluation
+
+        hyps = ["the cat sat", "a dog ran off", "hello there"]
+        refs = ["the cat sat down", "a dog ran", "hello"]
+        expected = bleu(hyps, refs, bootstrap=50, seed=3)
+        monkeypatch.setattr(evaluation, "_BOOTSTRAP_CELLS", 1)
+        assert bleu(hyps, refs, bootstrap=50, seed=3) == expected
+
+
+class TestCorpus:
+    def test_read_corpus(self, tmp_path):
+        path = tmp_path / "corpus.jsonl"
+        path.write_text(
+            "\n".join(e.model_dump_json() for e in CORPUS) + "\n\n"
+        )
+        assert read_corpus(str(path)) == CORPUS
+
+    def test_from_records(self, basic_text_record):
+        spanish = basic_text_record.model_copy(update={
+            "original_lang": "es", "translations": [
+                {"lang": "en", "text": "Hello"}
+            ]
+        })
+        examples = corpus_from_records(
+            [basic_text_record, spanish], "es"
+        )
+        assert examples == [Example(
+            source="Hello world", reference="Hola mundo",
+            source_lang="en", target_lang="es",
+        )]
+
+    def test_sample(self):
+        records = [
+            TextRecord(
+                message_id=str(n), conversation_id="c", sender="s",
+                recipient="r", original_lang="en",
+                original_text=f"text {n}",
+                translations=[{"lang": "es", "text": f"texto {n}"}],
+                timestamp="t",
+            )
+            for n in range(100)
+        ]
+        sample = corpus_from_records(records, "es", sample=10, seed=1)
+        assert len(sample) == 10
+        assert len({e.source for e in sample}) == 10
+        assert sample == corpus_from_records(records, "es", sample=10,
+                                             seed=1)
+        assert len(corpus_from_records(records[:5], "es", sample=10)) == 5
+
+
+class TestEvaluate:
+    def test_provider_report(self):
+        translator = DictTranslator(GOOD)
+        report = evaluate_provider(
+            "amazon", translator, CORPUS, concurrency=1, bootstrap=50
+        )
+        assert report.examples == 4
+        assert report.errors == 0
+        assert report.chrf.score == pytest.approx(100.0)
+        assert report.bleu.score == pytest.approx(100.0)
+        # "hello" is translated (and paid for) once
+        assert translator.calls == 3
+        assert report.cache_hits == 1
+        assert report.characters == len("hellogood morningsee you tomorrow")
+        assert report.source_characters == report.characters + len("hello")
+        assert report.cost == pytest.approx(report.characters * 15e-6)
+        assert report.cost_per_1k_chars == pytest.approx(
+            report.cost / report.source_characters * 1000
+        )
+        assert set(report.latency_ms) == {"mean", "p50", "p90", "p99", "max"}
+
+    def test_no_cache_and_unknown_price(self):
+        translator = DictTranslator(GOOD)
+        report = evaluate_provider(
+            "local", translator, CORPUS, cache=False, bootstrap=0
+        )
+        assert translator.calls == 4
+        assert report.cache_hits == 0
+        assert report.cost is None
+        assert report.cost_per_1k_chars is None
+
+    def test_errors_score_empty(self):
+        translator = DictTranslator(GOOD, fail_on={"good morning"})
+        report = evaluate_provider("x", translator, CORPUS, bootstrap=0)
+        assert report.errors == 1
+        assert report.chrf.score < 100.0
+
+    def test_latency(self):
+        translator = FakeTranslator(
+            faults=FaultInjector(latency=ConstantLatency(0.01))
+        )
+        report = evaluate_provider(
+            "fake", translator, CORPUS, concurrency=4, cache=False,
+            bootstrap=0,
+        )
+        assert report.latency_ms["p50"] >= 10.0
+        assert report.elapsed < 4 * 0.01 + 0.5
+
+    def test_latency_excludes_cache_hits_and_errors(self):
+        class SlowDictTranslator(DictTranslator):
+            def translate(self, text, target_language,
+                          detected_language=None):
+                if text not in self.fail_on:
+                    time.sleep(0.01)
+                return super().translate(
+                    text, target_language, detected_language
+                )
+
+        translator = SlowDictTranslator(GOOD, fail_on={"good morning"})
+        report = evaluate_provider(
+            "x", translator, CORPUS, concurrency=1, bootstrap=0
+        )
+        assert report.errors == 1
+        assert report.cache_hits == 1
+        # a fast failure and a cache hit would pull the median below 10 ms
+        assert report.latency_ms["p50"] >= 10.0
+
+    def test_compare(self):
+        report = evaluate(
+            {
+                "good": DictTranslator(GOOD),
+                "none": DictTranslator({}),
+            },
+            CORPUS,
+            bootstrap=20,
+            seed=0,
+        )
+        good, none = report.providers
+        assert report.examples == 4
+        assert good.chrf.score > none.chrf.score
+        assert good.bleu.score > none.bleu.score
+        table = report.format_table()
+        assert table.splitlines()[2].startswith("good")
+        assert "n/a" in table
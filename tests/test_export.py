@@ -0,0 +1,178 @@
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.record import MediaItem, TextRecord
+from translatron.storage import RecordEncoder
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from translatron.export import (  # noqa: E402
+    PartitionedWriter,
+    export_table,
+    iter_export_records,
+    partition_path,
+    read_export,
+)
+
+NUMBERS = ["+15551234567", "+15551111111"]
+
+
+def make_record(n):
+    return TextRecord(
+        message_id=f"msg-{n:03d}",
+        conversation_id=f"conv-{n % 3}",
+        sender="+15559876543",
+        recipient=NUMBERS[n % 2],
+        original_lang="en",
+        original_text=f"message {n}",
+        translations=[{"lang": "es", "text": f"mensaje {n}"}],
+        timestamp=f"2024-05-0{1 + n % 3}T12:00:{n % 60:02d}Z",
+    )
+
+
+def all_files(root):
+    return sorted(
+        os.path.join(d, f) for d, _, files in os.walk(root) for f in files
+    )
+
+
+def test_partition_path():
+    assert partition_path("2024-05-01", "+15551234567") == os.path.join(
+        "date=2024-05-01", "number=%2B15551234567"
+    )
+
+
+class TestPartitionedWriter:
+    def test_round_trip(self, tmp_path):
+        records = [make_record(n) for n in range(30)]
+        with PartitionedWriter(str(tmp_path), row_group_size=4) as writer:
+            writer.write_all(records)
+
+        files = all_files(tmp_path)
+        assert len(files) == 6  # 3 dates x 2 numbers
+        assert writer.rows == 30
+        read = sorted(iter_export_records(str(tmp_path)),
+                      key=lambda r: r.message_id)
+        assert read == records
+
+    def test_row_groups(self, tmp_path):
+        with PartitionedWriter(str(tmp_path), row_group_size=2) as writer:
+            for n in range(0, 30, 6):  # all in one partition
+                writer.write(make_record(n))
+        [path] = all_files(tmp_path)
+        metadata = pq.ParquetFile(path).metadata
+        assert metadata.num_rows == 5
+        assert [metadata.row_group(i).num_rows
+                for i in range(metadata.num_row_groups)] == [2, 2, 1]
+
+    def test_buffer_bound(self, tmp_path):
+        writer = PartitionedWriter(
+            str(tmp_path), row_group_size=100, max_buffered_rows=100
+        )
+        for n in range(300):
+            writer.write(make_record(n))
+            assert writer._buffered <= 101
+        writer.close()
+        assert len(list(iter_export_records(str(tmp_path)))) == 300
+
+    def test_open_files_bound(self, tmp_path):
+        writer = PartitionedWriter(
+            str(tmp_path), row_group_size=1, max_open_files=2
+        )
+        for n in range(12):
+            writer.write(make_record(n))
+            assert len(writer._open) <= 2
+        writer.close()
+        # partitions continue in new files once closed
+        assert len(writer.files) > 6
+        assert len(read_export(str(tmp_path))) == 12
+
+    def test_arrow_format(self, tmp_path):
+        records = [make_record(n) for n in range(10)]
+        with PartitionedWriter(str(tmp_path), file_format="arrow") as writer:
+            writer.write_all(records)
+        assert all(f.endswith(".arrow") for f in all_files(tmp_path))
+        read = sorted(
+            iter_export_records(str(tmp_path), file_format="arrow"),
+            key=lambda r: r.message_id,
+        )
+        assert read == records
+
+    def test_invalid_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            PartitionedWriter(str(tmp_path), file_format="csv")
+
+    def test_media_count(self, tmp_path):
+        record = make_record(0).model_copy(update={"media": [MediaItem(
+            url="https://example.com/a.jpg", content_type="image/jpeg",
+            sha256="ab" * 32, size=3,
+        )]})
+        with PartitionedWriter(str(tmp_path)) as writer:
+            writer.write(record)
+        table = read_export(str(tmp_path))
+        assert table.column("media_count").to_pylist() == [1]
+
+
+class TestReadExport:
+    @pytest.fixture
+    def root(self, tmp_path):
+        with PartitionedWriter(str(tmp_path)) as writer:
+            writer.write_all(make_record(n) for n in range(30))
+        return str(tmp_path)
+
+    def test_columns(self, root):
+        table = read_export(root, columns=["original_lang", "date", "number"])
+        assert table.column_names == ["original_lang", "date", "number"]
+        assert set(table.column("number").to_pylist()) == set(NUMBERS)
+
+    def test_date_filter(self, root):
+        table = read_export(root, dates=("2024-05-02", None))
+        assert set(table.column("date").to_pylist()) == {
+            "2024-05-02", "2024-05-03"
+        }
+        table = read_export(root, dates=("2024-05-01", "2024-05-01"))
+        assert len(table) == 10
+
+    def test_number_filter(self, root):
+        records = list(iter_export_records(root, numbers=[NUMBERS[0]]))
+        assert len(records) == 15
+        assert {r.recipient for r in records} == {NUMBERS[0]}
+
+
+@mock_aws
+class TestExportTable:
+    def setup_method(self, method):
+        self.dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        self.table = self.dynamodb.create_table(
+            TableName="messages",
+            KeySchema=[
+                {"AttributeName": "conversation_id", "KeyType": "HASH"},
+                {"AttributeName": "timestamp", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "conversation_id", "AttributeType": "S"},
+                {"AttributeName": "timestamp", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+    def test_export(self, tmp_path):
+        encoder = RecordEncoder()
+        records = [make_record(n) for n in range(40)]
+        for n, record in enumerate(records):
+            item = encoder.encode(record) if n % 2 else record.model_dump()
+            self.table.put_item(Item=item)
+
+        report = export_table(
+            "messages", str(tmp_path), segments=3, page_size=7,
+            dynamodb=self.dynamodb,
+        )
+        assert report.records == 40
+        assert report.files == len(all_files(tmp_path))
+        read = sorted(iter_export_records(str(tmp_path)),
+                      key=lambda r: r.message_id)
+        assert read == records
@@ -0,0 +1,193 @@
+import threading
+import time
+
+import pytest
+
+from translatron.failover import (
+    AllProvidersFailedError,
+    CircuitBreaker,
+    FailoverTranslator,
+    ProviderStats,
+)
+from translatron.translator import Translator
+
+
+class FakeProvider(Translator):
+    """Provider with configurable delay and failures."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def detect_language(self, text: str) -> str:
+        return self._respond(f"{self.name}-lang")
+
+    def translate(self, text, target_language, detected_language=None):
+        return self._respond(f"{self.name}:{target_language}:{text}")
+
+    def _respond(self, value):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return value
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=10.0, clock=self.clock
+        )
+
+    def test_opens_after_threshold(self):
+        assert self.breaker.state == CircuitBreaker.CLOSED
+        self.breaker.record_failure()
+        assert self.breaker.allow()
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.OPEN
+        assert not self.breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_single_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10.0
+        assert self.breaker.state == CircuitBreaker.HALF_OPEN
+        assert self.breaker.allow()
+        assert not self.breaker.allow()
+
+    @pytest.mark.parametrize(
+        "success,expected",
+        [(True, CircuitBreaker.CLOSED), (False, CircuitBreaker.OPEN)],
+    )
+    def test_half_open_trial_outcome(self, success, expected):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10.0
+        assert self.breaker.allow()
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        assert self.breaker.state == expected
+
+
+class TestProviderStats:
+    def test_quantiles(self):
+        stats = ProviderStats()
+        for i in range(100):
+            stats.record(i / 100, success=True)
+        stats.record(5.0, success=False)
+        assert stats.quantile(0.5) == 0.5
+        assert stats.quantile(0.95) == 0.95
+        assert stats.calls == 101
+        assert stats.failures == 1
+
+    def test_empty(self):
+        assert ProviderStats().quantile(0.95) is None
+
+
+class TestFailoverTranslator:
+    def make(self, *providers, **kwargs):
+        kwargs.setdefault("default_hedge_delay", 0.05)
+        translator = FailoverTranslator(
+            {p.name: p for p in providers}, **kwargs
+        )
+        return translator
+
+    def test_requires_provider(self):
+        with pytest.raises(ValueError):
+            FailoverTranslator({})
+
+    def test_uses_primary(self):
+        primary = FakeProvider("primary")
+        backup = FakeProvider("backup")
+        translator = self.make(primary, backup)
+        assert translator.translate("hi", "es") == "primary:es:hi"
+        assert translator.detect_language("hi") == "primary-lang"
+        assert backup.calls == 0
+
+    def test_fails_over_on_error(self):
+        primary = FakeProvider("primary", fail=True)
+        backup = FakeProvider("backup")
+        translator = self.make(primary, backup)
+        assert translator.translate("hi", "es") == "backup:es:hi"
+        health = translator.health()
+        assert health["primary"]["failures"] == 1
+        assert health["backup"]["wins"] == 1
+
+    def test_all_fail(self):
+        translator = self.make(
+            FakeProvider("a", fail=True), FakeProvider("b", fail=True)
+        )
+        with pytest.raises(AllProvidersFailedError):
+            translator.translate("hi", "es")
+
+    def test_hedges_slow_primary(self):
+        primary = FakeProvider("primary", delay=0.5)
+        backup = FakeProvider("backup")
+        translator = self.make(primary, backup)
+
+        start = time.monotonic()
+        assert translator.translate("hi", "es") == "backup:es:hi"
+        assert time.monotonic() - start < 0.4
+        assert translator.health()["primary"]["hedges"] == 1
+
+    def test_circuit_opens_and_skips_provider(self):
+        primary = FakeProvider("primary", fail=True)
+        backup = FakeProvider("backup")
+        translator = self.make(primary, backup, failure_threshold=2)
+
+        for _ in range(3):
+            assert translator.translate("hi", "es") == "backup:es:hi"
+
+        assert primary.calls == 2
+        assert translator.health()["primary"]["state"] == "open"
+
+    def test_no_healthy_provider(self):
+        primary = FakeProvider("primary", fail=True)
+        translator = self.make(primary, failure_threshold=1)
+        with pytest.raises(AllProvidersFailedError):
+            translator.translate("hi", "es")
+        with pytest.raises(AllProvidersFailedError, match="No healthy"):
+            translator.translate("hi", "es")
+
+    def test_hedge_delay_uses_quantile(self):
+        translator = self.make(FakeProvider("a"), min_samples=5)
+        assert translator.hedge_delay("a") == 0.05
+        for _ in range(10):
+            translator.stats["a"].record(0.2, success=True)
+        assert translator.hedge_delay("a") == 0.2
+
+    def test_concurrent_calls(self):
+        translator = self.make(FakeProvider("a", delay=0.01))
+        results = []
+
+        def worker(i):
+            results.append(translator.translate(str(i), "es"))
+
+        threads = [
+            threading.Thread(target=worker, args=(i,)) for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(results) == sorted(f"a:es:{i}" for i in range(10))
@@ -0,0 +1,158 @@
+import io
+import json
+import logging
+
+import pytest
+
+from translatron.logs import (
+    JsonFormatter,
+    LogConfig,
+    MessageLog,
+    Redactor,
+    configure_logging,
+    message_logger,
+    redact_number,
+    redact_text,
+    redact_url,
+)
+from translatron.record import MediaItem
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    package = logging.getLogger("translatron")
+    saved = (root.handlers[:], root.level, package.level, message_logger.level)
+    yield
+    root.handlers[:] = saved[0]
+    root.setLevel(saved[1])
+    package.setLevel(saved[2])
+    message_logger.setLevel(saved[3])
+
+
+def test_redact_number():
+    assert redact_number("+15551234567") == "+*******4567"
+    assert redact_number("5551234567") == "******4567"
+    assert redact_number("123") == "***"
+
+
+def test_redact_text():
+    assert redact_text("Hello") == "<5 chars>"
+
+
+def test_redact_url():
+    url = "https://api.twilio.com/2010-04-01/Accounts/AC1/Media/ME1"
+    assert redact_url(url) == "https://api.twilio.com/<redacted>"
+
+
+class TestRedactor:
+    def test_record(self, basic_text_record):
+        data = Redactor().record(basic_text_record)
+        assert data["sender"] == "+*******6543"
+        assert data["original_text"] == "<11 chars>"
+        assert data["translations"][0] == {"lang": "es", "text": "<10 chars>"}
+        assert data["message_id"] == basic_text_record.message_id
+
+    def test_media(self, basic_text_record):
+        basic_text_record.media = [MediaItem(
+            url="https://api.twilio.com/Accounts/AC1/Media/ME1",
+            content_type="image/jpeg",
+            sha256="abc",
+            size=10,
+            description="a photo of my house",
+        )]
+        (item,) = Redactor().record(basic_text_record)["media"]
+        assert item["url"] == "https://api.twilio.com/<redacted>"
+        assert item["description"] == "<19 chars>"
+        assert item["sha256"] == "abc"
+
+    def test_disabled(self, basic_text_record):
+        data = Redactor(numbers=False, text=False).record(basic_text_record)
+        assert data["sender"] == basic_text_record.sender
+        assert data["original_text"] == "Hello world"
+
+
+class TestLogConfig:
+    def test_sample_rate(self):
+        config = LogConfig(sample_rate=0.25, seed=1)
+        sampled = sum(config.sample() for _ in range(1000))
+        assert 200 < sampled < 300
+
+    def test_no_sampling(self):
+        config = LogConfig()
+        assert not any(config.sample() for _ in range(100))
+
+
+class TestMessageLog:
+    def setup_method(self):
+        self.now = 0.0
+        self.log = MessageLog(clock=lambda: self.now)
+
+    def test_stages_accumulate(self):
+        with self.log.stage("translate"):
+            self.now += 0.010
+        with self.log.stage("translate"):
+            self.now += 0.005
+        with self.log.stage("action"):
+            self.now += 0.002
+        data = self.log.as_dict()
+        assert data["timings_ms"] == {"translate": 15.0, "action": 2.0}
+        assert data["total_ms"] == 17.0
+
+    def test_stage_timed_on_error(self):
+        with pytest.raises(ValueError):
+            with self.log.stage("action"):
+                self.now += 0.001
+                raise ValueError()
+        assert self.log.timings["action"] == pytest.approx(1.0)
+
+    def test_emit(self, caplog, basic_text_record):
+        self.log.record = basic_text_record
+        self.log.set(status=200)
+        with caplog.at_level("INFO", logger="translatron.messages"):
+            self.log.emit(LogConfig())
+        (line,) = caplog.records
+        assert line.fields["message_id"] == "test-msg-123"
+        assert line.fields["sender"] == "+*******6543"
+        assert line.fields["chars"] == 11
+        assert "record" not in line.fields  # not sampled
+
+    def test_emit_disabled(self, caplog):
+        self.log.record = None
+        with caplog.at_level("WARNING", logger="translatron.messages"):
+            self.log.emit(LogConfig())
+        assert caplog.records == []
+
+
+def test_json_formatter():
+    record = logging.LogRecord(
+        "translatron.messages", logging.INFO, __file__, 1,
+        "handled %s", ("m1",), None,
+    )
+    record.fields = {"status": 200}
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "handled m1"
+    assert data["level"] == "INFO"
+    assert data["status"] == 200
+
+
+def test_configure_logging_structured(restore_logging):
+    stream = io.StringIO()
+    root = logging.getLogger()
+    root.handlers[:] = []
+    configure_logging(structured=True, stream=stream)
+
+    logging.getLogger("translatron.text").info("detail line")
+    message_logger.info("message handled", extra={"fields": {"status": 200}})
+
+    (line,) = stream.getvalue().splitlines()
+    assert json.loads(line)["status"] == 200
+
+
+def test_configure_logging_text(restore_logging):
+    stream = io.StringIO()
+    root = logging.getLogger()
+    root.handlers[:] = []
+    configure_logging(structured=False, stream=stream)
+    logging.getLogger("translatron.text").info("detail line")
+    assert "detail line" in stream.getvalue()
@@ -0,0 +1,263 @@
+import email.message
+import hashlib
+import io
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import urllib.response
+from unittest.mock import Mock, patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.media import (
+    MediaDescriber,
+    MediaProcessor,
+    MediaTooLargeError,
+    RekognitionTextDescriber,
+    S3MediaStore,
+    build_opener,
+    fetch_media,
+    open_url,
+    parse_media_params,
+)
+
+MEDIA_URL = (
+    "https://api.twilio.com/2010-04-01/Accounts/AC1/Messages/MM1/Media/ME"
+)
+
+
+class UpperDescriber(MediaDescriber):
+    def describe(self, data, content_type):
+        if content_type != "image/png":
+            return None
+        return data.decode().upper()
+
+
+class TestParseMediaParams:
+    def test_parse(self):
+        params = {
+            "NumMedia": ["2"],
+            "MediaUrl0": [MEDIA_URL + "0"],
+            "MediaContentType0": ["image/jpeg"],
+            "MediaUrl1": [MEDIA_URL + "1"],
+        }
+        assert parse_media_params(params) == [
+            (MEDIA_URL + "0", "image/jpeg"),
+            (MEDIA_URL + "1", "application/octet-stream"),
+        ]
+
+    @pytest.mark.parametrize("num_media", [None, "0", "", "bad"])
+    def test_no_media(self, num_media):
+        params = {} if num_media is None else {"NumMedia": [num_media]}
+        assert parse_media_params(params) == []
+
+
+class RedirectingHandler(urllib.request.BaseHandler):
+    """Stub transport: Twilio redirects to a CDN, which serves the media."""
+
+    handler_order = 100  # before the real HTTPSHandler
+
+    def __init__(self, location):
+        self.location = location
+        self.requests = []
+
+    def https_open(self, request):
+        self.requests.append(request)
+        headers = email.message.Message()
+        if urllib.parse.urlsplit(request.full_url).netloc == "api.twilio.com":
+            headers["Location"] = self.location
+            response = urllib.response.addinfourl(
+                io.BytesIO(b""), headers, request.full_url, code=307
+            )
+            response.msg = "Temporary Redirect"
+        else:
+            response = urllib.response.addinfourl(
+                io.BytesIO(b"photo"), headers, request.full_url, code=200
+            )
+            response.msg = "OK"
+        return response
+
+
+class TestOpenUrl:
+    def test_credentials_not_sent_to_redirect_host(self):
+        stub = RedirectingHandler("https://cdn.example.com/ME?sig=1")
+        response = open_url(
+            MEDIA_URL, auth=("AC1", "tok"), opener=build_opener(stub)
+        )
+        assert response.read() == b"photo"
+        twilio, cdn = stub.requests
+        assert twilio.get_header("Authorization").startswith("Basic ")
+        assert cdn.full_url == "https://cdn.example.com/ME?sig=1"
+        assert cdn.get_header("Authorization") is None
+
+    def test_credentials_kept_on_same_host(self):
+        stub = RedirectingHandler("https://api.twilio.com/other")
+        opener = build_opener(stub)
+        # the stub keeps redirecting on api.twilio.com
+        with pytest.raises(urllib.error.HTTPError):
+            open_url(MEDIA_URL, auth=("AC1", "tok"), opener=opener)
+        assert all(
+            request.get_header("Authorization") for request in stub.requests
+        )
+
+
+class TestFetchMedia:
+    def test_fetch_and_hash(self):
+        with patch(
+            "translatron.media.open_url",
+            return_value=io.BytesIO(b"x" * 10),
+        ) as mock_open:
+            data, sha = fetch_media(
+                MEDIA_URL, auth=("AC1", "tok"), chunk_size=3
+            )
+        assert data == b"x" * 10
+        assert sha == hashlib.sha256(b"x" * 10).hexdigest()
+        assert mock_open.call_args[1]["auth"] == ("AC1", "tok")
+
+    def test_too_large(self):
+        with patch(
+            "translatron.media.open_url",
+            return_value=io.BytesIO(b"x" * 10),
+        ):
+            with pytest.raises(MediaTooLargeError):
+                fetch_media(MEDIA_URL, max_bytes=5, chunk_size=3)
+
+
+class TestRekognitionTextDescriber:
+    def setup_method(self):
+        with patch("boto3.client") as mock_boto_client:
+            self.client = Mock()
+            mock_boto_client.return_value = self.client
+            self.describer = RekognitionTextDescriber()
+
+    def test_describe(self):
+        self.client.detect_text.return_value = {
+            "TextDetections": [
+                {"Type": "LINE", "DetectedText": "OPEN", "Confidence": 99},
+                {"Type": "WORD", "DetectedText": "OPEN", "Confidence": 99},
+                {"Type": "LINE", "DetectedText": "blur", "Confidence": 20},
+                {"Type": "LINE", "DetectedText": "9-5", "Confidence": 95},
+            ]
+        }
+        assert self.describer.describe(b"img", "image/png") == "OPEN\n9-5"
+
+    def test_unsupported_type(self):
+        assert self.describer.describe(b"gif", "image/gif") is None
+        self.client.detect_text.assert_not_called()
+
+
+@mock_aws
+class TestS3MediaStore:
+    def setup_method(self, method):
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket="media-bucket")
+        self.store = S3MediaStore("media-bucket", s3_client=self.s3)
+
+    def test_store_deduplicates(self):
+        key = self.store.store(b"img", "abc123", "image/png")
+        assert key == "media/abc123.png"
+        obj = self.s3.get_object(Bucket="media-bucket", Key=key)
+        assert obj["Body"].read() == b"img"
+        assert obj["ContentType"] == "image/png"
+
+        with patch.object(self.s3, "put_object") as mock_put:
+            assert self.store.store(b"img", "abc123", "image/png") == key
+        mock_put.assert_not_called()
+
+
+class TestMediaProcessor:
+    def make_processor(self, contents, **kwargs):
+        processor = MediaProcessor(**kwargs)
+
+        def fetch(url, auth):
+            data = contents[url]
+            if isinstance(data, Exception):
+                raise data
+            return data, hashlib.sha256(data).hexdigest()
+
+        processor.fetch = fetch
+        return processor
+
+    def test_process_preserves_order(self):
+        processor = self.make_processor(
+            {"u0": b"first", "u1": b"second"},
+            describer=UpperDescriber(),
+        )
+        items = processor([("u0", "image/png"), ("u1", "image/jpeg")])
+        assert [item.url for item in items] == ["u0", "u1"]
+        assert items[0].description == "FIRST"
+        assert items[1].description is None
+        assert items[1].size == 6
+        assert items[0].s3_key is None
+
+    def test_fetches_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+        processor = MediaProcessor(max_workers=3)
+
+        def fetch(url, auth):
+            barrier.wait()  # only passes if all three run at once
+            return b"data", "sha"
+
+        processor.fetch = fetch
+        items = processor([(f"u{n}", "image/png") for n in range(3)])
+        assert len(items) == 3
+
+    def test_failed_item_is_dropped(self):
+        processor = self.make_processor(
+            {"u0": OSError("boom"), "u1": b"ok"}
+        )
+        items = processor([("u0", "image/png"), ("u1", "image/png")])
+        assert [item.url for item in items] == ["u1"]
+
+    def test_stores_media(self):
+        store = Mock()
+        store.store.return_value = "media/key.png"
+        processor = self.make_processor({"u0": b"img"}, store=store)
+        (item,) = processor([("u0", "image/png")], auth=("AC1", "tok"))
+        assert item.s3_key == "media/key.png"
+        store.store.assert_called_once_with(
+            b"img", hashlib.sha256(b"img").hexdigest(), "image/png"
+        )
+
+    def test_no_media(self):
+        assert MediaProcessor()([]) == []
+
+
+class TestMediaDeadline:
+    def test_deadline_reaches_worker_threads(self):
+        from translatron.deadline import Deadline, activate, current_deadline
+
+        seen = []
+        processor = MediaProcessor(max_workers=2)
+
+        def fetch(url, auth):
+            seen.append(current_deadline())
+            return b"data", "sha"
+
+        processor.fetch = fetch
+        deadline = Deadline.from_timeout(10)
+        with activate(deadline):
+            processor([("u0", "image/png"), ("u1", "image/png")])
+        assert seen == [deadline, deadline]
+
+    def test_fetch_timeout_fits_deadline(self):
+        from translatron.deadline import (
+            Deadline,
+            DeadlineExceededError,
+            activate,
+        )
+
+        with patch(
+            "translatron.media.open_url",
+            return_value=io.BytesIO(b"x"),
+        ) as mock_open:
+            with activate(Deadline.from_timeout(2.0)):
+                fetch_media(MEDIA_URL, timeout=30)
+        assert mock_open.call_args[1]["timeout"] <= 2.0
+
+        with activate(Deadline.from_timeout(0.0)):
+            with pytest.raises(DeadlineExceededError):
+                fetch_media(MEDIA_URL)
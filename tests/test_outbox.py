@@ -0,0 +1,293 @@
+from unittest.mock import Mock
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from translatron.actions import ActionBase, SendTranslatedSMS
+from translatron.outbox import (
+    DONE,
+    FAILED,
+    IN_PROGRESS,
+    PENDING,
+    Outbox,
+    OutboxWorker,
+    action_name,
+    create_outbox_table,
+)
+from translatron.text import TranslatronText
+
+TABLE = "translatron-outbox"
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingAction(ActionBase):
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+
+class FlakySMSClient:
+    """Twilio stand-in whose sends to some numbers fail a few times."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.sent = []
+        self.messages = Mock()
+        self.messages.create.side_effect = self._create
+
+    def _create(self, body, from_, to):
+        if self.failures.get(to, 0) > 0:
+            self.failures[to] -= 1
+            raise RuntimeError(f"send to {to} failed")
+        self.sent.append((to, body))
+
+
+@pytest.fixture
+def aws():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        create_outbox_table(TABLE, dynamodb=dynamodb)
+        yield dynamodb
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def outbox(aws, clock):
+    return Outbox(TABLE, dynamodb=aws, clock=clock)
+
+
+def make_sms(user_info_data, failures=None):
+    client = FlakySMSClient(failures)
+    return SendTranslatedSMS(user_info_data, client), client
+
+
+class TestOutbox:
+    def test_enqueue_one_delivery_per_recipient(
+        self, outbox, basic_text_record, user_info_data
+    ):
+        sms, client = make_sms(user_info_data)
+        store = RecordingAction()
+        ids = outbox.enqueue(basic_text_record, [sms, store])
+
+        assert sorted(ids) == sorted([
+            "test-msg-123#SendTranslatedSMS#+15559876544",
+            "test-msg-123#SendTranslatedSMS#+15559876545",
+            "test-msg-123#RecordingAction#*",
+        ])
+        for delivery_id in ids:
+            assert outbox.get(delivery_id)["status"] == PENDING
+        # nothing is sent at enqueue time
+        assert client.sent == [] and store.records == []
+
+    def test_enqueue_is_idempotent(self, outbox, basic_text_record):
+        action = RecordingAction()
+        outbox.enqueue(basic_text_record, [action])
+        outbox.enqueue(basic_text_record, [action])
+        assert len(outbox.due(PENDING, 10)) == 1
+
+    def test_enqueue_adds_missing_deliveries(
+        self, outbox, basic_text_record, user_info_data
+    ):
+        store = RecordingAction()
+        outbox.enqueue(basic_text_record, [store])
+        sms, _ = make_sms(user_info_data)
+        outbox.enqueue(basic_text_record, [store, sms])
+        assert len(outbox.due(PENDING, 10)) == 3
+
+    def test_enqueue_raises_other_cancellations(
+        self, outbox, basic_text_record
+    ):
+        error = ClientError(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [{"Code": "ThrottlingError"}],
+            },
+            "TransactWriteItems",
+        )
+        outbox.client = Mock(transact_write_items=Mock(side_effect=error))
+        with pytest.raises(ClientError):
+            outbox.enqueue(basic_text_record, [RecordingAction()])
+
+    def test_follow_up_has_own_deliveries(self, outbox, basic_text_record):
+        action = RecordingAction()
+        outbox.enqueue(basic_text_record, [action])
+        follow_up = basic_text_record.model_copy(update={"is_follow_up": True})
+        (delivery_id,) = outbox.enqueue(follow_up, [action])
+        assert delivery_id == "test-msg-123#RecordingAction#*#follow-up"
+        assert len(outbox.due(PENDING, 10)) == 2
+
+    def test_claim_is_exclusive(self, outbox, basic_text_record):
+        outbox.enqueue(basic_text_record, [RecordingAction()])
+        (item,) = outbox.due(PENDING, 10)
+        assert outbox.claim(item, lease_seconds=60) is not None
+        # a second worker that read the same item loses the race
+        assert outbox.claim(item, lease_seconds=60) is None
+
+    def test_action_name(self):
+        action = RecordingAction()
+        assert action_name(action) == "RecordingAction"
+        action.name = "audit"
+        assert action_name(action) == "audit"
+
+
+class TestOutboxWorker:
+    def test_drain_delivers_everything(
+        self, outbox, basic_text_record, user_info_data
+    ):
+        sms, client = make_sms(user_info_data)
+        store = RecordingAction()
+        ids = outbox.enqueue(basic_text_record, [sms, store])
+
+        report = OutboxWorker(outbox, [sms, store]).drain()
+
+        assert report.claimed == 3 and report.succeeded == 3
+        assert sorted(client.sent) == [
+            ("+15559876544", "Hola mundo"),
+            ("+15559876545", "Bonjour le monde"),
+        ]
+        assert store.records == [basic_text_record]
+        assert all(outbox.get(i)["status"] == DONE for i in ids)
+        assert all("expires_at" in outbox.get(i) for i in ids)
+
+        # draining again sends nothing more
+        assert OutboxWorker(outbox, [sms, store]).drain().claimed == 0
+        assert len(client.sent) == 2
+
+    def test_partial_failure_retries_only_failed_recipient(
+        self, outbox, clock, basic_text_record, user_info_data
+    ):
+        sms, client = make_sms(user_info_data, failures={"+15559876545": 1})
+        outbox.enqueue(basic_text_record, [sms])
+        worker = OutboxWorker(outbox, [sms], base_backoff=10)
+
+        report = worker.drain()
+        assert (report.succeeded, report.retried) == (1, 1)
+        assert client.sent == [("+15559876544", "Hola mundo")]
+        failed_id = "test-msg-123#SendTranslatedSMS#+15559876545"
+        item = outbox.get(failed_id)
+        assert item["status"] == PENDING
+        assert "failed" in item["last_error"]
+
+        # not due until the backoff has passed
+        assert worker.drain().claimed == 0
+        clock.now += 10
+        report = worker.drain()
+        assert (report.claimed, report.succeeded) == (1, 1)
+        assert client.sent[-1] == ("+15559876545", "Bonjour le monde")
+        assert outbox.get(failed_id)["status"] == DONE
+
+    def test_gives_up_after_max_attempts(
+        self, outbox, clock, basic_text_record
+    ):
+        action = Mock(spec=ActionBase)
+        action.name = "broken"
+        action.deliveries.return_value = [{}]
+        action.deliver.side_effect = RuntimeError("down")
+        (delivery_id,) = outbox.enqueue(basic_text_record, [action])
+        worker = OutboxWorker(outbox, [action], max_attempts=2, base_backoff=1)
+
+        assert worker.drain().retried == 1
+        clock.now += 1
+        assert worker.drain().failed == 1
+        item = outbox.get(delivery_id)
+        assert item["status"] == FAILED
+        assert item["attempts"] == 2
+
+    def test_unknown_action_fails(self, outbox, basic_text_record):
+        outbox.enqueue(basic_text_record, [RecordingAction()])
+        report = OutboxWorker(outbox, []).drain()
+        assert report.failed == 1
+
+    def test_expired_lease_is_reclaimed(
+        self, outbox, clock, basic_text_record
+    ):
+        action = RecordingAction()
+        (delivery_id,) = outbox.enqueue(basic_text_record, [action])
+        worker = OutboxWorker(outbox, [action], lease_seconds=30)
+
+        # a worker claims the delivery and then dies
+        (item,) = outbox.due(PENDING, 10)
+        stale_token = outbox.claim(item, lease_seconds=30)
+        assert worker.drain().claimed == 0
+        assert outbox.get(delivery_id)["status"] == IN_PROGRESS
+
+        clock.now += 31
+        assert worker.drain().succeeded == 1
+        assert action.records == [basic_text_record]
+        # the dead worker can no longer record an outcome
+        assert not outbox.complete(delivery_id, stale_token, FAILED)
+        assert outbox.get(delivery_id)["status"] == DONE
+
+    def test_batches(self, outbox, basic_text_record):
+        action = RecordingAction()
+        for n in range(5):
+            record = basic_text_record.model_copy(
+                update={"message_id": f"msg-{n}"}
+            )
+            outbox.enqueue(record, [action])
+        worker = OutboxWorker(outbox, [action], batch_size=2)
+
+        assert worker.drain(max_batches=1).claimed == 2
+        result = worker({"max_batches": None}, None)
+        assert result["claimed"] == 3
+        assert len(action.records) == 5
+
+    def test_stops_claiming_near_deadline(self, outbox, basic_text_record):
+        from translatron.deadline import Deadline
+
+        action = RecordingAction()
+        for n in range(4):
+            record = basic_text_record.model_copy(
+                update={"message_id": f"msg-{n}"}
+            )
+            outbox.enqueue(record, [action])
+        worker = OutboxWorker(outbox, [action], batch_size=2, batch_seconds=5)
+        now = [0.0]
+        deadline = Deadline(11.0, clock=lambda: now[0])
+        original = worker.process
+
+        def slow_process(item):
+            now[0] += 3.0  # each delivery takes 3s
+            return original(item)
+
+        worker.process = slow_process
+        # 11s left: a batch fits; it takes 6s, and with 5s left the
+        # remaining two deliveries wait for the next run
+        report = worker.drain(deadline=deadline)
+        assert report.claimed == 2
+        assert outbox.due(PENDING, 10)
+
+    def test_lease_must_outlast_invocation(self, outbox):
+        worker = OutboxWorker(outbox, [], lease_seconds=60)
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 60_000
+        with pytest.raises(ValueError, match="lease_seconds"):
+            worker({}, context)
+        context.get_remaining_time_in_millis.return_value = 30_000
+        assert worker({}, context)["claimed"] == 0
+
+
+class TestTranslatronTextOutbox:
+    def test_action_enqueues(self, outbox, basic_text_record):
+        action = RecordingAction()
+        translatron = TranslatronText(
+            translator=Mock(), actions=[action], languages=[], outbox=outbox
+        )
+        translatron.action(basic_text_record)
+        assert action.records == []
+        assert len(outbox.due(PENDING, 10)) == 1
@@ -0,0 +1,167 @@
+import json
+
+import pytest
+
+from translatron.phrases import (
+    PhraseEntry,
+    PhraseTable,
+    load_phrase_table,
+    mine_phrases,
+    normalize_phrase,
+    read_phrase_entries,
+)
+from translatron.record import TextRecord
+
+ENTRIES = [
+    PhraseEntry(
+        source="en",
+        translations={"en": "Thanks!", "es": "¡Gracias!", "fr": "Merci !"},
+    ),
+    PhraseEntry(
+        source="en",
+        translations={"en": "On my way", "es": "En camino"},
+    ),
+    # "no" is the same word in English and Spanish
+    PhraseEntry(source="en", translations={"en": "No", "fr": "Non"}),
+    PhraseEntry(source="es", translations={"es": "No", "fr": "Non"}),
+]
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = str(tmp_path / "phrases.bin")
+    PhraseTable.build(ENTRIES, path)
+    return path
+
+
+class TestNormalizePhrase:
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("Thanks!", "thanks"),
+            ("  THANKS  ", "thanks"),
+            ("on   my\nway...", "on my way"),
+            ("¡Gracias!", "gracias"),
+            ("ｔｈａｎｋｓ", "thanks"),  # full-width (NFKC)
+            ("مرسی؟", "مرسی"),
+            ("", ""),
+        ],
+    )
+    def test_normalize_phrase(self, text, expected):
+        assert normalize_phrase(text) == expected
+
+
+class TestPhraseTable:
+    def test_build_counts_keys(self, tmp_path):
+        path = str(tmp_path / "phrases.bin")
+        # "Non" (fr) appears in two entries but is only indexed once
+        assert PhraseTable.build(ENTRIES, path) == 8
+        assert len(PhraseTable(path)) == 8
+
+    def test_build_source_only(self, tmp_path):
+        path = str(tmp_path / "phrases.bin")
+        n = PhraseTable.build(ENTRIES, path, index_all_languages=False)
+        assert n == 4
+        assert PhraseTable(path).lookup("gracias") is None
+
+    def test_lookup_source_text(self, table_path):
+        entry = PhraseTable(table_path).lookup("thanks")
+        assert entry.source == "en"
+        assert entry.translations["es"] == "¡Gracias!"
+
+    def test_lookup_translated_text(self, table_path):
+        entry = PhraseTable(table_path).lookup("gracias!!")
+        assert entry.source == "es"
+        assert entry.translations["fr"] == "Merci !"
+
+    def test_lookup_missing(self, table_path):
+        assert PhraseTable(table_path).lookup("something else") is None
+
+    def test_lookup_with_source(self, table_path):
+        table = PhraseTable(table_path)
+        assert table.lookup("no", source="en").source == "en"
+        assert table.lookup("no", source="es").source == "es"
+        assert table.lookup("no", source="de") is None
+
+    def test_empty_table(self, tmp_path):
+        path = str(tmp_path / "empty.bin")
+        PhraseTable.build([], path)
+        table = PhraseTable(path)
+        assert len(table) == 0
+        assert table.lookup("thanks") is None
+
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / "bad.bin"
+        path.write_bytes(b"not a phrase table")
+        with pytest.raises(ValueError, match="not a translatron phrase table"):
+            PhraseTable(str(path))
+
+    def test_load_phrase_table_cached(self, table_path):
+        assert load_phrase_table(table_path) is load_phrase_table(table_path)
+
+
+def test_read_phrase_entries(tmp_path):
+    path = tmp_path / "phrases.jsonl"
+    path.write_text(
+        "\n".join(json.dumps(e.model_dump()) for e in ENTRIES) + "\n\n",
+        encoding="utf-8",
+    )
+    assert read_phrase_entries(str(path)) == ENTRIES
+
+
+def make_record(text, lang="en", translations=None):
+    return TextRecord(
+        message_id="id",
+        conversation_id="conv",
+        sender="+15551234567",
+        recipient="+15559876543",
+        original_lang=lang,
+        original_text=text,
+        translations=translations or [],
+        timestamp="2023-01-01T12:00:00Z",
+    )
+
+
+def es(text):
+    return {"lang": "es", "text": text}
+
+
+class TestMinePhrases:
+    def test_mine_phrases(self):
+        records = [
+            make_record("Thanks!", translations=[es("¡Gracias!")]),
+            make_record("thanks", translations=[es("Gracias")]),
+            make_record("Thanks!", translations=[es("¡Gracias!")]),
+            make_record("On my way", translations=[es("En camino")]),
+            make_record("on my way"),
+            make_record("Something else entirely"),
+        ]
+
+        candidates = mine_phrases(records, min_count=2)
+
+        assert [c.count for c in candidates] == [3, 2]
+        thanks = candidates[0]
+        assert thanks.source == "en"
+        assert thanks.translations == {"en": "Thanks!", "es": "¡Gracias!"}
+        assert candidates[1].translations["es"] == "En camino"
+
+    def test_mine_phrases_separates_languages(self):
+        records = [make_record("No", lang="en")] * 2 + [
+            make_record("No", lang="es")
+        ] * 2
+        candidates = mine_phrases(records, min_count=2)
+        assert sorted(c.source for c in candidates) == ["en", "es"]
+
+    def test_mine_phrases_skips_long_and_empty(self):
+        records = [make_record("one two three four")] * 3 + [
+            make_record("!!!")
+        ] * 3
+        assert mine_phrases(records, max_words=3) == []
+
+    def test_candidates_build_table(self, tmp_path):
+        records = [
+            make_record("Thanks!", translations=[es("¡Gracias!")])
+        ] * 3
+        path = str(tmp_path / "mined.bin")
+        PhraseTable.build(mine_phrases(records), path)
+        assert PhraseTable(path).lookup("gracias").source == "es"
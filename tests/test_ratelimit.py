@@ -0,0 +1,248 @@
+import datetime
+import threading
+import uuid
+from unittest.mock import Mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from translatron.ratelimit import (
+    CharacterBudget,
+    RateLimitedTranslator,
+    RateLimitExceededError,
+    TokenBucket,
+    get_budget,
+    get_limiter,
+    is_throttling_error,
+)
+from translatron.translator import NonTranslator, Translator
+
+
+def throttling_error(code="ThrottlingException"):
+    return ClientError(
+        {"Error": {"Code": code, "Message": "Rate exceeded"}},
+        "TranslateText",
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FlakyTranslator(Translator):
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or throttling_error()
+        self.calls = 0
+
+    def detect_language(self, text):
+        return self._respond("es")
+
+    def translate(self, text, target_language, detected_language=None):
+        return self._respond(f"[{target_language}] {text}")
+
+    def _respond(self, value):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return value
+
+
+class TestIsThrottlingError:
+    @pytest.mark.parametrize(
+        "code", ["ThrottlingException", "TooManyRequestsException"]
+    )
+    def test_aws_throttling(self, code):
+        assert is_throttling_error(throttling_error(code))
+
+    def test_other_client_error(self):
+        assert not is_throttling_error(throttling_error("ValidationException"))
+
+    def test_http_429(self):
+        exc = Exception("too many")
+        exc.code = 429
+        assert is_throttling_error(exc)
+
+    def test_plain_exception(self):
+        assert not is_throttling_error(RuntimeError("boom"))
+
+
+class TestTokenBucket:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(
+            rate=2.0, capacity=2.0, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_burst_then_wait(self):
+        assert self.bucket.try_acquire() == 0.0
+        assert self.bucket.try_acquire() == 0.0
+        assert self.bucket.try_acquire() == pytest.approx(0.5)
+
+    def test_acquire_sleeps_until_available(self):
+        for _ in range(3):
+            assert self.bucket.acquire()
+        assert self.clock.now == pytest.approx(0.5)
+
+    def test_acquire_timeout(self):
+        self.bucket.acquire(2.0)
+        assert not self.bucket.acquire(timeout=0.1)
+        assert self.clock.now == 0.0
+
+    def test_penalize_and_reward(self):
+        self.bucket.penalize()
+        assert self.bucket.rate == 1.0
+        for _ in range(100):
+            self.bucket.penalize()
+        assert self.bucket.rate == self.bucket.min_rate
+        for _ in range(100):
+            self.bucket.reward()
+        assert self.bucket.rate == 2.0
+
+    def test_rate_below_one_per_second(self):
+        bucket = TokenBucket(0.5, clock=self.clock, sleep=self.clock.sleep)
+        assert bucket.capacity == 1.0
+        assert bucket.try_acquire() == 0.0
+        assert bucket.try_acquire() == pytest.approx(2.0)
+
+
+class TestCharacterBudget:
+    def test_consume_and_reset(self):
+        day = [datetime.datetime(2024, 1, 1, 23, tzinfo=datetime.timezone.utc)]
+        budget = CharacterBudget(10, now=lambda: day[0])
+        assert budget.consume(6)
+        assert not budget.consume(6)
+        assert budget.remaining == 4
+        day[0] += datetime.timedelta(hours=2)
+        assert budget.remaining == 10
+        assert budget.consume(6)
+        budget.refund(6)
+        assert budget.remaining == 10
+
+    def test_shared_across_threads(self):
+        budget = CharacterBudget(100)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(budget.consume(1)))
+            for _ in range(150)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results.count(True) == 100
+
+
+class TestRegistry:
+    def test_limiters_shared_per_provider_api(self):
+        provider = str(uuid.uuid4())
+        detect = get_limiter(provider, "detect", 5.0)
+        assert get_limiter(provider, "detect", 50.0) is detect
+        assert get_limiter(provider, "translate", 5.0) is not detect
+
+    def test_conflicting_rate_warns(self, caplog):
+        provider = str(uuid.uuid4())
+        get_limiter(provider, "detect", 5.0)
+        with caplog.at_level("WARNING", logger="translatron.ratelimit"):
+            get_limiter(provider, "detect", 5.0)
+            assert not caplog.records
+            get_limiter(provider, "detect", 50.0)
+        assert "already exists" in caplog.text
+
+    def test_budget_shared_per_provider(self):
+        provider = str(uuid.uuid4())
+        assert get_budget(provider, 10) is get_budget(provider, 20)
+
+    def test_conflicting_budget_warns(self, caplog):
+        provider = str(uuid.uuid4())
+        get_budget(provider, 10)
+        with caplog.at_level("WARNING", logger="translatron.ratelimit"):
+            get_budget(provider, 10)
+            assert not caplog.records
+            get_budget(provider, 20)
+        assert "daily_limit=10" in caplog.text
+
+
+class TestRateLimitedTranslator:
+    def make(self, translator, **kwargs):
+        kwargs.setdefault("sleep", Mock())
+        return RateLimitedTranslator(
+            translator, provider=str(uuid.uuid4()), **kwargs
+        )
+
+    def test_passthrough(self):
+        translator = self.make(FlakyTranslator())
+        assert translator.detect_language("Hola") == "es"
+        assert translator.translate("Hello", "es") == "[es] Hello"
+
+    def test_retries_throttling(self):
+        inner = FlakyTranslator(failures=2)
+        translator = self.make(inner)
+        assert translator.translate("Hello", "es") == "[es] Hello"
+        assert inner.calls == 3
+        assert translator.sleep.call_count == 2
+        assert translator.translate_limiter.rate < 10.0
+
+    def test_non_throttling_error_raised(self):
+        inner = FlakyTranslator(failures=1, error=ValueError("bad"))
+        translator = self.make(inner)
+        with pytest.raises(ValueError):
+            translator.translate("Hello", "es")
+        assert inner.calls == 1
+
+    def test_throttled_without_fallback(self):
+        translator = self.make(FlakyTranslator(failures=10), max_retries=2)
+        with pytest.raises(RateLimitExceededError, match="throttled"):
+            translator.translate("Hello", "es")
+
+    def test_throttled_with_fallback(self):
+        translator = self.make(
+            FlakyTranslator(failures=10),
+            max_retries=2,
+            fallback=NonTranslator(),
+        )
+        assert translator.translate("Hello", "es") == "Hello"
+        assert translator.detect_language("Hello") == "en"
+
+    def test_budget_exhausted(self):
+        inner = FlakyTranslator()
+        translator = self.make(
+            inner, daily_characters=8, fallback=NonTranslator()
+        )
+        assert translator.translate("Hello", "es") == "[es] Hello"
+        assert translator.translate("Hello", "fr") == "Hello"
+        assert inner.calls == 1
+
+    def test_budget_refunded_on_failure(self):
+        translator = self.make(
+            FlakyTranslator(failures=1, error=ValueError("bad")),
+            daily_characters=100,
+        )
+        with pytest.raises(ValueError):
+            translator.translate("Hello", "es")
+        assert translator.budget.remaining == 100
+
+        translator = self.make(
+            FlakyTranslator(failures=10), max_retries=1,
+            daily_characters=100, fallback=NonTranslator(),
+        )
+        assert translator.translate("Hello", "es") == "Hello"
+        assert translator.budget.remaining == 100
+        translator.translator.failures = 0
+        assert translator.translate("Hello", "es") == "[es] Hello"
+        assert translator.budget.remaining == 95
+
+    def test_rate_limit_timeout(self):
+        translator = self.make(
+            FlakyTranslator(), translate_rate=0.01, acquire_timeout=0.0
+        )
+        translator.translate_limiter._tokens = 0.0
+        with pytest.raises(RateLimitExceededError, match="rate limit"):
+            translator.translate("Hello", "es")
@@ -0,0 +1,209 @@
+import random
+import urllib.error
+from unittest.mock import Mock
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from twilio.base.exceptions import TwilioRestException
+
+from translatron.actions import ActionBase, SendTranslatedSMS
+from translatron.deadline import Deadline, activate
+from translatron.outbox import action_name
+from translatron.retry import (
+    RetryingAction,
+    RetryingTranslator,
+    RetryPolicy,
+    is_transient_aws_error,
+    is_transient_error,
+    is_transient_network_error,
+    is_transient_twilio_error,
+)
+from translatron.translator import Translator
+
+
+def client_error(code, status=400):
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": code},
+            "ResponseMetadata": {"HTTPStatusCode": status},
+        },
+        "Operation",
+    )
+
+
+def twilio_error(status):
+    return TwilioRestException(status, "https://api.twilio.com", "error")
+
+
+class Flaky:
+    """Callable failing with the given exceptions before succeeding."""
+
+    def __init__(self, *errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+def make_policy(**kwargs):
+    sleeps = []
+    kwargs.setdefault("rng", random.Random(0))
+    policy = RetryPolicy(sleep=sleeps.append, **kwargs)
+    return policy, sleeps
+
+
+class TestClassifiers:
+    @pytest.mark.parametrize(
+        "exc, expected",
+        [
+            (client_error("ThrottlingException"), True),
+            (client_error("ProvisionedThroughputExceededException"), True),
+            (client_error("InternalServerError", 500), True),
+            (client_error("SomethingElse", 503), True),
+            (client_error("ValidationException"), False),
+            (client_error("ConditionalCheckFailedException"), False),
+            (EndpointConnectionError(endpoint_url="https://x"), True),
+            (ValueError("nope"), False),
+        ],
+    )
+    def test_aws(self, exc, expected):
+        assert is_transient_aws_error(exc) is expected
+
+    @pytest.mark.parametrize(
+        "status, expected", [(429, True), (500, True), (503, True),
+                             (400, False), (404, False)]
+    )
+    def test_twilio(self, status, expected):
+        assert is_transient_twilio_error(twilio_error(status)) is expected
+
+    def test_network(self):
+        def http_error(code):
+            return urllib.error.HTTPError("u", code, "msg", {}, None)
+
+        assert is_transient_network_error(ConnectionResetError())
+        assert is_transient_network_error(TimeoutError())
+        assert is_transient_network_error(urllib.error.URLError("dns"))
+        assert is_transient_network_error(http_error(503))
+        assert not is_transient_network_error(http_error(404))
+
+    def test_default(self):
+        assert is_transient_error(twilio_error(429))
+        assert is_transient_error(client_error("ThrottlingException"))
+        assert not is_transient_error(KeyError("x"))
+
+
+class TestRetryPolicy:
+    def test_retries_transient_errors(self):
+        policy, sleeps = make_policy(max_attempts=3)
+        func = Flaky(twilio_error(429), ConnectionResetError())
+        assert policy.call(func) == "ok"
+        assert func.calls == 3
+        assert len(sleeps) == 2
+
+    def test_gives_up_after_max_attempts(self):
+        policy, sleeps = make_policy(max_attempts=2)
+        func = Flaky(twilio_error(500), twilio_error(503))
+        with pytest.raises(TwilioRestException) as excinfo:
+            policy.call(func)
+        assert excinfo.value.status == 503
+        assert func.calls == 2
+
+    def test_does_not_retry_permanent_errors(self):
+        policy, sleeps = make_policy()
+        func = Flaky(twilio_error(400))
+        with pytest.raises(TwilioRestException):
+            policy.call(func)
+        assert func.calls == 1 and sleeps == []
+
+    def test_custom_classifier(self):
+        policy, _ = make_policy(retryable=lambda e: isinstance(e, KeyError))
+        assert policy.call(Flaky(KeyError("x"))) == "ok"
+
+    def test_backoff_bounds(self):
+        policy, _ = make_policy(base_delay=0.1, max_delay=1.0)
+        for attempt in range(1, 10):
+            cap = min(1.0, 0.1 * 2 ** (attempt - 1))
+            assert 0 <= policy.backoff(attempt) <= cap
+
+    def test_backoff_without_jitter(self):
+        policy, _ = make_policy(base_delay=0.1, max_delay=1.0, jitter=False)
+        assert [policy.backoff(n) for n in (1, 2, 3, 5)] == [
+            0.1, 0.2, 0.4, 1.0
+        ]
+
+    def test_respects_deadline(self):
+        clock = Mock(return_value=0.0)
+        deadline = Deadline(0.05, clock=clock)
+        policy, sleeps = make_policy(base_delay=1.0, jitter=False)
+        func = Flaky(twilio_error(429))
+        with pytest.raises(TwilioRestException):
+            policy.call(func, deadline=deadline)
+        assert sleeps == []
+
+    def test_uses_current_deadline(self):
+        deadline = Deadline(0.0, clock=Mock(return_value=0.0))
+        policy, sleeps = make_policy()
+        with activate(deadline):
+            with pytest.raises(TwilioRestException):
+                policy.call(Flaky(twilio_error(429)))
+        assert sleeps == []
+
+    def test_passes_arguments(self):
+        policy, _ = make_policy()
+        func = Mock(return_value=3)
+        assert policy.call(func, 1, b=2) == 3
+        func.assert_called_once_with(1, b=2)
+
+
+class TestRetryingAction:
+    def test_retries_single_action(self, basic_text_record):
+        inner = Mock(spec=ActionBase)
+        inner.deliveries.return_value = [{}]
+        inner.deliver.side_effect = Flaky(client_error("ThrottlingException"))
+        policy, _ = make_policy()
+        action = RetryingAction(inner, policy)
+        assert action(basic_text_record) == ["ok"]
+        assert inner.deliver.call_count == 2
+
+    def test_retries_per_recipient(self, basic_text_record, user_info_data):
+        client = Mock()
+        sent = []
+
+        def create(body, from_, to):
+            if to == "+15559876545" and not any(t == to for t, _ in sent):
+                sent.append((to, None))  # mark the failed attempt
+                raise twilio_error(429)
+            sent.append((to, body))
+
+        client.messages.create.side_effect = create
+        policy, _ = make_policy()
+        action = RetryingAction(
+            SendTranslatedSMS(user_info_data, client), policy
+        )
+        action(basic_text_record)
+        delivered = [to for to, body in sent if body is not None]
+        # the successful recipient is not sent to twice
+        assert sorted(delivered) == ["+15559876544", "+15559876545"]
+        assert action_name(action) == "SendTranslatedSMS"
+
+
+class TestRetryingTranslator:
+    def test_retries(self):
+        inner = Mock(spec=Translator)
+        inner.detect_language.side_effect = Flaky(
+            client_error("ThrottlingException"), result="es"
+        )
+        inner.translate.side_effect = Flaky(
+            client_error("ServiceUnavailableException", 503), result="hola"
+        )
+        policy, _ = make_policy()
+        translator = RetryingTranslator(inner, policy)
+        assert translator.detect_language("hola") == "es"
+        result = translator.translate("hi", "es", detected_language="en")
+        assert result == "hola"
+        inner.translate.assert_called_with("hi", "es", detected_language="en")
@@ -0,0 +1,139 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from translatron.singleflight import CoalescingTranslator, SingleFlight
+from translatron.translator import Translator
+
+
+class BlockingTranslator(Translator):
+    """Translator whose calls block until ``release`` is set."""
+
+    def __init__(self, fail=False):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.translate_calls = 0
+        self.detect_calls = 0
+        self.fail = fail
+
+    def detect_language(self, text):
+        self.detect_calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return "en"
+
+    def translate(self, text, target_language, detected_language=None):
+        self.translate_calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("provider down")
+        return f"[{target_language}] {text}"
+
+
+def wait_for_waiters(flight, key, count):
+    for _ in range(500):
+        call = flight._in_flight.get(key)
+        if call is not None and call.waiters >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("waiters never arrived")
+
+
+class TestSingleFlight:
+    def test_sequential_calls_both_run(self):
+        flight = SingleFlight()
+        assert flight.do("k", lambda: 1) == 1
+        assert flight.do("k", lambda: 2) == 2
+        assert flight.stats() == {"calls": 2, "coalesced": 0, "in_flight": 0}
+
+
+class TestCoalescingTranslator:
+    def test_concurrent_identical_calls_share_result(self):
+        inner = BlockingTranslator()
+        translator = CoalescingTranslator(inner)
+        key = ("Hello", "en", "es")
+        with ThreadPoolExecutor(4) as pool:
+            futures = [
+                pool.submit(translator.translate, "Hello", "es", "en")
+                for _ in range(4)
+            ]
+            inner.started.wait(5)
+            wait_for_waiters(translator.translate_flight, key, 3)
+            inner.release.set()
+            results = [f.result() for f in futures]
+
+        assert results == ["[es] Hello"] * 4
+        assert inner.translate_calls == 1
+        stats = translator.stats()["translate"]
+        assert stats == {"calls": 4, "coalesced": 3, "in_flight": 0}
+
+    def test_different_targets_not_coalesced(self):
+        inner = BlockingTranslator()
+        inner.release.set()
+        translator = CoalescingTranslator(inner)
+        with ThreadPoolExecutor(2) as pool:
+            results = list(pool.map(
+                lambda target: translator.translate("Hi", target, "en"),
+                ["es", "fr"],
+            ))
+        assert results == ["[es] Hi", "[fr] Hi"]
+        assert inner.translate_calls == 2
+
+    def test_error_shared_by_waiters(self):
+        inner = BlockingTranslator(fail=True)
+        translator = CoalescingTranslator(inner)
+        with ThreadPoolExecutor(3) as pool:
+            futures = [
+                pool.submit(translator.translate, "Hi", "es", "en")
+                for _ in range(3)
+            ]
+            inner.started.wait(5)
+            wait_for_waiters(
+                translator.translate_flight, ("Hi", "en", "es"), 2
+            )
+            inner.release.set()
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result()
+        assert inner.translate_calls == 1
+        # the failure is not cached
+        inner.fail = False
+        assert translator.translate("Hi", "es", "en") == "[es] Hi"
+
+    def test_detect_language_coalesced(self):
+        inner = BlockingTranslator()
+        translator = CoalescingTranslator(inner)
+        with ThreadPoolExecutor(2) as pool:
+            futures = [
+                pool.submit(translator.detect_language, "Hi") for _ in range(2)
+            ]
+            inner.started.wait(5)
+            wait_for_waiters(translator.detect_flight, "Hi", 1)
+            inner.release.set()
+            assert [f.result() for f in futures] == ["en", "en"]
+        assert inner.detect_calls == 1
+
+    def test_batches_forwarded_and_coalesced(self):
+        from translatron.batching import MicroBatchingTranslator
+
+        inner = BlockingTranslator()
+        inner.supports_batch = True
+        translator = CoalescingTranslator(inner)
+        assert translator.supports_batch
+        assert MicroBatchingTranslator(translator).supports_batch
+        with ThreadPoolExecutor(2) as pool:
+            futures = [
+                pool.submit(translator.translate_batch, ["a", "b"], "es", "en")
+                for _ in range(2)
+            ]
+            inner.started.wait(5)
+            wait_for_waiters(
+                translator.batch_flight, (("a", "b"), "en", "es"), 1
+            )
+            inner.release.set()
+            assert [f.result() for f in futures] == [["[es] a", "[es] b"]] * 2
+        # the default translate_batch translates each text once
+        assert inner.translate_calls == 2
+        assert translator.stats()["translate_batch"]["coalesced"] == 1
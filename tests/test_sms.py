@@ -0,0 +1,122 @@
+import pytest
+
+from translatron.sms import (
+    GSM7,
+    UCS2,
+    SegmentPolicy,
+    count_segments,
+    detect_encoding,
+    is_gsm7,
+    normalize_gsm7,
+    split_single_segments,
+)
+
+
+class TestEncoding:
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("Hello world", True),
+            ("Ça coûte 5€ {ok}", False),  # û is not GSM-7
+            ("Está bien, ¿sí?", False),  # á and í are not GSM-7
+            ("Ñandú", False),
+            ("Ñandu é à", True),
+            ("price: 5€ [approx] ~ {x}", True),
+            ("it’s", False),
+            ("سلام", False),
+            ("🌍", False),
+            ("", True),
+        ],
+    )
+    def test_is_gsm7(self, text, expected):
+        assert is_gsm7(text) is expected
+        assert detect_encoding(text) == (GSM7 if expected else UCS2)
+
+    def test_normalize_gsm7(self):
+        text = "“Hi” — it’s fine…"
+        normalized = normalize_gsm7(text)
+        assert normalized == '"Hi" - it\'s fine...'
+        assert is_gsm7(normalized)
+
+    def test_normalize_gsm7_leaves_other_text_alone(self):
+        assert normalize_gsm7("سلام") == "سلام"
+
+
+class TestCountSegments:
+    @pytest.mark.parametrize(
+        "text,encoding,units,segments",
+        [
+            ("", GSM7, 0, 1),
+            ("a" * 160, GSM7, 160, 1),
+            ("a" * 161, GSM7, 161, 2),
+            ("a" * 306, GSM7, 306, 2),
+            ("a" * 307, GSM7, 307, 3),
+            ("€" * 80, GSM7, 160, 1),
+            ("س" * 70, UCS2, 70, 1),
+            ("س" * 71, UCS2, 71, 2),
+            ("س" * 134, UCS2, 134, 2),
+            ("س" * 135, UCS2, 135, 3),
+            ("🌍" * 35, UCS2, 70, 1),
+        ],
+    )
+    def test_count_segments(self, text, encoding, units, segments):
+        info = count_segments(text)
+        assert info.encoding == encoding
+        assert info.units == units
+        assert info.segments == segments
+
+    def test_escape_not_split_across_segments(self):
+        # 152 plain characters followed by an escaped character: the escape
+        # pair doesn't fit in the first 153-septet segment
+        text = "a" * 152 + "€" + "a" * 10
+        info = count_segments(text)
+        assert info.units == 164
+        assert info.segments == 2
+
+    def test_surrogate_pair_not_split_across_segments(self):
+        text = "س" * 66 + "🌍" + "س" * 66
+        assert count_segments(text).segments == 3
+
+
+class TestSplitSingleSegments:
+    def test_split_on_whitespace(self):
+        text = " ".join(["word"] * 62)  # 309 characters
+        parts = split_single_segments(text)
+        assert len(parts) == 2
+        assert all(count_segments(p).segments == 1 for p in parts)
+        assert " ".join(parts) == text
+
+    def test_split_long_word(self):
+        text = "a" * 400
+        parts = split_single_segments(text)
+        assert [len(p) for p in parts] == [160, 160, 80]
+        assert "".join(parts) == text
+
+
+class TestSegmentPolicy:
+    def test_normalizes_smart_quotes(self):
+        text = "It’s " + "a" * 70
+        assert count_segments(text).segments == 2
+        assert SegmentPolicy().choose(text) == ["It's " + "a" * 70]
+
+    def test_no_normalization_if_still_ucs2(self):
+        text = "“سلام”"
+        assert SegmentPolicy().choose(text) == [text]
+
+    def test_normalization_disabled(self):
+        text = "It’s " + "a" * 70
+        assert SegmentPolicy(normalize=False).choose(text) == [text]
+
+    def test_split_when_fewer_segments(self):
+        text = " ".join(["word"] * 62)  # 3 concatenated segments
+        assert count_segments(text).segments == 3
+        bodies = SegmentPolicy(allow_split=True).choose(text)
+        assert len(bodies) == 2
+
+    def test_prefers_concatenated_on_tie(self):
+        text = " ".join(["word"] * 40)  # 2 segments either way
+        assert SegmentPolicy(allow_split=True).choose(text) == [text]
+
+    def test_split_not_used_by_default(self):
+        text = " ".join(["word"] * 62)
+        assert SegmentPolicy().choose(text) == [text]
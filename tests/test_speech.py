@@ -0,0 +1,105 @@
+import io
+from unittest.mock import Mock, patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.speech import (
+    FakeSynthesizer,
+    PollySynthesizer,
+    S3AudioStore,
+    UploadedAudioKeys,
+    audio_cache_key,
+)
+
+
+class TestAudioCacheKey:
+    def test_depends_on_all_parts(self):
+        keys = {
+            audio_cache_key("hola", "es", "Lupe"),
+            audio_cache_key("hola", "es", "Mia"),
+            audio_cache_key("hola", "es", None),
+            audio_cache_key("hola", "pt", "Lupe"),
+            audio_cache_key("hola!", "es", "Lupe"),
+        }
+        assert len(keys) == 5
+
+    def test_stable(self):
+        assert audio_cache_key("hi", "en", "Joanna") == audio_cache_key(
+            "hi", "en", "Joanna"
+        )
+
+    def test_parts_are_delimited(self):
+        assert audio_cache_key("b", "a", "") != audio_cache_key("", "a", "b")
+
+
+class TestFakeSynthesizer:
+    def test_synthesize(self):
+        synth = FakeSynthesizer()
+        assert synth.synthesize("hi", "en", "Joanna") == b"en:Joanna:hi"
+        assert synth.calls == [("hi", "en", "Joanna")]
+
+
+class TestPollySynthesizer:
+    def setup_method(self):
+        with patch("boto3.client") as mock_boto_client:
+            self.client = Mock()
+            mock_boto_client.return_value = self.client
+            self.synth = PollySynthesizer(voices={"es": "Mia"})
+        self.client.synthesize_speech.return_value = {
+            "AudioStream": io.BytesIO(b"mp3data")
+        }
+
+    def test_synthesize_default_voice(self):
+        assert self.synth.synthesize("Hello", "en") == b"mp3data"
+        self.client.synthesize_speech.assert_called_once_with(
+            Text="Hello", VoiceId="Joanna", Engine="standard",
+            OutputFormat="mp3",
+        )
+        assert self.synth.content_type == "audio/mpeg"
+
+    def test_voice_override(self):
+        assert self.synth.default_voice("es") == "Mia"
+
+    def test_unsupported_language(self):
+        with pytest.raises(ValueError, match="fa"):
+            self.synth.synthesize("salam", "fa")
+
+
+class TestUploadedAudioKeys:
+    def test_seen_and_add(self):
+        keys = UploadedAudioKeys()
+        assert not keys.seen("k")
+        keys.add("k")
+        assert keys.seen("k")
+        assert "k" in keys
+
+    def test_evicts_least_recently_used(self):
+        keys = UploadedAudioKeys(max_keys=2)
+        keys.add("a")
+        keys.add("b")
+        assert keys.seen("a")  # b is now least recently used
+        keys.add("c")
+        assert "b" not in keys
+        assert keys.seen("a")
+        assert keys.seen("c")
+        assert len(keys) == 2
+
+
+@mock_aws
+class TestS3AudioStore:
+    def setup_method(self, method):
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket="tts-bucket")
+        self.store = S3AudioStore("tts-bucket", s3_client=self.s3)
+
+    def test_put_exists_url(self):
+        assert not self.store.exists("k")
+        self.store.put("k", b"audio", "audio/mpeg")
+        assert self.store.exists("k")
+        obj = self.s3.get_object(Bucket="tts-bucket", Key="tts/k")
+        assert obj["Body"].read() == b"audio"
+        assert obj["ContentType"] == "audio/mpeg"
+        url = self.store.url("k")
+        assert "tts/k" in url and "Signature" in url
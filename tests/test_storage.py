@@ -0,0 +1,150 @@
+import gzip
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.actions import StoreToDynamoDB
+from translatron.record import MediaItem
+from translatron.storage import (
+    CODEC,
+    PAYLOAD,
+    RecordEncoder,
+    compress,
+    decode_item,
+    decompress,
+)
+
+try:
+    import zstandard  # noqa: F401
+except ImportError:
+    HAS_ZSTD = False
+else:
+    HAS_ZSTD = True
+
+
+@pytest.fixture
+def long_record(basic_text_record):
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    return basic_text_record.model_copy(update={
+        "original_text": text,
+        "translations": [
+            {"lang": "es", "text": "El rápido zorro marrón salta. " * 20},
+            {"lang": "fr", "text": "Le renard brun rapide saute. " * 20},
+        ],
+    })
+
+
+class TestRecordEncoder:
+    def test_short_record_not_compressed(self, basic_text_record):
+        item = RecordEncoder().encode(basic_text_record)
+        assert CODEC not in item
+        payload = json.loads(item[PAYLOAD])
+        assert payload["translations"] == {
+            "es": "Hola mundo", "fr": "Bonjour le monde"
+        }
+        assert "media" not in payload
+        assert item["conversation_id"] == "conv-456"
+        assert item["sender"] == basic_text_record.sender
+        assert "original_text" not in item
+
+    def test_long_record_compressed(self, long_record):
+        item = RecordEncoder().encode(long_record)
+        assert item[CODEC] == "gzip"
+        assert isinstance(item[PAYLOAD], bytes)
+        assert len(item[PAYLOAD]) < len(long_record.original_text)
+
+    def test_no_codec(self, long_record):
+        item = RecordEncoder(codec=None).encode(long_record)
+        assert CODEC not in item
+        assert isinstance(item[PAYLOAD], str)
+
+    def test_ttl(self, basic_text_record):
+        encoder = RecordEncoder(ttl=86400, clock=lambda: 1000.0)
+        assert encoder.encode(basic_text_record)["expires_at"] == 87400
+        assert "expires_at" not in RecordEncoder().encode(basic_text_record)
+
+    def test_index_attributes(self, basic_text_record):
+        encoder = RecordEncoder(index_attributes=["original_lang"])
+        item = encoder.encode(basic_text_record)
+        assert item["original_lang"] == "en"
+        assert "recipient" not in item
+        assert encoder.decode(item) == basic_text_record
+
+    def test_invalid_codec(self):
+        with pytest.raises(ValueError):
+            RecordEncoder(codec="lz4")
+
+    @pytest.mark.parametrize("codec", [
+        None,
+        "gzip",
+        pytest.param("zstd", marks=pytest.mark.skipif(
+            not HAS_ZSTD, reason="zstandard not installed"
+        )),
+    ])
+    def test_round_trip(self, long_record, codec):
+        record = long_record.model_copy(update={
+            "media": [MediaItem(
+                url="https://example.com/a.jpg",
+                content_type="image/jpeg",
+                sha256="ab" * 32,
+                size=10,
+            )],
+            "deferred_languages": ["fr"],
+            "is_follow_up": True,
+        })
+        encoder = RecordEncoder(codec=codec)
+        assert encoder.decode(encoder.encode(record)) == record
+
+
+def test_compress_round_trip():
+    data = b"hello " * 100
+    assert decompress(compress(data, "gzip"), "gzip") == data
+    assert gzip.decompress(compress(data, "gzip")) == data
+    with pytest.raises(ValueError):
+        compress(data, "lz4")
+
+
+def test_decode_plain_item(basic_text_record):
+    item = basic_text_record.model_dump()
+    item["extra_attribute"] = "ignored"
+    assert decode_item(item) == basic_text_record
+
+
+@mock_aws
+class TestStoreEncoded:
+    def setup_method(self, method):
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        self.table = dynamodb.create_table(
+            TableName="messages",
+            KeySchema=[
+                {"AttributeName": "conversation_id", "KeyType": "HASH"},
+                {"AttributeName": "timestamp", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "conversation_id", "AttributeType": "S"},
+                {"AttributeName": "timestamp", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+    def get(self, record):
+        return self.table.get_item(Key={
+            "conversation_id": record.conversation_id,
+            "timestamp": record.timestamp,
+        })["Item"]
+
+    def test_round_trip_through_dynamodb(self, long_record):
+        action = StoreToDynamoDB("messages", encoder=RecordEncoder(ttl=60))
+        action(long_record)
+        item = self.get(long_record)
+        assert item[CODEC] == "gzip"
+        assert "expires_at" in item
+        assert decode_item(item) == long_record
+
+    def test_default_is_plain(self, basic_text_record):
+        StoreToDynamoDB("messages")(basic_text_record)
+        item = self.get(basic_text_record)
+        assert PAYLOAD not in item
+        assert decode_item(item) == basic_text_record
@@ -0,0 +1,178 @@
+import io
+import struct
+import threading
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.streaming import (
+    BoundedStream,
+    BufferPool,
+    PassthroughTranscoder,
+    S3MultipartSink,
+    WavToPcmTranscoder,
+)
+
+
+def make_wav(samples, sample_rate=8000, channels=1, extra_chunk=b""):
+    fmt = struct.pack(
+        "<HHIIHH", 1, channels, sample_rate, sample_rate * 2 * channels,
+        2 * channels, 16,
+    )
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    if extra_chunk:
+        body += b"LIST" + struct.pack("<I", len(extra_chunk)) + extra_chunk
+    body += b"data" + struct.pack("<I", len(samples)) + samples
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class SlowSource(io.RawIOBase):
+    """Readable that records how far ahead of the consumer it gets."""
+
+    def __init__(self, size):
+        self.remaining = size
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.remaining)
+        buffer[:n] = b"a" * n
+        self.remaining -= n
+        self.reads += 1
+        return n
+
+
+class FailingSource(io.RawIOBase):
+    def readinto(self, buffer):
+        raise OSError("connection reset")
+
+
+class TestBufferPool:
+    def test_acquire_release(self):
+        pool = BufferPool(8, 2)
+        a = pool.acquire()
+        b = pool.acquire()
+        assert len(a) == 8 and pool.available == 0
+        pool.release(a)
+        pool.release(b)
+        assert pool.available == 2
+
+    def test_acquire_blocks_when_exhausted(self):
+        pool = BufferPool(8, 1)
+        pool.acquire()
+        with pytest.raises(Exception):
+            pool.acquire(timeout=0.01)
+
+
+class TestBoundedStream:
+    def test_yields_all_data(self):
+        stream = BoundedStream(io.BytesIO(b"0123456789"), buffer_size=4)
+        assert [bytes(c) for c in stream] == [b"0123", b"4567", b"89"]
+
+    def test_backpressure(self):
+        source = SlowSource(100)
+        stream = BoundedStream(source, buffer_size=1, max_in_flight=2)
+        it = iter(stream)
+        next(it)
+        # give the reader a chance to run ahead as far as it can
+        threading.Event().wait(0.1)
+        # consumer holds one buffer, at most two more are queued, and the
+        # reader may have one more read blocked waiting for a free buffer
+        assert source.reads <= 4
+        it.close()
+
+    def test_buffers_are_reused(self):
+        stream = BoundedStream(
+            io.BytesIO(b"x" * 64), buffer_size=4, max_in_flight=1
+        )
+        ids = {id(chunk.obj) for chunk in stream}
+        assert len(ids) <= 2
+
+    def test_source_error_raised_in_consumer(self):
+        stream = BoundedStream(FailingSource(), buffer_size=4)
+        with pytest.raises(OSError, match="connection reset"):
+            list(stream)
+
+    def test_early_close_stops_reader(self):
+        stream = BoundedStream(SlowSource(10_000), buffer_size=1)
+        for _ in stream:
+            break
+        stream._thread.join(timeout=1)
+        assert not stream._thread.is_alive()
+
+
+class TestTranscoders:
+    def test_passthrough(self):
+        transcoder = PassthroughTranscoder("audio/mpeg")
+        assert list(transcoder.transcode([b"ab", b"c"])) == [b"ab", b"c"]
+        assert transcoder.content_type == "audio/mpeg"
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 44, 1000])
+    def test_wav_to_pcm(self, chunk_size):
+        samples = bytes(range(200))
+        wav = make_wav(samples, sample_rate=16000, extra_chunk=b"meta")
+        chunks = [
+            wav[i : i + chunk_size] for i in range(0, len(wav), chunk_size)
+        ]
+        transcoder = WavToPcmTranscoder()
+        out = b"".join(bytes(c) for c in transcoder.transcode(chunks))
+        assert out == samples
+        assert transcoder.sample_rate == 16000
+        assert transcoder.channels == 1
+        assert transcoder.bits_per_sample == 16
+
+    def test_wav_to_pcm_ignores_trailing_chunks(self):
+        wav = make_wav(b"pcm!") + b"junk" + struct.pack("<I", 0)
+        out = b"".join(
+            bytes(c) for c in WavToPcmTranscoder().transcode([wav])
+        )
+        assert out == b"pcm!"
+
+    def test_wav_to_pcm_rejects_non_wav(self):
+        with pytest.raises(ValueError):
+            list(WavToPcmTranscoder().transcode([b"ID3" + b"\0" * 20]))
+
+
+@mock_aws
+class TestS3MultipartSink:
+    def setup_method(self, method):
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket="recordings")
+
+    def read(self, key):
+        return self.s3.get_object(Bucket="recordings", Key=key)["Body"].read()
+
+    def test_multiple_parts(self):
+        part_size = S3MultipartSink.MIN_PART_SIZE
+        data = b"ab" * (part_size // 2) + b"tail"
+        step = 1_000_000
+        chunks = [data[i : i + step] for i in range(0, len(data), step)]
+        sink = S3MultipartSink(
+            self.s3, "recordings", "big.wav", content_type="audio/wav"
+        )
+        assert sink.write_all(chunks) == len(data)
+        assert self.read("big.wav") == data
+        head = self.s3.head_object(Bucket="recordings", Key="big.wav")
+        assert head["ContentType"] == "audio/wav"
+
+    def test_empty_stream(self):
+        S3MultipartSink(self.s3, "recordings", "empty.wav").write_all([])
+        assert self.read("empty.wav") == b""
+
+    def test_aborts_on_error(self):
+        def chunks():
+            yield b"partial"
+            raise OSError("download failed")
+
+        with pytest.raises(OSError):
+            sink = S3MultipartSink(self.s3, "recordings", "bad.wav")
+            sink.write_all(chunks())
+        uploads = self.s3.list_multipart_uploads(Bucket="recordings")
+        assert not uploads.get("Uploads")
+
+    def test_part_size_minimum(self):
+        with pytest.raises(ValueError):
+            S3MultipartSink(self.s3, "recordings", "k", part_size=1024)
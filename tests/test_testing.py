@@ -0,0 +1,170 @@
+import random
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from twilio.base.exceptions import TwilioRestException
+
+from translatron.record import TextRecord
+from translatron.retry import RetryPolicy, is_transient_error
+from translatron.testing import (
+    ConstantLatency,
+    EmpiricalLatency,
+    Emulator,
+    FakeTranslator,
+    FakeTwilioClient,
+    FaultInjector,
+    LogNormalLatency,
+    UniformLatency,
+    emulated_user_info,
+    mock_store_to_dynamodb,
+    translate_throttled,
+    twilio_unavailable,
+)
+
+
+class TestLatency:
+    def test_constant(self):
+        assert ConstantLatency(0.2).sample(random.Random()) == 0.2
+
+    def test_uniform(self):
+        rng = random.Random(0)
+        samples = [UniformLatency(0.1, 0.2).sample(rng) for _ in range(100)]
+        assert all(0.1 <= s <= 0.2 for s in samples)
+
+    def test_lognormal_median_and_cap(self):
+        rng = random.Random(0)
+        latency = LogNormalLatency(0.1, sigma=0.5, cap=0.3)
+        samples = sorted(latency.sample(rng) for _ in range(1001))
+        assert samples[500] == pytest.approx(0.1, rel=0.15)
+        assert max(samples) == 0.3
+
+    def test_empirical(self):
+        rng = random.Random(0)
+        assert EmpiricalLatency([1.0, 2.0]).sample(rng) in (1.0, 2.0)
+        with pytest.raises(ValueError):
+            EmpiricalLatency([])
+
+
+class TestFaultInjector:
+    def test_sleeps_for_latency(self):
+        sleeps = []
+        faults = FaultInjector(ConstantLatency(0.5), sleep=sleeps.append)
+        faults()
+        faults()
+        assert sleeps == [0.5, 0.5]
+        assert faults.calls == 2
+        assert faults.total_latency == 1.0
+
+    def test_seeded_errors_are_repeatable(self):
+        def outcomes():
+            faults = FaultInjector(error_rate=0.3, seed=42)
+            result = []
+            for _ in range(50):
+                try:
+                    faults()
+                    result.append(True)
+                except RuntimeError:
+                    result.append(False)
+            return result
+
+        first = outcomes()
+        assert first == outcomes()
+        assert 5 < first.count(False) < 25
+
+
+class TestFakeTwilioClient:
+    def test_records_messages_and_calls(self):
+        client = FakeTwilioClient()
+        message = client.messages.create(body="Hi", from_="+1", to="+2")
+        client.calls.create(twiml="<Response/>", from_="+1", to="+3")
+        assert message.sid.startswith("SM")
+        assert message.body == "Hi"
+        assert len(client.messages) == 1
+        assert client.calls.created[0].sid.startswith("CA")
+        assert client.sent_to("+2") == [message]
+
+    def test_injected_error_is_transient(self):
+        client = FakeTwilioClient(FaultInjector(
+            error_rate=1.0,
+            error_factory=twilio_unavailable,
+        ))
+        with pytest.raises(TwilioRestException) as excinfo:
+            client.messages.create(body="Hi", from_="+1", to="+2")
+        assert is_transient_error(excinfo.value)
+        assert len(client.messages) == 0
+
+
+class TestFakeTranslator:
+    def test_translate_and_detect(self):
+        translator = FakeTranslator(detect=lambda text: "es")
+        assert translator.detect_language("Hola") == "es"
+        assert translator.translate("Hola", "en", "es") == "[en] Hola"
+        assert translator.translate_calls == 1
+        assert translator.detect_calls == 1
+
+    def test_default_error_is_throttling(self):
+        translator = FakeTranslator(faults=FaultInjector(
+            error_rate=1.0,
+            error_factory=translate_throttled,
+        ))
+        with pytest.raises(ClientError) as excinfo:
+            translator.translate("Hi", "es")
+        assert excinfo.value.response["Error"]["Code"] == "ThrottlingException"
+
+
+def test_mock_store_to_dynamodb(basic_text_record):
+    with mock_store_to_dynamodb("records") as store:
+        store(basic_text_record)
+        table = boto3.resource("dynamodb").Table("records")
+        item = table.get_item(Key={"message_id": "test-msg-123"})["Item"]
+        assert TextRecord(**item) == basic_text_record
+
+
+def test_emulated_user_info():
+    user_info = emulated_user_info(2, 3, ["en", "es"])
+    assert len(user_info) == 2
+    langs = [user["lang"] for user in user_info["+15550000000"].values()]
+    assert langs == ["en", "es", "en"]
+
+
+class TestEmulator:
+    def test_run(self):
+        with Emulator(seed=0) as emulator:
+            report = emulator.run(20, concurrency=4)
+        assert report.messages == 20
+        assert report.errors == 0
+        assert report.records_stored == 20
+        # each message goes to the other 4 users of the group
+        assert report.sms_sent == 80
+        # one translation per non-source language (es, fr)
+        assert report.translate_calls == 40
+        assert report.latency_p50 <= report.latency_p99
+
+    def test_retries_recover_injected_errors(self):
+        twilio = FakeTwilioClient(FaultInjector(
+            error_rate=0.2,
+            error_factory=twilio_unavailable,
+            seed=1,
+        ))
+        policy = RetryPolicy(max_attempts=5, base_delay=0, max_delay=0)
+        emulator = Emulator(
+            twilio_client=twilio,
+            seed=1,
+            handler_kwargs={"retry_policy": policy},
+        )
+        with emulator:
+            report = emulator.run(10, concurrency=2)
+        assert report.errors == 0
+        assert report.sms_sent == 40
+        assert twilio.faults.failures > 0
+
+    def test_invalid_signature_rejected(self):
+        with Emulator() as emulator:
+            event = emulator.random_event()
+            event["headers"]["x-twilio-signature"] = "forged"
+            assert emulator.handler(event, None)["statusCode"] == 403
+
+    def test_run_outside_context(self):
+        with pytest.raises(RuntimeError):
+            Emulator().run(1)
@@ -8,10 +8,12 @@ from twilio.request_validator import RequestValidator
 
 import pytest
 
-from translatron.text import TranslatronText
+from translatron.text import FOLLOW_UP_EVENT, TranslatronText
 from translatron.record import TextRecord
 from translatron.translator import Translator
 from translatron.actions import ActionBase
+from translatron.phrases import PhraseEntry, PhraseTable
+from translatron.record import MediaItem
 
 
 class MockTranslator(Translator):
@@ -221,6 +223,38 @@ class TestTranslatronText:
 
         assert result is expected_result
 
+    def test_validate_twilio_event_behind_proxy(self):
+        params = {"From": "+1234567890", "Body": "Hello"}
+        url = "https://public.example.com/sms?group=1"
+        signature = RequestValidator("test_token_123").compute_signature(
+            url, params
+        )
+        event = {
+            "headers": {
+                "host": "internal:8000",
+                "x-forwarded-host": "public.example.com",
+                "x-forwarded-proto": "https, http",
+                "x-twilio-signature": signature,
+            },
+            "rawPath": "/sms",
+            "rawQueryString": "group=1",
+        }
+        path = self.translatron.get_request_path(event)
+        assert path == "/sms?group=1"
+
+        list_params = {k: [v] for k, v in params.items()}
+        with patch.object(
+            self.translatron, "get_twilio_auth_token",
+            return_value="test_token_123",
+        ):
+            assert self.translatron.validate_twilio_event(
+                list_params, event["headers"], path
+            )
+            # the signature covers the path
+            assert not self.translatron.validate_twilio_event(
+                list_params, event["headers"]
+            )
+
     def test_validate_twilio_event_missing_signature_header(self):
         params = {"From": "+1234567890", "Body": "Hello"}
         list_params = {k: [v] for k, v in params.items()}
@@ -359,6 +393,56 @@ class TestTranslatronText:
         assert isinstance(original_lang, str)
         assert isinstance(translations, list)
 
+    def test_detect_and_translate_phrase_table_hit(self, tmp_path):
+        path = str(tmp_path / "phrases.bin")
+        PhraseTable.build(
+            [
+                PhraseEntry(
+                    source="es",
+                    translations={"es": "¡Gracias!", "en": "Thanks!"},
+                )
+            ],
+            path,
+        )
+        translator = Mock(wraps=MockTranslator())
+        translatron = TranslatronText(
+            translator=translator,
+            actions=[],
+            languages=self.languages,
+            phrase_table=PhraseTable(path),
+        )
+
+        translations, original_lang = translatron.detect_and_translate(
+            {"text": "gracias", "sender": "+15551234567"}
+        )
+
+        assert original_lang == "es"
+        translation_dict = {t["lang"]: t["text"] for t in translations}
+        assert translation_dict["en"] == "Thanks!"
+        # French isn't in the table, so it goes to the translator
+        assert translation_dict["fr"] == "[fr] gracias"
+        translator.detect_language.assert_not_called()
+        translator.translate.assert_called_once_with(
+            "gracias", "fr", detected_language="es"
+        )
+
+    def test_detect_and_translate_phrase_table_miss(self, tmp_path):
+        path = str(tmp_path / "phrases.bin")
+        PhraseTable.build([], path)
+        translatron = TranslatronText(
+            translator=self.mock_translator,
+            actions=[],
+            languages=self.languages,
+            phrase_table=PhraseTable(path),
+        )
+
+        translations, original_lang = translatron.detect_and_translate(
+            {"text": "Hello world", "sender": "+15551234567"}
+        )
+
+        assert original_lang == "en"
+        assert len(translations) == 2
+
     def test_action_calls_all_actions(self):
         basic_text_record = TextRecord(
             message_id="test-id",
@@ -509,13 +593,17 @@ class TestTranslatronText:
 
             self.translatron(event, {})
 
-            mock_logger.info.assert_any_call(
+            # numbers and content only at DEBUG
+            mock_logger.debug.assert_any_call(
                 "Received SMS from %s", "+15551234567"
             )
-            mock_logger.info.assert_any_call(
+            mock_logger.debug.assert_any_call(
                 "Received SMS to %s", "+15559876543"
             )
-            mock_logger.info.assert_any_call("SMS text: %s", "Test logging")
+            mock_logger.debug.assert_any_call("SMS text: %s", "Test logging")
+            mock_logger.info.assert_any_call(
+                "Message ID: %s", "logging-test-id"
+            )
 
     def test_empty_languages_list(self):
         translatron = TranslatronText(
@@ -590,3 +678,423 @@ class TestTranslatronText:
         assert record.sender == "+1234567890"
         assert record.recipient == "+0987654321"
         assert record.original_text == "Hello world"
+
+
+class TestTranslatronTextMedia:
+    def setup_method(self):
+        self.translator = Mock(wraps=MockTranslator())
+        self.processor = Mock()
+        self.item = MediaItem(
+            url="https://example.com/m0",
+            content_type="image/png",
+            sha256="abc",
+            size=3,
+        )
+        self.processor.return_value = [self.item]
+        self.translatron = TranslatronText(
+            translator=self.translator,
+            actions=[],
+            languages=["en", "es"],
+            media_processor=self.processor,
+        )
+        self.params = {
+            "From": ["+1234567890"],
+            "Body": [""],
+            "NumMedia": ["1"],
+            "MediaUrl0": ["https://example.com/m0"],
+            "MediaContentType0": ["image/png"],
+        }
+
+    def test_media_in_record(self):
+        with (
+            patch.object(
+                self.translatron, "get_twilio_account_sid", return_value="AC1"
+            ),
+            patch.object(
+                self.translatron, "get_twilio_auth_token", return_value="tok"
+            ),
+        ):
+            message = self.translatron.get_message_details(self.params)
+        self.processor.assert_called_once_with(
+            [("https://example.com/m0", "image/png")], auth=("AC1", "tok")
+        )
+        translations, lang = self.translatron.detect_and_translate(message)
+        record = self.translatron.build_record(message, translations, lang)
+        assert record.media == [self.item]
+        # media-only messages are not sent to the translator
+        assert (translations, lang) == ([], "und")
+        self.translator.detect_language.assert_not_called()
+
+    def test_media_ignored_without_processor(self):
+        self.translatron.media_processor = None
+        message = self.translatron.get_message_details(self.params)
+        assert message["media"] == []
+
+
+class TestTranslatronTextRetry:
+    def test_retry_policy_wraps_translator_and_actions(self):
+        from translatron.retry import (
+            RetryingAction,
+            RetryingTranslator,
+            RetryPolicy,
+        )
+
+        action = MockAction()
+        translatron = TranslatronText(
+            translator=MockTranslator(),
+            actions=[action],
+            languages=["en"],
+            retry_policy=RetryPolicy(),
+        )
+        assert isinstance(translatron.translator, RetryingTranslator)
+        (wrapped,) = translatron.actions
+        assert isinstance(wrapped, RetryingAction)
+        assert wrapped.action is action
+
+    def test_deadline_active_during_call(self):
+        from translatron.deadline import current_deadline
+
+        seen = []
+        translatron = TranslatronText(
+            translator=MockTranslator(), actions=[], languages=[]
+        )
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 5000
+
+        def handle(event, context):
+            seen.append(current_deadline())
+            return {}
+
+        with patch.object(translatron, "handle", side_effect=handle):
+            translatron({}, context)
+        assert 0 < seen[0].remaining() <= 4.5
+        assert current_deadline() is None
+
+
+class TestTranslatronTextDeadline:
+    def setup_method(self):
+        from translatron.deadline import DeadlineBudget
+
+        self.clock = Mock(return_value=0.0)
+        self.translator = Mock(wraps=MockTranslator())
+        self.action1 = MockAction()
+        self.action2 = MockAction()
+        self.handoffs = []
+        self.translatron = TranslatronText(
+            translator=self.translator,
+            actions=[self.action1, self.action2],
+            languages=["en", "es", "fr"],
+            required_languages=["es"],
+            budget=DeadlineBudget(actions=1.0, translation=0.5),
+            handoff=lambda record, actions: self.handoffs.append(actions),
+        )
+
+    def deadline(self, seconds):
+        from translatron.deadline import Deadline
+
+        return Deadline(seconds, clock=self.clock)
+
+    def translate_with(self, seconds):
+        from translatron.deadline import activate
+
+        with activate(self.deadline(seconds)):
+            return self.translatron.detect_and_translate({"text": "Hi"})
+
+    def test_all_languages_with_time(self):
+        translations, _ = self.translate_with(10.0)
+        assert [t["lang"] for t in translations] == ["es", "fr"]
+
+    def test_optional_language_skipped_when_short(self):
+        translations, _ = self.translate_with(1.2)
+        # es is required; fr is skipped to leave time for the actions
+        assert [t["lang"] for t in translations] == ["es"]
+
+    def test_first_language_required_by_default(self):
+        from translatron.deadline import activate
+
+        translatron = TranslatronText(
+            translator=MockTranslator(), actions=[], languages=["es", "fr"]
+        )
+        assert translatron.required_languages == ["es"]
+        with activate(self.deadline(0.0)):
+            translations, _ = translatron.detect_and_translate({"text": "Hi"})
+        assert [t["lang"] for t in translations] == ["es"]
+
+    def test_detection_runs_against_stage_deadline(self):
+        from translatron.deadline import activate, current_deadline
+
+        seen = []
+
+        def detect_language(text):
+            seen.append(current_deadline().remaining())
+            return "en"
+
+        self.translator.detect_language.side_effect = detect_language
+        with activate(self.deadline(5.0)):
+            self.translatron.detect_and_translate({"text": "Hi"})
+        assert seen == [4.0]
+
+    def test_translation_runs_against_stage_deadline(self):
+        from translatron.deadline import activate, current_deadline
+
+        seen = []
+
+        def translate(text, target, detected_language=None):
+            seen.append(current_deadline().remaining())
+            return text
+
+        self.translator.translate.side_effect = translate
+        with activate(self.deadline(5.0)):
+            self.translatron.detect_and_translate({"text": "Hi"})
+        assert seen == [4.0, 4.0]
+
+    def test_actions_run_with_time(self, basic_text_record):
+        from translatron.deadline import activate
+
+        with activate(self.deadline(5.0)):
+            self.translatron.action(basic_text_record)
+        assert self.action1.called_with == [basic_text_record]
+        assert self.action2.called_with == [basic_text_record]
+        assert self.handoffs == []
+
+    def test_actions_handed_off_when_short(self, basic_text_record):
+        from translatron.deadline import activate
+
+        with activate(self.deadline(0.5)):
+            self.translatron.action(basic_text_record)
+        assert self.action1.called_with == []
+        assert self.handoffs == [[self.action1, self.action2]]
+
+    def test_no_handoff_configured_runs_actions(self, basic_text_record):
+        from translatron.deadline import activate
+
+        self.translatron.handoff = None
+        with activate(self.deadline(0.0)):
+            self.translatron.action(basic_text_record)
+        assert self.action1.called_with == [basic_text_record]
+
+
+class TestTranslatronTextTiers:
+    def setup_method(self):
+        from translatron.tiers import LanguageTiers, LoadMonitor
+
+        self.monitor = LoadMonitor(latency_threshold=1.0, min_samples=1)
+        self.translator = Mock(wraps=MockTranslator())
+        self.action = MockAction()
+        self.translatron = TranslatronText(
+            translator=self.translator,
+            actions=[self.action],
+            languages=["en", "es", "fr"],
+            tiers=LanguageTiers(
+                {"en": 1, "es": 1, "fr": 2}, monitor=self.monitor
+            ),
+        )
+        self.message = {
+            "message_id": "m1",
+            "conversation_id": "c1",
+            "sender": "+1",
+            "recipient": "+2",
+            "text": "Hello",
+            "timestamp": "t",
+        }
+
+    def test_deferred_language_not_translated(self):
+        translations, _ = self.translatron.detect_and_translate(self.message)
+        assert [t["lang"] for t in translations] == ["es"]
+        assert self.message["deferred_languages"] == ["fr"]
+        record = self.translatron.build_record(self.message, translations, "en")
+        assert record.deferred_languages == ["fr"]
+        assert not record.is_follow_up
+
+    def test_follow_up(self):
+        translations, _ = self.translatron.detect_and_translate(self.message)
+        record = self.translatron.build_record(self.message, translations, "en")
+        self.translatron.action(record)
+        self.translatron.follow_up(record)
+
+        first, follow_up = self.action.called_with
+        assert first is record
+        assert follow_up.is_follow_up
+        assert follow_up.deferred_languages == ["fr"]
+        assert [t["lang"] for t in follow_up.translations] == ["es", "fr"]
+
+    def test_follow_up_on_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        translations, _ = self.translatron.detect_and_translate(self.message)
+        record = self.translatron.build_record(self.message, translations, "en")
+        with ThreadPoolExecutor(1) as executor:
+            self.translatron.follow_up_executor = executor
+            self.translatron.follow_up(record)
+        (follow_up,) = self.action.called_with
+        assert follow_up.is_follow_up
+
+    def test_follow_up_skips_stores(self):
+        store = MockAction()
+        store.delivers_follow_ups = False
+        self.translatron.actions.append(store)
+        translations, _ = self.translatron.detect_and_translate(self.message)
+        record = self.translatron.build_record(self.message, translations, "en")
+        self.translatron.follow_up(record)
+
+        (follow_up,) = self.action.called_with
+        assert follow_up.is_follow_up
+        assert store.called_with == []
+
+    def test_follow_up_dispatch(self):
+        dispatched = []
+        self.translatron.follow_up_dispatch = dispatched.append
+        translations, _ = self.translatron.detect_and_translate(self.message)
+        record = self.translatron.build_record(self.message, translations, "en")
+        self.translatron.follow_up(record)
+        assert dispatched == [record]
+        assert self.action.called_with == []
+
+        # the dispatched event translates and delivers the follow-up
+        response = self.translatron(
+            {FOLLOW_UP_EVENT: record.model_dump(mode="json")}, None
+        )
+        assert response["statusCode"] == 200
+        (follow_up,) = self.action.called_with
+        assert follow_up.is_follow_up
+        assert [t["lang"] for t in follow_up.translations] == ["es", "fr"]
+
+    def test_follow_up_without_time_sends_original(self):
+        from translatron.deadline import Deadline, activate
+
+        self.message["deferred_languages"] = ["fr"]
+        record = self.translatron.build_record(self.message, [], "en")
+        with activate(Deadline(0.1, clock=Mock(return_value=0.0))):
+            follow_up = self.translatron.translate_deferred(record)
+        self.translator.translate.assert_not_called()
+        assert follow_up.translations == []
+        assert follow_up.deferred_languages == ["fr"]
+
+    def test_no_follow_up_without_deferred(self, basic_text_record):
+        self.translatron.follow_up(basic_text_record)
+        assert self.action.called_with == []
+
+    def test_follow_up_failure_is_logged(self):
+        self.message["deferred_languages"] = ["fr"]
+        record = self.translatron.build_record(self.message, [], "en")
+        self.translator.translate.side_effect = RuntimeError("down")
+        with patch("translatron.text.logger") as mock_logger:
+            self.translatron.follow_up(record)
+        mock_logger.exception.assert_called_once()
+
+    def test_demotion_under_load(self):
+        self.monitor.record(5.0)  # slow translations seen recently
+        self.translatron.detect_and_translate(self.message)
+        assert self.message["deferred_languages"] == ["es", "fr"]
+
+    def test_translate_reports_to_monitor(self):
+        self.translatron.translate("Hello", "es", "en")
+        assert len(self.monitor._latencies) == 1
+
+    def test_short_deadline_defers_optional_language(self):
+        from translatron.deadline import Deadline, activate
+
+        self.translatron.required_languages = ["es"]
+        self.translatron.tiers.tiers["fr"] = 1
+        with activate(Deadline(0.1, clock=Mock(return_value=0.0))):
+            translations, _ = self.translatron.detect_and_translate(
+                self.message
+            )
+        assert [t["lang"] for t in translations] == ["es"]
+        assert self.message["deferred_languages"] == ["fr"]
+
+
+class TestTranslatronTextLogging:
+    def setup_method(self):
+        from translatron.logs import LogConfig
+
+        self.action = MockAction()
+        self.translatron = TranslatronText(
+            translator=MockTranslator(),
+            actions=[self.action],
+            languages=["en", "es"],
+            log_config=LogConfig(sample_rate=1.0),
+        )
+        self.event = {
+            "body": urlencode({
+                "From": "+15551234567", "To": "+15559876543", "Body": "Hi"
+            }),
+            "headers": {"host": "example.com", "x-twilio-signature": "sig"},
+        }
+
+    def handle(self, caplog, valid=True):
+        context = Mock(aws_request_id="req-1")
+        with (
+            patch.object(
+                self.translatron, "validate_twilio_event", return_value=valid
+            ),
+            caplog.at_level("INFO", logger="translatron.messages"),
+        ):
+            response = self.translatron.handle(self.event, context)
+        (line,) = [
+            r for r in caplog.records if r.name == "translatron.messages"
+        ]
+        return response, line.fields
+
+    def test_one_redacted_line_per_message(self, caplog):
+        response, fields = self.handle(caplog)
+        assert response["statusCode"] == 200
+        assert fields["status"] == 200
+        assert fields["request_id"] == "req-1"
+        assert fields["sender"] == "+*******4567"
+        assert fields["translations"] == 1
+        assert set(fields["timings_ms"]) == {
+            "validate", "message", "translate", "action", "follow_up"
+        }
+        # sampled record, with content redacted
+        assert fields["record"]["original_text"] == "<2 chars>"
+        assert "Hi" not in str(fields)
+
+    def test_no_content_at_info(self, caplog):
+        self.translatron.log_config = None
+        with (
+            patch.object(
+                self.translatron, "validate_twilio_event", return_value=True
+            ),
+            caplog.at_level("INFO", logger="translatron"),
+        ):
+            self.translatron.handle(self.event, None)
+        assert caplog.records
+        assert "Hi" not in caplog.text
+        assert "+15551234567" not in caplog.text
+
+    def test_usage_in_line(self, caplog):
+        from translatron.usage import record_sms
+
+        self.translatron.actions = [lambda record: record_sms(2)]
+        _, fields = self.handle(caplog)
+        assert fields["usage"] == {"sms_messages": 1, "sms_segments": 2}
+
+    def test_invalid_signature_logged(self, caplog):
+        response, fields = self.handle(caplog, valid=False)
+        assert response["statusCode"] == 403
+        assert fields["status"] == 403
+        assert "message_id" not in fields
+
+    def test_error_logged(self, caplog):
+        self.translatron.actions = [Mock(side_effect=RuntimeError("down"))]
+        with pytest.raises(RuntimeError):
+            self.handle(caplog)
+        (line,) = [
+            r for r in caplog.records if r.name == "translatron.messages"
+        ]
+        assert line.fields["status"] == "error"
+        assert "message_id" in line.fields
+
+    def test_no_line_without_config(self, caplog):
+        self.translatron.log_config = None
+        with (
+            patch.object(
+                self.translatron, "validate_twilio_event", return_value=True
+            ),
+            caplog.at_level("INFO", logger="translatron.messages"),
+        ):
+            self.translatron.handle(self.event, None)
+        assert not [
+            r for r in caplog.records if r.name == "translatron.messages"
+        ]
@@ -0,0 +1,57 @@
+from translatron.tiers import LanguageTiers, LoadMonitor
+
+
+class TestLoadMonitor:
+    def test_needs_min_samples(self):
+        monitor = LoadMonitor(latency_threshold=1.0, min_samples=5)
+        for _ in range(4):
+            monitor.record(10.0)
+        assert not monitor.degraded
+        monitor.record(10.0)
+        assert monitor.degraded
+
+    def test_degrades_on_throttling(self):
+        monitor = LoadMonitor(throttle_threshold=0.1, min_samples=10)
+        for n in range(10):
+            monitor.record(0.1, throttled=(n < 2))
+        assert monitor.degraded
+
+    def test_recovers_with_hysteresis(self):
+        monitor = LoadMonitor(
+            latency_threshold=1.0, window=10, min_samples=10, quantile=0.5
+        )
+        for _ in range(10):
+            monitor.record(2.0)
+        assert monitor.degraded
+        # below the threshold, but not below threshold * recovery_factor
+        for _ in range(10):
+            monitor.record(0.8)
+        assert monitor.degraded
+        for _ in range(10):
+            monitor.record(0.2)
+        assert not monitor.degraded
+
+
+class TestLanguageTiers:
+    def test_is_deferred(self):
+        tiers = LanguageTiers({"en": 1, "es": 1, "fa": 2})
+        assert [
+            lang for lang in ["en", "fa", "es", "fr"]
+            if tiers.is_deferred(lang)
+        ] == ["fa", "fr"]
+
+    def test_default_tier(self):
+        tiers = LanguageTiers({"en": 2}, default_tier=1)
+        assert tiers.is_deferred("en")
+        assert not tiers.is_deferred("fr")
+
+    def test_demotion_under_load(self):
+        monitor = LoadMonitor(latency_threshold=1.0, min_samples=1)
+        tiers = LanguageTiers(
+            {"en": 1, "es": 1}, monitor=monitor, pinned=["es"]
+        )
+        assert tiers.tier("en") == 1
+        monitor.record(5.0)
+        assert tiers.tier("en") == 2
+        assert tiers.tier("es") == 1
+        assert tiers.is_deferred("en") and not tiers.is_deferred("es")
@@ -0,0 +1,117 @@
+import io
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from translatron.deadline import Deadline, DeadlineExceededError, activate
+from translatron.transcribe import (
+    AmazonTranscriber,
+    FakeTranscriber,
+    Transcript,
+)
+
+
+class TestFakeTranscriber:
+    def test_consumes_chunks(self):
+        transcriber = FakeTranscriber("Hello world", lang="en")
+        result = transcriber.transcribe(
+            iter([b"abc", b"defg"]), "audio/wav"
+        )
+        assert result == Transcript(text="Hello world", lang="en")
+        assert transcriber.bytes_received == 7
+        assert transcriber.chunks_received == 2
+        assert transcriber.content_type == "audio/wav"
+
+
+class TestAmazonTranscriber:
+    def setup_method(self):
+        with patch("boto3.client") as mock_boto_client:
+            self.mock_s3 = Mock()
+            self.mock_transcribe = Mock()
+            mock_boto_client.side_effect = lambda name: {
+                "s3": self.mock_s3,
+                "transcribe": self.mock_transcribe,
+            }[name]
+            self.transcriber = AmazonTranscriber(
+                "voicemail-bucket", poll_interval=0
+            )
+
+        self.mock_s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        self.mock_s3.upload_part.return_value = {"ETag": "etag1"}
+        self.mock_s3.get_object.return_value = {
+            "Body": io.BytesIO(
+                json.dumps(
+                    {"results": {"transcripts": [{"transcript": "Hola"}]}}
+                ).encode()
+            )
+        }
+
+    def test_transcribe(self):
+        self.mock_transcribe.get_transcription_job.side_effect = [
+            {"TranscriptionJob": {"TranscriptionJobStatus": "IN_PROGRESS"}},
+            {
+                "TranscriptionJob": {
+                    "TranscriptionJobStatus": "COMPLETED",
+                    "LanguageCode": "es-US",
+                }
+            },
+        ]
+
+        result = self.transcriber.transcribe(
+            iter([b"RIFF", b"data"]), "audio/wav"
+        )
+
+        assert result == Transcript(text="Hola", lang="es")
+        create_kwargs = self.mock_s3.create_multipart_upload.call_args[1]
+        key = create_kwargs["Key"]
+        assert create_kwargs["Bucket"] == "voicemail-bucket"
+        assert create_kwargs["ContentType"] == "audio/wav"
+        assert key.startswith("recordings/") and key.endswith(".wav")
+        part_kwargs = self.mock_s3.upload_part.call_args[1]
+        assert part_kwargs["Body"] == b"RIFFdata"
+        self.mock_s3.complete_multipart_upload.assert_called_once()
+
+        job_kwargs = self.mock_transcribe.start_transcription_job.call_args[1]
+        assert job_kwargs["IdentifyLanguage"] is True
+        assert job_kwargs["MediaFormat"] == "wav"
+        assert job_kwargs["Media"]["MediaFileUri"] == f"s3://voicemail-bucket/{key}"
+
+    def test_transcribe_with_language_code(self):
+        self.transcriber.language_code = "fa-IR"
+        self.mock_transcribe.get_transcription_job.return_value = {
+            "TranscriptionJob": {
+                "TranscriptionJobStatus": "COMPLETED",
+                "LanguageCode": "fa-IR",
+            }
+        }
+        result = self.transcriber.transcribe(iter([b"x"]), "audio/mpeg")
+        job_kwargs = self.mock_transcribe.start_transcription_job.call_args[1]
+        assert job_kwargs["LanguageCode"] == "fa-IR"
+        assert "IdentifyLanguage" not in job_kwargs
+        assert job_kwargs["MediaFormat"] == "mp3"
+        assert result.lang == "fa"
+
+    def test_transcribe_failed_job(self):
+        self.mock_transcribe.get_transcription_job.return_value = {
+            "TranscriptionJob": {
+                "TranscriptionJobStatus": "FAILED",
+                "FailureReason": "bad audio",
+            }
+        }
+        with pytest.raises(RuntimeError, match="bad audio"):
+            self.transcriber.transcribe(iter([b"x"]), "audio/wav")
+
+    def test_wait_respects_deadline(self):
+        self.mock_transcribe.get_transcription_job.return_value = {
+            "TranscriptionJob": {"TranscriptionJobStatus": "IN_PROGRESS"}
+        }
+        with activate(Deadline.from_timeout(0.0)):
+            with pytest.raises(DeadlineExceededError):
+                self.transcriber.transcribe(iter([b"x"]), "audio/wav")
+
+    def test_rejects_headerless_pcm(self):
+        with pytest.raises(ValueError, match="audio/pcm"):
+            self.transcriber.transcribe(iter([b"\x00\x01"]), "audio/pcm")
+        self.mock_s3.create_multipart_upload.assert_not_called()
+        self.mock_transcribe.start_transcription_job.assert_not_called()
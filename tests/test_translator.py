@@ -1,6 +1,11 @@
 import pytest
 from unittest.mock import Mock, patch
-from translatron.translator import NonTranslator, AmazonTranslator
+from translatron.translator import (
+    NonTranslator,
+    AmazonTranslator,
+    LocalTranslator,
+)
+from translatron.phrases import PhraseEntry, PhraseTable
 
 # Check if Google Cloud libraries are available
 try:
@@ -41,7 +46,8 @@ class TestAmazonTranslator:
             self.mock_translate_client = Mock()
             self.mock_comprehend_client = Mock()
 
-            def client_side_effect(service_name):
+            def client_side_effect(service_name, config=None):
+                self.client_config = config
                 if service_name == 'translate':
                     return self.mock_translate_client
                 elif service_name == 'comprehend':
@@ -51,6 +57,10 @@ class TestAmazonTranslator:
             mock_boto_client.side_effect = client_side_effect
             self.translator = AmazonTranslator()
 
+    def test_client_timeouts(self):
+        assert self.client_config.read_timeout == 5.0
+        assert self.client_config.connect_timeout == 2.0
+
     def test_detect_language(self):
         # Mock the comprehend response
         mock_response = {
@@ -268,6 +278,19 @@ class TestGoogleTranslator:
         with pytest.raises(Exception, match="Google API Error"):
             self.translator.detect_language("Hello")
 
+    def test_translate_batch(self):
+        self.mock_client.translate.return_value = [
+            {'translatedText': 'Hola'},
+            {'translatedText': 'Adiós'},
+        ]
+        result = self.translator.translate_batch(
+            ["Hello", "Goodbye"], "es", detected_language="en"
+        )
+        assert result == ["Hola", "Adiós"]
+        self.mock_client.translate.assert_called_once_with(
+            ["Hello", "Goodbye"], target_language="es", source_language="en"
+        )
+
     def test_initialization_with_credentials_path(self):
         # Test that credentials_path parameter doesn't break initialization
         with patch('google.cloud.translate_v2.Client') as mock_client_class:
@@ -285,6 +308,61 @@ class TestGoogleTranslator:
             assert translator.client is not None
 
 
+class TestLocalTranslator:
+    @pytest.fixture
+    def table_path(self, tmp_path):
+        path = str(tmp_path / "phrases.bin")
+        PhraseTable.build(
+            [
+                PhraseEntry(
+                    source="en",
+                    translations={"en": "Thanks!", "es": "¡Gracias!"},
+                ),
+            ],
+            path,
+        )
+        return path
+
+    def test_detect_language(self, table_path):
+        translator = LocalTranslator(table_path)
+        assert translator.detect_language("thanks") == "en"
+        assert translator.detect_language("Gracias") == "es"
+
+    def test_detect_language_unknown(self, table_path):
+        translator = LocalTranslator(table_path, default_language="fr")
+        assert translator.detect_language("Bonjour") == "fr"
+
+    def test_translate(self, table_path):
+        translator = LocalTranslator(table_path)
+        assert translator.translate("Thanks", "es") == "¡Gracias!"
+        assert translator.translate(
+            "gracias", "en", detected_language="es"
+        ) == "Thanks!"
+        assert translator.translate(
+            "Thanks", "es", detected_language="auto"
+        ) == "¡Gracias!"
+
+    def test_translate_unknown_returns_text(self, table_path):
+        translator = LocalTranslator(table_path)
+        assert translator.translate("Hello there", "es") == "Hello there"
+        assert translator.translate("Thanks", "de") == "Thanks"
+
+    def test_fallback(self, table_path):
+        fallback = Mock()
+        fallback.detect_language.return_value = "de"
+        fallback.translate.return_value = "Hallo"
+        translator = LocalTranslator(table_path, fallback=fallback)
+
+        assert translator.detect_language("Hallo") == "de"
+        assert translator.translate(
+            "Hello", "de", detected_language="en"
+        ) == "Hallo"
+        fallback.translate.assert_called_once_with(
+            "Hello", "de", detected_language="en"
+        )
+        assert translator.translate("Thanks", "es") == "¡Gracias!"
+
+
 # Integration-style tests that verify the interface compliance
 class TestTranslatorInterface:
     """Test that all translators implement the required interface correctly."""
@@ -309,6 +387,12 @@ class TestTranslatorInterface:
             result = translator.translate("Hello", "es")
             assert isinstance(result, str)
 
+    def test_translate_batch_interface(self, translator):
+        """Test that the default translate_batch translates each text."""
+        if isinstance(translator, NonTranslator):
+            result = translator.translate_batch(["Hello", "Bye"], "es")
+            assert result == ["Hello", "Bye"]
+
     def test_translate_with_detected_language_interface(self, translator):
         """Test that translate with detected_language parameter returns a string."""
         if isinstance(translator, NonTranslator):
@@ -0,0 +1,282 @@
+import json
+import threading
+from unittest.mock import Mock, patch
+from urllib.parse import urlencode
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from translatron.actions import SendTranslatedSMS, StoreToDynamoDB
+from translatron.storage import RecordEncoder, decode_item
+from translatron.testing import FakeTranslator, FakeTwilioClient
+from translatron.text import TranslatronText
+from translatron.translator import AmazonTranslator
+from translatron.usage import (
+    Usage,
+    UsageAccumulator,
+    UsageMetrics,
+    activate_usage,
+    current_usage,
+    record_detection,
+    record_dynamodb_write,
+    record_sms,
+    record_translation,
+    record_voice_call,
+)
+
+
+class TestUsageAccumulator:
+    def test_records_usage(self):
+        with activate_usage() as accumulator:
+            assert current_usage() is accumulator
+            record_detection("amazon", 11)
+            record_translation("amazon", "es", 11)
+            record_translation("amazon", "es", 5)
+            record_translation("google", "fr", 11)
+            record_sms(2, messages=1)
+            record_sms(1)
+            record_voice_call()
+            record_dynamodb_write()
+        assert current_usage() is None
+
+        usage = accumulator.snapshot()
+        assert usage.detect_calls == {"amazon": 1}
+        assert usage.detect_characters == {"amazon": 11}
+        assert usage.translated_characters == {
+            "amazon": {"es": 16}, "google": {"fr": 11}
+        }
+        assert usage.total_translated_characters == 27
+        assert usage.sms_segments == 3
+        assert usage.sms_messages == 2
+        assert usage.voice_calls == 1
+        assert usage.dynamodb_writes == 1
+
+    def test_no_op_without_accumulator(self):
+        record_translation("amazon", "es", 11)
+        record_sms(1)
+        assert current_usage() is None
+
+    def test_snapshot_is_a_copy(self):
+        accumulator = UsageAccumulator()
+        accumulator.add_translation("amazon", "es", 1)
+        snapshot = accumulator.snapshot()
+        accumulator.add_translation("amazon", "es", 1)
+        assert snapshot.translated_characters == {"amazon": {"es": 1}}
+
+    def test_thread_safe(self):
+        accumulator = UsageAccumulator()
+
+        def work():
+            for _ in range(1000):
+                accumulator.add_sms(1)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert accumulator.snapshot().sms_segments == 4000
+
+
+class TestUsageMetrics:
+    def usage(self):
+        return Usage(
+            detect_calls={"amazon": 1},
+            detect_characters={"amazon": 5},
+            translated_characters={"amazon": {"es": 5, "fr": 5}},
+            sms_messages=2,
+            sms_segments=3,
+            dynamodb_writes=1,
+        )
+
+    def test_emf_documents(self):
+        lines = []
+        metrics = UsageMetrics(sink=lines.append)
+        metrics.add(self.usage(), number="+15551234567")
+
+        documents = [json.loads(line) for line in lines]
+        assert len(documents) == 3
+        group = documents[0]
+        [directive] = group["_aws"]["CloudWatchMetrics"]
+        assert directive["Namespace"] == "Translatron"
+        assert directive["Dimensions"] == [["Number"]]
+        assert {m["Name"] for m in directive["Metrics"]} <= set(group)
+        assert group["Number"] == "+15551234567"
+        assert group["Messages"] == 1
+        assert group["TranslatedCharacters"] == 10
+        assert group["SmsSegments"] == 3
+        assert group["DetectCalls"] == 1
+
+        spanish = documents[1]
+        assert spanish["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [
+            ["Number", "Provider", "Language"], ["Provider", "Language"]
+        ]
+        assert (spanish["Provider"], spanish["Language"]) == ("amazon", "es")
+        assert spanish["TranslatedCharacters"] == 5
+
+    def test_aggregates_over_interval(self):
+        lines = []
+        now = [0.0]
+        metrics = UsageMetrics(
+            flush_interval=60, sink=lines.append, clock=lambda: now[0]
+        )
+        metrics.add(self.usage(), number="a")
+        metrics.add(self.usage(), number="a")
+        metrics.add(self.usage(), number="b")
+        assert lines == []
+
+        now[0] = 61.0
+        metrics.add(self.usage(), number="a")
+        groups = {
+            d["Number"]: d for d in map(json.loads, lines)
+            if "Provider" not in d
+        }
+        assert groups["a"]["Messages"] == 3
+        assert groups["a"]["SmsSegments"] == 9
+        assert groups["b"]["Messages"] == 1
+
+        lines.clear()
+        metrics.flush()
+        assert lines == []
+
+    def test_gauges(self):
+        metrics = UsageMetrics(sink=lambda line: None)
+        metrics.add(self.usage(), number="a")
+        metrics.add(self.usage(), number="b")
+        gauges = {name: get() for name, get in metrics.gauges().items()}
+        assert gauges["usage_messages_total"] == 2
+        assert gauges["usage_translated_characters_total"] == 20
+        assert gauges["usage_sms_segments_total"] == 6
+
+
+class TestProviderReporting:
+    def test_amazon_translator(self):
+        translator = AmazonTranslator.__new__(AmazonTranslator)
+        translator.comprehend_client = Mock(**{
+            "detect_dominant_language.return_value": {
+                "Languages": [{"LanguageCode": "en"}]
+            }
+        })
+        translator.translate_client = Mock(**{
+            "translate_text.return_value": {"TranslatedText": "Hola"}
+        })
+        with activate_usage() as accumulator:
+            translator.detect_language("Hello")
+            translator.translate("Hello", "es", "en")
+        usage = accumulator.snapshot()
+        assert usage.detect_calls == {"amazon": 1}
+        assert usage.translated_characters == {"amazon": {"es": 5}}
+
+    def test_failed_call_not_counted(self):
+        translator = AmazonTranslator.__new__(AmazonTranslator)
+        translator.translate_client = Mock(**{
+            "translate_text.side_effect": RuntimeError("throttled")
+        })
+        with activate_usage() as accumulator:
+            with pytest.raises(RuntimeError):
+                translator.translate("Hello", "es", "en")
+        assert accumulator.snapshot().translated_characters == {}
+
+
+@mock_aws
+class TestHandlerUsage:
+    def setup_method(self, method):
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        self.table = dynamodb.create_table(
+            TableName="messages",
+            KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "message_id", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self.user_info = {
+            "+15551234567": {
+                "+15559876543": {"name": "Alice", "lang": "en"},
+                "+15559876544": {"name": "Bob", "lang": "es"},
+                "+15559876545": {"name": "Charlie", "lang": "fr"},
+            }
+        }
+        self.lines = []
+        self.twilio = FakeTwilioClient()
+
+    def handler(self, **store_kwargs):
+        return TranslatronText(
+            translator=FakeTranslator(),
+            actions=[
+                SendTranslatedSMS(self.user_info, self.twilio),
+                StoreToDynamoDB(
+                    "messages", store_usage=True, **store_kwargs
+                ),
+            ],
+            languages=["en", "es", "fr"],
+            usage_metrics=UsageMetrics(sink=self.lines.append),
+        )
+
+    def handle(self, handler, body="Hello"):
+        event = {
+            "body": urlencode({
+                "From": "+15559876543", "To": "+15551234567", "Body": body,
+            }),
+            "headers": {"host": "example.com", "x-twilio-signature": "sig"},
+        }
+        with patch.object(handler, "validate_twilio_event",
+                          return_value=True):
+            return handler.handle(event, None)
+
+    def test_usage_stored_and_emitted(self):
+        handler = self.handler()
+        assert self.handle(handler)["statusCode"] == 200
+
+        [item] = self.table.scan()["Items"]
+        usage = decode_item(item).usage
+        assert usage.detect_calls == {"fake": 1}
+        assert usage.translated_characters == {
+            "fake": {"es": 5, "fr": 5}
+        }
+        assert usage.sms_messages == 2
+        assert usage.sms_segments == 2
+        assert usage.dynamodb_writes == 1
+
+        group = json.loads(self.lines[0])
+        assert group["Number"] == "+15551234567"
+        assert group["TranslatedCharacters"] == 10
+        assert group["SmsSegments"] == 2
+        assert group["DynamoDBWrites"] == 1
+        assert handler.usage_metrics.messages == 1
+
+    def test_encoded_record_usage(self):
+        handler = self.handler(encoder=RecordEncoder())
+        self.handle(handler)
+        [item] = self.table.scan()["Items"]
+        assert "usage" not in item
+        assert decode_item(item).usage.sms_segments == 2
+
+    def test_usage_per_message(self):
+        handler = self.handler()
+        self.handle(handler, "Hello")
+        self.handle(handler, "Hi")
+        usages = sorted(
+            decode_item(item).usage.total_translated_characters
+            for item in self.table.scan()["Items"]
+        )
+        assert usages == [4, 10]
+
+    def test_no_usage_stored_by_default(self, basic_text_record):
+        StoreToDynamoDB("messages")(basic_text_record)
+        [item] = self.table.scan()["Items"]
+        assert "usage" not in item
+        assert decode_item(item).usage is None
+
+    def test_failed_write_not_counted(self, basic_text_record):
+        action = StoreToDynamoDB("messages", store_usage=True)
+        action.table = Mock()
+        action.table.put_item.side_effect = RuntimeError("throttled")
+        with activate_usage() as usage:
+            with pytest.raises(RuntimeError):
+                action(basic_text_record)
+        assert usage.snapshot().dynamodb_writes == 0
+        # the stored usage would have included the write
+        (item,) = [c.kwargs["Item"] for c in action.table.put_item.mock_calls]
+        assert item["usage"]["dynamodb_writes"] == 1
@@ -0,0 +1,248 @@
+import io
+import struct
+import urllib.error
+from unittest.mock import Mock, patch
+
+import pytest
+
+from translatron.actions import ActionBase
+from translatron.record import TextRecord
+from translatron.streaming import WavToPcmTranscoder
+from translatron.test_events import create_twilio_test_event
+from translatron.transcribe import FakeTranscriber
+from translatron.translator import Translator
+from translatron.voice import RECORDING_EVENT, TranslatronVoice, fetch_recording
+
+AUTH_TOKEN = "test_token_123"
+RECORDING_URL = "https://api.twilio.com/2010-04-01/Accounts/AC1/Recordings/RE1"
+
+
+class MockTranslator(Translator):
+    def detect_language(self, text: str) -> str:
+        return "en"
+
+    def translate(self, text, target_language, detected_language=None):
+        return f"[{target_language}] {text}"
+
+
+class MockAction(ActionBase):
+    def __init__(self):
+        self.called_with = []
+
+    def __call__(self, record: TextRecord) -> None:
+        self.called_with.append(record)
+
+
+def make_wav(samples, sample_rate=8000):
+    fmt = struct.pack("<HHIIHH", 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    body = (
+        b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", len(samples)) + samples
+    )
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def http_404():
+    return urllib.error.HTTPError(RECORDING_URL, 404, "Not Found", {}, None)
+
+
+class TestFetchRecording:
+    def test_streams_chunks(self):
+        with patch(
+            "translatron.voice.open_url",
+            return_value=io.BytesIO(b"x" * 10),
+        ) as mock_open:
+            # chunks are views into reused buffers; copy them to keep them
+            chunks = [
+                bytes(chunk)
+                for chunk in fetch_recording(
+                    RECORDING_URL, auth=("AC1", "tok"), chunk_size=4
+                )
+            ]
+
+        assert chunks == [b"xxxx", b"xxxx", b"xx"]
+        # credentials are scoped to the recording's host by open_url
+        assert mock_open.call_args[1]["auth"] == ("AC1", "tok")
+
+    def test_retries_404(self):
+        with (
+            patch(
+                "translatron.voice.open_url",
+                side_effect=[http_404(), io.BytesIO(b"data")],
+            ),
+            patch("translatron.voice.time.sleep") as mock_sleep,
+        ):
+            chunks = [bytes(c) for c in fetch_recording(RECORDING_URL)]
+        assert chunks == [b"data"]
+        mock_sleep.assert_called_once()
+
+    def test_gives_up_after_retries(self):
+        with (
+            patch(
+                "translatron.voice.open_url",
+                side_effect=http_404(),
+            ),
+            patch("translatron.voice.time.sleep"),
+        ):
+            with pytest.raises(urllib.error.HTTPError):
+                list(fetch_recording(RECORDING_URL, retries=2))
+
+
+class TestTranslatronVoice:
+    def setup_method(self):
+        self.action = MockAction()
+        self.transcriber = FakeTranscriber("Call me back")
+        self.voice = TranslatronVoice(
+            translator=MockTranslator(),
+            actions=[self.action],
+            languages=["en", "es"],
+            transcriber=self.transcriber,
+            chunk_size=4,
+        )
+
+    def make_event(self, params, auth_token=AUTH_TOKEN):
+        return create_twilio_test_event(
+            url="https://example.com/",
+            param_dict=params,
+            auth_token=auth_token,
+        )
+
+    def call(self, event, recording=b"RIFF0123456789"):
+        with (
+            patch.object(
+                self.voice, "get_twilio_auth_token", return_value=AUTH_TOKEN
+            ),
+            patch(
+                "translatron.voice.open_url",
+                return_value=io.BytesIO(recording),
+            ) as mock_open,
+        ):
+            response = self.voice(event, {})
+        return response, mock_open
+
+    def test_incoming_call_prompts_for_recording(self):
+        event = self.make_event({"From": "+15551234567", "To": "+15559876543"})
+        response, mock_urlopen = self.call(event)
+
+        assert response["statusCode"] == 200
+        prompt = "<Say>Please leave a message after the tone.</Say>"
+        assert prompt in response["body"]
+        assert "<Record" in response["body"]
+        mock_urlopen.assert_not_called()
+        assert self.action.called_with == []
+
+    def test_recording_callback_runs_pipeline(self):
+        event = self.make_event({
+            "From": "+15551234567",
+            "To": "+15559876543",
+            "RecordingUrl": RECORDING_URL,
+        })
+        response, mock_urlopen = self.call(event)
+
+        assert response["body"] == "<Response><Hangup/></Response>"
+        assert mock_urlopen.call_args[0][0] == RECORDING_URL + ".wav"
+        # streamed in chunk_size pieces
+        assert self.transcriber.chunks_received == 4
+        assert self.transcriber.bytes_received == 14
+        assert self.transcriber.content_type == "audio/wav"
+
+        (record,) = self.action.called_with
+        assert record.sender == "+15551234567"
+        assert record.recipient == "+15559876543"
+        assert record.original_text == "Call me back"
+        assert record.translations == [
+            {"lang": "es", "text": "[es] Call me back"}
+        ]
+
+    def test_empty_transcription_skips_actions(self):
+        self.transcriber.text = "  "
+        event = self.make_event({
+            "From": "+15551234567",
+            "RecordingUrl": RECORDING_URL,
+        })
+        response, _ = self.call(event)
+        assert response["statusCode"] == 200
+        assert self.action.called_with == []
+
+    def test_invalid_signature(self):
+        event = self.make_event(
+            {"From": "+15551234567", "RecordingUrl": RECORDING_URL},
+            auth_token="wrong_token",
+        )
+        response, mock_urlopen = self.call(event)
+        assert response["statusCode"] == 403
+        mock_urlopen.assert_not_called()
+
+    def test_mp3_recording_format(self):
+        self.voice.recording_format = "mp3"
+        url = self.voice.get_recording_url({"RecordingUrl": [RECORDING_URL]})
+        assert url == RECORDING_URL + ".mp3"
+        with patch.object(
+            self.voice, "fetch_recording", return_value=iter([b"ID3"])
+        ):
+            self.voice.transcribe({"RecordingUrl": [RECORDING_URL]})
+        assert self.transcriber.content_type == "audio/mpeg"
+
+    def test_fetch_uses_account_credentials(self):
+        with (
+            patch.object(
+                self.voice, "get_twilio_account_sid", return_value="AC1"
+            ),
+            patch.object(
+                self.voice, "get_twilio_auth_token", return_value="tok"
+            ),
+            patch("translatron.voice.fetch_recording") as mock_fetch,
+        ):
+            mock_fetch.return_value = Mock()
+            self.voice.fetch_recording(RECORDING_URL)
+        mock_fetch.assert_called_once_with(
+            RECORDING_URL, auth=("AC1", "tok"), chunk_size=4, max_in_flight=4
+        )
+
+    def test_transcoder(self):
+        self.voice.transcoder = WavToPcmTranscoder()
+        wav = make_wav(b"\x01\x02" * 5)
+        with patch.object(
+            self.voice,
+            "fetch_recording",
+            return_value=iter([wav[:10], wav[10:30], wav[30:]]),
+        ):
+            self.voice.transcribe({"RecordingUrl": [RECORDING_URL]})
+        assert self.transcriber.content_type == "audio/pcm"
+        assert self.transcriber.bytes_received == 10
+
+    def test_transcript_language_skips_detection(self):
+        self.transcriber.lang = "es"
+        self.voice.translator = Mock(wraps=MockTranslator())
+        event = self.make_event({
+            "From": "+15551234567",
+            "RecordingUrl": RECORDING_URL,
+        })
+        self.call(event)
+
+        self.voice.translator.detect_language.assert_not_called()
+        (record,) = self.action.called_with
+        assert record.original_lang == "es"
+        assert record.translations == [
+            {"lang": "en", "text": "[en] Call me back"}
+        ]
+
+    def test_dispatch_responds_before_transcribing(self):
+        dispatched = []
+        self.voice.dispatch = dispatched.append
+        params = {"From": "+15551234567", "RecordingUrl": RECORDING_URL}
+        response, mock_urlopen = self.call(self.make_event(params))
+
+        assert response["body"] == "<Response><Hangup/></Response>"
+        mock_urlopen.assert_not_called()
+        assert self.action.called_with == []
+        assert dispatched == [{k: [v] for k, v in params.items()}]
+
+        # the dispatched event runs the pipeline without a signature
+        response, mock_urlopen = self.call({RECORDING_EVENT: dispatched[0]})
+        assert response["statusCode"] == 200
+        assert self.transcriber.bytes_received == 14
+        (record,) = self.action.called_with
+        assert record.original_text == "Call me back"
+